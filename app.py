@@ -1,18 +1,47 @@
 
 import json
 import copy
+import io
 import streamlit as st
 from pathlib import Path
 from datetime import datetime
 import re
 import math
+import os
+import secrets
 import base64
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from repositories import ContentAddressedStore, JsonFactionRepository, SqliteArmyListRepository
+from repositories.readonly import freeze
+from repositories.rule_parser import combine_rules, is_natural_weapon, parse_rule
+from services.army_codec import compact_army_list, expand_army_list
+from services.army_diff import CATEGORY_LABELS, diff_army_lists
+from services.army_fingerprint import army_fingerprint, canonical_army_json, fingerprint_text
+from services import army_rules
+from services.autosave import ArmyJournal, prune_sessions
+from services.combat import DEFAULT_TARGET, expected_army_output, expected_unit_output
+from services.efficiency_report import REPORT_COLUMNS, score_faction, write_csv
+from services.export_queue import ExportQueue
+from services.exporters import RENDER_MODEL_VERSION, RENDERERS, build_render_model, render
+from services.list_import import ListImportError, import_army_list, parse_list_file, read_limited
+from services.list_migration import ListMigrator
+from services.list_session import detach_saved_list, forget_saved_lists_page, start_new_list
+from services.metagame import load_stats, save_stats, update_from_database
+from services.rules_index import load_rules_index
+from services.session_footprint import retain_drafts, session_footprint
+from services.unit_draft import UnitDraft
+from services.upgrade_graph import compile_upgrade_graph
 
 st.set_page_config(page_title="OPR ArmyBuilder FR", layout="wide", initial_sidebar_state="auto")
 
 # URL de l'app (pour le QR code de partage)
 APP_URL = "https://armybuilder-fra.streamlit.app/"
 
+# Polices inlinées (réduites aux glyphes utilisés, via fontTools) dans l'export HTML hors ligne
+_FONTS_DIR = Path(__file__).resolve().parent / "assets" / "fonts"
+EXPORT_FONTS = {w: p for w, p in {400: _FONTS_DIR / "Inter-Regular.ttf", 700: _FONTS_DIR / "Inter-Bold.ttf"}.items() if p.exists()}
+
 # Couleur d'accent par jeu
 _GAME_COLORS = {
     "Age of Fantasy":            "#2980b9",
@@ -67,6 +96,8 @@ with st.sidebar:
     st.markdown(f"**Jeu :** {game}")
     st.markdown(f"**Faction :** {faction}")
     st.markdown(f"**Format :** {points} pts")
+    st.text_input("👤 Joueur", key="player", placeholder="Pseudo pour sauvegarder vos listes",
+                  on_change=forget_saved_lists_page, args=(st.session_state,))
     if points > 0:
         st.progress(min(army_cost / points, 1.0))
         st.markdown(f"**Coût :** {army_cost} / {points} pts")
@@ -88,6 +119,36 @@ if "unit_selections" not in st.session_state: st.session_state.unit_selections =
 if "draft_counter" not in st.session_state: st.session_state.draft_counter = 0
 if "draft_unit_name" not in st.session_state: st.session_state.draft_unit_name = ""
 
+# ── Stockage adressé par contenu : listes, HTML et QR partagés entre sessions ──
+@st.cache_resource
+def get_artifact_store():
+    # Cache reconstructible : purgé en arrière-plan au-delà de 512 Mo ou après 30 jours sans usage
+    return ContentAddressedStore(Path(__file__).resolve().parent / "saves" / "artifacts",
+                                 max_bytes=512 * 1024 * 1024, max_age=30 * 24 * 3600)
+
+METAGAME_STATE = Path(__file__).resolve().parent / "saves" / "metagame.json"
+
+@st.cache_resource(max_entries=2)
+def metagame_stats(mtime_ns):
+    # mtime dans la clé : l'état est relu après chaque mise à jour (bouton ou python -m services.metagame)
+    return load_stats(METAGAME_STATE)
+
+def refresh_metagame():
+    # Thread d'arrière-plan : seules les listes nouvelles ou modifiées sont intégrées, les supprimées retirées
+    base_dir = Path(__file__).resolve().parent
+    stats = load_stats(METAGAME_STATE)
+    added = update_from_database(stats, base_dir / "saves" / "army_lists.sqlite3", base_dir)
+    save_stats(stats, METAGAME_STATE)
+    return added
+
+def store_army_list(army_list, context):
+    # Une liste identique (partagée, ré-importée, ré-exportée) n'est stockée qu'une fois
+    canonical = canonical_army_json(army_list, context)
+    fingerprint = fingerprint_text(canonical)
+    try: get_artifact_store().put("list", fingerprint, canonical.encode("utf-8"))
+    except OSError: pass
+    return fingerprint
+
 # ── Lecture du paramètre ?list= (QR code de partage) ────────────────────────
 if not st.session_state.get("_qr_loaded"):
     st.session_state["_qr_loaded"] = True
@@ -104,14 +165,16 @@ if not st.session_state.get("_qr_loaded"):
             # Stocker army_list complète si présente
             if _data.get("army_list"):
                 st.session_state["_qr_army_list"] = _data["army_list"]
+                store_army_list(_data["army_list"], {"game": _data.get("game", ""), "faction": _data.get("faction", "")})
                 st.session_state["_qr_army_cost"] = _data.get("army_cost", 0)
+                st.session_state["_qr_faction_version"] = _data.get("faction_version", "")
             # Stocker pour le bandeau info
             st.session_state["_qr_game"]    = _data.get("game", "")
             st.session_state["_qr_faction"] = _data.get("faction", "")
             st.session_state["_qr_pts"]     = _data.get("pts", 1000)
             st.session_state["_qr_units"]   = _data.get("units", [])
             st.session_state["_qr_pending"] = True
-            st.query_params.clear()
+            del st.query_params["list"]  # conserver ?session= (autosave)
             st.rerun()
     except Exception:
         pass  # paramètre invalide → ignorer silencieusement
@@ -123,87 +186,12 @@ if "units" not in st.session_state: st.session_state.units = []
 if "faction_special_rules" not in st.session_state: st.session_state.faction_special_rules = []
 if "faction_spells" not in st.session_state: st.session_state.faction_spells = {}
 
-GAME_CONFIG = {
-    "Age of Fantasy": {"min_points": 250, "max_points": 10000, "default_points": 1000, "hero_limit": 375, "unit_copy_rule": 750, "unit_max_cost_ratio": 0.35, "unit_per_points": 150},
-    "Age of Fantasy Regiments": {"min_points": 500, "max_points": 20000, "default_points": 2000, "hero_limit": 500, "unit_copy_rule": 1000, "unit_max_cost_ratio": 0.4, "unit_per_points": 200},
-    "Grimdark Future": {"min_points": 250, "max_points": 10000, "default_points": 1000, "hero_limit": 375, "unit_copy_rule": 750, "unit_max_cost_ratio": 0.35, "unit_per_points": 150},
-    "Grimdark Future Firefight": {"min_points": 150, "max_points": 1000, "default_points": 300, "hero_limit": 300, "unit_copy_rule": 300, "unit_max_cost_ratio": 0.6, "unit_per_points": 100},
-    "Age of Fantasy Skirmish": {"min_points": 150, "max_points": 1000, "default_points": 300, "hero_limit": 300, "unit_copy_rule": 300, "unit_max_cost_ratio": 0.6, "unit_per_points": 100}
-}
-
-def check_hero_limit(army_list, army_points, game_config):
-    max_heroes = math.floor(army_points / game_config["hero_limit"])
-    hero_count = sum(1 for unit in army_list if unit.get("type") == "hero")
-    if hero_count > max_heroes:
-        st.error(f"Limite de héros dépassée! Max: {max_heroes} (1 héros/{game_config['hero_limit']} pts)")
-        return False
-    return True
-
-def check_unit_max_cost(army_list, army_points, game_config, new_unit_cost=None):
-    max_cost = army_points * game_config["unit_max_cost_ratio"]
-    for unit in army_list:
-        if unit["cost"] > max_cost:
-            st.error(f"Unité {unit['name']} dépasse {int(max_cost)} pts (35% du total)")
-            return False
-    if new_unit_cost and new_unit_cost > max_cost:
-        st.error(f"Cette unité dépasse {int(max_cost)} pts (35% du total)")
-        return False
-    return True
-
-def check_unit_copy_rule(army_list, army_points, game_config):
-    x_value = math.floor(army_points / game_config["unit_copy_rule"])
-    max_copies = 1 + x_value
-    unit_counts = {}
-    for unit in army_list:
-        name = unit["name"]
-        unit_counts[name] = unit_counts.get(name, 0) + 1
-    for unit_name, count in unit_counts.items():
-        if count > max_copies:
-            st.error(f"Trop de copies de {unit_name}! Max: {max_copies}")
-            return False
-    return True
+GAME_CONFIG = army_rules.GAME_CONFIG
 
 def validate_army_rules(army_list, army_points, game):
-    game_config = GAME_CONFIG.get(game, {})
-    return (check_hero_limit(army_list, army_points, game_config) and
-            check_unit_max_cost(army_list, army_points, game_config) and
-            check_unit_copy_rule(army_list, army_points, game_config))
-
-def check_weapon_conditions(unit_key, requires, unit=None):
-    """
-    Vérifie si les conditions d'une option sont remplies.
-    Prend en compte :
-    - Les sélections explicites dans session_state (armes de remplacement choisies)
-    - Les armes de BASE de l'unité, actives quand aucun groupe type=weapon
-      n'a de sélection explicite (= le joueur garde choices[0])
-    """
-    if not requires:
-        return True
-    current_weapons = []
-    selections = st.session_state.unit_selections.get(unit_key, {})
-
-    # 1. Sélections explicites (armes remplacées, conditionnelles choisies)
-    for v in selections.values():
-        if isinstance(v, str) and v not in ("Aucune amélioration", "Aucune arme", "Aucun rôle"):
-            current_weapons.append({"name": v.split(" (")[0]})
-
-    # 2. Armes de BASE — actives pour chaque groupe type=weapon
-    #    où aucune sélection explicite n'est stockée (= choices[0] implicite)
-    if unit is not None:
-        for gi, g in enumerate(unit.get("upgrade_groups", [])):
-            if g.get("type") != "weapon":
-                continue
-            g_key = f"group_{gi}"
-            if g_key not in selections:
-                # Aucune sélection explicite → les armes de base sont actives
-                for w in unit.get("weapon", []):
-                    if isinstance(w, dict):
-                        current_weapons.append(w)
-
-    for req in requires:
-        if not any(w.get("name") == req or req in w.get("tags", []) for w in current_weapons):
-            return False
-    return True
+    errors = army_rules.validate_army_rules(army_list, army_points, GAME_CONFIG.get(game, {}))
+    for message in errors: st.error(message)
+    return not errors
 
 def format_unit_option(u):
     name_part = u["name"] + (" [1]" if u.get("type") == "hero" else f" [{u.get('size', 10)}]")
@@ -278,415 +266,231 @@ def format_mount_option(mount):
     if coriace > 0: stats.append(f"Coriace+{coriace}")
     sr = mount_data.get("special_rules", [])
     if sr:
-        rt = ", ".join([r for r in sr if not r.startswith(("Griffes", "Sabots"))])
+        rt = ", ".join([r for r in sr if not is_natural_weapon(r)])
         if rt: stats.append(rt)
     label = name
     if stats: label += f" ({', '.join(stats)})"
     return label + f" (+{cost} pts)"
 
-# ======================================================
-# EXPORT HTML — STYLE ARMYFORGE (VERSION FINALE CORRIGÉE)
-# ======================================================
-def export_html(army_list, army_name, army_limit):
-
-    def esc(txt):
-        if txt is None: return ""
-        return str(txt).replace("&","&amp;").replace("<","&lt;").replace(">","&gt;").replace('"',"&quot;")
-
-    def get_priority(unit):
-        d = unit.get("unit_detail", unit.get("type","unit"))
-        order = {"named_hero": 1, "hero": 2, "unit": 3, "light_vehicle": 4, "vehicle": 5, "titan": 6}
-        return order.get(d, 7)
-
-    def fmt_range(rng):
-        if rng in (None, "-", "mêlée", "Mêlée") or str(rng).lower() == "mêlée": return "-"
-        if isinstance(rng, (int, float)): return f'{int(rng)}"'
-        s = str(rng).strip()
-        return s if s.endswith('"') else f'{s}"'
-
-    def collect_weapons(unit):
-        # unit["weapon"] contient DEJA toutes les armes consolidees par la page army
-        # (armes de base, remplacements, armes de role). Ne PAS relire unit["options"]
-        # pour eviter les doublons sur les roles avec weapon.
-        result = []
-        bw = unit.get("weapon", [])
-        if isinstance(bw, dict): bw = [bw]
-        for w in bw:
-            if isinstance(w, dict):
-                wc = w.copy(); wc.setdefault("range", "Mêlée")
-                # Purger _count sur les armes de base (not _upgraded) :
-                # _count ne doit exister que sur les armes ajoutées via slider.
-                # Un résidu de cache ou de JSON corrompu sur une arme de base
-                # fausserait le calcul de replaced_count dans group_weapons.
-                if not wc.get("_upgraded") and "_count" in wc:
-                    del wc["_count"]
-                result.append(wc)
-        # Armes de monture uniquement
-        if unit.get("mount"):
-            m = unit["mount"]
-            if isinstance(m, dict):
-                md = m.get("mount", {})
-                if isinstance(md, dict):
-                    mws = md.get("weapon", [])
-                    if isinstance(mws, dict): mws = [mws]
-                    for w in mws:
-                        if isinstance(w, dict):
-                            wc = w.copy(); wc.setdefault("range", "Mêlée"); wc["_mount_weapon"] = True; result.append(wc)
-        return result
-
-    def group_weapons(weapons, unit_size=1):
-        # Agrège les armes par clé (même profil).
-        # _count (slider) → utiliser _count comme quantité
-        # Tout le reste → cnt=1 (arme de base, conditional, remplacement total)
-        # La passe _replaces sert uniquement aux sliders (seuls cas avec _count).
-        wmap = {}
-        for w in weapons:
-            if not isinstance(w, dict) or w.get("_mount_weapon"): continue
-            wc = w.copy(); wc.setdefault("range","Mêlée")
-            key = (wc.get("name",""), wc.get("range",""), wc.get("attacks",""),
-                   wc.get("armor_piercing",""), tuple(sorted(wc.get("special_rules",[]))))
-            cnt = wc.get("_count", 1) or 1
-            if key not in wmap: wmap[key] = wc; wmap[key]["_display_count"] = cnt
-            else: wmap[key]["_display_count"] += cnt
-        # Soustraire les _replaces UNIQUEMENT pour les sliders (armes avec _count).
-        # Les conditional_weapon (sans _count) n'affectent pas le count des armes de base.
-        for w in weapons:
-            if not isinstance(w, dict) or w.get("_mount_weapon"): continue
-            if "_count" not in w: continue          # seulement les sliders
-            replaces = w.get("_replaces", [])
-            if not replaces: continue
-            rc = w.get("_count", 1) or 1
-            for replaced_name in replaces:
-                for key, entry in wmap.items():
-                    if entry.get("name") == replaced_name:
-                        wmap[key]["_display_count"] -= rc
-                        break
-        return [v for v in wmap.values() if v.get("_display_count", 1) > 0]
-
-    def get_rules(unit):
-        rules = set()
-        for r in unit.get("special_rules", []):
-            if isinstance(r, str): rules.add(r)
-        if "options" in unit and isinstance(unit["options"], dict):
-            for group in unit["options"].values():
-                opts = group if isinstance(group, list) else [group]
-                for opt in opts:
-                    if isinstance(opt, dict):
-                        for r in opt.get("special_rules", []):
-                            if isinstance(r, str): rules.add(r)
-        if unit.get("mount"):
-            m = unit["mount"]
-            if isinstance(m, dict):
-                md = m.get("mount", {})
-                if isinstance(md, dict):
-                    for r in md.get("special_rules", []):
-                        if isinstance(r, str) and not r.startswith(("Griffes","Sabots")): rules.add(r)
-        return sorted(rules)
-
-    def render_weapon_rows(final_weapons, unit_size=1):
-        # Règles d'affichage du préfixe :
-        #   slider (_count > 1)                        → "Nx nom"
-        #   conditional unique (_upgraded + _unique)   → "1x nom"  (amélioration d'une figurine)
-        #   tout le reste                              → "nom"
-        rows = ""
-        for w in final_weapons:
-            name      = esc(w.get("name","Arme"))
-            cnt       = w.get("_display_count", 1) or 1
-            has_count = "_count" in w
-            upgraded  = w.get("_upgraded", False)
-            unique    = w.get("_unique", False)
-
-            if has_count and cnt > 1:
-                nd = f"{cnt}x {name}"
-            elif upgraded and unique:
-                nd = f"1x {name}"
-            else:
-                nd = name
-
-            rng = fmt_range(w.get("range","Mêlée"))
-            att = w.get("attacks","-"); ap = w.get("armor_piercing","-")
-            spe = ", ".join(w.get("special_rules",[])) or "-"
-            rows += f"<tr><td class='weapon-name'>{nd}</td><td>{rng}</td><td>{att}</td><td>{ap}</td><td>{spe}</td></tr>"
-        return rows
-
-    def render_upgrade_rows(unit):
-        return ""   # remplacé par render_upgrades_section
-
-    def render_upgrades_section(unit):
-        """Bloc Améliorations sous les règles spéciales."""
-        upgrades = []
-        if "options" in unit and isinstance(unit["options"], dict):
-            for group_opts in unit["options"].values():
-                opts = group_opts if isinstance(group_opts, list) else [group_opts]
-                for opt in opts:
-                    if not isinstance(opt, dict): continue
-                    rules = ", ".join(opt.get("special_rules", []))
-                    upgrades.append((opt.get("name","Amélioration"), rules))
-        if not upgrades: return ""
-        items = ""
-        for n, r in upgrades:
-            items += f'<span class="rule-tag" style="background:#e8f4fd;border-color:#b8d9f0;">{esc(n)}'
-            if r: items += f' <span style="font-weight:400;color:#555;">({esc(r)})</span>'
-            items += '</span>'
-        return (
-            '<div style="border-top:1px solid var(--brd);margin-top:8px;padding-top:8px;">'
-            '<div class="rules-title">Améliorations</div>'
-            f'<div style="margin-bottom:4px;">{items}</div>'
-            '</div>'
-        )
-
-    def render_mount_section(unit):
-        if not unit.get("mount"): return ""
-        mount = unit["mount"]
-        if not isinstance(mount, dict) or "mount" not in mount: return ""
-        md = mount["mount"]; mname = esc(mount.get("name","Monture")); mcost = mount.get("cost",0)
-        mws = md.get("weapon",[]); 
-        if isinstance(mws, dict): mws = [mws]
-        wrows = ""
-        for w in mws:
-            if not isinstance(w, dict): continue
-            spe = ", ".join(w.get("special_rules",[])) or "-"
-            wrows += f"<tr><td class='weapon-name'>{esc(w.get('name','Arme'))}</td><td>{fmt_range(w.get('range','-'))}</td><td>{w.get('attacks','-')}</td><td>{w.get('armor_piercing','-')}</td><td>{spe}</td></tr>"
-        mrules = [r for r in md.get("special_rules",[]) if not r.startswith(("Griffes","Sabots","Coriace"))]
-        rhtml = " ".join(f'<span class="rule-tag">{esc(r)}</span>' for r in mrules) if mrules else ""
-        return f"""<div class="mount-section"><div class="section-title">🐴 {mname} (+{mcost} pts)</div>
-{('<div style="margin-bottom:8px;">' + rhtml + '</div>') if rhtml else ""}
-<table class="weapon-table"><thead><tr><th>Arme</th><th>Por</th><th>Att</th><th>PA</th><th>Spé</th></tr></thead><tbody>{wrows}</tbody></table></div>"""
-
-    sorted_units = sorted(army_list, key=get_priority)
-    total_cost = sum(u.get("cost",0) for u in sorted_units)
-
-    html = f"""<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">
-<title>Liste d'Armée OPR - {esc(army_name)}</title>
-<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap" rel="stylesheet">
-<style>
-:root{{--bg:#fff;--hdr:#f8f9fa;--accent:#3498db;--txt:#212529;--muted:#6c757d;--brd:#dee2e6;--red:#e74c3c;--rule:#e9ecef;--mount:#f3e5f5;--badge:#e9ecef;}}
-*{{box-sizing:border-box;}}
-body{{background:var(--bg);color:var(--txt);font-family:'Inter',sans-serif;margin:0;padding:12px;line-height:1.3;font-size:12px;}}
-.army{{max-width:210mm;margin:0 auto;}}
-
-/* ── Titre & résumé ── */
-.army-title{{text-align:center;font-size:18px;font-weight:700;margin-bottom:8px;border-bottom:2px solid var(--accent);padding-bottom:6px;}}
-.army-summary{{display:flex;justify-content:space-between;align-items:center;background:var(--hdr);padding:8px 12px;border-radius:6px;margin:8px 0 12px;border:1px solid var(--brd);font-size:12px;}}
-.summary-cost{{font-family:monospace;font-size:16px;font-weight:bold;color:var(--red);}}
-
-/* ── Grille 2 colonnes ── */
-.units-grid{{display:grid;grid-template-columns:1fr 1fr;gap:8px;}}
-
-/* ── Carte unité ── */
-.unit-card{{background:var(--bg);border:1px solid var(--brd);border-radius:6px;break-inside:avoid;page-break-inside:avoid;font-size:11px;}}
-.unit-header{{padding:6px 8px 4px;background:var(--hdr);border-bottom:1px solid var(--brd);border-radius:6px 6px 0 0;}}
-.unit-name-container{{display:flex;justify-content:space-between;align-items:flex-start;}}
-.unit-name{{font-size:13px;font-weight:700;margin:0;line-height:1.2;}}
-.unit-cost{{font-family:monospace;font-size:12px;font-weight:700;color:var(--red);white-space:nowrap;margin-left:6px;}}
-.unit-type{{font-size:10px;color:var(--muted);margin-top:1px;}}
-.unit-stats{{display:flex;gap:6px;padding:4px 0 2px;flex-wrap:wrap;}}
-.stat-badge{{background:var(--badge);padding:2px 7px;border-radius:12px;font-weight:600;display:flex;align-items:center;gap:4px;border:1px solid var(--brd);}}
-.stat-value{{font-weight:700;font-size:11px;}}
-.stat-label{{font-size:9px;color:var(--muted);}}
-.section{{padding:4px 8px 6px;}}
-.section-title{{font-weight:600;margin:4px 0 3px;font-size:11px;display:flex;align-items:center;gap:5px;border-bottom:1px solid var(--brd);padding-bottom:2px;color:var(--accent);}}
-.weapon-table{{width:100%;border-collapse:collapse;margin:0 0 4px;font-size:10px;}}
-.weapon-table th{{background:var(--hdr);padding:2px 5px;text-align:left;font-weight:600;border-bottom:1px solid var(--brd);border-right:1px solid var(--brd);font-size:9px;color:var(--muted);}}
-.weapon-table th:last-child{{border-right:none;}}
-.weapon-table td{{padding:2px 5px;border-bottom:1px solid var(--brd);border-right:1px solid var(--brd);vertical-align:top;line-height:1.3;}}
-.weapon-table td:last-child{{border-right:none;}} .weapon-table tr:last-child td{{border-bottom:none;}}
-.weapon-name{{font-weight:600;}}
-.rules-section{{margin:3px 0 0;}}
-.rules-title{{font-weight:600;margin-bottom:3px;font-size:10px;color:var(--muted);text-transform:uppercase;letter-spacing:.03em;}}
-.rule-tag{{background:var(--rule);padding:1px 6px;border-radius:3px;font-size:9px;border:1px solid var(--brd);margin-right:3px;margin-bottom:3px;display:inline-block;line-height:1.5;}}
-.mount-section{{background:var(--mount);border:1px solid var(--brd);border-radius:4px;padding:4px 8px;margin:4px 0;font-size:10px;}}
-.mount-section .section-title{{font-size:10px;}}
-
-/* ── Page de légende (règles + sorts) ── */
-.legend-page{{page-break-before:always;break-before:page;padding:12px 0;}}
-.faction-rules{{padding:8px;border-radius:6px;border:1px solid var(--brd);}}
-.legend-title{{text-align:center;color:var(--accent);border-bottom:2px solid var(--accent);padding-bottom:6px;margin-bottom:12px;font-size:14px;font-weight:700;}}
-.rule-item{{margin-bottom:4px;padding-bottom:4px;border-bottom:1px solid var(--brd);}}
-.rule-item:last-child{{border-bottom:none;margin-bottom:0;padding-bottom:0;}}
-.rule-name{{color:var(--accent);font-weight:600;font-size:8px;margin-bottom:1px;}}
-.rule-desc{{font-size:7.5px;line-height:1.28;color:#555;}}
-
-@media print{{
-  body{{padding:6px;}}
-  .army{{max-width:100%;}}
-  .unit-card{{border:0.5px solid #ccc;box-shadow:none;background:white;}}
-  .faction-rules{{border:0.5px solid #ccc;}}
-  .legend-page{{page-break-before:always;}}
-}}
-</style></head><body><div class="army">
-<div class="army-title">{esc(army_name)} — {total_cost}/{army_limit} pts</div>
-<div class="army-summary">
-  <div><span style="color:var(--muted);">Unités :</span> <strong>{len(sorted_units)}</strong></div>
-  <div class="summary-cost">{total_cost}/{army_limit} pts</div>
-</div>
-<div class="units-grid">
-"""
-
-    for unit in sorted_units:
-        if not isinstance(unit, dict): continue
-        name = esc(unit.get("name","Unité")); cost = unit.get("cost",0)
-        quality = esc(unit.get("quality","-")); defense = esc(unit.get("defense","-"))
-        size = unit.get("size",10); coriace = unit.get("coriace",0)
-
-        rules = get_rules(unit)
-        rules_html = " ".join(f'<span class="rule-tag">{esc(r)}</span>' for r in rules) if rules else '<span class="rule-tag">Aucune</span>'
-
-        weapons = collect_weapons(unit)
-        final_weapons = group_weapons(weapons, unit_size=size)
-        weapon_rows = render_weapon_rows(final_weapons, unit_size=size)
-        upgrade_rows     = render_upgrade_rows(unit)
-        upgrades_section = render_upgrades_section(unit)
-        mount_section    = render_mount_section(unit)
-
-        detail_labels = {
-            "named_hero":    "Héros nommé",
-            "hero":          "Héros",
-            "unit":          "Unité de base",
-            "light_vehicle": "Véhicule léger / Petit monstre",
-            "vehicle":       "Véhicule / Monstre",
-            "titan":         "Titan",
-        }
-        detail_label = detail_labels.get(unit.get("unit_detail", unit.get("type","unit")), "")
-
-        html += f"""<div class="unit-card">
-  <div class="unit-header">
-    <div class="unit-name-container">
-      <div class="unit-name">{name}{'<div class="unit-type">' + detail_label + '</div>' if detail_label else ''}</div>
-      <div class="unit-cost">{cost} pts</div>
-    </div>
-    <div class="unit-stats">
-      <div class="stat-badge"><span class="stat-label">QUAL</span><span class="stat-value">{quality}+</span></div>
-      <div class="stat-badge"><span class="stat-label">DÉF</span><span class="stat-value">{defense}+</span></div>
-      {'<div class="stat-badge"><span class="stat-label">CORIACE</span><span class="stat-value">' + str(coriace) + '</span></div>' if coriace > 0 else ''}
-      <div class="stat-badge"><span class="stat-label">TAILLE</span><span class="stat-value">{size}</span></div>
-    </div>
-  </div>
-  <div class="section">
-    <div class="rules-section">
-      <div class="rules-title">Règles spéciales</div>
-      <div style="margin-bottom:4px;">{rules_html}</div>
-      {upgrades_section}
-    </div>
-    <div class="section-title">⚔️ Armes</div>
-    <table class="weapon-table">
-      <thead><tr><th>Arme</th><th>Por</th><th>Att</th><th>PA</th><th>Spé</th></tr></thead>
-      <tbody>{weapon_rows}</tbody>
-    </table>
-    {mount_section}
-  </div>
-</div>"""
-
-    html += "</div>\n"  # ferme .units-grid
-
-    try:
-        faction_rules = st.session_state.get("faction_special_rules", [])
-        faction_spells = st.session_state.get("faction_spells", {})
-        all_rules = [r for r in faction_rules if isinstance(r, dict)]
-        if all_rules or faction_spells:
-            # ── Page légende : règles + sorts en colonnes CSS auto-ajustées ──
-            # columns: auto répartit le contenu sur plusieurs colonnes en remplissant
-            # chaque colonne avant d'en créer une nouvelle → s'adapte à n'importe quel volume.
-            html += """<div class="legend-page"><div class="faction-rules">"""
-            html += """<div class="legend-title">📜 Règles spéciales &amp; Sorts</div>"""
-            html += """<div style="columns:3;column-gap:8px;column-rule:1px solid #dee2e6;font-size:7.5px;">"""
-
-            if all_rules:
-                if faction_spells:
-                    html += """<div style="break-after:column;"></div>""" if False else ""
-                for rule in sorted(all_rules, key=lambda x: x.get("name","").lower()):
-                    html += (
-                        f'<div class="rule-item" style="break-inside:avoid;">'
-                        f'<div class="rule-name">{esc(rule.get("name",""))}</div>'
-                        f'<div class="rule-desc">{esc(rule.get("description",""))}</div>'
-                        f'</div>'
-                    )
-
-            if faction_spells:
-                if all_rules:
-                    html += '<div class="rule-item" style="break-inside:avoid;border-bottom:2px solid var(--accent);margin-bottom:8px;"><div style="font-size:10px;font-weight:700;color:var(--accent);">✨ Sorts</div></div>'
-                for spell_name, spell_data in faction_spells.items():
-                    if isinstance(spell_data, dict):
-                        desc = spell_data.get("description","")
-                    else:
-                        desc = str(spell_data)
-                    html += (
-                        f'<div class="rule-item" style="break-inside:avoid;">'
-                        f'<div class="rule-name">{esc(spell_name)}</div>'
-                        f'<div class="rule-desc">{esc(desc)}</div>'
-                        f'</div>'
-                    )
-
-            html += "</div></div></div>"  # ferme columns + faction-rules + legend-page
-    except Exception as e:
-        html += f'<div style="color:red;padding:10px;">Erreur règles faction : {esc(str(e))}</div>'
-
-    # QR code : stratégie double
-    # 1. qrcode[pil] installé → PNG base64 inline (offline)
-    # 2. fallback → URL api.qrserver.com (requiert internet à l'ouverture)
-    import urllib.parse as _urlp
-    # QR code : URL vers l'app avec la liste encodée (compressée + base64)
-    # Le téléphone ouvre directement l'app au scan
-    import zlib as _zlib
-    _list_data = json.dumps({
-        "game": st.session_state.get("game",""),
-        "faction": army_name, "pts": army_limit,
-        "list_name": army_name,
-        "army_list": army_list,
-        "army_cost": sum(u.get("cost",0) for u in army_list),
-        "units": [{"n": u.get("name",""), "c": u.get("cost",0)} for u in army_list]
-    }, ensure_ascii=False, separators=(',',':'))
-    _compressed = _zlib.compress(_list_data.encode(), level=9)
-    import base64 as _b64u, urllib.parse as _urlp
-    _b64_data = _b64u.urlsafe_b64encode(_compressed).decode()
-    _payload = APP_URL + "?list=" + _urlp.quote(_b64_data)
-
-    _qr_img_tag = ""
-    try:
-        import qrcode as _qrc, io as _io, base64 as _b64
-        _qr = _qrc.QRCode(version=None, error_correction=_qrc.constants.ERROR_CORRECT_M, box_size=4, border=2)
-        _qr.add_data(_payload); _qr.make(fit=True)
-        _img = _qr.make_image(fill_color="black", back_color="white")
-        _buf = _io.BytesIO(); _img.save(_buf, format="PNG"); _buf.seek(0)
-        _qr_b64 = _b64.b64encode(_buf.read()).decode()
-        _qr_img_tag = f'<img src="data:image/png;base64,{_qr_b64}" style="width:96px;height:96px;display:block;margin:0 auto;border:1px solid var(--brd);border-radius:4px;" alt="QR code">'
-    except Exception:
-        # Fallback URL externe (fonctionne si internet disponible à l'ouverture du HTML)
-        _qr_url = "https://api.qrserver.com/v1/create-qr-code/?data=" + _urlp.quote(_payload) + "&size=96x96&margin=2"
-        _qr_img_tag = f'<img src="{_qr_url}" style="width:96px;height:96px;display:block;margin:0 auto;border:1px solid var(--brd);border-radius:4px;" alt="QR code">'
-
-    html += (
-        '<div style="text-align:center;margin-top:28px;padding:16px 0;border-top:1px solid var(--brd);">'
-        '<div style="font-size:10px;color:var(--muted);margin-bottom:8px;letter-spacing:.06em;text-transform:uppercase;">Scanner pour partager</div>'
-        + _qr_img_tag +
-        '</div>'
+def qr_png(payload):
+    import qrcode as _qrc
+    _qr = _qrc.QRCode(version=None, error_correction=_qrc.constants.ERROR_CORRECT_M, box_size=4, border=2)
+    _qr.add_data(payload); _qr.make(fit=True)
+    _img = _qr.make_image(fill_color="black", back_color="white")
+    _buf = io.BytesIO(); _img.save(_buf, format="PNG")
+    return _buf.getvalue()
+
+def share_qr_png(url, store):
+    # PNG mis en cache par empreinte du contenu encodé : une même liste ne régénère pas son QR
+    try: return store.get_or_create("qr", fingerprint_text(url), lambda: qr_png(url))
+    except Exception: return None  # qrcode absent → le rendu HTML bascule sur l'URL externe
+
+@st.cache_resource(max_entries=32)
+def export_render_model(export_key, _army_list, list_name, points, game, faction):
+    # Modèle de rendu calculé une seule fois par liste (export_key = empreinte) et partagé par tous les formats
+    fd = load_factions()[0].get(game, {}).get(faction, {})
+    # copie : le modèle est mis en cache alors que army_list est modifiée sur place dans la session
+    return build_render_model(copy.deepcopy(_army_list), list_name, points, game, faction, fd.get("version", ""),
+                              fd.get("faction_special_rules", []), fd.get("spells", {}), APP_URL)
+
+def render_artifact(fmt, model, store):
+    # Exécuté dans un thread du pool d'export : aucun appel Streamlit ici
+    if fmt == "html": options = {"qr_png": share_qr_png(model["share_url"], store)}
+    elif fmt == "html_offline": options = {"fonts": EXPORT_FONTS}
+    else: options = {}
+    return render(fmt, model, **options).encode("utf-8")
+
+@st.cache_resource
+def get_faction_repository():
+    # Catalogue précompilé (python -m repositories.build_catalog) ; repli sur les JSON s'il est périmé.
+    # OPR_SHARED_CATALOG=<chemin .mmap> : plusieurs workers partagent une seule copie via le cache de pages.
+    base_dir = Path(__file__).resolve().parent
+    shared_catalog = os.environ.get("OPR_SHARED_CATALOG")
+    return JsonFactionRepository(
+        base_dir,
+        artifact_path=base_dir / "repositories" / "data" / "catalog.bin",
+        shared_catalog_path=Path(shared_catalog) if shared_catalog else None,
     )
-    html += f'<div style="text-align:center;margin-top:16px;font-size:11px;color:var(--muted);">Généré par OPR ArmyBuilder FRA — {datetime.now().strftime("%d/%m/%Y %H:%M")}</div></div></body></html>'
-    return html
 
-@st.cache_data
+@st.cache_resource
+def get_army_list_repository():
+    return SqliteArmyListRepository(Path(__file__).resolve().parent / "saves" / "army_lists.sqlite3")
+
+@st.cache_resource
 def load_factions():
-    factions = {}; games = set()
     try:
-        FACTIONS_DIR = Path(__file__).resolve().parent / "repositories" / "data" / "factions"
-        for fp in FACTIONS_DIR.glob("*.json"):
-            try:
-                with open(fp, encoding="utf-8") as f:
-                    data = json.load(f)
-                game = data.get("game"); faction = data.get("faction")
-                if game and faction:
-                    if game not in factions: factions[game] = {}
-                    data.setdefault("faction_special_rules", []); data.setdefault("spells", {}); data.setdefault("units", [])
-                    factions[game][faction] = data; games.add(game)
-            except Exception as e:
-                st.warning(f"Erreur chargement {fp.name}: {e}")
+        factions, games = get_faction_repository().load_catalog()
     except Exception as e:
         st.error(f"Erreur chargement des factions: {e}"); return {}, []
-    return factions, sorted(games) if games else list(GAME_CONFIG.keys())
+    # Partagé par toutes les sessions : en lecture seule (copy.deepcopy avant toute modification)
+    return freeze(factions), games if games else list(GAME_CONFIG.keys())
+
+@st.cache_resource(show_spinner="Indexation des règles…")
+def get_rules_index():
+    # Relu depuis .cache/rules_index.json si les données n'ont pas changé, reconstruit sinon
+    return load_rules_index(get_faction_repository())
+
+@st.cache_resource
+def get_unit_index():
+    # Index inversé règles / armes / caractéristiques → unités, toutes factions (requêtes sub-milliseconde)
+    return get_faction_repository().unit_index()
+
+@st.cache_resource(max_entries=16)
+def get_list_migrator(game, faction, version):
+    # Un migrateur par version de faction : renommages composés et fiches résolues servent à toutes les ouvertures
+    return ListMigrator(load_factions()[0].get(game, {}).get(faction, {}))
+
+@st.cache_resource
+def faction_upgrade_graphs(game, faction):
+    # Graphes de dépendances des groupes d'améliorations, compilés une fois par faction (unités du catalogue en cache)
+    # Clé : index de l'unité dans la faction (une unité du catalogue partagé est redécodée à chaque lecture)
+    units = load_factions()[0].get(game, {}).get(faction, {}).get("units", [])
+    return [compile_upgrade_graph(u) for u in units]
+
+@st.cache_resource
+def get_import_executor():
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="list-import")
+
+@st.cache_resource
+def get_export_queue():
+    # QR, rendu HTML et sous-ensembles de polices hors du thread du script ; travaux partagés entre sessions
+    return ExportQueue(get_artifact_store(), ThreadPoolExecutor(max_workers=2, thread_name_prefix="export"))
+
+@st.cache_resource
+def get_process_pool():
+    # Calculs coûteux en CPU (mise en page PDF, rapport d'efficacité) : processus séparés (spawn, sûr depuis le serveur multi-thread)
+    return ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"))
+
+@st.cache_resource
+def get_pdf_queue():
+    # Demandé explicitement (bouton) : pas de temporisation, le processus est lancé depuis le thread du script.
+    return ExportQueue(get_artifact_store(), get_process_pool(), debounce=0)
+
+@st.fragment(run_every=0.5)
+def background_job_status(job, message):
+    # Sondage léger : seul ce fragment se ré-exécute tant que le travail tourne
+    if job is None: return
+    if job.done(): st.rerun(scope="app")
+    st.info(message)
+
+def _export_slot(fmt):
+    # Un slot par session et par format : une nouvelle version de la liste remplace (et annule) l'export en attente
+    return st.session_state.setdefault("_export_slot", secrets.token_hex(8)), fmt
+
+def _job_error(job):
+    return job.exception() if job.done() and not job.cancelled() else None
+
+def replace_army_list(label, army_list, army_cost, report=()):
+    # Liste remplacée (import, QR) : l'ancienne reste comparable, et le rapport résume ce qui a changé
+    previous = st.session_state.get("army_list") or []
+    st.session_state.army_list = army_list; st.session_state.army_cost = army_cost
+    detach_saved_list(st.session_state)  # sauvegarder la liste importée ne doit pas écraser celle ouverte avant
+    report = list(report)
+    if previous:
+        st.session_state["_compare_base"] = (label, previous)
+        report += [("info", f"Par rapport à la liste précédente — {line}") for line in diff_army_lists(previous, army_list).summary()]
+    if report: st.session_state.import_report = report
+
+def export_download(fmt, export_key, model, file_name, key):
+    # Artefact servi depuis le magasin s'il est prêt ; sinon rendu en arrière-plan et « préparation… »
+    result = get_export_queue().request(_export_slot(fmt), fmt, export_key, render_artifact, fmt, model, get_artifact_store())
+    if isinstance(result, bytes):
+        st.download_button(RENDERERS[fmt]["label"], data=result, file_name=file_name, mime=RENDERERS[fmt]["mime"],
+                           use_container_width=True, key=key)
+    elif _job_error(result) is not None:
+        st.error(f"Erreur génération {RENDERERS[fmt]['extension'].upper()}: {_job_error(result)}")
+        if st.button("🔁 Réessayer", use_container_width=True, key=f"{key}_retry"):
+            get_export_queue().retry(fmt, export_key); st.rerun()
+    else:
+        background_job_status(result, f"⏳ {RENDERERS[fmt]['label']} : préparation…")
+
+# ── Autosave : journal de deltas par session (?session=<jeton> dans l'URL) ──
+def _autosave(op, **data):
+    journal = st.session_state.get("_autosave")
+    if journal is not None: journal.record(op, **data)
+
+def _autosave_flush():
+    # Appelé en fin d'exécution et avant chaque st.rerun() : une seule écriture groupée par rerun
+    journal = st.session_state.get("_autosave")
+    if journal is None: return
+    # Rien à reprendre tant qu'aucune armée n'est configurée : une simple visite n'écrit aucun fichier
+    if not journal.state["meta"].get("faction") and not st.session_state.army_list: return
+    if journal.state["meta"].get("draft_counter") != st.session_state.draft_counter:
+        journal.record("meta", values={"draft_counter": st.session_state.draft_counter})
+    journal.record_selections(st.session_state.unit_selections)
+    try: journal.flush()
+    except OSError: pass  # l'autosave ne doit jamais bloquer l'édition
+
+def _stop():
+    # st.stop() saute le flush de fin d'exécution : sans lui, les deltas en attente seraient perdus si chaque rerun s'arrête ici
+    _autosave_flush(); st.stop()
+
+@st.cache_resource(ttl=24 * 3600)
+def prune_autosave_sessions(sessions_dir):
+    # Au plus une fois par jour et par processus : sessions abandonnées depuis SESSION_MAX_AGE supprimées
+    return prune_sessions(sessions_dir)
+
+if "_autosave" not in st.session_state:
+    _sessions_dir = Path(__file__).resolve().parent / "saves" / "sessions"
+    prune_autosave_sessions(_sessions_dir)
+    _token = st.query_params.get("session", "")
+    try:
+        _journal = ArmyJournal(_sessions_dir, _token)
+    except ValueError:
+        _token = secrets.token_urlsafe(12); st.query_params["session"] = _token
+        _journal = ArmyJournal(_sessions_dir, _token)
+    try:
+        _restored = _journal.restore()
+    except (OSError, ValueError, KeyError):
+        _restored = None
+    st.session_state["_autosave"] = _journal
+    if _restored and _restored["army_list"] and not st.session_state.army_list and not st.session_state.get("_qr_pending"):
+        _meta = _restored["meta"]
+        _fd = load_factions()[0].get(_meta.get("game"), {}).get(_meta.get("faction"))
+        if _fd:
+            st.session_state.game = _meta["game"]; st.session_state.faction = _meta["faction"]
+            st.session_state.points = _meta.get("points", 0); st.session_state.list_name = _meta.get("list_name", "")
+            st.session_state.units = _fd.get("units",[]); st.session_state.faction_special_rules = _fd.get("faction_special_rules",[]); st.session_state.faction_spells = _fd.get("spells",{})
+            st.session_state.army_list = _restored["army_list"]; st.session_state.army_cost = _restored["army_cost"]
+            st.session_state.unit_selections = _restored["unit_selections"]
+            st.session_state.draft_counter = _meta.get("draft_counter", st.session_state.draft_counter)
+            st.session_state.page = "army"
+            st.toast("Liste en cours restaurée.")
+
+@st.cache_resource(max_entries=16)
+def faction_efficiency_job(game, faction, version):
+    # Calculé une fois par version de faction dans le pool de processus, partagé entre sessions
+    return get_process_pool().submit(score_faction, load_factions()[0].get(game, {}).get(faction, {}))
+
+# ── Diagnostic mémoire (?debug=memoire) : octets par clé de session, catalogue partagé compté à part ──
+if st.query_params.get("debug") == "memoire":
+    with st.sidebar.expander("🧠 Mémoire de la session", expanded=True):
+        _footprint = session_footprint(st.session_state.to_dict(), shared=(load_factions()[0],))
+        st.caption(f"Propre : {sum(r['propre'] for r in _footprint) / 1024:.1f} Ko — "
+                   f"brouillons conservés : {len(st.session_state.unit_selections)}")
+        st.dataframe(_footprint, use_container_width=True, hide_index=True)
+
+# ── Recherche de règles (génériques, communes, de faction, sorts) : qui a la règle X ? ──
+with st.sidebar.expander("📖 Rechercher une règle"):
+    _rules_query = st.text_input("Règle ou mot-clé", key="rules_query", placeholder="Coriace, Tough, régén…")
+    if _rules_query.strip():
+        _rule_hits = get_rules_index().search(_rules_query, limit=8)
+        if not _rule_hits: st.caption("Aucune règle trouvée.")
+        for _hit in _rule_hits:
+            st.markdown(f"**{_hit.name}** · _{_hit.kind_label}_")
+            if _hit.factions:
+                st.caption("Factions : " + ", ".join(f"{f} ({g})" for g, f in _hit.factions[:6])
+                           + (f" … +{len(_hit.factions) - 6}" if len(_hit.factions) > 6 else ""))
+            st.caption(_hit.description[:300] + ("…" if len(_hit.description) > 300 else ""))
+            if _hit.holders:
+                _holders = sorted({f"{u} — {f}" for _g, f, u, _via in _hit.holders})
+                st.caption(f"Unités ({len(_holders)}) : " + ", ".join(_holders[:10])
+                           + (" …" if len(_holders) > 10 else ""))
 
 if st.session_state.page == "setup":
     factions_by_game, games = load_factions()
-    if not games: st.error("Aucun jeu trouvé"); st.stop()
+    for _broken_name, _broken_error in get_faction_repository().broken_files: st.warning(f"Erreur chargement {_broken_name}: {_broken_error}")
+    if not games: st.error("Aucun jeu trouvé"); _stop()
 
     # ── Bandeau liste partagée reçue via QR ──────────────────────────────────
     if st.session_state.get("_qr_pending"):
@@ -702,6 +506,72 @@ if st.session_state.page == "setup":
         )
         del st.session_state["_qr_pending"]
 
+    # ── Listes sauvegardées du joueur ─────────────────────────────────────────
+    _player = st.session_state.get("player", "").strip()
+    if _player:
+        with st.expander("📂 Mes listes sauvegardées", expanded=False):
+            _cursors = st.session_state.setdefault("saved_lists_cursors", [None])
+            _rows, _next = get_army_list_repository().list_lists(_player, limit=10, cursor=_cursors[-1])
+            if not _rows: st.markdown("Aucune liste sauvegardée.")
+            for _row in _rows:
+                _c1, _c2 = st.columns([4, 1])
+                _c1.markdown(f"**{_row['list_name']}** — {_row['game']} / {_row['faction']} — {_row['army_cost']}/{_row['points']} pts <span style='color:#6c757d;font-size:.85em;'>({_row['updated_at'][:16].replace('T',' ')})</span>", unsafe_allow_html=True)
+                if _c2.button("Ouvrir", key=f"open_saved_{_row['id']}", use_container_width=True):
+                    _record = get_army_list_repository().get_list(_row["id"])
+                    _fd = factions_by_game.get(_record["game"], {}).get(_record["faction"])
+                    if not _fd: st.error("Faction introuvable pour cette liste."); _stop()
+                    if _record["faction_version"] != _fd.get("version", ""):
+                        # Données de faction mises à jour depuis la sauvegarde : renommages + coûts recalculés
+                        _migration = get_list_migrator(_record["game"], _record["faction"], _fd.get("version", "")).migrate_compact_list(_record["units"], _record["faction_version"])
+                        _errors = [m for level, m in _migration["notes"] if level == "error"]
+                        if _errors: st.error("Liste incompatible avec les données actuelles : " + " ; ".join(_errors)); _stop()
+                        get_army_list_repository().apply_migrations([{"id": _record["id"], **_migration}])
+                        _army = _migration["army_list"]; st.session_state.import_report = _migration["notes"]
+                    else:
+                        try:
+                            _army = expand_army_list(_record["units"], _fd)
+                        except ValueError as e:
+                            st.error(f"Liste incompatible avec les données actuelles : {e}"); _stop()
+                    st.session_state.game = _record["game"]; st.session_state.faction = _record["faction"]
+                    st.session_state.points = _record["points"]; st.session_state.list_name = _record["list_name"]
+                    st.session_state.units = _fd.get("units",[]); st.session_state.faction_special_rules = _fd.get("faction_special_rules",[]); st.session_state.faction_spells = _fd.get("spells",{})
+                    st.session_state.army_list = _army; st.session_state.army_cost = sum(u["cost"] for u in _army)
+                    st.session_state.unit_selections = {}; st.session_state.saved_list_id = _row["id"]
+                    _autosave("meta", values={"game": _record["game"], "faction": _record["faction"], "points": _record["points"], "list_name": _record["list_name"]})
+                    _autosave("replace", army_list=_army, army_cost=st.session_state.army_cost); _autosave_flush()
+                    st.session_state.page = "army"; st.rerun()
+            _p1, _p2 = st.columns(2)
+            if len(_cursors) > 1 and _p1.button("⬅️ Précédentes", key="saved_prev", use_container_width=True):
+                _cursors.pop(); st.rerun()
+            if _next and _p2.button("Suivantes ➡️", key="saved_next", use_container_width=True):
+                _cursors.append(_next); st.rerun()
+
+    # ── Métagame du club (archives JSON : python -m services.metagame <dossiers>) ──
+    with st.expander("📊 Métagame du club", expanded=False):
+        _meta_job = st.session_state.get("_metagame_job")
+        if _meta_job is not None and _meta_job.done():
+            del st.session_state["_metagame_job"]
+            if _job_error(_meta_job) is not None: st.error(f"Erreur mise à jour du métagame : {_job_error(_meta_job)}")
+            else: st.toast(f"{_meta_job.result()} liste(s) nouvelle(s) ou modifiée(s) intégrée(s).")
+            _meta_job = None
+        if _meta_job is not None:
+            background_job_status(_meta_job, "⏳ Intégration des nouvelles listes sauvegardées…")
+        elif st.button("🔄 Intégrer les nouvelles listes sauvegardées", key="metagame_refresh"):
+            st.session_state["_metagame_job"] = get_import_executor().submit(refresh_metagame); st.rerun()
+        _meta = metagame_stats(METAGAME_STATE.stat().st_mtime_ns if METAGAME_STATE.exists() else 0)
+        if not _meta.games():
+            st.markdown("Aucune liste analysée pour le moment.")
+        else:
+            _mg = st.selectbox("Jeu", _meta.games(), key="metagame_game")
+            _mf = st.selectbox("Faction", ["Toutes"] + [r["faction"] for r in _meta.faction_distribution(_mg)], key="metagame_faction")
+            _mf = None if _mf == "Toutes" else _mf
+            _pct = lambda rows, *keys: [{k: (f"{v:.1%}" if k in keys else v) for k, v in r.items()} for r in rows]
+            _t1, _t2, _t3, _t4 = st.tabs(["Factions", "Points par catégorie", "Unités", "Options"])
+            _t1.dataframe(_pct(_meta.faction_distribution(_mg), "part"), use_container_width=True, hide_index=True)
+            _t2.dataframe(_pct(_meta.category_shares(_mg), "part_moyenne"), use_container_width=True, hide_index=True)
+            _t3.dataframe(_pct(_meta.pick_rates(_mg, _mf), "taux"), use_container_width=True, hide_index=True)
+            _t4.dataframe(_pct(_meta.popular_options(_mg, _mf)[:200], "taux"), use_container_width=True, hide_index=True)
+
     # Jeu courant
     current_game = st.session_state.get("game", games[0] if games else "")
 
@@ -815,7 +685,7 @@ if st.session_state.page == "setup":
     with col2:
         st.markdown("<span class='badge'>Faction</span>", unsafe_allow_html=True)
         faction_options = list(factions_by_game.get(game, {}).keys())
-        if not faction_options: st.error("Aucune faction disponible"); st.stop()
+        if not faction_options: st.error("Aucune faction disponible"); _stop()
         _cur_faction = st.session_state.get("faction", "")
         _faction_idx = faction_options.index(_cur_faction) if _cur_faction in faction_options else 0
         faction = st.selectbox("Faction", faction_options, index=_faction_idx, label_visibility="collapsed")
@@ -832,21 +702,35 @@ if st.session_state.page == "setup":
     with colB:
         st.markdown("<span class='badge'>Action</span>", unsafe_allow_html=True)
         st.markdown("<p>Prêt à forger votre armée ?</p>", unsafe_allow_html=True)
+        if st.session_state.get("army_list") and st.button("🆕 Nouvelle liste vide", use_container_width=True, key="new_list"):
+            start_new_list(st.session_state)
+            _autosave("replace", army_list=[], army_cost=0); _autosave_flush()
+            st.toast("Armée vidée : la prochaine sauvegarde créera une nouvelle liste."); st.rerun()
         if st.button("🔥 Construire l'armée", use_container_width=True, type="primary", disabled=not all([game, faction, points > 0]), key="build_army"):
             _game_changed    = st.session_state.get("game")    != game
             _faction_changed = st.session_state.get("faction") != faction
+            # Nouveau nom : la sauvegarde crée une nouvelle liste au lieu de renommer celle ouverte
+            if list_name.strip() != st.session_state.get("list_name"): detach_saved_list(st.session_state)
             st.session_state.game = game; st.session_state.faction = faction; st.session_state.points = points
             st.session_state.list_name = list_name.strip() or f"Liste_{datetime.now().strftime('%Y%m%d')}"
             fd = factions_by_game[game][faction]
             st.session_state.units = fd.get("units",[]); st.session_state.faction_special_rules = fd.get("faction_special_rules",[]); st.session_state.faction_spells = fd.get("spells",{})
+            _autosave("meta", values={"game": game, "faction": faction, "points": points, "list_name": st.session_state.list_name})
             # Réinitialiser l'armée seulement si jeu ou faction a changé
             if _game_changed or _faction_changed:
-                st.session_state.army_list = []; st.session_state.army_cost = 0; st.session_state.unit_selections = {}
+                start_new_list(st.session_state)
+                _autosave("replace", army_list=[], army_cost=0)
             # Si une liste QR est en attente, l'injecter
             if st.session_state.get("_qr_army_list"):
-                st.session_state.army_list = st.session_state.pop("_qr_army_list")
-                st.session_state.army_cost = st.session_state.pop("_qr_army_cost", 0)
+                _qr_list = st.session_state.pop("_qr_army_list"); _qr_cost = st.session_state.pop("_qr_army_cost", 0); _qr_notes = []
                 st.session_state.unit_selections = {}
+                _qr_version = st.session_state.pop("_qr_faction_version", "")
+                if _qr_version and _qr_version != fd.get("version", ""):
+                    _migration = get_list_migrator(game, faction, fd.get("version", "")).migrate_army_list(_qr_list, _qr_version)
+                    _qr_list = _migration["army_list"]; _qr_cost = _migration["army_cost"]; _qr_notes = _migration["notes"]
+                replace_army_list("Avant la liste reçue par QR", _qr_list, _qr_cost, _qr_notes)
+                _autosave("replace", army_list=st.session_state.army_list, army_cost=st.session_state.army_cost)
+            _autosave_flush()
             st.session_state.page = "army"; st.rerun()
 
 if st.session_state.page == "army":
@@ -854,16 +738,39 @@ if st.session_state.page == "army":
     if not all(k in st.session_state for k in required_keys):
         st.error("Configuration incomplète.")
         if st.button("Retour", key="back1"): st.session_state.page = "setup"; st.rerun()
-        st.stop()
+        _stop()
     if not st.session_state.units:
         st.error("Aucune unité disponible pour cette faction.")
         if st.button("Retour", key="back2"): st.session_state.page = "setup"; st.rerun()
-        st.stop()
+        _stop()
 
     st.session_state.setdefault("list_name","Nouvelle Armée"); st.session_state.setdefault("army_cost",0)
     st.session_state.setdefault("army_list",[]); st.session_state.setdefault("unit_selections",{}); st.session_state.setdefault("unit_filter","Tous")
 
+    # Import terminé en arrière-plan → appliquer le résultat avant d'afficher la liste
+    _import_job = st.session_state.get("_import_job")
+    if _import_job is not None and _import_job.done():
+        del st.session_state["_import_job"]
+        try:
+            _imported = _import_job.result()
+        except ListImportError as e:
+            st.session_state.import_report = [("error", str(e))]
+        except Exception as e:
+            st.session_state.import_report = [("error", f"Erreur import: {e}")]
+        else:
+            if _imported["list_name"]: st.session_state.list_name = _imported["list_name"]
+            replace_army_list("Avant l'import", _imported["army_list"], _imported["army_cost"], _imported["issues"])
+            _autosave("replace", army_list=st.session_state.army_list, army_cost=st.session_state.army_cost); _autosave_flush()
+            st.toast(f"Liste importée ! ({len(_imported['army_list'])} unités)")
+
     st.title(f"{st.session_state.list_name} - {st.session_state.army_cost}/{st.session_state.points} pts")
+    if st.session_state.get("import_report"):
+        with st.expander("📋 Rapport d'import / migration", expanded=True):
+            _notify = {"error": st.error, "warning": st.warning, "info": st.info}
+            for _level, _message in st.session_state.import_report:
+                _notify.get(_level, st.info)(_message)
+            if st.button("Fermer", key="close_import_report"):
+                del st.session_state["import_report"]; st.rerun()
     if st.button("⬅️ Retour à la configuration", key="back3"): st.session_state.page = "setup"; st.rerun()  # army_list conservée
 
     st.divider(); st.subheader("📤 Export/Import de la liste")
@@ -876,24 +783,102 @@ if st.session_state.page == "army":
     else:
         _base_name = re.sub(r'[^a-zA-Z0-9_ -]', '_', _list_name)
 
+    _fd = load_factions()[0].get(st.session_state.game, {}).get(st.session_state.faction, {})
+    _export_context = {"game": st.session_state.game, "faction": st.session_state.faction, "version": _fd.get("version", ""),
+                       "list_name": st.session_state.list_name, "points": st.session_state.points, "render": RENDER_MODEL_VERSION,
+                       "fonts": sorted(p.name for p in EXPORT_FONTS.values())}
+    _export_key = store_army_list(st.session_state.army_list, _export_context)
+    def _export_model():
+        return export_render_model(_export_key, st.session_state.army_list, st.session_state.list_name,
+                                   st.session_state.points, st.session_state.game, st.session_state.faction)
+
     colE1, colE2, colE3 = st.columns(3)
     with colE1:
-        json_data = json.dumps({"game":st.session_state.game,"faction":st.session_state.faction,"points":st.session_state.points,"list_name":st.session_state.list_name,"army_list":st.session_state.army_list,"army_cost":st.session_state.army_cost,"exported_at":datetime.now().strftime("%Y-%m-%d %H:%M")}, indent=2, ensure_ascii=False)
-        st.download_button("📄 Export JSON", data=json_data, file_name=f"{_base_name}.json", mime="application/json", use_container_width=True, key="export_json")
+        # JSON horodaté à chaque export : rendu direct (le modèle, lui, est en cache)
+        json_data = render("json", {**_export_model(), "generated_at": datetime.now()})
+        st.download_button(RENDERERS["json"]["label"], data=json_data, file_name=f"{_base_name}.json", mime=RENDERERS["json"]["mime"], use_container_width=True, key="export_json")
     with colE2:
-        html_data = export_html(st.session_state.army_list, st.session_state.list_name, st.session_state.points)
-        st.download_button("🌐 Export HTML", data=html_data, file_name=f"{_base_name}.html", mime="text/html", use_container_width=True, key="export_html_btn")
+        export_download("html", _export_key, _export_model(), f"{_base_name}.html", "export_html_btn")
     with colE3:
         uploaded_file = st.file_uploader("📥 Importer", type=["json"], label_visibility="collapsed", key="import_file")
-        if uploaded_file is not None:
+        # Le fichier reste dans l'uploader entre les reruns : ne lancer l'import qu'une fois par fichier
+        if uploaded_file is not None and st.session_state.get("_import_file_id") != uploaded_file.file_id:
+            st.session_state["_import_file_id"] = uploaded_file.file_id
             try:
-                imported_data = json.loads(uploaded_file.getvalue().decode("utf-8"))
-                if not isinstance(imported_data, dict) or "army_list" not in imported_data: st.error("Fichier invalide."); st.stop()
-                st.session_state.list_name = imported_data.get("list_name", st.session_state.list_name)
-                st.session_state.army_list = imported_data["army_list"]
-                st.session_state.army_cost = imported_data.get("army_cost", sum(u["cost"] for u in imported_data["army_list"]))
-                st.success(f"Liste importée ! ({len(imported_data['army_list'])} unités)"); st.rerun()
-            except Exception as e: st.error(f"Erreur import: {e}")
+                _raw = read_limited(uploaded_file)
+            except ListImportError as e:
+                st.error(str(e))
+            else:
+                # Ré-hydratation + contrôles en arrière-plan ; le résultat est appliqué au rerun suivant
+                st.session_state["_import_job"] = get_import_executor().submit(
+                    import_army_list, _raw, _fd, GAME_CONFIG.get(st.session_state.game, {}), st.session_state.points,
+                    get_list_migrator(st.session_state.game, st.session_state.faction, _fd.get("version", "")))
+        if st.session_state.get("_import_job") is not None:
+            background_job_status(st.session_state["_import_job"], "⏳ Import et vérification de la liste en cours…")
+
+    # Autres formats : même modèle de rendu, artefacts stockés par empreinte
+    _other_formats = [f for f in RENDERERS if f not in ("json", "html", "pdf")]
+    for _col, _fmt in zip(st.columns(len(_other_formats)), _other_formats):
+        with _col:
+            _suffix = {"cards": "_cartes", "html_offline": "_hors_ligne"}.get(_fmt, "")
+            export_download(_fmt, _export_key, _export_model(), f"{_base_name}{_suffix}.{RENDERERS[_fmt]['extension']}", f"export_{_fmt}")
+
+    # PDF : à la demande, mis en page dans un processus séparé, stocké par empreinte (une liste inchangée n'est jamais recalculée)
+    _pdf_queue = get_pdf_queue()
+    _pdf_data = get_artifact_store().get("pdf", _export_key)
+    _pdf_job = _pdf_queue.job("pdf", _export_key)
+    if _pdf_data is not None:
+        st.download_button(RENDERERS["pdf"]["label"], data=_pdf_data, file_name=f"{_base_name}.pdf", mime=RENDERERS["pdf"]["mime"],
+                           use_container_width=True, key="export_pdf")
+    elif _pdf_job is None:
+        _pdf_queue.release(_export_slot("pdf"))  # liste modifiée : l'ancienne mise en page n'est plus attendue
+        if st.button("📑 Préparer le PDF", use_container_width=True, key="prepare_pdf"):
+            _pdf_queue.request(_export_slot("pdf"), "pdf", _export_key, render, "pdf", _export_model())
+            st.rerun()
+    elif _job_error(_pdf_job) is not None:
+        st.error(f"Erreur génération PDF: {_job_error(_pdf_job)}")
+        if st.button("🔁 Réessayer", use_container_width=True, key="export_pdf_retry"):
+            _pdf_queue.retry("pdf", _export_key)
+            _pdf_queue.request(_export_slot("pdf"), "pdf", _export_key, render, "pdf", _export_model())
+            st.rerun()
+    else:
+        background_job_status(_pdf_job, "⏳ Mise en page du PDF : préparation…")
+
+    _player = st.session_state.get("player", "").strip()
+    if st.button("💾 Sauvegarder la liste", key="save_list", disabled=not _player, help=None if _player else "Renseignez un joueur dans la barre latérale."):
+        _fd = load_factions()[0].get(st.session_state.game, {}).get(st.session_state.faction, {})
+        st.session_state.saved_list_id = get_army_list_repository().save_list(
+            _player, st.session_state.game, st.session_state.faction, st.session_state.list_name,
+            compact_army_list(st.session_state.army_list, _fd), points=st.session_state.points,
+            army_cost=st.session_state.army_cost, faction_version=_fd.get("version", ""),
+            list_id=st.session_state.get("saved_list_id"))
+        st.success("Liste sauvegardée !")
+
+    # ── Comparaison avec une autre version de la liste (sauvegarde, avant import, fichier JSON) ──
+    with st.expander("🔀 Comparer avec une autre version", expanded=False):
+        _sources = ["Fichier JSON"]
+        if st.session_state.get("saved_list_id"): _sources.insert(0, "Version sauvegardée")
+        if st.session_state.get("_compare_base"): _sources.insert(0, st.session_state["_compare_base"][0])
+        _source = st.radio("Comparer la liste actuelle avec", _sources, horizontal=True, key="compare_source")
+        _other = None
+        if _source == "Fichier JSON":
+            _compare_file = st.file_uploader("Liste JSON à comparer", type=["json"], key="compare_file")
+            if _compare_file is not None:
+                try: _other = parse_list_file(read_limited(_compare_file))["army_list"]
+                except ListImportError as e: st.error(str(e))
+        elif _source == "Version sauvegardée":
+            _record = get_army_list_repository().get_list(st.session_state.saved_list_id)
+            try: _other = expand_army_list(_record["units"], _fd) if _record else None
+            except ValueError as e: st.error(f"Version sauvegardée illisible avec les données actuelles : {e}")
+        else:
+            _other = st.session_state["_compare_base"][1]
+        if _other is not None:
+            _diff = diff_army_lists(_other, st.session_state.army_list)
+            _deltas = _diff.cost_deltas
+            for _col, (_label, _delta) in zip(st.columns(4), [("Total", _diff.cost_delta)] + [(CATEGORY_LABELS[c], d) for c, d in _deltas.items()]):
+                _col.metric(_label, f"{_delta:+d} pts")
+            st.caption(f"{len(_diff.added)} ajoutée(s), {len(_diff.removed)} retirée(s), {len(_diff.changed)} modifiée(s), {_diff.unchanged} identique(s)")
+            st.markdown("\n".join(f"- {_line}" for _line in _diff.unit_lines()) or "Aucune différence.")
 
     st.subheader("📊 Points de l'Armée")
     pu = st.session_state.army_cost; pt = st.session_state.points
@@ -939,6 +924,13 @@ if st.session_state.page == "army":
   </div>
 </div>
 """, unsafe_allow_html=True)
+    if st.session_state.army_list:
+        _army_exp = expected_army_output(st.session_state.army_list)
+        st.caption(
+            f"🎯 Efficacité attendue vs Déf {DEFAULT_TARGET['defense']}+ : "
+            f"{_army_exp['hits']:.1f} touches, {_army_exp['wounds']:.1f} blessures "
+            f"({_army_exp['wounds_per_100_pts']:.2f} bless./100 pts)"
+        )
     st.divider()
 
     if st.session_state.faction_special_rules:
@@ -950,6 +942,21 @@ if st.session_state.page == "army":
         with st.expander("✨ Sorts de la faction", expanded=False):
             for sn, sd in st.session_state.faction_spells.items():
                 if isinstance(sd, dict): st.markdown(f"**{sn}**: {sd.get('description','')}")
+    with st.expander("📈 Rapport d'efficacité de la faction", expanded=False):
+        st.caption("Meilleures configurations de chaque unité (non dominées en coût, blessures et résistance), triables par colonne (efficacité vs Déf 4+).")
+        if st.checkbox("Calculer le rapport", key="show_efficiency_report"):
+            _fd = load_factions()[0].get(st.session_state.game, {}).get(st.session_state.faction, {})
+            _report_job = faction_efficiency_job(st.session_state.game, st.session_state.faction, _fd.get("version", ""))
+            if not _report_job.done():
+                background_job_status(_report_job, "⏳ Calcul du rapport d'efficacité…")
+            elif _job_error(_report_job) is not None:
+                st.error(f"Erreur calcul du rapport : {_job_error(_report_job)}")
+                faction_efficiency_job.clear()  # pas de résultat mémorisé : recalculé au prochain affichage
+            else:
+                _rows = _report_job.result()
+                st.dataframe([{k: r[k] for k in REPORT_COLUMNS[3:]} for r in _rows], use_container_width=True, hide_index=True)
+                _csv = io.StringIO(); write_csv(_rows, _csv)
+                st.download_button("📊 Export CSV", data=_csv.getvalue(), file_name="rapport_efficacite.csv", mime="text/csv", key="export_efficiency_csv")
 
     st.subheader("Liste de l'Armée")
     if not st.session_state.army_list:
@@ -992,6 +999,15 @@ if st.session_state.page == "army":
                 )
                 st.markdown(f"<div style='font-size:clamp(12px,2vw,0.85em);color:#555;margin-bottom:6px;'>{stats_html}</div>", unsafe_allow_html=True)
 
+                # ── Efficacité attendue (vs cible de référence) ─────────────
+                _exp = expected_unit_output(ud)
+                _per100 = f" · <b>{_exp['wounds'] * 100 / ud['cost']:.2f}</b> bless./100 pts" if ud.get("cost") else ""
+                st.markdown(
+                    f"<div style='font-size:clamp(12px,2vw,0.8em);color:#555;margin-bottom:4px;'>"
+                    f"🎯 Touches moy. <b>{_exp['hits']:.1f}</b> · Blessures moy. <b>{_exp['wounds']:.1f}</b>"
+                    f" (tir {_exp['shooting_wounds']:.1f} / mêlée {_exp['melee_wounds']:.1f}){_per100}</div>",
+                    unsafe_allow_html=True)
+
                 # ── Armes ───────────────────────────────────────────────────
                 weapons=ud.get("weapon",[])
                 ws=weapons if isinstance(weapons,list) else [weapons]
@@ -1023,7 +1039,7 @@ if st.session_state.page == "army":
                     m=ud["mount"]; md=m.get("mount",{})
                     mws=md.get("weapon",[]); mws=mws if isinstance(mws,list) else [mws]
                     marmes=[fmt_weapon_line(w) for w in mws if isinstance(w,dict)]
-                    msr=[r for r in md.get("special_rules",[]) if "Coriace" not in r]
+                    msr=[r for r in md.get("special_rules",[]) if not parse_rule(r).named("Coriace")]
                     mount_parts=[]
                     if marmes: mount_parts.append("Armes : "+" · ".join(marmes))
                     if msr: mount_parts.append(", ".join(msr))
@@ -1046,13 +1062,15 @@ if st.session_state.page == "army":
                 _col1, _col2 = st.columns(2)
                 with _col1:
                     if st.button("🗑 Supprimer", key=f"delete_{i}", type="secondary", use_container_width=True):
-                        st.session_state.army_cost -= ud["cost"]; st.session_state.army_list.pop(i); st.rerun()
+                        st.session_state.army_cost -= ud["cost"]; st.session_state.army_list.pop(i)
+                        _autosave("delete", index=i); _autosave_flush(); st.rerun()
                 with _col2:
                     if st.button("⧉ Dupliquer", key=f"dup_{i}", use_container_width=True):
                         import copy as _copy
                         _dup = _copy.deepcopy(ud)
                         st.session_state.army_list.insert(i+1, _dup)
                         st.session_state.army_cost += _dup["cost"]
+                        _autosave("duplicate", index=i); _autosave_flush()
                         st.rerun()
 
     st.divider(); st.subheader("Filtres par type d'unité")
@@ -1060,19 +1078,43 @@ if st.session_state.page == "army":
     for cat in filter_categories:
         if st.button(cat, key=f"filter_{cat}", use_container_width=True): st.session_state.unit_filter = cat; st.rerun()
 
-    fu = st.session_state.units if st.session_state.unit_filter == "Tous" else [u for u in st.session_state.units if u.get("unit_detail") in filter_categories[st.session_state.unit_filter]]
+    # Unités décodées une fois pour ce rerun (libérées ensuite) ; sélection et filtres par index dans la faction
+    _catalog_units = dict(enumerate(st.session_state.units))
+    fu = [i for i, u in _catalog_units.items() if st.session_state.unit_filter == "Tous" or u.get("unit_detail") in filter_categories[st.session_state.unit_filter]]
 
     # Recherche par nom
     _search = st.text_input("🔍 Rechercher une unité", value="", placeholder="Nom de l'unité…", label_visibility="collapsed", key="unit_search")
     if _search.strip():
-        fu = [u for u in fu if _search.strip().lower() in u.get("name","").lower()]
+        fu = [i for i in fu if _search.strip().lower() in _catalog_units[i].get("name","").lower()]
+
+    # Filtre avancé : règles d'unité, règles portées par une même arme, seuils de caractéristiques
+    with st.expander("🧪 Filtre avancé (règles, armes, caractéristiques)"):
+        _uidx = get_unit_index()
+        _adv_rules = st.multiselect("Règles de l'unité", _uidx.rule_names(st.session_state.game, st.session_state.faction), key="adv_rules")
+        _adv_wrules = st.multiselect("Règles d'arme (sur une même arme)", _uidx.weapon_rule_names(st.session_state.game, st.session_state.faction), key="adv_weapon_rules")
+        _ac = st.columns(5)
+        _adv_cor = _ac[0].number_input("Coriace ≥", min_value=0, value=0, step=1, key="adv_coriace")
+        _adv_ap = _ac[1].number_input("PA ≥", min_value=0, value=0, step=1, key="adv_ap")
+        _adv_att = _ac[2].number_input("Attaques ≥", min_value=0, value=0, step=1, key="adv_attacks")
+        _adv_rng = _ac[3].number_input("Portée ≥", min_value=0, value=0, step=1, key="adv_range")
+        _adv_cost = _ac[4].number_input("Coût ≤", min_value=0, value=0, step=5, key="adv_cost", help="0 : sans limite")
+        _adv_opts = st.checkbox("Inclure les options d'amélioration", value=True, key="adv_options")
+    _adv_stats = {k: b for k, b in (("coriace", (_adv_cor or None, None)), ("cost", (None, _adv_cost or None))) if b != (None, None)}
+    _adv_wstats = {k: (v, None) for k, v in (("armor_piercing", _adv_ap), ("attacks", _adv_att), ("range", _adv_rng)) if v}
+    if _adv_rules or _adv_wrules or _adv_stats or _adv_wstats:
+        _adv_matches = _uidx.query(st.session_state.game, st.session_state.faction, _adv_rules, _adv_wrules,
+                                   _adv_stats, _adv_wstats, with_options=_adv_opts)
+        _adv_indexes = {m.index for m in _adv_matches}
+        fu = [i for i in fu if i in _adv_indexes]
+        _adv_via = [f"{m.name} ({', '.join(m.via[:3])}{'…' if len(m.via) > 3 else ''})" for m in _adv_matches if m.via]
+        if _adv_via: st.caption("Avec option : " + " · ".join(_adv_via[:8]) + (" …" if len(_adv_via) > 8 else ""))
 
     st.markdown(f"<div style='text-align:right;margin:4px 0 8px;color:#6c757d;font-size:.85em;'>{len(fu)} unité(s) — filtre : {st.session_state.unit_filter}</div>", unsafe_allow_html=True)
-    if not fu: st.warning(f"Aucune unité trouvée."); st.stop()
+    if not fu: st.warning(f"Aucune unité trouvée."); _stop()
 
-    unit = st.selectbox("Unité disponible", fu, format_func=format_unit_option, key="unit_select")
-    if not unit: st.error("Aucune unité sélectionnée."); st.stop()
-    if "upgrade_groups" not in unit: unit["upgrade_groups"] = []
+    unit_index = st.selectbox("Unité disponible", fu, format_func=lambda i: format_unit_option(_catalog_units[i]), key="unit_select")
+    unit = _catalog_units.get(unit_index)
+    if not unit: st.error("Aucune unité sélectionnée."); _stop()
 
     # Chaque configuration d'unité a un key unique basé sur un compteur.
     # Quand l'unité change, on incrémente → pas de collision entre deux unités du même nom.
@@ -1080,15 +1122,22 @@ if st.session_state.page == "army":
         st.session_state.draft_counter += 1
         st.session_state.draft_unit_name = unit['name']
     unit_key = f"draft_{st.session_state.draft_counter}"
-    st.session_state.unit_selections.setdefault(unit_key, {})
-    weapons = copy.deepcopy(list(unit.get("weapon",[]))); selected_options = {}; mount = None
-    weapon_cost = 0; mount_cost = 0; upgrades_cost = 0
+    # Brouillon de prix incrémental : seuls les groupes touchés par le dernier changement sont recalculés
+    _draft_slot = st.session_state.get("_unit_draft")
+    _unit_ref = (st.session_state.game, st.session_state.faction, unit_index)
+    if _draft_slot is None or _draft_slot[:2] != (unit_key, _unit_ref):
+        _graphs = faction_upgrade_graphs(st.session_state.game, st.session_state.faction)
+        _draft_slot = st.session_state["_unit_draft"] = (unit_key, _unit_ref, UnitDraft(unit, _graphs[unit_index] if unit_index < len(_graphs) else None))
+        _draft_slot[2].load(st.session_state.unit_selections.get(unit_key, {}))
+    draft = _draft_slot[2]
+    unit = draft.unit  # même objet d'un rerun à l'autre tant que le brouillon vit
+    _labels = {}  # libellés des choix radio de ce rerun (règles spéciales ajoutées à l'unité)
 
     for g_idx, group in enumerate(unit.get("upgrade_groups",[])):
         g_key = f"group_{g_idx}"
         gtype = group.get("type","")
         hvo = (bool(group.get("options")) if gtype != "conditional_weapon"
-               else any(not o.get("requires") or check_weapon_conditions(unit_key, o.get("requires",[]), unit) for o in group.get("options",[])))
+               else any(draft.is_available(g_idx, oi) for oi in range(len(group.get("options",[])))))
         if not hvo: continue
         st.subheader(group.get("group","Améliorations"))
 
@@ -1100,63 +1149,51 @@ if st.session_state.page == "army":
             elif isinstance(bw,dict): choices=[format_weapon_option(bw)]
             else: choices=[]
             opt_map={}
-            for o in group.get("options",[]):
+            for oi,o in enumerate(group.get("options",[])):
                 w=o.get("weapon",{})
                 lbl=(" et ".join(x.get("name","Arme") for x in w)+f" (+{o['cost']} pts)") if isinstance(w,list) else format_weapon_option(w,o["cost"])
-                choices.append(lbl); opt_map[lbl]=o
+                choices.append(lbl); opt_map[lbl]=oi
             if choices:
-                cur=st.session_state.unit_selections[unit_key].get(g_key,choices[0])
+                cur={oi: lbl for lbl, oi in opt_map.items()}.get(draft.choice(g_idx),choices[0])
                 ch=st.radio("Sélection de l'arme",choices,index=choices.index(cur) if cur in choices else 0,key=f"{unit_key}_{g_key}_weapon")
-                st.session_state.unit_selections[unit_key][g_key]=ch
+                _labels[g_key]=ch
+                draft.choose(g_idx, opt_map.get(ch) if ch != choices[0] else None)
                 if ch != choices[0] and ch in opt_map:
-                    _ow = opt_map[ch].get("weapon", {})
+                    _ow = group["options"][opt_map[ch]].get("weapon", {})
                     if isinstance(_ow, list):
                         for _w in _ow:
                             if isinstance(_w, dict): st.caption(f"⚔️ {_w.get('name','')} — {weapon_profile_md(_w)}")
                     elif isinstance(_ow, dict) and _ow:
                         st.caption(f"⚔️ {_ow.get('name','')} — {weapon_profile_md(_ow)}")
-                if ch!=choices[0]:
-                    for ol,o in opt_map.items():
-                        if ol==ch: weapon_cost+=o["cost"]; weapons=copy.deepcopy(o["weapon"] if isinstance(o["weapon"],list) else [o["weapon"]]); break
 
         elif gtype == "conditional_weapon":
-            ao=[o for o in group.get("options",[]) if not o.get("requires") or check_weapon_conditions(unit_key,o.get("requires",[]),unit)]
+            ao=[(oi,o) for oi,o in enumerate(group.get("options",[])) if draft.is_available(g_idx, oi)]
             if not ao: st.markdown(f"<div style='color:#999;font-size:.9em;'>{group.get('description','')} <em>(Non disponible)</em></div>",unsafe_allow_html=True)
             else:
                 choices=["Aucune amélioration"]; opt_map={}
-                for o in ao:
+                for oi,o in ao:
                     w_cond=o.get("weapon",{})
                     if isinstance(w_cond,dict) and w_cond:
                         lbl=format_weapon_option(w_cond, o.get("cost",0))
                     else:
                         lbl=f"{o.get('name','Amélioration')} (+{o.get('cost',0)} pts)"
-                    choices.append(lbl); opt_map[lbl]=o
-                cur=st.session_state.unit_selections[unit_key].get(g_key,choices[0])
+                    choices.append(lbl); opt_map[lbl]=oi
+                cur={oi: lbl for lbl, oi in opt_map.items()}.get(draft.choice(g_idx),choices[0])
                 ch=st.radio(group.get("description","Sélectionnez une amélioration"),choices,index=choices.index(cur) if cur in choices else 0,key=f"{unit_key}_{g_key}_cond")
-                st.session_state.unit_selections[unit_key][g_key]=ch
+                _labels[g_key]=ch
+                draft.choose(g_idx, opt_map.get(ch))
                 if ch != choices[0] and ch in opt_map:
-                    _ow = opt_map[ch].get("weapon", {})
+                    _ow = group["options"][opt_map[ch]].get("weapon", {})
                     if isinstance(_ow, list):
                         for _w in _ow:
                             if isinstance(_w, dict): st.caption(f"⚔️ {_w.get('name','')} — {weapon_profile_md(_w)}")
                     elif isinstance(_ow, dict) and _ow:
                         st.caption(f"⚔️ {_ow.get('name','')} — {weapon_profile_md(_ow)}")
-                if ch!=choices[0]:
-                    opt=opt_map[ch]; upgrades_cost+=opt.get("cost",0)
-                    if "weapon" in opt:
-                        # conditional_weapon avec "requires" = amélioration d'une seule figurine → _unique=True
-                        # conditional_weapon sans "requires" = toute l'unité → _unique absent
-                        nw=opt["weapon"]
-                        extra={"_upgraded":True}
-                        if opt.get("requires"): extra["_unique"]=True
-                        if isinstance(nw,dict): weapons.append({**nw,**extra})
-                        elif isinstance(nw,list): weapons.extend({**w,**extra} for w in nw)
 
         elif gtype == "variable_weapon_count":
             st.markdown(f"<div style='margin-bottom:10px;color:#6c757d;'>{group.get('description','')}</div>",unsafe_allow_html=True)
             for oi,option in enumerate(group.get("options",[])):
-                req=option.get("requires",[])
-                if req and not check_weapon_conditions(unit_key,req,unit):
+                if not draft.is_available(g_idx, oi):
                     st.markdown(f"<div style='color:#999;font-size:.9em;'>{option['name']} <em>(Non disponible)</em></div>",unsafe_allow_html=True); continue
                 # Profil(s) de l'arme sous le titre
                 _opt_nw = option.get("weapon", {})
@@ -1167,116 +1204,77 @@ if st.session_state.page == "army":
                     _profiles = [f"⚔️ **{_opt_nw.get('name','')}** — {weapon_profile_md(_opt_nw)}"]
                 _profile_label = "  \n".join(_profiles)
                 st.markdown(f"**{option['name']}**" + (f"  \n{_profile_label}" if _profile_label else ""))
-                # ── BUG 1 FIX : max_count selon le type ──────────────────────
-                mc_cfg  = option.get("max_count", {})
-                mc_type = mc_cfg.get("type","size_based") if isinstance(mc_cfg,dict) else "size_based"
-                if mc_type == "fixed":
-                    mc = mc_cfg.get("value",1)
-                elif mc_type == "size_based":
-                    mc = min(mc_cfg.get("value", unit.get("size",1)), unit.get("size",1))
-                elif mc_type == "count_in_weapons":
-                    # Compter les exemplaires encore présents dans weapons (courant)
-                    # _count pour les armes ajoutées par variable_weapon_count, count pour les armes de base
-                    wn = mc_cfg.get("weapon_name","")
-                    mc = sum(w.get("_count", w.get("count", 1)) for w in weapons if isinstance(w,dict) and w.get("name")==wn)
-                else:
-                    mc = unit.get("size",1)
-                mc = max(mc, 0)
+                # max_count selon le type (count_in_weapons : armes restantes après les options précédentes)
+                mc = draft.max_count(g_idx, oi)
                 cnt_key = f"{unit_key}_{g_key}_cnt_{oi}"
-                prev = min(st.session_state.unit_selections[unit_key].get(cnt_key, option.get("min_count",0)), mc)
+                prev = min(draft.choice(g_idx)[oi], mc)
                 cnt = st.number_input(f"Nombre de {option['name']} (0 – {mc})", min_value=option.get("min_count",0), max_value=max(mc, option.get("min_count",0)), value=prev, step=1, key=cnt_key)
-                st.session_state.unit_selections[unit_key][cnt_key] = cnt
-                tc=cnt*option["cost"]; upgrades_cost+=tc
+                draft.set_count(g_idx, oi, cnt)
+                tc=cnt*option["cost"]
                 if cnt > 0 or tc > 0:
                     st.markdown(f"<div style='margin:10px 0;padding:8px;background:#f8f9fa;border-radius:4px;'><strong>{option['name']}</strong> × {cnt} = <strong style='color:#e74c3c;'>{tc} pts</strong></div>",unsafe_allow_html=True)
-                if cnt > 0:
-                    # BUG 2 FIX : fw repart de weapons COURANT (pas des armes de base)
-                    fw = copy.deepcopy(weapons)
-                    nw = option["weapon"]
-                    opt_replaces = option.get("replaces",[])
-                    # BUG 3 FIX : pour les armes avec count > 1, décrémenter count
-                    if opt_replaces:
-                        remaining = cnt
-                        new_fw = []
-                        for w in fw:
-                            if not isinstance(w,dict): new_fw.append(w); continue
-                            if w.get("name") in opt_replaces and remaining > 0:
-                                # Lire _count OU count (armes ajoutées vs armes de base)
-                                w_count = w.get("_count", w.get("count", 1))
-                                if w_count > remaining:
-                                    wc = w.copy()
-                                    # Décrémenter le bon champ
-                                    if "_count" in w: wc["_count"] = w_count - remaining
-                                    else: wc["count"] = w_count - remaining
-                                    new_fw.append(wc)
-                                    remaining = 0
-                                else:
-                                    remaining -= w_count
-                            else:
-                                new_fw.append(w)
-                        fw = new_fw
-                    if isinstance(nw,dict): fw.append({**nw,"_count":cnt,"_replaces":opt_replaces,"_upgraded":True})
-                    elif isinstance(nw,list): fw.extend({**w2,"_count":cnt,"_replaces":opt_replaces,"_upgraded":True} for w2 in nw)
-                    weapons = fw
         elif gtype == "role":
             choices=["Aucun rôle"]; opt_map={}
-            for o in group.get("options",[]):
+            for oi,o in enumerate(group.get("options",[])):
                 sr=o.get("special_rules",[]); lbl=o.get("name","Rôle")
                 if sr: lbl+=f" | {', '.join(sr)}"
-                lbl+=f" (+{o.get('cost',0)} pts)"; choices.append(lbl); opt_map[lbl]=o
-            cur=st.session_state.unit_selections[unit_key].get(g_key,choices[0])
+                lbl+=f" (+{o.get('cost',0)} pts)"; choices.append(lbl); opt_map[lbl]=oi
+            cur={oi: lbl for lbl, oi in opt_map.items()}.get(draft.choice(g_idx),choices[0])
             ch=st.radio(group.get("group","Rôle"),choices,index=choices.index(cur) if cur in choices else 0,key=f"{unit_key}_{g_key}_role",horizontal=len(choices)<=4)
-            st.session_state.unit_selections[unit_key][g_key]=ch
-            if ch!=choices[0]:
-                opt=opt_map[ch]; upgrades_cost+=opt.get("cost",0); selected_options[group.get("group","Rôle")]=[opt]
-                rw=opt.get("weapon",[])
-                if isinstance(rw,list): weapons.extend(copy.deepcopy(rw))
-                elif isinstance(rw,dict): weapons.append(copy.deepcopy(rw))
+            _labels[g_key]=ch
+            draft.choose(g_idx, opt_map.get(ch))
 
         elif gtype == "upgrades":
+            checked=set()
             for oi,o in enumerate(group.get("options",[])):
                 ok=f"{unit_key}_{g_key}_{o['name']}_{oi}"
                 # Afficher les special_rules entre parenthèses si présentes
                 sr_label = o.get("special_rules", [])
                 sr_str = f" ({', '.join(sr_label)})" if sr_label else ""
-                chk=st.checkbox(f"{o['name']}{sr_str} (+{o['cost']} pts)",value=st.session_state.unit_selections[unit_key].get(ok,False),key=ok)
-                st.session_state.unit_selections[unit_key][ok]=chk
-                if chk: upgrades_cost+=o["cost"]; selected_options.setdefault(group.get("group","Options"),[]).append(o)
+                chk=st.checkbox(f"{o['name']}{sr_str} (+{o['cost']} pts)",value=oi in draft.choice(g_idx),key=ok)
+                if chk: checked.add(oi)
+            draft.choose(g_idx, frozenset(checked))
 
         elif gtype == "mount":
             choices=["Aucune monture"]; opt_map={}
-            for o in group.get("options",[]): lbl=format_mount_option(o); choices.append(lbl); opt_map[lbl]=o
-            cur=st.session_state.unit_selections[unit_key].get(g_key,choices[0])
+            for oi,o in enumerate(group.get("options",[])): lbl=format_mount_option(o); choices.append(lbl); opt_map[lbl]=oi
+            cur={oi: lbl for lbl, oi in opt_map.items()}.get(draft.choice(g_idx),choices[0])
             ch=st.radio("Monture",choices,index=choices.index(cur) if cur in choices else 0,key=f"{unit_key}_{g_key}_mount")
-            st.session_state.unit_selections[unit_key][g_key]=ch
-            if ch!="Aucune monture": mount=opt_map[ch]; mount_cost=mount["cost"]
+            _labels[g_key]=ch
+            draft.choose(g_idx, opt_map.get(ch))
 
-    multiplier=1
-    if unit.get("type")!="hero" and unit.get("size",1)>1:
-        if st.checkbox("Unité combinée",key=f"{unit_key}_combined"): multiplier=2
+    draft.combined = unit.get("type")!="hero" and unit.get("size",1)>1 and st.checkbox("Unité combinée",key=f"{unit_key}_combined")
+    multiplier = draft.multiplier; mount = draft.mount
+    # Sélections compactes (index d'options) ; seuls les derniers brouillons utilisés restent en session
+    st.session_state.unit_selections[unit_key] = draft.selections()
+    retain_drafts(st.session_state.unit_selections, unit_key)
 
-    final_cost=(unit.get("base_cost",0)+weapon_cost)*multiplier+upgrades_cost+mount_cost
+    final_cost = draft.cost
     st.subheader("Coût de l'unité sélectionnée"); st.markdown(f"**Coût total :** {final_cost} pts"); st.divider()
 
     if st.button("➕ Ajouter à l'armée",key=f"{unit_key}_add"):
         if st.session_state.army_cost+final_cost>st.session_state.points:
-            st.error(f"⛔ Dépassement : {st.session_state.army_cost+final_cost} / {st.session_state.points} pts"); st.stop()
+            st.error(f"⛔ Dépassement : {st.session_state.army_cost+final_cost} / {st.session_state.points} pts"); _stop()
         cor=unit.get("coriace",0); asr=unit.get("special_rules",[]).copy()
         if mount and "mount" in mount: cor+=mount["mount"].get("coriace_bonus",0)
         for g in unit.get("upgrade_groups",[]):
             gk=f"group_{unit.get('upgrade_groups',[]).index(g)}"
-            so=st.session_state.unit_selections[unit_key].get(gk,"")
+            so=_labels.get(gk,"")
             if so and so not in ("Aucune amélioration","Aucun rôle"):
                 for opt in g.get("options",[]):
                     if "special_rules" in opt and opt.get("name","") in so: asr.extend(opt["special_rules"])
         if mount:
             for r in mount.get("mount",{}).get("special_rules",[]):
-                if not r.startswith(("Griffes","Sabots")) and "Coriace" not in r: asr.append(r)
-        ud={"name":unit["name"],"type":unit.get("type","unit"),"unit_detail":unit.get("unit_detail",unit.get("type","unit")),"cost":final_cost,"size":unit.get("size",10)*multiplier if unit.get("type")!="hero" else 1,"quality":unit.get("quality"),"defense":unit.get("defense"),"weapon":weapons,"options":selected_options,"mount":mount,"special_rules":list(set(asr)),"coriace":cor}
+                if not is_natural_weapon(r) and not parse_rule(r).named("Coriace"): asr.append(r)
+        ud={"name":unit["name"],"type":unit.get("type","unit"),"unit_detail":unit.get("unit_detail",unit.get("type","unit")),"cost":final_cost,"size":unit.get("size",10)*multiplier if unit.get("type")!="hero" else 1,"quality":unit.get("quality"),"defense":unit.get("defense"),"weapon":copy.deepcopy(list(draft.weapons)),"options":copy.deepcopy(draft.selected_options),"mount":copy.deepcopy(mount),"special_rules":combine_rules(asr),"coriace":cor}
         if validate_army_rules(st.session_state.army_list+[ud],st.session_state.points,st.session_state.game):
             st.session_state.army_list.append(ud)
             st.session_state.army_cost += final_cost
+            _autosave("add", unit=ud)
             # Incrémenter le draft_counter → la prochaine unité (même nom) repart vierge
             st.session_state.draft_counter += 1
             st.session_state.draft_unit_name = ""
+            _autosave_flush()
             st.rerun()
+
+_autosave_flush()
@@ -0,0 +1,74 @@
+"""Compare la mémoire résidente (RSS) par worker : catalogue JSON vs catalogue mmap partagé.
+
+Usage : python benchmarks/bench_shared_catalog.py --workers 4
+"""
+import argparse
+import multiprocessing
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from repositories.faction_repository import JsonFactionRepository  # noqa: E402
+
+
+def _memory_kb() -> dict[str, int]:
+    fields = {"VmRSS": 0, "RssAnon": 0, "RssFile": 0}
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                key, _, value = line.partition(":")
+                if key in fields:
+                    fields[key] = int(value.split()[0])
+    except OSError:
+        import resource
+        fields["VmRSS"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return fields
+
+
+def _worker(mode: str, shared_path: str, queue: multiprocessing.Queue) -> None:
+    before = _memory_kb()
+    repository = JsonFactionRepository(BASE_DIR, shared_catalog_path=Path(shared_path) if mode == "mmap" else None)
+    factions_by_game, _ = repository.load_catalog()
+    # Simule un worker qui sert tout le catalogue : chaque unité est lue une fois
+    units = sum(1 for factions in factions_by_game.values() for data in factions.values() for _ in data["units"])
+    # Les données restent référencées (comme le cache d'un worker Streamlit)
+    after = _memory_kb()
+    queue.put((mode, units, before, after))
+    del factions_by_game
+
+
+def run(mode: str, workers: int, shared_path: Path) -> list[tuple]:
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    processes = [context.Process(target=_worker, args=(mode, str(shared_path), queue)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    shared_path = JsonFactionRepository(BASE_DIR).build_shared_catalog()
+    print(f"{'mode':<6} {'unités':>7} {'RSS avant':>10} {'RSS après':>10} {'anon +':>8} {'fichier +':>10}  (kB)")
+    for mode in ("json", "mmap"):
+        results = run(mode, args.workers, shared_path)
+        for _, units, before, after in results:
+            print(
+                f"{mode:<6} {units:>7} {before['VmRSS']:>10} {after['VmRSS']:>10} "
+                f"{after['RssAnon'] - before['RssAnon']:>8} {after['RssFile'] - before['RssFile']:>10}"
+            )
+        average = sum(after["RssAnon"] - before["RssAnon"] for _, _, before, after in results) / len(results)
+        print(f"{mode:<6} mémoire privée moyenne ajoutée par worker : {average:.0f} kB")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
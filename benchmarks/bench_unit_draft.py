@@ -0,0 +1,132 @@
+"""Compare les allocations par rerun du configurateur : copies profondes des armes vs brouillon incrémental.
+
+Usage : python benchmarks/bench_unit_draft.py --reruns 20
+"""
+import argparse
+import copy
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from repositories.faction_repository import JsonFactionRepository  # noqa: E402
+from services.unit_draft import UnitDraft  # noqa: E402
+
+
+def _as_list(value):
+    if isinstance(value, dict):
+        return [value] if value else []
+    return [v for v in value if isinstance(v, dict)] if isinstance(value, list) else []
+
+
+def deepcopy_weapons(unit, choices):
+    """Ancienne dérivation des armes, recalculée intégralement à chaque rerun (copies profondes)."""
+    weapons = copy.deepcopy(list(unit.get("weapon", [])))
+    for group, choice in zip(unit.get("upgrade_groups", []), choices):
+        gtype, options = group.get("type"), group.get("options", [])
+        if gtype == "weapon" and isinstance(choice, int):
+            weapons = copy.deepcopy(_as_list(options[choice].get("weapon"))) or weapons
+        elif gtype in ("conditional_weapon", "role") and isinstance(choice, int):
+            weapons.extend(copy.deepcopy(_as_list(options[choice].get("weapon"))))
+        elif gtype == "variable_weapon_count":
+            for option, cnt in zip(options, choice):
+                if cnt <= 0:
+                    continue
+                fw = copy.deepcopy(weapons)
+                replaces, remaining, new_fw = option.get("replaces", []), cnt, []
+                for w in fw:
+                    if replaces and w.get("name") in replaces and remaining > 0:
+                        w_count = w.get("_count", w.get("count", 1))
+                        if w_count > remaining:
+                            wc = w.copy()
+                            wc["_count" if "_count" in w else "count"] = w_count - remaining
+                            new_fw.append(wc)
+                            remaining = 0
+                        else:
+                            remaining -= w_count
+                    else:
+                        new_fw.append(w)
+                new_fw.extend({**w, "_count": cnt, "_replaces": replaces, "_upgraded": True} for w in _as_list(option.get("weapon")))
+                weapons = new_fw
+    return weapons
+
+
+def _random_choice(group, rng):
+    options = group.get("options", [])
+    gtype = group.get("type")
+    if gtype == "upgrades":
+        return frozenset(i for i in range(len(options)) if rng.random() < 0.3)
+    if gtype == "variable_weapon_count":
+        return tuple(rng.randint(0, 2) for _ in options)
+    return rng.choice([None] + list(range(len(options))))
+
+
+def _measure(run, reruns):
+    """(octets alloués au pic, octets conservés, µs) moyens par rerun."""
+    peaks = kept = 0
+    start_time = time.perf_counter()
+    for i in range(reruns):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        result = run(i)
+        current, peak = tracemalloc.get_traced_memory()
+        peaks += peak - before
+        kept += current - before
+        del result
+    return peaks / reruns, kept / reruns, (time.perf_counter() - start_time) * 1e6 / reruns
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=20, help="Reruns simulés par unité (un widget modifié à chaque fois)")
+    args = parser.parse_args()
+
+    factions, _ = JsonFactionRepository(BASE_DIR).load_catalog()
+    units = [u for by_name in factions.values() for data in by_name.values() for u in data["units"]
+             if any(g.get("type") == "variable_weapon_count" for g in u.get("upgrade_groups", []))]
+    rng = random.Random(1)
+    scripts = []
+    for unit in units:
+        groups = unit.get("upgrade_groups", [])
+        choices = [_random_choice(g, rng) for g in groups]
+        steps = []
+        for _ in range(args.reruns):
+            index = rng.randrange(len(groups))
+            choices[index] = _random_choice(groups[index], rng)
+            steps.append((index, choices[index], list(choices)))
+        scripts.append((unit, steps))
+
+    tracemalloc.start()
+    totals = {"deepcopy": [0.0, 0.0, 0.0], "brouillon": [0.0, 0.0, 0.0]}
+    for unit, steps in scripts:
+        draft = UnitDraft(unit)
+        for index, choice in enumerate(steps[0][2]):
+            draft.choose(index, choice)
+        draft.cost
+
+        def legacy(i, unit=unit, steps=steps):
+            return deepcopy_weapons(unit, steps[i][2])
+
+        def incremental(i, draft=draft, steps=steps):
+            index, choice, _ = steps[i]
+            draft.choose(index, choice)
+            return draft.cost, draft.weapon_slots
+
+        for name, run in (("deepcopy", legacy), ("brouillon", incremental)):
+            for k, value in enumerate(_measure(run, len(steps))):
+                totals[name][k] += value / len(scripts)
+    tracemalloc.stop()
+
+    print(f"{len(scripts)} unités à nombre d'armes variable, {args.reruns} reruns chacune")
+    print(f"{'mode':<10} {'pic/rerun':>12} {'conservé/rerun':>15} {'µs/rerun':>10}")
+    for name, (peak, kept, micros) in totals.items():
+        print(f"{name:<10} {peak:>10.0f} o {kept:>13.0f} o {micros:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,4 +1,6 @@
 from .faction_repository import JsonFactionRepository
 from .common_rules_repository import CommonRulesRepository
+from .army_list_repository import SqliteArmyListRepository
+from .content_store import ContentAddressedStore
 
-__all__ = ["JsonFactionRepository", "CommonRulesRepository"]
+__all__ = ["JsonFactionRepository", "CommonRulesRepository", "SqliteArmyListRepository", "ContentAddressedStore"]
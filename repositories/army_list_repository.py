@@ -0,0 +1,200 @@
+import json
+import queue
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+
+ArmyListRecord = dict[str, Any]
+PageCursor = tuple[str, int]
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS army_lists (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        player TEXT NOT NULL,
+        game TEXT NOT NULL,
+        faction TEXT NOT NULL,
+        list_name TEXT NOT NULL,
+        points INTEGER NOT NULL DEFAULT 0,
+        army_cost INTEGER NOT NULL DEFAULT 0,
+        faction_version TEXT NOT NULL DEFAULT '',
+        units TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_army_lists_player_updated ON army_lists (player, updated_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_army_lists_player_game_faction ON army_lists (player, game, faction)",
+    "CREATE INDEX IF NOT EXISTS idx_army_lists_game_faction ON army_lists (game, faction)",
+    "CREATE INDEX IF NOT EXISTS idx_army_lists_updated ON army_lists (updated_at DESC)",
+)
+
+# Requêtes constantes et paramétrées : sqlite3 les garde préparées dans son cache de statements
+_INSERT = (
+    "INSERT INTO army_lists (player, game, faction, list_name, points, army_cost, faction_version, units, created_at, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+# Une liste d'un autre jeu ou d'une autre faction n'écrase jamais l'existante : elle est insérée à part
+_UPDATE = (
+    "UPDATE army_lists SET list_name = ?, points = ?, army_cost = ?, "
+    "faction_version = ?, units = ?, updated_at = ? WHERE id = ? AND player = ? AND game = ? AND faction = ?"
+)
+_SELECT_ONE = "SELECT * FROM army_lists WHERE id = ?"
+_DELETE = "DELETE FROM army_lists WHERE id = ? AND player = ?"
+_APPLY_MIGRATION = "UPDATE army_lists SET units = ?, army_cost = ?, faction_version = ? WHERE id = ?"
+_SUMMARY_COLUMNS = "id, player, game, faction, list_name, points, army_cost, faction_version, created_at, updated_at"
+
+
+class SqliteConnectionPool:
+    """Small fixed-size pool of SQLite connections shareable across Streamlit threads."""
+
+    def __init__(self, db_path: Path, size: int = 4) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connections: queue.Queue[sqlite3.Connection] = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._connections.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=64, timeout=10)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self._connections.get()
+        try:
+            with connection:
+                yield connection
+        finally:
+            self._connections.put(connection)
+
+    def close(self) -> None:
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+
+class SqliteArmyListRepository:
+    """Repository responsible for persisting army lists in a local SQLite database."""
+
+    def __init__(self, db_path: Path, pool_size: int = 4) -> None:
+        self.pool = SqliteConnectionPool(db_path, pool_size)
+        with self.pool.connection() as connection:
+            for statement in _SCHEMA:
+                connection.execute(statement)
+
+    def save_list(
+        self,
+        player: str,
+        game: str,
+        faction: str,
+        list_name: str,
+        units: list[dict[str, Any]],
+        points: int = 0,
+        army_cost: int = 0,
+        faction_version: str = "",
+        list_id: int | None = None,
+    ) -> int:
+        now = _utc_now()
+        payload = json.dumps(units, ensure_ascii=False, separators=(",", ":"))
+        with self.pool.connection() as connection:
+            if list_id is not None:
+                cursor = connection.execute(
+                    _UPDATE,
+                    (list_name, points, army_cost, faction_version, payload, now, list_id, player, game, faction),
+                )
+                if cursor.rowcount:
+                    return list_id
+            cursor = connection.execute(
+                _INSERT,
+                (player, game, faction, list_name, points, army_cost, faction_version, payload, now, now),
+            )
+            return int(cursor.lastrowid)
+
+    def get_list(self, list_id: int) -> ArmyListRecord | None:
+        with self.pool.connection() as connection:
+            row = connection.execute(_SELECT_ONE, (list_id,)).fetchone()
+        if row is None:
+            return None
+        record = dict(row)
+        record["units"] = json.loads(record["units"])
+        return record
+
+    def delete_list(self, player: str, list_id: int) -> bool:
+        with self.pool.connection() as connection:
+            return connection.execute(_DELETE, (list_id, player)).rowcount > 0
+
+    def list_lists(
+        self,
+        player: str,
+        game: str | None = None,
+        faction: str | None = None,
+        limit: int = 20,
+        cursor: PageCursor | None = None,
+    ) -> tuple[list[ArmyListRecord], PageCursor | None]:
+        """Page de listes d'un joueur, de la plus récente à la plus ancienne (pagination par curseur)."""
+        clauses = ["player = ?"]
+        params: list[Any] = [player]
+        if game:
+            clauses.append("game = ?")
+            params.append(game)
+        if faction:
+            clauses.append("faction = ?")
+            params.append(faction)
+        if cursor is not None:
+            clauses.append("(updated_at < ? OR (updated_at = ? AND id < ?))")
+            params.extend([cursor[0], cursor[0], cursor[1]])
+        params.append(limit + 1)
+
+        query = (
+            f"SELECT {_SUMMARY_COLUMNS} FROM army_lists WHERE {' AND '.join(clauses)} "
+            "ORDER BY updated_at DESC, id DESC LIMIT ?"
+        )
+        with self.pool.connection() as connection:
+            rows = [dict(row) for row in connection.execute(query, params).fetchall()]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1]["updated_at"], rows[-1]["id"])
+        return rows, next_cursor
+
+    def iter_lists(self, batch_size: int = 500) -> Iterator[ArmyListRecord]:
+        """Parcourt toutes les listes (tous joueurs) par lots, dans l'ordre des identifiants."""
+        last_id = 0
+        while True:
+            with self.pool.connection() as connection:
+                rows = connection.execute(
+                    "SELECT * FROM army_lists WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                record = dict(row)
+                record["units"] = json.loads(record["units"])
+                yield record
+            last_id = rows[-1]["id"]
+
+    def apply_migrations(self, migrations: list[dict[str, Any]]) -> None:
+        """Réécrit en une transaction les listes migrées, sans toucher à updated_at (ordre « Mes listes » inchangé)."""
+        with self.pool.connection() as connection:
+            connection.executemany(_APPLY_MIGRATION, [
+                (json.dumps(m["units"], ensure_ascii=False, separators=(",", ":")), m["army_cost"], m["faction_version"], m["id"])
+                for m in migrations
+            ])
+
+    def count_lists(self, player: str) -> int:
+        with self.pool.connection() as connection:
+            return connection.execute("SELECT COUNT(*) FROM army_lists WHERE player = ?", (player,)).fetchone()[0]
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
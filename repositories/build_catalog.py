@@ -0,0 +1,20 @@
+from pathlib import Path
+
+from repositories.faction_repository import JsonFactionRepository
+
+
+def main() -> int:
+    base_dir = Path(__file__).resolve().parent.parent
+    repository = JsonFactionRepository(base_dir)
+    output_path = repository.data_dir / "catalog.bin"
+    content_hash = repository.build_artifact(output_path)
+    print(f"Catalogue compilé dans {output_path} ({content_hash[:12]})")
+    shared_path = repository.build_shared_catalog(repository.data_dir / "catalog.mmap")
+    print(f"Catalogue partagé (mmap) compilé dans {shared_path}")
+    for name, error in repository.broken_files:
+        print(f"Fichier ignoré {name} : {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import pickle
+from pathlib import Path
+from typing import Any
+
+
+CatalogPayload = dict[str, Any]
+
+ARTIFACT_MAGIC = b"OPRCAT\n"
+ARTIFACT_FORMAT = 1
+
+
+def iter_source_files(data_dir: Path) -> list[Path]:
+    data_dir = Path(data_dir)
+    sources = sorted((data_dir / "factions").glob("*.json"))
+    sources += [data_dir / "common-rules" / "common-rules.json", data_dir / "generic_rules.json"]
+    return [path for path in sources if path.exists()]
+
+
+def source_fingerprint(data_dir: Path) -> str:
+    """Empreinte bon marché des sources (chemin, taille, mtime) : un stat par fichier, aucune lecture."""
+    digest = hashlib.sha256(f"format:{ARTIFACT_FORMAT}".encode())
+    for path in iter_source_files(data_dir):
+        stat = path.stat()
+        digest.update(f"{path.relative_to(data_dir).as_posix()}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def write_catalog_artifact(output_path: Path, payload: CatalogPayload, fingerprint: str) -> str:
+    body = pickle.dumps(payload, protocol=5)
+    content_hash = hashlib.sha256(body).hexdigest()
+    header = {"format": ARTIFACT_FORMAT, "sources": fingerprint, "content_hash": content_hash}
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(".tmp")
+    with tmp_path.open("wb") as file:
+        file.write(ARTIFACT_MAGIC)
+        file.write(json.dumps(header).encode() + b"\n")
+        file.write(body)
+    tmp_path.replace(output_path)
+    return content_hash
+
+
+def read_catalog_artifact(artifact_path: Path, data_dir: Path) -> CatalogPayload | None:
+    """Charge l'artefact en une lecture, ou None s'il est absent, corrompu ou périmé."""
+    artifact_path = Path(artifact_path)
+    if not artifact_path.exists():
+        return None
+
+    raw = artifact_path.read_bytes()
+    if not raw.startswith(ARTIFACT_MAGIC):
+        return None
+    header_end = raw.find(b"\n", len(ARTIFACT_MAGIC))
+    try:
+        header = json.loads(raw[len(ARTIFACT_MAGIC):header_end])
+    except ValueError:
+        return None
+    if header.get("format") != ARTIFACT_FORMAT or header.get("sources") != source_fingerprint(data_dir):
+        return None
+
+    body = memoryview(raw)[header_end + 1:]
+    if hashlib.sha256(body).hexdigest() != header.get("content_hash"):
+        return None
+    return pickle.loads(body)
+
@@ -0,0 +1,164 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+
+_KIND_PATTERN = re.compile(r"^[a-z0-9_-]{1,32}$")
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{8,128}$")
+
+
+class ContentAddressedStore:
+    """Content-addressed blob store: one file per (kind, fingerprint), written once and shared by every session.
+
+    Every blob can be rebuilt from its source, so the store is a cache: with ``max_bytes`` or ``max_age``
+    (seconds since last use), it prunes itself in the background every ``prune_every`` new files. Recently
+    used blobs are also kept in memory, bounded by ``memory_items`` and ``memory_bytes``.
+    """
+
+    def __init__(
+        self,
+        root_dir: Path,
+        memory_items: int = 256,
+        memory_bytes: int = 16 * 1024 * 1024,
+        max_bytes: int | None = None,
+        max_age: float | None = None,
+        prune_every: int = 64,
+    ) -> None:
+        self.root_dir = Path(root_dir)
+        self.memory_items = memory_items
+        self.memory_bytes = memory_bytes
+        self.memory_size = 0
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.prune_every = prune_every
+        self._memory: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        self._writes = 0
+
+    def _path(self, kind: str, key: str) -> Path:
+        if not _KIND_PATTERN.match(kind):
+            raise ValueError(f"Type d'artefact invalide : {kind!r}")
+        if not _KEY_PATTERN.match(key):
+            raise ValueError(f"Empreinte invalide : {key!r}")
+        return self.root_dir / kind / key[:2] / key
+
+    def _remember(self, kind: str, key: str, data: bytes) -> None:
+        if len(data) > self.memory_bytes:
+            return  # PDF ou HTML hors ligne volumineux : relu depuis le disque
+        with self._lock:
+            previous = self._memory.pop((kind, key), None)
+            if previous is not None:
+                self.memory_size -= len(previous)
+            self._memory[(kind, key)] = data
+            self.memory_size += len(data)
+            while len(self._memory) > self.memory_items or self.memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self.memory_size -= len(evicted)
+
+    def contains(self, kind: str, key: str) -> bool:
+        return (kind, key) in self._memory or self._path(kind, key).exists()
+
+    def get(self, kind: str, key: str) -> bytes | None:
+        path = self._path(kind, key)
+        with self._lock:
+            data = self._memory.get((kind, key))
+            if data is not None:
+                self._memory.move_to_end((kind, key))
+                return data
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        self._touch(path)
+        self._remember(kind, key, data)
+        return data
+
+    def put(self, kind: str, key: str, data: bytes) -> bool:
+        """Stocke le contenu s'il est absent. Retourne False si la clé existait déjà (dédupliqué)."""
+        path = self._path(kind, key)
+        self._remember(kind, key, data)
+        if path.exists():
+            self._touch(path)
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+        self._schedule_prune()
+        return True
+
+    def get_or_create(self, kind: str, key: str, factory: Callable[[], bytes]) -> bytes:
+        data = self.get(kind, key)
+        if data is None:
+            data = factory()
+            try:
+                self.put(kind, key, data)
+            except OSError:
+                pass  # disque plein ou en lecture seule : l'artefact reste servi depuis la mémoire
+        return data
+
+    def count(self, kind: str) -> int:
+        kind_dir = self._path(kind, "0" * 8).parent.parent
+        if not kind_dir.exists():
+            return 0
+        return sum(1 for path in kind_dir.glob("*/*") if not path.name.endswith(".tmp"))
+
+    # ── Purge ──
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        # mtime = dernier usage : la purge garde les artefacts encore demandés
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _schedule_prune(self) -> None:
+        if self.max_bytes is None and self.max_age is None:
+            return
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.prune_every == 1 or self.prune_every == 1
+        if due and self._prune_lock.acquire(blocking=False):
+            def run() -> None:
+                try:
+                    self.prune()
+                finally:
+                    self._prune_lock.release()
+
+            threading.Thread(target=run, name="artifact-prune", daemon=True).start()
+
+    def prune(self, max_bytes: int | None = None, max_age: float | None = None) -> int:
+        """Supprime les fichiers inutilisés depuis ``max_age`` secondes, puis les moins récents jusqu'à ``max_bytes``.
+
+        Sans argument, applique les limites du magasin. Retourne le nombre de fichiers supprimés.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        max_age = self.max_age if max_age is None else max_age
+        files = []
+        for path in self.root_dir.glob("*/*/*"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        cutoff = time.time() - max_age if max_age is not None else None
+        removed = 0
+        for mtime, size, path in files:
+            expired = cutoff is not None and mtime < cutoff
+            if not expired and (max_bytes is None or total <= max_bytes):
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
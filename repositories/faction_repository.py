@@ -1,7 +1,11 @@
 import json
 from pathlib import Path
 from typing import Any
+from repositories.catalog_artifact import read_catalog_artifact, source_fingerprint, write_catalog_artifact
 from repositories.common_rules_repository import CommonRulesRepository
+from repositories.rule_parser import parse_rule
+from repositories.shared_catalog import SHARED_CATALOG_FORMAT, SharedCatalog, write_shared_catalog
+from repositories.unit_index import UnitIndex
 
 
 FactionData = dict[str, Any]
@@ -11,30 +15,163 @@ FactionsByGame = dict[str, dict[str, FactionData]]
 class JsonFactionRepository:
     """Repository responsible for reading faction data from JSON files."""
 
-    def __init__(self, base_dir: Path) -> None:
+    def __init__(
+        self,
+        base_dir: Path,
+        artifact_path: Path | None = None,
+        shared_catalog_path: Path | None = None,
+    ) -> None:
         self.base_dir = Path(base_dir)
         self.data_dir = self.base_dir / "repositories" / "data"
+        self.artifact_path = Path(artifact_path) if artifact_path else None
+        self.shared_catalog_path = Path(shared_catalog_path) if shared_catalog_path else None
         self.common_rules_repository = CommonRulesRepository(self.base_dir)
-        self._common_rules_by_title = self.common_rules_repository.load_rules_by_title()
+        self._common_rules: dict[str, str] | None = None
+        self._common_rules_by_key: dict[str, str] | None = None
+        self._shared_catalog: SharedCatalog | None = None
+        self._shared_catalog_stat: tuple[int, int] | None = None
+        # Fichiers de faction illisibles lors du dernier chargement : (nom du fichier, erreur)
+        self.broken_files: list[tuple[str, str]] = []
+        self._unit_index: UnitIndex | None = None
+
+    @property
+    def _common_rules_by_title(self) -> dict[str, str]:
+        if self._common_rules is None:
+            self._common_rules = self.common_rules_repository.load_rules_by_title()
+        return self._common_rules
 
     def load_catalog(self) -> tuple[FactionsByGame, list[str]]:
+        """Factions par jeu et jeux triés ; un fichier illisible est ignoré et signalé dans ``broken_files``."""
+        shared_catalog = self._open_shared_catalog()
+        if shared_catalog is not None:
+            self.broken_files = shared_catalog.broken_files()
+            games = shared_catalog.list_games()
+            factions = {
+                game: {
+                    name: shared_catalog.get_faction(game, name)
+                    for name in shared_catalog.list_faction_names(game)
+                }
+                for game in games
+            }
+            return factions, games
+
+        if self.artifact_path is not None:
+            artifact = read_catalog_artifact(self.artifact_path, self.data_dir)
+            if artifact is not None:
+                self.broken_files = [tuple(item) for item in artifact.get("broken_files", [])]  # type: ignore[misc]
+                return artifact["factions"], artifact["games"]
+
+        factions, games, self.broken_files = self._load_catalog_from_json()
+        return factions, games
+
+    def build_artifact(self, output_path: Path | None = None) -> str:
+        output_path = Path(output_path or self.artifact_path or self.data_dir / "catalog.bin")
+        # Empreinte prise avant la lecture : une modification concurrente rendra l'artefact périmé
+        fingerprint = source_fingerprint(self.data_dir)
+        factions, games, self.broken_files = self._load_catalog_from_json()
+        generic_rules_path = self.data_dir / "generic_rules.json"
+        generic_rules = self._load_file(generic_rules_path) if generic_rules_path.exists() else {}
+        payload = {
+            "factions": factions,
+            "games": games,
+            "common_rules": self.common_rules_repository.load_rules(),
+            "generic_rules": generic_rules,
+            "broken_files": self.broken_files,
+        }
+        return write_catalog_artifact(output_path, payload, fingerprint)
+
+    def load_generic_rules(self) -> list[dict[str, str]]:
+        """Règles spéciales génériques (tous jeux), noms au format « EN [FR] »."""
+        data: Any = None
+        if self.artifact_path is not None:
+            artifact = read_catalog_artifact(self.artifact_path, self.data_dir)
+            if artifact is not None:
+                data = artifact.get("generic_rules")
+        if data is None:
+            generic_rules_path = self.data_dir / "generic_rules.json"
+            data = self._load_file(generic_rules_path) if generic_rules_path.exists() else {}
+        rules = data.get("rules", []) if isinstance(data, dict) else []
+        return [
+            {"name": str(rule["name"]), "description": str(rule.get("description", ""))}
+            for rule in rules
+            if isinstance(rule, dict) and rule.get("name")
+        ]
+
+    def build_shared_catalog(self, output_path: Path | None = None) -> Path:
+        output_path = Path(output_path or self.shared_catalog_path or self.data_dir / "catalog.mmap")
+        fingerprint = source_fingerprint(self.data_dir)
+        factions, games, self.broken_files = self._load_catalog_from_json()
+        write_shared_catalog(output_path, factions, games, fingerprint, self.broken_files)
+        return output_path
+
+    def unit_index(self) -> UnitIndex:
+        """Index règles / armes / caractéristiques → unités, reconstruit quand les sources changent."""
+        fingerprint = source_fingerprint(self.data_dir)
+        if self._unit_index is None or self._unit_index.version != fingerprint:
+            factions, _ = self.load_catalog()
+            self._unit_index = UnitIndex(factions, fingerprint)
+        return self._unit_index
+
+    def get_unit(self, game: str, faction: str, index: int) -> FactionData | None:
+        shared_catalog = self._open_shared_catalog()
+        if shared_catalog is not None:
+            return shared_catalog.get_unit(game, faction, index)
+
+        units = (self.get_faction(game, faction) or {}).get("units", [])
+        return units[index] if 0 <= index < len(units) else None
+
+    def _open_shared_catalog(self) -> SharedCatalog | None:
+        # Empreinte des sources vérifiée une fois par version du fichier partagé (taille, mtime) :
+        # les appels suivants (get_unit, load_catalog) ne coûtent qu'un stat.
+        if self.shared_catalog_path is None:
+            return None
+        try:
+            stat = self.shared_catalog_path.stat()
+        except OSError:
+            if self._shared_catalog is not None:
+                self._shared_catalog.close()
+            self._shared_catalog, self._shared_catalog_stat = None, None
+            return None
+        file_stat = (stat.st_size, stat.st_mtime_ns)
+        if file_stat == self._shared_catalog_stat:
+            return self._shared_catalog
+
+        catalog = SharedCatalog(self.shared_catalog_path)
+        if catalog.format != SHARED_CATALOG_FORMAT or catalog.fingerprint != source_fingerprint(self.data_dir):
+            catalog.close()
+            catalog = None
+        if self._shared_catalog is not None:
+            self._shared_catalog.close()  # ancienne version : fermée dès que plus aucune unité n'en est lue
+        self._shared_catalog, self._shared_catalog_stat = catalog, file_stat
+        return catalog
+
+    def _load_catalog_from_json(self) -> tuple[FactionsByGame, list[str], list[tuple[str, str]]]:
         factions: FactionsByGame = {}
         games: set[str] = set()
+        broken: list[tuple[str, str]] = []
 
         for file_path in self._iter_faction_files():
-            data = self._load_file(file_path)
-            game = data.get("game")
-            faction = data.get("faction")
-            if not game or not faction:
+            # Un fichier invalide ne doit pas priver l'application des autres factions
+            try:
+                data = self._load_file(file_path)
+                if not isinstance(data, dict):
+                    raise ValueError("objet JSON attendu")
+                game = data.get("game")
+                faction = data.get("faction")
+                if not game or not faction:
+                    continue
+                normalized = self._normalize_faction(data)
+            except Exception as exc:
+                broken.append((file_path.name, str(exc)))
                 continue
 
             if game not in factions:
                 factions[game] = {}
 
-            factions[game][faction] = self._normalize_faction(data)
+            factions[game][faction] = normalized
             games.add(game)
 
-        return factions, sorted(games)
+        return factions, sorted(games), broken
 
     def list_games(self) -> list[str]:
         _, games = self.load_catalog()
@@ -85,7 +222,7 @@ class JsonFactionRepository:
                     {
                         "name": name,
                         "description": rule.get(
-                            "description", self._common_rules_by_title.get(name, "")
+                            "description", self._common_rule_description(name)
                         ),
                     }
                 )
@@ -95,8 +232,20 @@ class JsonFactionRepository:
                 hydrated_rules.append(
                     {
                         "name": rule,
-                        "description": self._common_rules_by_title.get(rule, ""),
+                        "description": self._common_rule_description(rule),
                     }
                 )
 
         return hydrated_rules
+
+    def _common_rule_description(self, name: str) -> str:
+        # Titre exact, sinon même règle sous son autre nom ou un autre paramètre (« Coriace (3) » → « Tough (X) [Coriace (X)] »)
+        if name in self._common_rules_by_title:
+            return self._common_rules_by_title[name]
+        if self._common_rules_by_key is None:
+            self._common_rules_by_key = {}
+            for title, description in self._common_rules_by_title.items():
+                for alias in parse_rule(title).aliases:
+                    self._common_rules_by_key.setdefault(alias, description)
+        return next((self._common_rules_by_key[alias] for alias in parse_rule(name).aliases
+                     if alias in self._common_rules_by_key), "")
@@ -0,0 +1,53 @@
+import copy
+from typing import Any, NoReturn
+
+
+def _read_only(self: Any, *args: Any, **kwargs: Any) -> NoReturn:
+    raise TypeError("Catalogue partagé en lecture seule : copiez l'objet (copy.deepcopy) avant de le modifier.")
+
+
+class ReadOnlyDict(dict):
+    """Dict of the shared catalog: reads as a plain dict, refuses in-place changes.
+
+    Copies (``copy.copy``, ``copy.deepcopy``, ``dict(x)``) and pickles are plain mutable dicts,
+    so an army entry built from catalog options can be edited freely once copied.
+    """
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self) -> dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> dict:
+        return {copy.deepcopy(k, memo): copy.deepcopy(v, memo) for k, v in self.items()}
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return dict, (dict(self),)
+
+
+class ReadOnlyList(list):
+    """List of the shared catalog: reads as a plain list, refuses in-place changes."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __copy__(self) -> list:
+        return list(self)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> list:
+        return [copy.deepcopy(v, memo) for v in self]
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return list, (list(self),)
+
+
+def freeze(value: Any) -> Any:
+    """Copie en lecture seule d'une structure JSON (dicts et listes imbriqués), partageable entre sessions."""
+    if isinstance(value, dict):
+        return ReadOnlyDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return ReadOnlyList(freeze(v) for v in value)
+    return value
@@ -0,0 +1,132 @@
+import re
+import sys
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable
+
+
+_PARAMETER = re.compile(r"^(?P<name>.*?)\s*\((?P<param>[^()]*)\)\s*$")
+_BILINGUAL = re.compile(r"^(?P<en>[^\[]*?)\s*\[(?P<fr>[^\]]+)\]$")
+_NUMBER = re.compile(r"\d+")
+_INTEGER = re.compile(r"^\+?\d+$")  # niveau « (3) » ou bonus « (+3) » ; pas un seuil « (2+) »
+_WORD = re.compile(r"[a-z0-9]+")
+# Armes naturelles de monture (« Griffes lourdes », « Sabots ») saisies parmi les règles : déjà affichées comme armes
+_NATURAL_WEAPONS = frozenset({"griffes", "sabots"})
+
+
+def fold_text(text: str) -> str:
+    """Minuscules sans accents (« Éclaireur » et « Eclaireur » se confondent)."""
+    decomposed = unicodedata.normalize("NFKD", text.replace("’", "'"))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokens(text: str) -> list[str]:
+    return _WORD.findall(fold_text(text))
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    """A special rule string split into base name and parameter, with its English and French keys.
+
+    ``"Crossing Barrage (X) [Bombardement croisé (X)]"`` → name ``"Crossing Barrage [Bombardement croisé]"``,
+    param ``"X"``, aliases ``("crossing barrage", "bombardement croise")``. ``key`` is the French alias.
+    """
+
+    text: str
+    name: str
+    param: str | None
+    aliases: tuple[str, ...]
+    value: int | None = None  # paramètre numérique (« (+3) » → 3), None pour « (X) » ou sans paramètre
+    is_bonus: bool = False  # « (+N) » : s'ajoute à la valeur existante
+
+    @property
+    def key(self) -> str:
+        return self.aliases[-1] if self.aliases else ""
+
+    def named(self, *names: str) -> bool:
+        """Vrai si la règle porte l'un de ces noms (anglais ou français, paramètre et accents ignorés)."""
+        return any(alias in self.aliases for name in names for alias in parse_rule(name).aliases)
+
+
+def _split(text: str) -> tuple[str, str | None]:
+    match = _PARAMETER.match(text)
+    return (match["name"], match["param"].strip()) if match else (text, None)
+
+
+def _alias(text: str) -> str:
+    return sys.intern(" ".join(tokens(text)))
+
+
+@lru_cache(maxsize=8192)
+def parse_rule(text: str) -> Rule:
+    """Règle structurée, mémoïsée : chaque libellé du catalogue n'est analysé qu'une fois par processus."""
+    name, param = _split(text.strip())
+    bilingual = _BILINGUAL.match(name)
+    if bilingual:
+        en, en_param = _split(bilingual["en"])
+        fr, fr_param = _split(bilingual["fr"].strip())
+        name, param = f"{en} [{fr}]", param or en_param or fr_param
+        aliases = tuple(dict.fromkeys(alias for alias in (_alias(en), _alias(fr)) if alias))
+    else:
+        alias = _alias(name)
+        aliases = (alias,) if alias else ()
+    number = _NUMBER.search(param or "")
+    return Rule(
+        sys.intern(text), sys.intern(name), sys.intern(param) if param else None, aliases,
+        int(number.group()) if number else None, (param or "").startswith("+"),
+    )
+
+
+def rule_key(text: str) -> str:
+    return parse_rule(text).key
+
+
+def is_natural_weapon(text: str) -> bool:
+    """« Griffes lourdes », « Sabots »… : arme de monture listée parmi ses règles."""
+    return parse_rule(text).key.split(" ", 1)[0] in _NATURAL_WEAPONS
+
+
+def _with_param(rule: Rule, param: str) -> str:
+    # « Tough [Coriace] » → « Tough (6) [Coriace (6)] »
+    bilingual = _BILINGUAL.match(rule.name)
+    if bilingual:
+        return f"{bilingual['en']} ({param}) [{bilingual['fr']} ({param})]"
+    return f"{rule.name} ({param})"
+
+
+def combine_rules(rules: Iterable[str]) -> list[str]:
+    """Fusionne les occurrences d'une même règle, dans l'ordre de première apparition.
+
+    Seuls les paramètres entiers se combinent : les bonus « (+N) » s'additionnent, les niveaux « (N) » gardent
+    le plus élevé puis reçoivent les bonus (« Coriace (3) » + « Coriace (+3) » → « Coriace (6) ») et « (X) »
+    s'efface devant une valeur. Les seuils « (2+) » et autres paramètres restent tels quels ; les doublons disparaissent.
+    """
+    merged: dict[tuple[str, ...], tuple[Rule, int | None, int]] = {}
+    for text in rules:
+        if not isinstance(text, str) or not text.strip():
+            continue
+        rule = parse_rule(text)
+        integer = rule.param is not None and _INTEGER.match(rule.param) is not None
+        if integer or rule.param is None or rule.param.upper() == "X":
+            slot: tuple[str, ...] = (rule.key,)
+        else:
+            slot = (rule.key, fold_text(rule.param))
+        first, level, bonus = merged.get(slot, (rule, None, 0))
+        if integer and rule.is_bonus:
+            bonus += rule.value or 0
+        elif integer:
+            level = rule.value if level is None else max(level, rule.value or 0)
+        merged[slot] = (first, level, bonus)
+
+    combined = []
+    for first, level, bonus in merged.values():
+        first_integer = first.param is not None and _INTEGER.match(first.param) is not None
+        alone = ((None, first.value or 0) if first.is_bonus else (first.value, 0)) if first_integer else (None, 0)
+        if (level, bonus) == alone:
+            combined.append(first.text)
+        elif level is not None:
+            combined.append(_with_param(first, str(level + bonus)))
+        else:
+            combined.append(_with_param(first, f"+{bonus}"))
+    return combined
@@ -0,0 +1,169 @@
+import json
+import mmap
+import weakref
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Iterator
+
+from repositories.readonly import freeze
+
+FactionData = dict[str, Any]
+FactionsByGame = dict[str, dict[str, FactionData]]
+_Span = tuple[int, int]
+
+SHARED_CATALOG_MAGIC = b"OPRMMAP\n"
+SHARED_CATALOG_FORMAT = 1
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def write_shared_catalog(
+    output_path: Path,
+    factions_by_game: FactionsByGame,
+    games: list[str],
+    fingerprint: str,
+    broken_files: list[tuple[str, str]] | None = None,
+) -> None:
+    """Écrit un fichier : en-tête JSON (index des offsets) puis un blob JSON par méta de faction et par unité."""
+    blobs: list[bytes] = []
+    offset = 0
+
+    def append(blob: bytes) -> list[int]:
+        nonlocal offset
+        blobs.append(blob)
+        span = [offset, len(blob)]
+        offset += len(blob)
+        return span
+
+    index: dict[str, dict[str, dict[str, Any]]] = {}
+    for game in games:
+        for faction, data in factions_by_game.get(game, {}).items():
+            meta = {k: v for k, v in data.items() if k != "units"}
+            index.setdefault(game, {})[faction] = {
+                "meta": append(_encode(meta)),
+                "units": [append(_encode(unit)) for unit in data.get("units", [])],
+            }
+
+    header = _encode({
+        "format": SHARED_CATALOG_FORMAT,
+        "sources": fingerprint,
+        "games": games,
+        "factions": index,
+        "broken_files": [list(item) for item in broken_files or []],
+    })
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(".tmp")
+    with tmp_path.open("wb") as file:
+        file.write(SHARED_CATALOG_MAGIC)
+        file.write(len(header).to_bytes(8, "little"))
+        file.write(header)
+        for blob in blobs:
+            file.write(blob)
+    tmp_path.replace(output_path)
+
+
+class LazyUnits(Sequence):
+    """Read-only unit list decoded one unit at a time from the shared mapping.
+
+    Nothing is cached: each lookup decodes a fresh read-only unit that lives only as long as its
+    caller keeps it, so a worker never accumulates a private copy of the catalog. Identify units
+    by their index, not by ``id()``.
+    """
+
+    def __init__(self, catalog: "SharedCatalog", spans: list[_Span]) -> None:
+        self._catalog = catalog
+        self._spans = spans
+        catalog._views += 1
+        weakref.finalize(self, catalog._release_view)
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def _unit(self, index: int) -> FactionData:
+        return freeze(self._catalog._decode(self._spans[index]))
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self._unit(i) for i in range(len(self._spans))[index]]
+        if index < 0:
+            index += len(self._spans)
+        if not 0 <= index < len(self._spans):
+            raise IndexError("unit index out of range")
+        return self._unit(index)
+
+    def __iter__(self) -> Iterator[FactionData]:
+        for index in range(len(self._spans)):
+            yield self._unit(index)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Envoyée à un autre processus (rapport d'efficacité) : liste ordinaire, le mappage ne se sérialise pas
+        return list, (list(self),)
+
+
+class SharedCatalog:
+    """Read-only, memory-mapped faction catalog shared by every worker through the page cache."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        with self.path.open("rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic_end = len(SHARED_CATALOG_MAGIC)
+        if self._mmap[:magic_end] != SHARED_CATALOG_MAGIC:
+            self._mmap.close()
+            raise ValueError(f"Fichier de catalogue partagé invalide : {self.path}")
+        header_length = int.from_bytes(self._mmap[magic_end:magic_end + 8], "little")
+        header_start = magic_end + 8
+        self._header = json.loads(self._mmap[header_start:header_start + header_length])
+        self._body_start = header_start + header_length
+        self._views = 0
+        self._closing = False
+
+    @property
+    def fingerprint(self) -> str:
+        return self._header.get("sources", "")
+
+    @property
+    def format(self) -> int:
+        return self._header.get("format", 0)
+
+    def close(self) -> None:
+        """Ferme le mappage, ou à la disparition de la dernière liste d'unités paresseuse encore utilisée."""
+        self._closing = True
+        if not self._views:
+            self._mmap.close()
+
+    def _release_view(self) -> None:
+        self._views -= 1
+        if self._closing and not self._views:
+            self._mmap.close()
+
+    def _decode(self, span: _Span) -> Any:
+        start = self._body_start + span[0]
+        return json.loads(self._mmap[start:start + span[1]])
+
+    def list_games(self) -> list[str]:
+        return list(self._header["games"])
+
+    def broken_files(self) -> list[tuple[str, str]]:
+        return [tuple(item) for item in self._header.get("broken_files", [])]  # type: ignore[misc]
+
+    def list_faction_names(self, game: str) -> list[str]:
+        return list(self._header["factions"].get(game, {}))
+
+    def get_faction(self, game: str, faction: str) -> FactionData | None:
+        entry = self._header["factions"].get(game, {}).get(faction)
+        if entry is None:
+            return None
+        data = self._decode(entry["meta"])
+        data["units"] = LazyUnits(self, entry["units"])
+        return data
+
+    def get_unit(self, game: str, faction: str, index: int) -> FactionData | None:
+        entry = self._header["factions"].get(game, {}).get(faction)
+        if entry is None or not 0 <= index < len(entry["units"]):
+            return None
+        return self._decode(entry["units"][index])
@@ -0,0 +1,213 @@
+import bisect
+import re
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping
+
+from repositories.rule_parser import parse_rule
+
+
+FactionsByGame = dict[str, dict[str, dict[str, Any]]]
+Bounds = tuple[int | None, int | None]  # (min, max) inclus ; None = non borné
+
+UNIT_STATS = ("cost", "coriace", "quality", "defense")
+WEAPON_STATS = ("attacks", "armor_piercing", "range")
+
+_NUMBER = re.compile(r"[+-]?\d+")
+
+
+def _as_int(value: Any) -> int:
+    # Portée « Mêlée » → 0 ; « 24" » → 24
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return int(value)
+    number = _NUMBER.search(str(value or ""))
+    return int(number.group()) if number else 0
+
+
+class _RangeIndex:
+    """Sorted (value, ref) pairs; a [min, max] selection is two bisects and a slice."""
+
+    __slots__ = ("values", "refs")
+
+    def __init__(self, pairs: Iterable[tuple[int, int]]) -> None:
+        ordered = sorted(pairs)
+        self.values = [value for value, _ in ordered]
+        self.refs = [ref for _, ref in ordered]
+
+    def select(self, low: int | None = None, high: int | None = None) -> list[int]:
+        start = 0 if low is None else bisect.bisect_left(self.values, low)
+        stop = len(self.values) if high is None else bisect.bisect_right(self.values, high)
+        return self.refs[start:stop]
+
+
+@dataclass(frozen=True)
+class UnitMatch:
+    """A unit satisfying a query; ``via`` lists the upgrade options needed when the base profile does not."""
+
+    game: str
+    faction: str
+    index: int
+    name: str
+    via: tuple[str, ...] = ()
+
+
+class UnitIndex:
+    """Inverted index from special rules, weapon rules and numeric stats to units across every faction.
+
+    Entries come from the base profile and from each upgrade option (granted rules, replacement
+    weapons, mounts), so a query can tell "has it" from "can take it". Rule keys come from
+    ``repositories.rule_parser`` (accents, case and parameters ignored); rule parameters and numeric
+    stats are kept in sorted arrays queried by bisect.
+    """
+
+    def __init__(self, factions: FactionsByGame, version: str = "") -> None:
+        self.version = version
+        self._units: list[tuple[str, str, int, str]] = []
+        self._scopes: dict[tuple[str, str], set[int]] = {}
+        # Source = profil de base (option None) ou option d'amélioration d'une unité
+        self._sources: list[tuple[int, str | None]] = []
+        self._weapon_sources: list[int] = []
+        self._labels: dict[str, str] = {}
+        rule_pairs: dict[str, list[tuple[int, int]]] = {}
+        weapon_rule_pairs: dict[str, list[tuple[int, int]]] = {}
+        stat_pairs: dict[str, list[tuple[int, int]]] = {stat: [] for stat in UNIT_STATS}
+        weapon_stat_pairs: dict[str, list[tuple[int, int]]] = {stat: [] for stat in WEAPON_STATS}
+
+        def add_rules(rules: Any, target: dict[str, list[tuple[int, int]]], ref: int) -> None:
+            for rule in rules if isinstance(rules, list) else []:
+                if not isinstance(rule, str) or not rule.strip():
+                    continue
+                parsed = parse_rule(rule)
+                self._labels.setdefault(parsed.key, parsed.name)
+                target.setdefault(parsed.key, []).append((parsed.value or 0, ref))
+
+        def add_weapons(weapons: Any, source: int) -> None:
+            for weapon in [weapons] if isinstance(weapons, dict) else weapons if isinstance(weapons, list) else []:
+                if not isinstance(weapon, dict):
+                    continue
+                weapon_id = len(self._weapon_sources)
+                self._weapon_sources.append(source)
+                for stat in WEAPON_STATS:
+                    weapon_stat_pairs[stat].append((_as_int(weapon.get(stat)), weapon_id))
+                add_rules(weapon.get("special_rules", []), weapon_rule_pairs, weapon_id)
+
+        for game, by_name in sorted(factions.items()):
+            for faction, data in sorted(by_name.items()):
+                scope = self._scopes.setdefault((game, faction), set())
+                for position, unit in enumerate(data.get("units", [])):
+                    if not isinstance(unit, dict):
+                        continue
+                    unit_id = len(self._units)
+                    self._units.append((game, faction, position, unit.get("name", "")))
+                    scope.add(unit_id)
+                    base = len(self._sources)
+                    self._sources.append((unit_id, None))
+                    coriace = _as_int(unit.get("coriace"))
+                    for stat, value in (("cost", unit.get("base_cost", unit.get("cost"))), ("coriace", coriace),
+                                        ("quality", unit.get("quality")), ("defense", unit.get("defense"))):
+                        stat_pairs[stat].append((_as_int(value), base))
+                    add_rules(unit.get("special_rules", []), rule_pairs, base)
+                    add_weapons(unit.get("weapon", []), base)
+                    for group in unit.get("upgrade_groups", []):
+                        for option in group.get("options", []) if isinstance(group, dict) else []:
+                            if not isinstance(option, dict):
+                                continue
+                            source = len(self._sources)
+                            self._sources.append((unit_id, option.get("name", "")))
+                            mount = option.get("mount") if isinstance(option.get("mount"), dict) else {}
+                            bonus = _as_int(option.get("coriace_bonus")) + _as_int(mount.get("coriace_bonus"))
+                            if bonus:
+                                stat_pairs["coriace"].append((coriace + bonus, source))
+                            add_rules(option.get("special_rules", []), rule_pairs, source)
+                            add_rules(mount.get("special_rules", []), rule_pairs, source)
+                            add_weapons(option.get("weapon", []), source)
+                            add_weapons(mount.get("weapon", []), source)
+
+        self._rules = {key: _RangeIndex(pairs) for key, pairs in rule_pairs.items()}
+        self._weapon_rules = {key: _RangeIndex(pairs) for key, pairs in weapon_rule_pairs.items()}
+        self._stats = {stat: _RangeIndex(pairs) for stat, pairs in stat_pairs.items()}
+        self._weapon_stats = {stat: _RangeIndex(pairs) for stat, pairs in weapon_stat_pairs.items()}
+
+    # ── Vocabulaire ──
+
+    def _scope(self, game: str | None, faction: str | None) -> set[int] | None:
+        if game is None and faction is None:
+            return None
+        return set().union(*(ids for (g, f), ids in self._scopes.items()
+                             if (game is None or g == game) and (faction is None or f == faction)))
+
+    def rule_names(self, game: str | None = None, faction: str | None = None) -> list[str]:
+        """Règles d'unité (base ou options) présentes dans le périmètre, libellé sans paramètre."""
+        return self._names(self._rules, lambda ref: self._sources[ref][0], game, faction)
+
+    def weapon_rule_names(self, game: str | None = None, faction: str | None = None) -> list[str]:
+        return self._names(self._weapon_rules, lambda ref: self._sources[self._weapon_sources[ref]][0], game, faction)
+
+    def _names(self, postings: dict[str, _RangeIndex], unit_of: Any, game: str | None, faction: str | None) -> list[str]:
+        scope = self._scope(game, faction)
+        return sorted(
+            (self._labels[key] for key, index in postings.items()
+             if scope is None or any(unit_of(ref) in scope for ref in index.refs)),
+            key=str.casefold,
+        )
+
+    # ── Requêtes ──
+
+    def query(
+        self,
+        game: str | None = None,
+        faction: str | None = None,
+        rules: Iterable[str] = (),
+        weapon_rules: Iterable[str] = (),
+        stats: Mapping[str, Bounds] | None = None,
+        weapon_stats: Mapping[str, Bounds] | None = None,
+        with_options: bool = True,
+    ) -> list[UnitMatch]:
+        """Unités satisfaisant tous les critères.
+
+        ``rules`` / ``weapon_rules`` : noms de règles ; un paramètre fixe un minimum (« Effrayant (2) » → ≥ 2).
+        Les règles d'arme doivent toutes être portées par une même arme, qui satisfait aussi ``weapon_stats``
+        (ex. PA ≥ 2 et Explosion). ``with_options=False`` ne considère que le profil de base.
+        """
+        criteria: list[dict[int, set[str | None]]] = []
+
+        def by_unit(source_ids: Iterable[int]) -> dict[int, set[str | None]]:
+            units: dict[int, set[str | None]] = {}
+            for source_id in source_ids:
+                unit_id, option = self._sources[source_id]
+                if option is None or with_options:
+                    units.setdefault(unit_id, set()).add(option)
+            return units
+
+        for rule in map(parse_rule, rules):
+            index = self._rules.get(rule.key)
+            criteria.append(by_unit(index.select(rule.value) if index else ()))
+        for stat, (low, high) in (stats or {}).items():
+            criteria.append(by_unit(self._stats[stat].select(low, high)))
+
+        weapon_criteria = [self._weapon_rules.get(rule.key, _RangeIndex(())).select(rule.value)
+                           for rule in map(parse_rule, weapon_rules)]
+        weapon_criteria += [self._weapon_stats[stat].select(low, high) for stat, (low, high) in (weapon_stats or {}).items()]
+        if weapon_criteria:
+            weapons = set(weapon_criteria[0]).intersection(*weapon_criteria[1:])
+            criteria.append(by_unit(self._weapon_sources[weapon_id] for weapon_id in weapons))
+
+        scope = self._scope(game, faction)
+        if criteria:
+            matched = set(min(criteria, key=len)).intersection(*criteria)
+            if scope is not None:
+                matched &= scope
+        else:
+            matched = scope if scope is not None else set(range(len(self._units)))
+
+        results = []
+        for unit_id in sorted(matched):
+            via: set[str] = set()
+            for criterion in criteria:
+                options = criterion[unit_id]
+                if None not in options:
+                    via.update(option for option in options if option)
+            game_name, faction_name, position, name = self._units[unit_id]
+            results.append(UnitMatch(game_name, faction_name, position, name, tuple(sorted(via))))
+        return results
@@ -0,0 +1,13 @@
+from .combat import (
+    DEFAULT_TARGET,
+    expected_army_output,
+    expected_unit_output,
+    simulate_unit_output,
+)
+
+__all__ = [
+    "DEFAULT_TARGET",
+    "expected_army_output",
+    "expected_unit_output",
+    "simulate_unit_output",
+]
@@ -0,0 +1,152 @@
+from typing import Any
+
+from repositories.rule_parser import combine_rules
+
+
+UnitEntry = dict[str, Any]
+CompactUnit = dict[str, Any]
+FactionData = dict[str, Any]
+
+# Clés d'état ajoutées par le configurateur sur les armes (conservées telles quelles)
+WEAPON_STATE_KEYS = ("count", "_count", "_replaces", "_upgraded", "_unique")
+
+
+def _as_list(value: Any) -> list[Any]:
+    if isinstance(value, dict):
+        return [value] if value else []
+    return value if isinstance(value, list) else []
+
+
+def compact_unit(entry: UnitEntry, unit: FactionData | None = None) -> CompactUnit:
+    """Réduit une entrée d'army_list à des références (noms) + sélections."""
+    base_rules = set(unit.get("special_rules", [])) if unit else set()
+    compact: CompactUnit = {
+        "n": entry.get("name", ""),
+        "c": entry.get("cost", 0),
+        "s": entry.get("size", 1),
+        "w": [
+            {"n": w.get("name", ""), **{k: w[k] for k in WEAPON_STATE_KEYS if k in w}}
+            for w in _as_list(entry.get("weapon", []))
+            if isinstance(w, dict)
+        ],
+    }
+    options = entry.get("options")
+    if isinstance(options, dict) and options:
+        compact["o"] = {
+            group: [o.get("name", "") for o in _as_list(opts) if isinstance(o, dict)]
+            for group, opts in options.items()
+        }
+    mount = entry.get("mount")
+    if isinstance(mount, dict):
+        compact["m"] = mount.get("name", "")
+    extra_rules = sorted(r for r in entry.get("special_rules", []) if isinstance(r, str) and r not in base_rules)
+    if extra_rules:
+        compact["r"] = extra_rules
+    return compact
+
+
+def compact_army_list(army_list: list[UnitEntry], faction: FactionData | None = None) -> list[CompactUnit]:
+    units_by_name = _units_by_name(faction) if faction else {}
+    return [compact_unit(entry, units_by_name.get(entry.get("name"))) for entry in army_list if isinstance(entry, dict)]
+
+
+def _units_by_name(faction: FactionData) -> dict[str, FactionData]:
+    return {u.get("name"): u for u in faction.get("units", []) if isinstance(u, dict)}
+
+
+def _weapon_catalog(unit: FactionData) -> dict[str, dict[str, Any]]:
+    catalog: dict[str, dict[str, Any]] = {}
+    for group in unit.get("upgrade_groups", []):
+        for option in group.get("options", []):
+            for w in _as_list(option.get("weapon")):
+                if isinstance(w, dict):
+                    catalog.setdefault(w.get("name"), w)
+    # Les armes de base priment sur les armes d'options homonymes
+    for w in _as_list(unit.get("weapon", [])):
+        if isinstance(w, dict):
+            catalog[w.get("name")] = w
+    return catalog
+
+
+def _find_option(unit: FactionData, group_name: str, option_name: str) -> dict[str, Any] | None:
+    fallback = None
+    for group in unit.get("upgrade_groups", []):
+        for option in group.get("options", []):
+            if option.get("name") == option_name:
+                if group.get("group") == group_name:
+                    return option
+                fallback = fallback or option
+    return fallback
+
+
+def _find_mount(unit: FactionData, mount_name: str) -> dict[str, Any] | None:
+    for group in unit.get("upgrade_groups", []):
+        if group.get("type") != "mount":
+            continue
+        for option in group.get("options", []):
+            if option.get("name") == mount_name:
+                return option
+    return None
+
+
+class UnknownReferenceError(ValueError):
+    """Raised when a compact unit references data missing from the faction."""
+
+
+def expand_unit(compact: CompactUnit, unit: FactionData) -> UnitEntry:
+    """Ré-hydrate une unité compacte à partir des données de faction courantes."""
+    weapons = []
+    catalog = _weapon_catalog(unit)
+    for ref in compact.get("w", []):
+        profile = catalog.get(ref.get("n"))
+        if profile is None:
+            raise UnknownReferenceError(f"Arme inconnue pour {unit.get('name')} : {ref.get('n')}")
+        state = {k: ref[k] for k in WEAPON_STATE_KEYS if k in ref}
+        weapon = {k: v for k, v in profile.items() if k not in WEAPON_STATE_KEYS}
+        weapons.append({**weapon, **state})
+
+    options: dict[str, list[dict[str, Any]]] = {}
+    for group_name, option_names in compact.get("o", {}).items():
+        for option_name in option_names:
+            option = _find_option(unit, group_name, option_name)
+            if option is None:
+                raise UnknownReferenceError(f"Option inconnue pour {unit.get('name')} : {option_name}")
+            options.setdefault(group_name, []).append(option)
+
+    mount = None
+    if compact.get("m"):
+        mount = _find_mount(unit, compact["m"])
+        if mount is None:
+            raise UnknownReferenceError(f"Monture inconnue pour {unit.get('name')} : {compact['m']}")
+
+    coriace = unit.get("coriace", 0)
+    if mount and "mount" in mount:
+        coriace += mount["mount"].get("coriace_bonus", 0)
+    # Mêmes fusions qu'à l'ajout : « Effrayant (1) » de base + « Effrayant (2) » enregistré → « Effrayant (2) »
+    rules = combine_rules([*unit.get("special_rules", []), *compact.get("r", [])])
+
+    return {
+        "name": unit.get("name", compact.get("n", "")),
+        "type": unit.get("type", "unit"),
+        "unit_detail": unit.get("unit_detail", unit.get("type", "unit")),
+        "cost": compact.get("c", 0),
+        "size": compact.get("s", 1),
+        "quality": unit.get("quality"),
+        "defense": unit.get("defense"),
+        "weapon": weapons,
+        "options": options,
+        "mount": mount,
+        "special_rules": rules,
+        "coriace": coriace,
+    }
+
+
+def expand_army_list(compact_units: list[CompactUnit], faction: FactionData) -> list[UnitEntry]:
+    units_by_name = _units_by_name(faction)
+    army_list = []
+    for compact in compact_units:
+        unit = units_by_name.get(compact.get("n"))
+        if unit is None:
+            raise UnknownReferenceError(f"Unité inconnue dans {faction.get('faction', 'la faction')} : {compact.get('n')}")
+        army_list.append(expand_unit(compact, unit))
+    return army_list
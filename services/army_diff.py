@@ -0,0 +1,178 @@
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass
+from typing import Any
+
+from services.army_fingerprint import unit_fingerprint
+
+
+UnitEntry = dict[str, Any]
+
+CATEGORIES = ("hero", "unit", "vehicle")
+CATEGORY_LABELS = {"hero": "Héros", "unit": "Unités", "vehicle": "Véhicules / Monstres"}
+_VEHICLE_DETAILS = frozenset({"light_vehicle", "vehicle", "titan"})
+_PRICE_KEYS = frozenset({"cost"})  # un recalcul de prix ne change pas la configuration
+
+
+def unit_category(entry: UnitEntry) -> str:
+    if entry.get("type") == "hero" or entry.get("unit_detail") in ("hero", "named_hero"):
+        return "hero"
+    return "vehicle" if entry.get("unit_detail") in _VEHICLE_DETAILS else "unit"
+
+
+def _option_names(entry: UnitEntry) -> Counter:
+    names: Counter = Counter()
+    options = entry.get("options")
+    if isinstance(options, dict):
+        for group, opts in options.items():
+            for option in opts if isinstance(opts, list) else []:
+                if isinstance(option, dict):
+                    names[f"{group} : {option.get('name', '?')}"] += 1
+    mount = entry.get("mount")
+    if isinstance(mount, dict) and mount.get("name"):
+        names[f"Monture : {mount['name']}"] += 1
+    return names
+
+
+def _weapon_counts(entry: UnitEntry) -> Counter:
+    counts: Counter = Counter()
+    weapons = entry.get("weapon", [])
+    for weapon in [weapons] if isinstance(weapons, dict) else weapons if isinstance(weapons, list) else []:
+        if isinstance(weapon, dict):
+            counts[weapon.get("name", "?")] += weapon.get("_count", weapon.get("count", 1)) or 1
+    return counts
+
+
+def _labels(counter: Counter) -> tuple[str, ...]:
+    return tuple(name if count == 1 else f"{name} ×{count}" for name, count in sorted(counter.items()))
+
+
+@dataclass(frozen=True)
+class UnitChange:
+    """One unit present in both lists under the same name but with a different configuration or cost."""
+
+    before: UnitEntry
+    after: UnitEntry
+    options_added: tuple[str, ...] = ()
+    options_removed: tuple[str, ...] = ()
+    weapons_added: tuple[str, ...] = ()
+    weapons_removed: tuple[str, ...] = ()
+
+    @property
+    def name(self) -> str:
+        return self.after.get("name", "?")
+
+    @property
+    def cost_delta(self) -> int:
+        return self.after.get("cost", 0) - self.before.get("cost", 0)
+
+    def describe(self) -> str:
+        parts = [f"+{o}" for o in self.options_added] + [f"−{o}" for o in self.options_removed]
+        if self.weapons_added or self.weapons_removed:
+            parts.append("armes : " + ", ".join([f"+{w}" for w in self.weapons_added] + [f"−{w}" for w in self.weapons_removed]))
+        if self.before.get("size") != self.after.get("size"):
+            parts.append(f"taille {self.before.get('size')} → {self.after.get('size')}")
+        if self.cost_delta:
+            parts.append(f"{self.before.get('cost', 0)} → {self.after.get('cost', 0)} pts")
+        return f"{self.name} : " + (", ".join(parts) or "profil modifié")
+
+
+@dataclass(frozen=True)
+class ArmyDiff:
+    """Structural difference between two army lists (``before`` → ``after``)."""
+
+    added: tuple[UnitEntry, ...]
+    removed: tuple[UnitEntry, ...]
+    changed: tuple[UnitChange, ...]
+    unchanged: int
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+    @property
+    def cost_deltas(self) -> dict[str, int]:
+        """Écart de points par catégorie (héros / unités / véhicules)."""
+        deltas = dict.fromkeys(CATEGORIES, 0)
+        for entry in self.added:
+            deltas[unit_category(entry)] += entry.get("cost", 0)
+        for entry in self.removed:
+            deltas[unit_category(entry)] -= entry.get("cost", 0)
+        for change in self.changed:
+            deltas[unit_category(change.before)] -= change.before.get("cost", 0)
+            deltas[unit_category(change.after)] += change.after.get("cost", 0)
+        return deltas
+
+    @property
+    def cost_delta(self) -> int:
+        return sum(self.cost_deltas.values())
+
+    def unit_lines(self) -> list[str]:
+        lines = [f"Ajout : {u.get('name', '?')} ({u.get('cost', 0)} pts)" for u in self.added]
+        lines += [f"Retrait : {u.get('name', '?')} ({u.get('cost', 0)} pts)" for u in self.removed]
+        lines += [f"Modifiée : {change.describe()}" for change in self.changed]
+        return lines
+
+    def summary(self) -> list[str]:
+        """Résumé « ce qui a changé », une ligne par unité puis les écarts par catégorie."""
+        if self.is_empty:
+            return ["Aucune différence."]
+        return self.unit_lines() + [f"{CATEGORY_LABELS[c]} : {d:+d} pts" for c, d in self.cost_deltas.items() if d]
+
+
+def _change(before: UnitEntry, after: UnitEntry) -> UnitChange:
+    options_before, options_after = _option_names(before), _option_names(after)
+    weapons_before, weapons_after = _weapon_counts(before), _weapon_counts(after)
+    return UnitChange(
+        before, after,
+        _labels(options_after - options_before), _labels(options_before - options_after),
+        _labels(weapons_after - weapons_before), _labels(weapons_before - weapons_after),
+    )
+
+
+def diff_army_lists(before: list[UnitEntry], after: list[UnitEntry]) -> ArmyDiff:
+    """Compare deux listes en temps linéaire.
+
+    Les unités sont d'abord appariées par empreinte de configuration (coût exclu), en multiensemble :
+    deux copies identiques d'un côté ne s'apparient qu'à deux copies de l'autre. Les unités restantes
+    sont appariées par nom (modifiées) ; le reste est ajouté ou retiré. L'ordre des listes est conservé.
+    """
+    before = [u for u in before if isinstance(u, dict)]
+    after = [u for u in after if isinstance(u, dict)]
+    keys_before = [unit_fingerprint(entry, _PRICE_KEYS) for entry in before]
+    keys_after = [unit_fingerprint(entry, _PRICE_KEYS) for entry in after]
+    by_key: dict[str, deque[int]] = defaultdict(deque)
+    for index, key in enumerate(keys_after):
+        by_key[key].append(index)
+
+    matched: dict[int, int] = {}  # index avant → index après
+    unmatched_before = []
+    for index, key in enumerate(keys_before):
+        candidates = by_key.get(key)
+        if candidates:
+            matched[index] = candidates.popleft()
+        else:
+            unmatched_before.append(index)
+
+    paired = set(matched.values())
+    by_name: dict[str, deque[int]] = defaultdict(deque)
+    for index, entry in enumerate(after):
+        if index not in paired:
+            by_name[entry.get("name", "")].append(index)
+    removed = []
+    for index in unmatched_before:
+        candidates = by_name.get(before[index].get("name", ""))
+        if candidates:
+            matched[index] = candidates.popleft()
+            paired.add(matched[index])
+        else:
+            removed.append(before[index])
+
+    changed, unchanged = [], 0
+    for index in sorted(matched, key=matched.__getitem__):
+        old, new = before[index], after[matched[index]]
+        if keys_before[index] == keys_after[matched[index]] and old.get("cost", 0) == new.get("cost", 0):
+            unchanged += 1
+        else:
+            changed.append(_change(old, new))
+    added = [entry for index, entry in enumerate(after) if index not in paired]
+    return ArmyDiff(tuple(added), tuple(removed), tuple(changed), unchanged)
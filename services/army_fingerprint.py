@@ -0,0 +1,68 @@
+import hashlib
+import json
+from typing import Any
+
+
+UnitEntry = dict[str, Any]
+
+# Clés ajoutées à l'affichage/export : elles ne décrivent pas la liste et ne doivent pas changer l'empreinte
+TRANSIENT_KEYS = frozenset({"_display_count", "_mount_weapon"})
+FINGERPRINT_SIZE = 16
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if k not in TRANSIENT_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def _sorted_by_content(items: list[Any]) -> list[Any]:
+    return sorted(items, key=_canonical_json)
+
+
+def normalize_unit(entry: UnitEntry) -> UnitEntry:
+    """Forme canonique d'une unité : clés transitoires retirées, règles et options triées.
+
+    L'ordre des armes est conservé (il porte les remplacements), celui des règles
+    et des options choisies ne l'est pas : l'application les construit via des sets.
+    """
+    unit = _normalize(entry)
+    if isinstance(unit.get("special_rules"), list):
+        unit["special_rules"] = _sorted_by_content(unit["special_rules"])
+    options = unit.get("options")
+    if isinstance(options, dict):
+        unit["options"] = {
+            group: _sorted_by_content(opts) if isinstance(opts, list) else opts
+            for group, opts in options.items()
+        }
+    return unit
+
+
+def normalize_army_list(army_list: list[UnitEntry]) -> list[UnitEntry]:
+    return [normalize_unit(entry) for entry in army_list if isinstance(entry, dict)]
+
+
+def canonical_army_json(army_list: list[UnitEntry], context: dict[str, Any] | None = None) -> str:
+    """Sérialisation canonique (clés triées, sans espaces) d'une liste et de son contexte (jeu, faction, points...)."""
+    return _canonical_json({"context": context or {}, "army_list": normalize_army_list(army_list)})
+
+
+def fingerprint_text(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=FINGERPRINT_SIZE).hexdigest()
+
+
+def army_fingerprint(army_list: list[UnitEntry], context: dict[str, Any] | None = None) -> str:
+    """Empreinte stable d'une liste : deux listes équivalentes donnent la même clé de cache/stockage."""
+    return fingerprint_text(canonical_army_json(army_list, context))
+
+
+def unit_fingerprint(entry: UnitEntry, ignore: frozenset[str] = frozenset()) -> str:
+    """Empreinte d'une unité seule ; ``ignore`` retire des clés de premier niveau (le coût, pour comparer des configurations)."""
+    unit = normalize_unit(entry)
+    return fingerprint_text(_canonical_json({k: v for k, v in unit.items() if k not in ignore}))
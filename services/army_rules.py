@@ -0,0 +1,53 @@
+import math
+from typing import Any
+
+
+UnitEntry = dict[str, Any]
+GameConfig = dict[str, Any]
+
+GAME_CONFIG: dict[str, GameConfig] = {
+    "Age of Fantasy": {"min_points": 250, "max_points": 10000, "default_points": 1000, "hero_limit": 375, "unit_copy_rule": 750, "unit_max_cost_ratio": 0.35, "unit_per_points": 150},
+    "Age of Fantasy Regiments": {"min_points": 500, "max_points": 20000, "default_points": 2000, "hero_limit": 500, "unit_copy_rule": 1000, "unit_max_cost_ratio": 0.4, "unit_per_points": 200},
+    "Grimdark Future": {"min_points": 250, "max_points": 10000, "default_points": 1000, "hero_limit": 375, "unit_copy_rule": 750, "unit_max_cost_ratio": 0.35, "unit_per_points": 150},
+    "Grimdark Future Firefight": {"min_points": 150, "max_points": 1000, "default_points": 300, "hero_limit": 300, "unit_copy_rule": 300, "unit_max_cost_ratio": 0.6, "unit_per_points": 100},
+    "Age of Fantasy Skirmish": {"min_points": 150, "max_points": 1000, "default_points": 300, "hero_limit": 300, "unit_copy_rule": 300, "unit_max_cost_ratio": 0.6, "unit_per_points": 100},
+}
+
+
+def check_hero_limit(army_list: list[UnitEntry], army_points: int, game_config: GameConfig) -> str | None:
+    max_heroes = math.floor(army_points / game_config["hero_limit"])
+    hero_count = sum(1 for unit in army_list if unit.get("type") == "hero")
+    if hero_count > max_heroes:
+        return f"Limite de héros dépassée! Max: {max_heroes} (1 héros/{game_config['hero_limit']} pts)"
+    return None
+
+
+def check_unit_max_cost(
+    army_list: list[UnitEntry], army_points: int, game_config: GameConfig, new_unit_cost: int | None = None
+) -> str | None:
+    max_cost = army_points * game_config["unit_max_cost_ratio"]
+    for unit in army_list:
+        if unit["cost"] > max_cost:
+            return f"Unité {unit['name']} dépasse {int(max_cost)} pts (35% du total)"
+    if new_unit_cost and new_unit_cost > max_cost:
+        return f"Cette unité dépasse {int(max_cost)} pts (35% du total)"
+    return None
+
+
+def check_unit_copy_rule(army_list: list[UnitEntry], army_points: int, game_config: GameConfig) -> str | None:
+    max_copies = 1 + math.floor(army_points / game_config["unit_copy_rule"])
+    unit_counts: dict[str, int] = {}
+    for unit in army_list:
+        unit_counts[unit["name"]] = unit_counts.get(unit["name"], 0) + 1
+    for unit_name, count in unit_counts.items():
+        if count > max_copies:
+            return f"Trop de copies de {unit_name}! Max: {max_copies}"
+    return None
+
+
+def validate_army_rules(army_list: list[UnitEntry], army_points: int, game_config: GameConfig) -> list[str]:
+    """Vérifie les règles de composition. Retourne les messages d'erreur (liste vide si la liste est valide)."""
+    if not game_config:
+        return []
+    checks = (check_hero_limit, check_unit_max_cost, check_unit_copy_rule)
+    return [message for check in checks if (message := check(army_list, army_points, game_config))]
@@ -0,0 +1,169 @@
+import copy
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any
+
+
+Delta = dict[str, Any]
+SessionSnapshot = dict[str, Any]
+
+_TOKEN_PATTERN = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+_MISSING = object()
+SESSION_MAX_AGE = 30 * 24 * 3600  # secondes sans écriture avant qu'une session autosauvée soit supprimée
+
+
+def empty_state() -> SessionSnapshot:
+    return {"meta": {}, "army_list": [], "army_cost": 0, "unit_selections": {}}
+
+
+def apply_delta(state: SessionSnapshot, delta: Delta) -> None:
+    """Applique une opération du journal à l'état (en place)."""
+    op = delta.get("op")
+    army_list = state["army_list"]
+    if op == "add":
+        army_list.append(delta["unit"])
+        state["army_cost"] += delta["unit"].get("cost", 0)
+    elif op == "delete":
+        index = delta["index"]
+        if 0 <= index < len(army_list):
+            state["army_cost"] -= army_list.pop(index).get("cost", 0)
+    elif op == "duplicate":
+        index = delta["index"]
+        if 0 <= index < len(army_list):
+            duplicate = copy.deepcopy(army_list[index])
+            army_list.insert(index + 1, duplicate)
+            state["army_cost"] += duplicate.get("cost", 0)
+    elif op == "replace":
+        state["army_list"] = copy.deepcopy(delta.get("army_list", []))
+        state["army_cost"] = delta.get("army_cost", sum(u.get("cost", 0) for u in state["army_list"]))
+        state["unit_selections"] = {}
+    elif op == "meta":
+        state["meta"].update(delta.get("values", {}))
+    elif op == "selection":
+        values = state["unit_selections"].setdefault(delta["draft"], {})
+        values.update(delta.get("values", {}))
+        for key in delta.get("removed", []):
+            values.pop(key, None)
+    elif op == "forget":
+        state["unit_selections"].pop(delta["draft"], None)
+
+
+class ArmyJournal:
+    """Append-only journal of army-building deltas, compacted into periodic snapshots."""
+
+    def __init__(self, journal_dir: Path, token: str, compact_every: int = 200) -> None:
+        if not _TOKEN_PATTERN.match(token or ""):
+            raise ValueError("Jeton de session invalide.")
+        self.journal_dir = Path(journal_dir)
+        self.token = token
+        self.compact_every = compact_every
+        self.snapshot_path = self.journal_dir / f"{token}.snapshot.json"
+        self.journal_path = self.journal_dir / f"{token}.journal.jsonl"
+        self._pending: list[Delta] = []
+        self._journal_length = 0
+        self._seq = 0
+        self.state = empty_state()
+
+    def restore(self) -> SessionSnapshot | None:
+        """Reconstruit l'état : dernier snapshot + deltas postérieurs. None si rien n'a été journalisé."""
+        if not self.snapshot_path.exists() and not self.journal_path.exists():
+            return None
+
+        state = empty_state()
+        seq = 0
+        if self.snapshot_path.exists():
+            snapshot = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+            state, seq = snapshot["state"], snapshot["seq"]
+
+        length = 0
+        if self.journal_path.exists():
+            with self.journal_path.open(encoding="utf-8") as journal:
+                for line in journal:
+                    try:
+                        delta = json.loads(line)
+                    except ValueError:
+                        break  # dernière ligne tronquée par un arrêt brutal
+                    length += 1
+                    # Deltas déjà intégrés au snapshot (compaction interrompue avant la troncature)
+                    if delta.get("seq", 0) <= seq:
+                        continue
+                    apply_delta(state, delta)
+                    seq = delta["seq"]
+
+        self.state, self._seq, self._journal_length = state, seq, length
+        return copy.deepcopy(state)
+
+    def record(self, op: str, **data: Any) -> None:
+        self._seq += 1
+        delta = {"seq": self._seq, "op": op, **data}
+        apply_delta(self.state, copy.deepcopy(delta))
+        self._pending.append(delta)
+
+    def record_selections(self, unit_selections: dict[str, dict[str, Any]]) -> None:
+        """Journalise uniquement les sélections de brouillon modifiées depuis le dernier appel
+        (valeurs changées, clés retirées, brouillons évincés)."""
+        known = self.state["unit_selections"]
+        for draft in [d for d in known if d not in unit_selections]:
+            self.record("forget", draft=draft)
+        for draft, values in unit_selections.items():
+            previous = known.get(draft, {})
+            changed = {k: v for k, v in values.items() if previous.get(k, _MISSING) != v}
+            removed = [k for k in previous if k not in values]
+            if removed:
+                self.record("selection", draft=draft, values=changed, removed=removed)
+            elif changed:
+                self.record("selection", draft=draft, values=changed)
+
+    def flush(self) -> None:
+        """Écrit en une seule fois (ajout en fin de fichier) les deltas en attente."""
+        if not self._pending:
+            return
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        lines = "".join(json.dumps(d, ensure_ascii=False, separators=(",", ":")) + "\n" for d in self._pending)
+        with self.journal_path.open("a", encoding="utf-8") as journal:
+            journal.write(lines)
+        self._journal_length += len(self._pending)
+        self._pending.clear()
+        if self._journal_length >= self.compact_every:
+            self.compact()
+
+    def compact(self) -> None:
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.snapshot_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps({"seq": self._seq, "state": self.state}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        tmp_path.replace(self.snapshot_path)
+        self.journal_path.write_text("", encoding="utf-8")
+        self._journal_length = 0
+
+
+
+def prune_sessions(journal_dir: Path, max_age: float = SESSION_MAX_AGE, now: float | None = None) -> int:
+    """Supprime les sessions (journal, snapshot) sans écriture depuis ``max_age`` secondes ; renvoie leur nombre."""
+    now = time.time() if now is None else now
+    files_by_token: dict[str, list[Path]] = {}
+    try:
+        paths = list(Path(journal_dir).iterdir())
+    except OSError:
+        return 0
+    for path in paths:
+        token = path.name.split(".", 1)[0]
+        if _TOKEN_PATTERN.match(token) and path.name != token:
+            files_by_token.setdefault(token, []).append(path)
+
+    removed = 0
+    for files in files_by_token.values():
+        try:
+            newest = max(path.stat().st_mtime for path in files)
+        except OSError:
+            continue  # session en cours d'écriture ou déjà supprimée par un autre worker
+        if now - newest < max_age:
+            continue
+        for path in files:
+            path.unlink(missing_ok=True)
+        removed += 1
+    return removed
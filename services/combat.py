@@ -0,0 +1,250 @@
+from dataclasses import dataclass
+from typing import Any
+
+from repositories.rule_parser import parse_rule
+
+
+UnitData = dict[str, Any]
+CombatResult = dict[str, float]
+
+# Cible de référence : infanterie standard (Déf 4+, Coriace 1, 10 figurines)
+DEFAULT_TARGET: UnitData = {"defense": 4, "coriace": 1, "size": 10}
+
+_MAX_BATCH_ELEMENTS = 4_000_000
+
+
+
+@dataclass(frozen=True)
+class AttackProfile:
+    """Dice pool of one weapon line, already multiplied by the number of carriers."""
+
+    name: str
+    dice: int
+    quality: int
+    armor_piercing: int = 0
+    blast: int = 1
+    deadly: int = 1
+    reliable: bool = False
+    rending: bool = False
+    bane: bool = False
+    melee: bool = False
+
+
+def success_probability(target: int) -> float:
+    """P(D6 >= target), un 6 naturel réussit toujours et un 1 échoue toujours."""
+    return (7 - min(max(int(target), 2), 6)) / 6
+
+
+def parse_weapon_rules(rules: list[Any]) -> dict[str, Any]:
+    parsed: dict[str, Any] = {}
+    for text in rules:
+        if not isinstance(text, str):
+            continue
+        rule = parse_rule(text)
+        if rule.key == "explosion" and rule.value:
+            parsed["blast"] = rule.value
+        elif rule.key == "mortel" and rule.value:
+            parsed["deadly"] = rule.value
+        elif rule.key == "fiable":
+            parsed["reliable"] = True
+        elif rule.key == "perforant":
+            parsed["rending"] = True
+        elif rule.key == "fleau":
+            parsed["bane"] = True
+    return parsed
+
+
+def _as_list(value: Any) -> list[Any]:
+    if isinstance(value, dict):
+        return [value]
+    return value if isinstance(value, list) else []
+
+
+def _as_int(value: Any, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _is_melee(weapon: dict[str, Any]) -> bool:
+    rng = weapon.get("range", "Mêlée")
+    return rng in (None, "-") or str(rng).lower() == "mêlée"
+
+
+def _weapon_carriers(unit: UnitData) -> list[tuple[dict[str, Any], int]]:
+    """Associe chaque arme au nombre de figurines qui la portent (même logique que group_weapons)."""
+    size = 1 if unit.get("type") == "hero" else max(_as_int(unit.get("size", 1), 1), 1)
+    weapons = [w for w in _as_list(unit.get("weapon", [])) if isinstance(w, dict)]
+
+    replaced: dict[str, int] = {}
+    for w in weapons:
+        if "_count" in w:
+            for name in w.get("_replaces", []):
+                replaced[name] = replaced.get(name, 0) + (w.get("_count", 1) or 1)
+
+    carriers = []
+    for w in weapons:
+        if "_count" in w:
+            count = w.get("_count", 1) or 1
+        elif w.get("_unique"):
+            count = 1
+        elif "count" in w:
+            count = _as_int(w.get("count"), 1) - replaced.pop(w.get("name"), 0)
+        else:
+            count = size - replaced.pop(w.get("name"), 0)
+        if count > 0:
+            carriers.append((w, count))
+
+    mount = unit.get("mount")
+    if isinstance(mount, dict) and isinstance(mount.get("mount"), dict):
+        for w in _as_list(mount["mount"].get("weapon", [])):
+            if isinstance(w, dict):
+                carriers.append((w, 1))
+    return carriers
+
+
+def attack_profiles(unit: UnitData) -> list[AttackProfile]:
+    """Construit les pools de dés d'une unité (entrée d'army_list ou unité brute de faction)."""
+    quality = _as_int(unit.get("quality"), 4)
+    profiles = []
+    for weapon, carriers in _weapon_carriers(unit):
+        attacks = _as_int(weapon.get("attacks"), 0)
+        if attacks <= 0:
+            continue
+        rules = parse_weapon_rules(weapon.get("special_rules", []))
+        profiles.append(
+            AttackProfile(
+                name=str(weapon.get("name", "Arme")),
+                dice=attacks * carriers,
+                quality=quality,
+                armor_piercing=_as_int(weapon.get("armor_piercing"), 0),
+                blast=rules.get("blast", 1),
+                deadly=rules.get("deadly", 1),
+                reliable=rules.get("reliable", False),
+                rending=rules.get("rending", False),
+                bane=rules.get("bane", False),
+                melee=_is_melee(weapon),
+            )
+        )
+    return profiles
+
+
+def _save_probability(defense: int, armor_piercing: int, bane: bool) -> float:
+    p_save = success_probability(defense + armor_piercing)
+    if bane:
+        # Les 6 naturels en défense doivent être relancés
+        p_save = p_save - 1 / 6 + p_save / 6
+    return p_save
+
+
+def expected_profile(profile: AttackProfile, target: UnitData = DEFAULT_TARGET) -> CombatResult:
+    """Espérance exacte (forme fermée) des touches et blessures d'un pool de dés."""
+    defense = _as_int(target.get("defense"), 4)
+    tough = max(_as_int(target.get("coriace"), 1), 1)
+    blast = min(profile.blast, max(_as_int(target.get("size"), 1), 1))
+
+    p_hit = success_probability(2 if profile.reliable else profile.quality)
+    if profile.rending:
+        # Les 6 naturels pour toucher ont PA(4)
+        groups = [(p_hit - 1 / 6, profile.armor_piercing), (1 / 6, max(profile.armor_piercing, 4))]
+    else:
+        groups = [(p_hit, profile.armor_piercing)]
+
+    hits = wounds = 0.0
+    for p, ap in groups:
+        group_hits = profile.dice * p * blast
+        hits += group_hits
+        wounds += group_hits * (1 - _save_probability(defense, ap, profile.bane))
+    wounds *= min(profile.deadly, tough)
+    return {"hits": hits, "wounds": wounds}
+
+
+def expected_unit_output(unit: UnitData, target: UnitData = DEFAULT_TARGET) -> CombatResult:
+    tough = max(_as_int(target.get("coriace"), 1), 1)
+    result = {"hits": 0.0, "wounds": 0.0, "shooting_wounds": 0.0, "melee_wounds": 0.0}
+    for profile in attack_profiles(unit):
+        expected = expected_profile(profile, target)
+        result["hits"] += expected["hits"]
+        result["wounds"] += expected["wounds"]
+        result["melee_wounds" if profile.melee else "shooting_wounds"] += expected["wounds"]
+    result["kills"] = min(result["wounds"] / tough, max(_as_int(target.get("size"), 1), 1))
+    return result
+
+
+def expected_army_output(army_list: list[UnitData], target: UnitData = DEFAULT_TARGET) -> CombatResult:
+    total = {"hits": 0.0, "wounds": 0.0, "shooting_wounds": 0.0, "melee_wounds": 0.0, "cost": 0.0}
+    for unit in army_list:
+        if not isinstance(unit, dict):
+            continue
+        expected = expected_unit_output(unit, target)
+        for key in ("hits", "wounds", "shooting_wounds", "melee_wounds"):
+            total[key] += expected[key]
+        total["cost"] += unit.get("cost", unit.get("base_cost", 0)) or 0
+    total["wounds_per_100_pts"] = total["wounds"] * 100 / total["cost"] if total["cost"] else 0.0
+    return total
+
+
+def wounds_per_point(unit: UnitData, target: UnitData = DEFAULT_TARGET) -> float:
+    cost = unit.get("cost", unit.get("base_cost", 0)) or 0
+    if not cost:
+        return 0.0
+    return expected_unit_output(unit, target)["wounds"] / cost
+
+
+def simulate_profile(
+    profile: AttackProfile,
+    target: UnitData = DEFAULT_TARGET,
+    rolls: int = 100_000,
+    batch_size: int = 20_000,
+    seed: int | None = None,
+) -> CombatResult:
+    """Simulation Monte Carlo vectorisée (NumPy) d'un pool de dés, par lots."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    defense = _as_int(target.get("defense"), 4)
+    tough = max(_as_int(target.get("coriace"), 1), 1)
+    blast = min(profile.blast, max(_as_int(target.get("size"), 1), 1))
+    hit_target = min(max(2 if profile.reliable else profile.quality, 2), 6)
+    deadly = min(profile.deadly, tough)
+
+    # Borne mémoire : lots de (essais x dés x explosion) éléments au plus
+    batch_size = max(1, min(batch_size, _MAX_BATCH_ELEMENTS // max(profile.dice * blast, 1)))
+    total_hits = total_wounds = 0
+    done = 0
+    while done < rolls:
+        n = min(batch_size, rolls - done)
+        to_hit = rng.integers(1, 7, size=(n, profile.dice))
+        hit = (to_hit >= hit_target) & (to_hit != 1)
+        ap = np.where(profile.rending & (to_hit == 6), max(profile.armor_piercing, 4), profile.armor_piercing)
+        save_target = np.clip(defense + ap, 2, 6)[..., None]
+        saves = rng.integers(1, 7, size=(n, profile.dice, blast))
+        if profile.bane:
+            rerolled = rng.integers(1, 7, size=saves.shape)
+            saves = np.where(saves == 6, rerolled, saves)
+        saved = (saves >= save_target) & (saves != 1)
+        hit = hit[..., None]
+        total_hits += int(hit.sum()) * blast
+        total_wounds += int((hit & ~saved).sum()) * deadly
+        done += n
+
+    return {"hits": total_hits / rolls, "wounds": total_wounds / rolls}
+
+
+def simulate_unit_output(
+    unit: UnitData,
+    target: UnitData = DEFAULT_TARGET,
+    rolls: int = 100_000,
+    batch_size: int = 20_000,
+    seed: int | None = None,
+) -> CombatResult:
+    result = {"hits": 0.0, "wounds": 0.0}
+    for offset, profile in enumerate(attack_profiles(unit)):
+        simulated = simulate_profile(
+            profile, target, rolls=rolls, batch_size=batch_size,
+            seed=None if seed is None else seed + offset,
+        )
+        result["hits"] += simulated["hits"]
+        result["wounds"] += simulated["wounds"]
+    return result
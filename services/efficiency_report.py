@@ -0,0 +1,413 @@
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterator, TextIO
+
+from services.combat import DEFAULT_TARGET, UnitData, expected_unit_output, success_probability
+
+
+ReportRow = dict[str, Any]
+_State = dict[str, Any]
+_Step = Callable[[_State], list[tuple[str, _State]]]
+
+REPORT_SCHEMA = 2  # 2 : configurations bornées par unité (front de Pareto)
+MAX_CONFIGURATIONS = 48  # configurations retenues par unité, hors unité combinée
+REPORT_COLUMNS = [
+    "game",
+    "faction",
+    "version",
+    "unit",
+    "configuration",
+    "cost",
+    "hits",
+    "wounds",
+    "wounds_per_100_pts",
+    "hits_to_destroy",
+    "durability_per_100_pts",
+]
+
+
+def _as_weapon_list(value: Any) -> list[dict[str, Any]]:
+    if isinstance(value, dict):
+        return [value] if value else []
+    return [w for w in value if isinstance(w, dict)] if isinstance(value, list) else []
+
+
+def _requirements_met(weapons: list[dict[str, Any]], requires: list[str]) -> bool:
+    return all(
+        any(w.get("name") == req or req in w.get("tags", []) for w in weapons)
+        for req in requires
+    )
+
+
+def _max_count(unit: UnitData, option: dict[str, Any], weapons: list[dict[str, Any]]) -> int:
+    mc_cfg = option.get("max_count", {})
+    mc_type = mc_cfg.get("type", "size_based") if isinstance(mc_cfg, dict) else "size_based"
+    size = unit.get("size", 1)
+    if mc_type == "fixed":
+        mc = mc_cfg.get("value", 1)
+    elif mc_type == "size_based":
+        mc = min(mc_cfg.get("value", size), size)
+    elif mc_type == "count_in_weapons":
+        name = mc_cfg.get("weapon_name", "")
+        mc = sum(w.get("_count", w.get("count", 1)) for w in weapons if w.get("name") == name)
+    else:
+        mc = size
+    return max(mc, 0)
+
+
+def _replace_weapons(weapons: list[dict[str, Any]], option: dict[str, Any], count: int) -> list[dict[str, Any]]:
+    replaces = option.get("replaces", [])
+    result = list(weapons)
+    if replaces:
+        remaining = count
+        result = []
+        for w in weapons:
+            if w.get("name") in replaces and remaining > 0:
+                w_count = w.get("_count", w.get("count", 1))
+                if w_count > remaining:
+                    wc = dict(w)
+                    wc["_count" if "_count" in w else "count"] = w_count - remaining
+                    result.append(wc)
+                    remaining = 0
+                else:
+                    remaining -= w_count
+            else:
+                result.append(w)
+    extra = {"_count": count, "_replaces": replaces, "_upgraded": True}
+    result.extend({**w, **extra} for w in _as_weapon_list(option.get("weapon")))
+    return result
+
+
+def _with(state: _State, **changes: Any) -> _State:
+    updated = dict(state)
+    updated.update(changes)
+    return updated
+
+
+def _group_steps(unit: UnitData, group: dict[str, Any]) -> list[_Step]:
+    gtype = group.get("type", "")
+    options = [o for o in group.get("options", []) if isinstance(o, dict)]
+
+    if gtype == "weapon":
+        def weapon_step(state: _State) -> list[tuple[str, _State]]:
+            branches = [("", state)]
+            for o in options:
+                branches.append((o.get("name", "Arme"), _with(
+                    state,
+                    weapons=_as_weapon_list(o.get("weapon")),
+                    weapon_cost=state["weapon_cost"] + o.get("cost", 0),
+                )))
+            return branches
+        return [weapon_step]
+
+    if gtype == "conditional_weapon":
+        def conditional_step(state: _State) -> list[tuple[str, _State]]:
+            branches = [("", state)]
+            for o in options:
+                requires = o.get("requires", [])
+                if requires and not _requirements_met(state["weapons"], requires):
+                    continue
+                extra = {"_upgraded": True, **({"_unique": True} if requires else {})}
+                branches.append((o.get("name", "Amélioration"), _with(
+                    state,
+                    weapons=state["weapons"] + [{**w, **extra} for w in _as_weapon_list(o.get("weapon"))],
+                    upgrades_cost=state["upgrades_cost"] + o.get("cost", 0),
+                    rules=state["rules"] + list(o.get("special_rules", [])),
+                )))
+            return branches
+        return [conditional_step]
+
+    if gtype == "variable_weapon_count":
+        def count_step_for(option: dict[str, Any]) -> _Step:
+            def count_step(state: _State) -> list[tuple[str, _State]]:
+                requires = option.get("requires", [])
+                if requires and not _requirements_met(state["weapons"], requires):
+                    return [("", state)]
+                low = option.get("min_count", 0)
+                high = max(_max_count(unit, option, state["weapons"]), low)
+                branches = []
+                # Seules les bornes du curseur sont évaluées (sinon explosion combinatoire)
+                for count in sorted({low, high}):
+                    if count == 0:
+                        branches.append(("", state))
+                        continue
+                    branches.append((f"{count}x {option.get('name', 'Arme')}", _with(
+                        state,
+                        weapons=_replace_weapons(state["weapons"], option, count),
+                        upgrades_cost=state["upgrades_cost"] + count * option.get("cost", 0),
+                    )))
+                return branches
+            return count_step
+        return [count_step_for(o) for o in options]
+
+    if gtype == "role":
+        def role_step(state: _State) -> list[tuple[str, _State]]:
+            branches = [("", state)]
+            for o in options:
+                branches.append((o.get("name", "Rôle"), _with(
+                    state,
+                    weapons=state["weapons"] + _as_weapon_list(o.get("weapon")),
+                    upgrades_cost=state["upgrades_cost"] + o.get("cost", 0),
+                    rules=state["rules"] + list(o.get("special_rules", [])),
+                )))
+            return branches
+        return [role_step]
+
+    if gtype == "upgrades":
+        def upgrade_step_for(option: dict[str, Any]) -> _Step:
+            def upgrade_step(state: _State) -> list[tuple[str, _State]]:
+                return [("", state), (option.get("name", "Option"), _with(
+                    state,
+                    upgrades_cost=state["upgrades_cost"] + option.get("cost", 0),
+                    rules=state["rules"] + list(option.get("special_rules", [])),
+                ))]
+            return upgrade_step
+        return [upgrade_step_for(o) for o in options]
+
+    if gtype == "mount":
+        def mount_step(state: _State) -> list[tuple[str, _State]]:
+            return [("", state)] + [(o.get("name", "Monture"), _with(state, mount=o)) for o in options]
+        return [mount_step]
+
+    return []
+
+
+def _entry(unit: UnitData, state: _State, multiplier: int) -> UnitData:
+    mount = state["mount"]
+    mount_data = mount.get("mount", {}) if mount else {}
+    cost = (unit.get("base_cost", 0) + state["weapon_cost"]) * multiplier + state["upgrades_cost"]
+    cost += mount.get("cost", 0) if mount else 0
+    return {
+        "name": unit.get("name", ""),
+        "type": unit.get("type", "unit"),
+        "cost": cost,
+        "size": 1 if unit.get("type") == "hero" else unit.get("size", 10) * multiplier,
+        "quality": unit.get("quality"),
+        "defense": unit.get("defense"),
+        "coriace": unit.get("coriace", 0) + mount_data.get("coriace_bonus", 0),
+        "weapon": state["weapons"],
+        "mount": mount,
+        "special_rules": state["rules"],
+    }
+
+
+def _required_names(unit: UnitData) -> set[str]:
+    return {
+        req
+        for group in unit.get("upgrade_groups", []) if isinstance(group, dict)
+        for option in group.get("options", []) if isinstance(option, dict)
+        for req in option.get("requires", [])
+    }
+
+
+def _prune(unit: UnitData, branches: list[tuple[tuple[str, ...], _State]], limit: int, required: set[str]) -> list[tuple[tuple[str, ...], _State]]:
+    """Garde au plus ``limit`` configurations partielles : celles qu'aucune autre ne domine, puis les meilleures.
+
+    Une configuration est dominée si une autre, avec les mêmes armes exigées par les options suivantes,
+    coûte moins ou autant pour au moins autant de blessures et de résistance.
+    """
+    if len(branches) <= limit:
+        return branches
+    scored = []
+    for index, (labels, state) in enumerate(branches):
+        entry = _entry(unit, state, 1)
+        score = score_configuration(entry)
+        gate = frozenset(
+            name for w in state["weapons"] for name in [w.get("name"), *w.get("tags", [])] if name in required
+        )
+        scored.append((entry["cost"], -score["wounds"], -score["hits_to_destroy"], index, gate, score))
+
+    frontier: dict[frozenset[str], list[tuple[float, float]]] = {}
+    kept = []
+    for cost, wounds, tough, index, gate, score in sorted(scored, key=lambda s: s[:4]):
+        # Trié par coût croissant : un point déjà retenu ne coûte jamais plus
+        points = frontier.setdefault(gate, [])
+        if any(w <= wounds and t <= tough for w, t in points):
+            continue
+        points.append((wounds, tough))
+        kept.append((index, score))
+
+    if len(kept) > limit:
+        by_wounds = sorted(kept, key=lambda k: (-k[1]["wounds_per_100_pts"], k[0]))[: limit // 2]
+        chosen = {index for index, _ in by_wounds}
+        for index, _ in sorted(kept, key=lambda k: (-k[1]["durability_per_100_pts"], k[0])):
+            if len(chosen) >= limit:
+                break
+            chosen.add(index)
+        kept = [k for k in kept if k[0] in chosen]
+    return [branches[index] for index in sorted(index for index, _ in kept)]
+
+
+def iter_configurations(unit: UnitData, limit: int | None = MAX_CONFIGURATIONS) -> Iterator[tuple[str, UnitData]]:
+    """Énumère les configurations d'une unité sous forme d'entrées d'army_list.
+
+    Au-delà de ``limit`` combinaisons, seules les configurations non dominées (coût, blessures,
+    résistance) sont poursuivies à chaque groupe d'options ; ``limit=None`` énumère tout (2^n).
+    """
+    steps: list[_Step] = []
+    for group in unit.get("upgrade_groups", []):
+        if isinstance(group, dict):
+            steps.extend(_group_steps(unit, group))
+
+    multipliers = [1, 2] if unit.get("type") != "hero" and unit.get("size", 1) > 1 else [1]
+    initial: _State = {
+        "weapons": _as_weapon_list(unit.get("weapon", [])),
+        "weapon_cost": 0,
+        "upgrades_cost": 0,
+        "mount": None,
+        "rules": list(unit.get("special_rules", [])),
+    }
+    required = _required_names(unit)
+
+    branches: list[tuple[tuple[str, ...], _State]] = [((), initial)]
+    for step in steps:
+        branches = [
+            (labels + ((label,) if label else ()), next_state)
+            for labels, state in branches
+            for label, next_state in step(state)
+        ]
+        if limit is not None:
+            branches = _prune(unit, branches, limit, required)
+
+    for labels, state in branches:
+        for multiplier in multipliers:
+            suffix = ("Unité combinée",) if multiplier == 2 else ()
+            yield " + ".join(labels + suffix) or "Base", _entry(unit, state, multiplier)
+
+
+def score_configuration(entry: UnitData, target: UnitData = DEFAULT_TARGET) -> dict[str, float]:
+    expected = expected_unit_output(entry, target)
+    cost = entry.get("cost", 0) or 0
+    tough = max(entry.get("coriace", 0) or 0, 1)
+    # Touches de PA0 nécessaires pour détruire l'unité
+    hits_to_destroy = entry.get("size", 1) * tough / (1 - success_probability(entry.get("defense") or 6))
+    return {
+        "hits": round(expected["hits"], 3),
+        "wounds": round(expected["wounds"], 3),
+        "wounds_per_100_pts": round(expected["wounds"] * 100 / cost, 3) if cost else 0.0,
+        "hits_to_destroy": round(hits_to_destroy, 3),
+        "durability_per_100_pts": round(hits_to_destroy * 100 / cost, 3) if cost else 0.0,
+    }
+
+
+def score_faction(data: dict[str, Any]) -> list[ReportRow]:
+    rows = []
+    for unit in data.get("units", []):
+        if not isinstance(unit, dict):
+            continue
+        for label, entry in iter_configurations(unit):
+            rows.append({
+                "game": data.get("game", ""),
+                "faction": data.get("faction", ""),
+                "version": data.get("version", ""),
+                "unit": unit.get("name", ""),
+                "configuration": label,
+                "cost": entry["cost"],
+                **score_configuration(entry),
+            })
+    return rows
+
+
+def score_faction_file(file_path: str) -> list[ReportRow]:
+    with open(file_path, encoding="utf-8") as file:
+        return score_faction(json.load(file))
+
+
+class EfficiencyReportCache:
+    """On-disk cache of faction reports keyed by faction file and `version`."""
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, faction_file: Path, version: str) -> Path:
+        safe_version = "".join(c if c.isalnum() or c in ".-" else "_" for c in version) or "sans-version"
+        return self.cache_dir / f"{faction_file.stem}-{safe_version}-v{REPORT_SCHEMA}.json"
+
+    def get(self, faction_file: Path, version: str) -> list[ReportRow] | None:
+        path = self._path(faction_file, version)
+        if not path.exists():
+            return None
+        with path.open(encoding="utf-8") as file:
+            return json.load(file)
+
+    def put(self, faction_file: Path, version: str, rows: list[ReportRow]) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(faction_file, version)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(rows, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(path)
+
+
+def _read_version(file_path: Path) -> str:
+    with file_path.open(encoding="utf-8") as file:
+        return str(json.load(file).get("version", ""))
+
+
+def generate_report(
+    factions_dir: Path,
+    cache: EfficiencyReportCache | None = None,
+    workers: int | None = None,
+) -> list[ReportRow]:
+    """Score toutes les factions, en parallèle (un processus par fichier à recalculer)."""
+    files = sorted(Path(factions_dir).glob("*.json"))
+    rows_by_file: dict[Path, list[ReportRow]] = {}
+    pending: list[tuple[Path, str]] = []
+
+    for file_path in files:
+        version = _read_version(file_path)
+        cached = cache.get(file_path, version) if cache else None
+        if cached is not None:
+            rows_by_file[file_path] = cached
+        else:
+            pending.append((file_path, version))
+
+    if len(pending) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers or min(len(pending), os.cpu_count() or 1)) as pool:
+            results = pool.map(score_faction_file, [str(p) for p, _ in pending])
+            computed = list(zip(pending, results))
+    else:
+        computed = [((p, v), score_faction_file(str(p))) for p, v in pending]
+
+    for (file_path, version), rows in computed:
+        rows_by_file[file_path] = rows
+        if cache:
+            cache.put(file_path, version, rows)
+
+    return [row for file_path in files for row in rows_by_file[file_path]]
+
+
+def sort_rows(rows: list[ReportRow], key: str = "wounds_per_100_pts", descending: bool = True) -> list[ReportRow]:
+    return sorted(rows, key=lambda row: row.get(key, 0), reverse=descending)
+
+
+def write_csv(rows: list[ReportRow], output: TextIO) -> None:
+    writer = csv.DictWriter(output, fieldnames=REPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def main(argv: list[str] | None = None) -> int:
+    base_dir = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Rapport d'efficacité de toutes les factions.")
+    parser.add_argument("--factions-dir", type=Path, default=base_dir / "repositories" / "data" / "factions")
+    parser.add_argument("--cache-dir", type=Path, default=base_dir / ".cache" / "efficiency")
+    parser.add_argument("--output", type=Path, default=Path("efficiency_report.csv"))
+    parser.add_argument("--sort", default="wounds_per_100_pts", choices=REPORT_COLUMNS)
+    parser.add_argument("--ascending", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    rows = generate_report(args.factions_dir, EfficiencyReportCache(args.cache_dir), workers=args.workers)
+    rows = sort_rows(rows, args.sort, descending=not args.ascending)
+    with args.output.open("w", encoding="utf-8", newline="") as file:
+        write_csv(rows, file)
+    print(f"{len(rows)} configurations écrites dans {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,158 @@
+import threading
+import time
+from concurrent.futures import CancelledError, Executor, Future
+from typing import Any, Callable, Hashable, Protocol
+
+
+JobKey = tuple[str, str]  # (type d'artefact, empreinte de la liste)
+
+
+class ArtifactStore(Protocol):
+    def get(self, kind: str, key: str) -> bytes | None: ...
+    def put(self, kind: str, key: str, data: bytes) -> bool: ...
+
+
+class _Job:
+    def __init__(self, func: Callable[..., bytes], args: tuple[Any, ...]) -> None:
+        self.func = func
+        self.args = args
+        self.future: Future = Future()  # renvoyé à l'interface, résolu une fois l'artefact stocké
+        self.timer: threading.Timer | None = None
+        self.inner: Future | None = None
+        self.waiters = 0
+        self.failed_at: float | None = None
+
+
+class ExportQueue:
+    """Background export jobs keyed by (kind, army fingerprint), shared by every session.
+
+    Each caller waits through a slot (typically session × format). Pointing a slot to a new
+    fingerprint releases the previous job, which is cancelled if nobody else waits for it and it
+    has not started yet. Submissions are debounced, so clicking through options only renders the
+    list the user stops on. Finished artifacts go to the store; the queue only tracks pending work.
+    A failure is kept for ``failure_ttl`` seconds (so reruns do not resubmit it), until ``retry``, or
+    until nobody waits for it any more.
+    """
+
+    def __init__(self, store: ArtifactStore, executor: Executor, debounce: float = 0.3, failure_ttl: float = 60.0) -> None:
+        self.store = store
+        self.executor = executor
+        self.debounce = debounce
+        self.failure_ttl = failure_ttl
+        self._jobs: dict[JobKey, _Job] = {}
+        self._slots: dict[Hashable, JobKey] = {}
+        self._lock = threading.RLock()
+
+    def request(self, slot: Hashable, kind: str, key: str, func: Callable[..., bytes], *args: Any) -> bytes | Future:
+        """Artefact prêt (octets), sinon le Future du travail en cours, soumis au besoin.
+
+        Un Future terminé en erreur reste mémorisé pour cette empreinte pendant ``failure_ttl`` secondes :
+        il n'est pas relancé à chaque rerun, mais l'est à la première demande après ce délai.
+        """
+        data = self.store.get(kind, key)
+        if data is not None:
+            self.release(slot)
+            return data
+        with self._lock:
+            self._drop_expired_failures()
+            job_key = (kind, key)
+            job = self._jobs.get(job_key)
+            if job is None:
+                job = self._jobs[job_key] = _Job(func, args)
+                self._schedule(job_key, job)
+            if self._slots.get(slot) != job_key:
+                self.release(slot)
+                self._slots[slot] = job_key
+                job.waiters += 1
+            return job.future
+
+    def job(self, kind: str, key: str) -> Future | None:
+        with self._lock:
+            self._drop_expired_failures()
+            job = self._jobs.get((kind, key))
+            return job.future if job is not None else None
+
+    def retry(self, kind: str, key: str) -> bool:
+        """Oublie l'échec mémorisé pour cette empreinte : la prochaine demande relance le travail."""
+        with self._lock:
+            job = self._jobs.get((kind, key))
+            if job is None or job.failed_at is None:
+                return False
+            self._drop((kind, key))
+            return True
+
+    def release(self, slot: Hashable) -> None:
+        """Le slot n'attend plus rien : annule son travail s'il est devenu inutile et n'a pas démarré."""
+        with self._lock:
+            job_key = self._slots.pop(slot, None)
+            job = self._jobs.get(job_key) if job_key else None
+            if job is None:
+                return
+            job.waiters -= 1
+            if job.waiters <= 0 and job.failed_at is not None:
+                self._drop(job_key)  # échec que plus personne n'affiche : la prochaine demande relancera
+                return
+            if job.waiters > 0 or job.future.done():
+                return
+            if job.timer is not None:
+                job.timer.cancel()
+            if job.inner is None or job.inner.cancel():
+                del self._jobs[job_key]
+                job.future.cancel()
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.future.done())
+
+    def _drop(self, job_key: JobKey) -> None:
+        del self._jobs[job_key]
+        for slot in [s for s, k in self._slots.items() if k == job_key]:
+            del self._slots[slot]
+
+    def _drop_expired_failures(self) -> None:
+        now = time.monotonic()
+        for job_key in [k for k, job in self._jobs.items() if job.failed_at is not None and now - job.failed_at >= self.failure_ttl]:
+            self._drop(job_key)
+
+    def _fail(self, job: _Job, exc: BaseException) -> None:
+        with self._lock:
+            job.failed_at = time.monotonic()
+        job.future.set_exception(exc)
+
+    # ── Exécution ──
+
+    def _schedule(self, job_key: JobKey, job: _Job) -> None:
+        if self.debounce > 0:
+            job.timer = threading.Timer(self.debounce, self._start, (job_key, job))
+            job.timer.daemon = True
+            job.timer.start()
+        else:
+            self._start(job_key, job)
+
+    def _start(self, job_key: JobKey, job: _Job) -> None:
+        with self._lock:
+            if self._jobs.get(job_key) is not job:
+                return  # remplacé ou annulé pendant l'attente
+            try:
+                job.inner = self.executor.submit(job.func, *job.args)
+            except RuntimeError as exc:  # exécuteur arrêté ou pool de processus cassé
+                self._fail(job, exc)
+                return
+        job.inner.add_done_callback(lambda inner: self._finish(job_key, job, inner))
+
+    def _finish(self, job_key: JobKey, job: _Job, inner: Future) -> None:
+        try:
+            data = inner.result()
+        except CancelledError:
+            return
+        except Exception as exc:
+            self._fail(job, exc)
+            return
+        try:
+            self.store.put(job_key[0], job_key[1], data)
+        except OSError:
+            pass  # le magasin garde l'artefact en mémoire même si l'écriture disque échoue
+        with self._lock:
+            if self._jobs.get(job_key) is job:
+                self._drop(job_key)
+        job.future.set_result(data)
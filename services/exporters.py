@@ -0,0 +1,676 @@
+import base64
+import csv
+import io
+import json
+import re
+import urllib.parse
+import zlib
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable
+
+from repositories.rule_parser import is_natural_weapon, parse_rule, rule_key
+from services.combat import DEFAULT_TARGET, expected_army_output, expected_unit_output
+from services.font_subset import font_face_css
+from services.pdf_export import render_pdf as _render_pdf
+from services.qr_code import qr_svg
+
+
+UnitEntry = dict[str, Any]
+RenderModel = dict[str, Any]
+Renderer = Callable[..., str | bytes]
+
+# À incrémenter quand le modèle ou un rendu change (invalide les exports stockés par empreinte)
+# 2 : export PDF ; 3 : HTML hors ligne (QR local, polices réduites) ; 4 : règles fusionnées via repositories.rule_parser
+# 5 : modèle sans date par défaut (artefacts stockés par empreinte)
+RENDER_MODEL_VERSION = 5
+
+DETAIL_LABELS = {
+    "named_hero": "Héros nommé",
+    "hero": "Héros",
+    "unit": "Unité de base",
+    "light_vehicle": "Véhicule léger / Petit monstre",
+    "vehicle": "Véhicule / Monstre",
+    "titan": "Titan",
+}
+_DETAIL_ORDER = {"named_hero": 1, "hero": 2, "unit": 3, "light_vehicle": 4, "vehicle": 5, "titan": 6}
+
+
+# ── Mise en forme des données (calculée une fois par armée) ─────────────────
+
+def _as_list(value: Any) -> list[Any]:
+    if isinstance(value, dict):
+        return [value]
+    return value if isinstance(value, list) else []
+
+
+def _priority(unit: UnitEntry) -> int:
+    return _DETAIL_ORDER.get(unit.get("unit_detail", unit.get("type", "unit")), 7)
+
+
+def format_range(rng: Any) -> str:
+    if rng in (None, "-", "mêlée", "Mêlée") or str(rng).lower() == "mêlée":
+        return "-"
+    if isinstance(rng, (int, float)):
+        return f'{int(rng)}"'
+    s = str(rng).strip()
+    return s if s.endswith('"') else f'{s}"'
+
+
+def collect_weapons(unit: UnitEntry) -> list[dict[str, Any]]:
+    # unit["weapon"] contient DEJA toutes les armes consolidees par la page army
+    # (armes de base, remplacements, armes de role). Ne PAS relire unit["options"]
+    # pour eviter les doublons sur les roles avec weapon.
+    result = []
+    for w in _as_list(unit.get("weapon", [])):
+        if isinstance(w, dict):
+            wc = w.copy()
+            wc.setdefault("range", "Mêlée")
+            # Purger _count sur les armes de base (not _upgraded) :
+            # _count ne doit exister que sur les armes ajoutées via slider.
+            # Un résidu de cache ou de JSON corrompu sur une arme de base
+            # fausserait le calcul de replaced_count dans group_weapons.
+            if not wc.get("_upgraded") and "_count" in wc:
+                del wc["_count"]
+            result.append(wc)
+    return result
+
+
+def group_weapons(weapons: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Agrège les armes par clé (même profil).
+    # _count (slider) → utiliser _count comme quantité
+    # Tout le reste → cnt=1 (arme de base, conditional, remplacement total)
+    # La passe _replaces sert uniquement aux sliders (seuls cas avec _count).
+    wmap: dict[tuple[Any, ...], dict[str, Any]] = {}
+    for w in weapons:
+        wc = w.copy()
+        wc.setdefault("range", "Mêlée")
+        key = (wc.get("name", ""), wc.get("range", ""), wc.get("attacks", ""),
+               wc.get("armor_piercing", ""), tuple(sorted(wc.get("special_rules", []))))
+        cnt = wc.get("_count", 1) or 1
+        if key not in wmap:
+            wmap[key] = wc
+            wmap[key]["_display_count"] = cnt
+        else:
+            wmap[key]["_display_count"] += cnt
+    # Soustraire les _replaces UNIQUEMENT pour les sliders (armes avec _count).
+    # Les conditional_weapon (sans _count) n'affectent pas le count des armes de base.
+    for w in weapons:
+        if "_count" not in w or not w.get("_replaces"):
+            continue
+        rc = w.get("_count", 1) or 1
+        for replaced_name in w["_replaces"]:
+            for entry in wmap.values():
+                if entry.get("name") == replaced_name:
+                    entry["_display_count"] -= rc
+                    break
+    return [v for v in wmap.values() if v.get("_display_count", 1) > 0]
+
+
+def _weapon_row(w: dict[str, Any]) -> dict[str, Any]:
+    # Préfixe : slider (_count > 1) → "Nx nom" ; amélioration d'une figurine (_upgraded + _unique) → "1x nom"
+    name = w.get("name", "Arme")
+    cnt = w.get("_display_count", 1) or 1
+    if "_count" in w and cnt > 1:
+        label = f"{cnt}x {name}"
+    elif w.get("_upgraded", False) and w.get("_unique", False):
+        label = f"1x {name}"
+    else:
+        label = name
+    return {
+        "label": label,
+        "name": name,
+        "count": cnt,
+        "range": format_range(w.get("range", "Mêlée")),
+        "attacks": w.get("attacks", "-"),
+        "armor_piercing": w.get("armor_piercing", "-"),
+        "special_rules": list(w.get("special_rules", [])),
+    }
+
+
+def _unit_rules(unit: UnitEntry) -> list[str]:
+    rules = {r for r in unit.get("special_rules", []) if isinstance(r, str)}
+    extra = []
+    if isinstance(unit.get("options"), dict):
+        for group in unit["options"].values():
+            for opt in _as_list(group):
+                if isinstance(opt, dict):
+                    extra.extend(r for r in opt.get("special_rules", []) if isinstance(r, str))
+    mount = unit.get("mount")
+    if isinstance(mount, dict) and isinstance(mount.get("mount"), dict):
+        extra.extend(r for r in mount["mount"].get("special_rules", []) if isinstance(r, str) and not is_natural_weapon(r))
+    # Les règles de l'unité intègrent déjà ses options (paramètres fusionnés) : une option n'ajoute qu'une règle absente
+    known = {rule_key(r) for r in rules}
+    rules.update(r for r in extra if rule_key(r) not in known)
+    return sorted(rules)
+
+
+def _unit_upgrades(unit: UnitEntry) -> list[dict[str, Any]]:
+    upgrades = []
+    if isinstance(unit.get("options"), dict):
+        for group_opts in unit["options"].values():
+            for opt in _as_list(group_opts):
+                if isinstance(opt, dict):
+                    upgrades.append({"name": opt.get("name", "Amélioration"), "special_rules": list(opt.get("special_rules", []))})
+    return upgrades
+
+
+def _unit_mount(unit: UnitEntry) -> dict[str, Any] | None:
+    mount = unit.get("mount")
+    if not isinstance(mount, dict) or "mount" not in mount:
+        return None
+    data = mount["mount"]
+    return {
+        "name": mount.get("name", "Monture"),
+        "cost": mount.get("cost", 0),
+        "special_rules": [
+            r for r in data.get("special_rules", []) if not is_natural_weapon(r) and not parse_rule(r).named("Coriace")
+        ],
+        "weapons": [
+            {
+                "label": w.get("name", "Arme"),
+                "name": w.get("name", "Arme"),
+                "count": 1,
+                "range": format_range(w.get("range", "-")),
+                "attacks": w.get("attacks", "-"),
+                "armor_piercing": w.get("armor_piercing", "-"),
+                "special_rules": list(w.get("special_rules", [])),
+            }
+            for w in _as_list(data.get("weapon", []))
+            if isinstance(w, dict)
+        ],
+    }
+
+
+def _unit_model(unit: UnitEntry) -> dict[str, Any]:
+    detail = unit.get("unit_detail", unit.get("type", "unit"))
+    return {
+        "name": unit.get("name", "Unité"),
+        "cost": unit.get("cost", 0),
+        "quality": unit.get("quality", "-"),
+        "defense": unit.get("defense", "-"),
+        "size": unit.get("size", 10),
+        "coriace": unit.get("coriace", 0),
+        "detail": detail,
+        "detail_label": DETAIL_LABELS.get(detail, ""),
+        "rules": _unit_rules(unit),
+        "upgrades": _unit_upgrades(unit),
+        "weapons": [_weapon_row(w) for w in group_weapons(collect_weapons(unit))],
+        "mount": _unit_mount(unit),
+        "expected_wounds": expected_unit_output(unit)["wounds"],
+    }
+
+
+def share_url(list_data: dict[str, Any], app_url: str) -> str:
+    """URL de l'app avec la liste encodée (JSON compressé + base64) : le téléphone ouvre l'app au scan."""
+    payload = json.dumps(list_data, ensure_ascii=False, separators=(",", ":"))
+    encoded = base64.urlsafe_b64encode(zlib.compress(payload.encode(), level=9)).decode()
+    return app_url + "?list=" + urllib.parse.quote(encoded)
+
+
+def build_render_model(
+    army_list: list[UnitEntry],
+    list_name: str,
+    points: int,
+    game: str = "",
+    faction: str = "",
+    faction_version: str = "",
+    faction_rules: list[Any] | None = None,
+    faction_spells: dict[str, Any] | None = None,
+    app_url: str = "",
+    generated_at: datetime | None = None,
+) -> RenderModel:
+    """Modèle intermédiaire partagé par tous les formats : tri, regroupement des armes, règles, statistiques.
+
+    Sans ``generated_at``, les rendus ne sont pas datés : ils ne dépendent que de la liste et peuvent être
+    stockés par empreinte (l'export JSON, lui, est horodaté au téléchargement).
+    """
+    units = [u for u in army_list if isinstance(u, dict)]
+    sorted_units = sorted(units, key=_priority)
+    army_cost = sum(u.get("cost", 0) for u in units)
+    spells = []
+    for spell_name, spell_data in (faction_spells or {}).items():
+        spells.append({
+            "name": spell_name,
+            "description": spell_data.get("description", "") if isinstance(spell_data, dict) else str(spell_data),
+        })
+    list_data = {
+        "game": game,
+        "faction": faction,
+        "pts": points,
+        "list_name": list_name,
+        "army_list": army_list,
+        "army_cost": army_cost,
+        "faction_version": faction_version,
+        "units": [{"n": u.get("name", ""), "c": u.get("cost", 0)} for u in units],
+    }
+    return {
+        "version": RENDER_MODEL_VERSION,
+        "list_name": list_name,
+        "game": game,
+        "faction": faction,
+        "faction_version": faction_version,
+        "points": points,
+        "army_cost": army_cost,
+        "army_list": army_list,
+        "expected_wounds": expected_army_output(sorted_units)["wounds"],
+        "target_defense": DEFAULT_TARGET["defense"],
+        "units": [_unit_model(u) for u in sorted_units],
+        "faction_rules": sorted(
+            ({"name": r.get("name", ""), "description": r.get("description", "")} for r in faction_rules or [] if isinstance(r, dict)),
+            key=lambda r: r["name"].lower(),
+        ),
+        "spells": spells,
+        "share_url": share_url(list_data, app_url) if app_url else "",
+        "generated_at": generated_at,
+    }
+
+
+def _generated_label(model: RenderModel) -> str:
+    """« Généré par … », suivi de la date si le modèle est daté."""
+    stamp = model.get("generated_at")
+    return "Généré par OPR ArmyBuilder FRA" + (f" — {stamp.strftime('%d/%m/%Y %H:%M')}" if stamp else "")
+
+
+# ── Registre des formats ─────────────────────────────────────────────────────
+
+RENDERERS: dict[str, dict[str, Any]] = {}
+
+
+def register_renderer(name: str, extension: str, mime: str, label: str) -> Callable[[Renderer], Renderer]:
+    """Déclare un format d'export : ajouter un format = écrire une fonction model → texte (ou octets)."""
+    def decorator(func: Renderer) -> Renderer:
+        RENDERERS[name] = {"render": func, "extension": extension, "mime": mime, "label": label}
+        return func
+    return decorator
+
+
+def render(name: str, model: RenderModel, **options: Any) -> str | bytes:
+    if name not in RENDERERS:
+        raise KeyError(f"Format d'export inconnu : {name}")
+    return RENDERERS[name]["render"](model, **options)
+
+
+def esc(txt: Any) -> str:
+    if txt is None:
+        return ""
+    return str(txt).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+# ── HTML (fiche d'armée imprimable) ──────────────────────────────────────────
+
+HTML_STYLE = """
+:root{--bg:#fff;--hdr:#f8f9fa;--accent:#3498db;--txt:#212529;--muted:#6c757d;--brd:#dee2e6;--red:#e74c3c;--rule:#e9ecef;--mount:#f3e5f5;--badge:#e9ecef;}
+*{box-sizing:border-box;}
+body{background:var(--bg);color:var(--txt);font-family:'Inter',sans-serif;margin:0;padding:12px;line-height:1.3;font-size:12px;}
+.army{max-width:210mm;margin:0 auto;}
+
+/* ── Titre & résumé ── */
+.army-title{text-align:center;font-size:18px;font-weight:700;margin-bottom:8px;border-bottom:2px solid var(--accent);padding-bottom:6px;}
+.army-summary{display:flex;justify-content:space-between;align-items:center;background:var(--hdr);padding:8px 12px;border-radius:6px;margin:8px 0 12px;border:1px solid var(--brd);font-size:12px;}
+.summary-cost{font-family:monospace;font-size:16px;font-weight:bold;color:var(--red);}
+
+/* ── Grille 2 colonnes ── */
+.units-grid{display:grid;grid-template-columns:1fr 1fr;gap:8px;}
+
+/* ── Carte unité ── */
+.unit-card{background:var(--bg);border:1px solid var(--brd);border-radius:6px;break-inside:avoid;page-break-inside:avoid;font-size:11px;}
+.unit-header{padding:6px 8px 4px;background:var(--hdr);border-bottom:1px solid var(--brd);border-radius:6px 6px 0 0;}
+.unit-name-container{display:flex;justify-content:space-between;align-items:flex-start;}
+.unit-name{font-size:13px;font-weight:700;margin:0;line-height:1.2;}
+.unit-cost{font-family:monospace;font-size:12px;font-weight:700;color:var(--red);white-space:nowrap;margin-left:6px;}
+.unit-type{font-size:10px;color:var(--muted);margin-top:1px;}
+.unit-stats{display:flex;gap:6px;padding:4px 0 2px;flex-wrap:wrap;}
+.stat-badge{background:var(--badge);padding:2px 7px;border-radius:12px;font-weight:600;display:flex;align-items:center;gap:4px;border:1px solid var(--brd);}
+.stat-value{font-weight:700;font-size:11px;}
+.stat-label{font-size:9px;color:var(--muted);}
+.section{padding:4px 8px 6px;}
+.section-title{font-weight:600;margin:4px 0 3px;font-size:11px;display:flex;align-items:center;gap:5px;border-bottom:1px solid var(--brd);padding-bottom:2px;color:var(--accent);}
+.weapon-table{width:100%;border-collapse:collapse;margin:0 0 4px;font-size:10px;}
+.weapon-table th{background:var(--hdr);padding:2px 5px;text-align:left;font-weight:600;border-bottom:1px solid var(--brd);border-right:1px solid var(--brd);font-size:9px;color:var(--muted);}
+.weapon-table th:last-child{border-right:none;}
+.weapon-table td{padding:2px 5px;border-bottom:1px solid var(--brd);border-right:1px solid var(--brd);vertical-align:top;line-height:1.3;}
+.weapon-table td:last-child{border-right:none;} .weapon-table tr:last-child td{border-bottom:none;}
+.weapon-name{font-weight:600;}
+.rules-section{margin:3px 0 0;}
+.rules-title{font-weight:600;margin-bottom:3px;font-size:10px;color:var(--muted);text-transform:uppercase;letter-spacing:.03em;}
+.rule-tag{background:var(--rule);padding:1px 6px;border-radius:3px;font-size:9px;border:1px solid var(--brd);margin-right:3px;margin-bottom:3px;display:inline-block;line-height:1.5;}
+.mount-section{background:var(--mount);border:1px solid var(--brd);border-radius:4px;padding:4px 8px;margin:4px 0;font-size:10px;}
+.mount-section .section-title{font-size:10px;}
+
+/* ── Page de légende (règles + sorts) ── */
+.legend-page{page-break-before:always;break-before:page;padding:12px 0;}
+.faction-rules{padding:8px;border-radius:6px;border:1px solid var(--brd);}
+.legend-title{text-align:center;color:var(--accent);border-bottom:2px solid var(--accent);padding-bottom:6px;margin-bottom:12px;font-size:14px;font-weight:700;}
+.rule-item{margin-bottom:4px;padding-bottom:4px;border-bottom:1px solid var(--brd);}
+.rule-item:last-child{border-bottom:none;margin-bottom:0;padding-bottom:0;}
+.rule-name{color:var(--accent);font-weight:600;font-size:8px;margin-bottom:1px;}
+.rule-desc{font-size:7.5px;line-height:1.28;color:#555;}
+
+@media print{
+  body{padding:6px;}
+  .army{max-width:100%;}
+  .unit-card{border:0.5px solid #ccc;box-shadow:none;background:white;}
+  .faction-rules{border:0.5px solid #ccc;}
+  .legend-page{page-break-before:always;}
+}
+"""
+
+_WEAPON_TABLE_HEAD = "<thead><tr><th>Arme</th><th>Por</th><th>Att</th><th>PA</th><th>Spé</th></tr></thead>"
+
+
+def _html_weapon_rows(weapons: list[dict[str, Any]]) -> str:
+    return "".join(
+        f"<tr><td class='weapon-name'>{esc(w['label'])}</td><td>{w['range']}</td><td>{w['attacks']}</td>"
+        f"<td>{w['armor_piercing']}</td><td>{', '.join(w['special_rules']) or '-'}</td></tr>"
+        for w in weapons
+    )
+
+
+def _html_upgrades(unit: dict[str, Any]) -> str:
+    """Bloc Améliorations sous les règles spéciales."""
+    if not unit["upgrades"]:
+        return ""
+    items = ""
+    for upgrade in unit["upgrades"]:
+        rules = ", ".join(upgrade["special_rules"])
+        items += f'<span class="rule-tag" style="background:#e8f4fd;border-color:#b8d9f0;">{esc(upgrade["name"])}'
+        if rules:
+            items += f' <span style="font-weight:400;color:#555;">({esc(rules)})</span>'
+        items += '</span>'
+    return (
+        '<div style="border-top:1px solid var(--brd);margin-top:8px;padding-top:8px;">'
+        '<div class="rules-title">Améliorations</div>'
+        f'<div style="margin-bottom:4px;">{items}</div>'
+        '</div>'
+    )
+
+
+def _html_mount(unit: dict[str, Any]) -> str:
+    mount = unit["mount"]
+    if not mount:
+        return ""
+    rules_html = " ".join(f'<span class="rule-tag">{esc(r)}</span>' for r in mount["special_rules"])
+    return f"""<div class="mount-section"><div class="section-title">🐴 {esc(mount['name'])} (+{mount['cost']} pts)</div>
+{('<div style="margin-bottom:8px;">' + rules_html + '</div>') if rules_html else ""}
+<table class="weapon-table">{_WEAPON_TABLE_HEAD}<tbody>{_html_weapon_rows(mount['weapons'])}</tbody></table></div>"""
+
+
+def _html_unit_card(unit: dict[str, Any]) -> str:
+    rules_html = (
+        " ".join(f'<span class="rule-tag">{esc(r)}</span>' for r in unit["rules"])
+        if unit["rules"] else '<span class="rule-tag">Aucune</span>'
+    )
+    detail = f'<div class="unit-type">{unit["detail_label"]}</div>' if unit["detail_label"] else ""
+    coriace = (
+        f'<div class="stat-badge"><span class="stat-label">CORIACE</span><span class="stat-value">{unit["coriace"]}</span></div>'
+        if unit["coriace"] > 0 else ""
+    )
+    return f"""<div class="unit-card">
+  <div class="unit-header">
+    <div class="unit-name-container">
+      <div class="unit-name">{esc(unit['name'])}{detail}</div>
+      <div class="unit-cost">{unit['cost']} pts</div>
+    </div>
+    <div class="unit-stats">
+      <div class="stat-badge"><span class="stat-label">QUAL</span><span class="stat-value">{esc(unit['quality'])}+</span></div>
+      <div class="stat-badge"><span class="stat-label">DÉF</span><span class="stat-value">{esc(unit['defense'])}+</span></div>
+      {coriace}
+      <div class="stat-badge"><span class="stat-label">TAILLE</span><span class="stat-value">{unit['size']}</span></div>
+      <div class="stat-badge"><span class="stat-label">BLESS.</span><span class="stat-value">{unit['expected_wounds']:.1f}</span></div>
+    </div>
+  </div>
+  <div class="section">
+    <div class="rules-section">
+      <div class="rules-title">Règles spéciales</div>
+      <div style="margin-bottom:4px;">{rules_html}</div>
+      {_html_upgrades(unit)}
+    </div>
+    <div class="section-title">⚔️ Armes</div>
+    <table class="weapon-table">
+      {_WEAPON_TABLE_HEAD}
+      <tbody>{_html_weapon_rows(unit['weapons'])}</tbody>
+    </table>
+    {_html_mount(unit)}
+  </div>
+</div>"""
+
+
+def html_legend(model: RenderModel, title: str = "📜 Règles spéciales &amp; Sorts") -> str:
+    # Page légende : règles + sorts en colonnes CSS auto-ajustées (chaque colonne est remplie avant la suivante)
+    rules, spells = model["faction_rules"], model["spells"]
+    if not rules and not spells:
+        return ""
+
+    def item(name: str, description: str) -> str:
+        return (
+            f'<div class="rule-item" style="break-inside:avoid;">'
+            f'<div class="rule-name">{esc(name)}</div>'
+            f'<div class="rule-desc">{esc(description)}</div>'
+            f'</div>'
+        )
+
+    html = '<div class="legend-page"><div class="faction-rules">'
+    html += f'<div class="legend-title">{title}</div>'
+    html += '<div style="columns:3;column-gap:8px;column-rule:1px solid #dee2e6;font-size:7.5px;">'
+    html += "".join(item(r["name"], r["description"]) for r in rules)
+    if spells:
+        if rules:
+            html += '<div class="rule-item" style="break-inside:avoid;border-bottom:2px solid var(--accent);margin-bottom:8px;"><div style="font-size:10px;font-weight:700;color:var(--accent);">✨ Sorts</div></div>'
+        html += "".join(item(s["name"], s["description"]) for s in spells)
+    html += "</div></div></div>"  # ferme columns + faction-rules + legend-page
+    return html
+
+
+def html_svg_qr(svg: str) -> str:
+    return f'<div style="width:96px;height:96px;display:block;margin:0 auto;border:1px solid var(--brd);border-radius:4px;overflow:hidden;">{svg}</div>'
+
+
+def _html_qr(model: RenderModel, qr_png: bytes | None, offline: bool = False) -> str:
+    if not model["share_url"]:
+        return ""
+    style = "width:96px;height:96px;display:block;margin:0 auto;border:1px solid var(--brd);border-radius:4px;"
+    if offline:
+        # Hors ligne : QR vectoriel généré localement, jamais de service externe
+        svg = qr_svg(model["share_url"])
+        if svg is None:
+            return ""
+        image = html_svg_qr(svg)
+    else:
+        if qr_png:
+            src = "data:image/png;base64," + base64.b64encode(qr_png).decode()
+        else:
+            # Fallback URL externe (fonctionne si internet disponible à l'ouverture du HTML)
+            src = "https://api.qrserver.com/v1/create-qr-code/?data=" + urllib.parse.quote(model["share_url"]) + "&size=96x96&margin=2"
+        image = f'<img src="{src}" style="{style}" alt="QR code">'
+    return html_qr_block(image)
+
+
+def html_qr_block(image: str) -> str:
+    return (
+        '<div style="text-align:center;margin-top:28px;padding:16px 0;border-top:1px solid var(--brd);">'
+        '<div style="font-size:10px;color:var(--muted);margin-bottom:8px;letter-spacing:.06em;text-transform:uppercase;">Scanner pour partager</div>'
+        f'{image}'
+        '</div>'
+    )
+
+
+@lru_cache(maxsize=8)
+def minify_css(css: str) -> str:
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def html_army_section(model: RenderModel) -> str:
+    """Titre, résumé et cartes d'unités (sans légende) : partagé par l'export HTML et le recueil de tournoi."""
+    title = f"{esc(model['list_name'])} — {model['army_cost']}/{model['points']} pts"
+    return (
+        f'<div class="army-title">{title}</div>\n'
+        '<div class="army-summary">\n'
+        f'  <div><span style="color:var(--muted);">Unités :</span> <strong>{len(model["units"])}</strong></div>\n'
+        f'  <div><span style="color:var(--muted);">Blessures moy. (Déf {model["target_defense"]}+) :</span> <strong>{model["expected_wounds"]:.1f}</strong></div>\n'
+        f'  <div class="summary-cost">{model["army_cost"]}/{model["points"]} pts</div>\n'
+        '</div>\n'
+        '<div class="units-grid">\n'
+        + "".join(_html_unit_card(unit) for unit in model["units"])
+        + "</div>\n"  # ferme .units-grid
+    )
+
+
+@register_renderer("html", "html", "text/html", "🌐 Export HTML")
+def render_html(model: RenderModel, qr_png: bytes | None = None, offline: bool = False, fonts: dict[int, Path] | None = None) -> str:
+    """Fiche d'armée imprimable.
+
+    ``offline=True`` : aucun appel réseau à l'ouverture (pas de Google Fonts, QR en SVG local, CSS minifié) ;
+    les polices de ``fonts`` sont inlinées, réduites aux seuls glyphes du document.
+    """
+    body = (
+        html_army_section(model)
+        + html_legend(model)
+        + _html_qr(model, qr_png, offline)
+        + f'<div style="text-align:center;margin-top:16px;font-size:11px;color:var(--muted);">{_generated_label(model)}</div></div></body></html>'
+    )
+    if offline:
+        head = f"<style>{font_face_css(fonts or {}, body)}{minify_css(HTML_STYLE)}</style>"
+    else:
+        head = (
+            '<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap" rel="stylesheet">\n'
+            f"<style>{HTML_STYLE}</style>"
+        )
+    return (
+        '<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">\n'
+        f"<title>Liste d'Armée OPR - {esc(model['list_name'])}</title>\n"
+        f'{head}</head><body><div class="army">\n'
+        + body
+    )
+
+
+@register_renderer("html_offline", "html", "text/html", "📴 HTML hors ligne")
+def render_html_offline(model: RenderModel, fonts: dict[int, Path] | None = None) -> str:
+    return render_html(model, offline=True, fonts=fonts)
+
+
+# ── JSON (ré-importable) ─────────────────────────────────────────────────────
+
+@register_renderer("json", "json", "application/json", "📄 Export JSON")
+def render_json(model: RenderModel) -> str:
+    return json.dumps({
+        "game": model["game"],
+        "faction": model["faction"],
+        "faction_version": model["faction_version"],
+        "points": model["points"],
+        "list_name": model["list_name"],
+        "army_list": model["army_list"],
+        "army_cost": model["army_cost"],
+        "exported_at": (model["generated_at"] or datetime.now()).strftime("%Y-%m-%d %H:%M"),
+    }, indent=2, ensure_ascii=False)
+
+
+# ── Texte / Markdown (forums, messageries) ───────────────────────────────────
+
+def _md_weapon(w: dict[str, Any]) -> str:
+    profile = f"{w['range']}, A{w['attacks']}, PA({w['armor_piercing']})"
+    if w["special_rules"]:
+        profile += ", " + ", ".join(w["special_rules"])
+    return f"{w['label']} ({profile})"
+
+
+@register_renderer("markdown", "md", "text/markdown", "📝 Export Markdown")
+def render_markdown(model: RenderModel) -> str:
+    lines = [
+        f"# {model['list_name']} — {model['army_cost']}/{model['points']} pts",
+        "",
+        f"*{model['game']} — {model['faction']}" + (f" ({model['faction_version']})" if model["faction_version"] else "") + "*",
+        "",
+    ]
+    for unit in model["units"]:
+        stats = f"Q{unit['quality']}+ D{unit['defense']}+"
+        if unit["coriace"]:
+            stats += f" Coriace({unit['coriace']})"
+        lines.append(f"## {unit['name']} [{unit['size']}] {stats} — {unit['cost']} pts")
+        lines.append("")
+        if unit["weapons"]:
+            lines.append("- **Armes :** " + " · ".join(_md_weapon(w) for w in unit["weapons"]))
+        if unit["rules"]:
+            lines.append("- **Règles :** " + ", ".join(unit["rules"]))
+        if unit["upgrades"]:
+            lines.append("- **Améliorations :** " + ", ".join(u["name"] for u in unit["upgrades"]))
+        if unit["mount"]:
+            mount = unit["mount"]
+            parts = [" · ".join(_md_weapon(w) for w in mount["weapons"])] + [", ".join(mount["special_rules"])]
+            lines.append(f"- **Monture {mount['name']} :** " + " — ".join(p for p in parts if p))
+        lines.append("")
+    if model["share_url"]:
+        lines += [f"[Ouvrir la liste dans l'app]({model['share_url']})", ""]
+    return "\n".join(lines)
+
+
+# ── Cartes compactes (planche imprimable, une carte par unité) ────────────────
+
+_CARDS_STYLE = (
+    "body{font-family:sans-serif;margin:0;padding:6mm;font-size:9px;color:#212529;}"
+    ".sheet{display:grid;grid-template-columns:repeat(3,1fr);gap:3mm;}"
+    ".card{border:1px solid #adb5bd;border-radius:3px;padding:2mm;break-inside:avoid;page-break-inside:avoid;}"
+    ".card h2{font-size:11px;margin:0 0 1mm;display:flex;justify-content:space-between;}"
+    ".stats{color:#6c757d;margin-bottom:1mm;}"
+    ".card ul{margin:0;padding-left:3mm;} .rules{margin-top:1mm;font-style:italic;}"
+)
+
+
+@register_renderer("cards", "html", "text/html", "🃏 Cartes d'unités")
+def render_cards(model: RenderModel) -> str:
+    cards = []
+    for unit in model["units"]:
+        weapons = list(unit["weapons"]) + (unit["mount"]["weapons"] if unit["mount"] else [])
+        coriace = f" · Coriace {unit['coriace']}" if unit["coriace"] else ""
+        rules = unit["rules"] + [u["name"] for u in unit["upgrades"]]
+        cards.append(
+            f'<div class="card"><h2><span>{esc(unit["name"])}</span><span>{unit["cost"]} pts</span></h2>'
+            f'<div class="stats">Q{esc(unit["quality"])}+ · D{esc(unit["defense"])}+ · Taille {unit["size"]}{coriace}</div>'
+            "<ul>" + "".join(f"<li>{esc(_md_weapon(w))}</li>" for w in weapons) + "</ul>"
+            + (f'<div class="rules">{esc(", ".join(rules))}</div>' if rules else "")
+            + "</div>"
+        )
+    return (
+        '<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">'
+        f"<title>Cartes - {esc(model['list_name'])}</title><style>{_CARDS_STYLE}</style></head>"
+        f'<body><div class="sheet">{"".join(cards)}</div></body></html>'
+    )
+
+
+# ── CSV (tableurs, outils de tournoi) ────────────────────────────────────────
+
+CSV_COLUMNS = ["unit", "detail", "size", "quality", "defense", "coriace", "cost", "weapons", "rules", "upgrades", "mount", "expected_wounds"]
+
+
+@register_renderer("csv", "csv", "text/csv", "📊 Export CSV")
+def render_csv(model: RenderModel) -> str:
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    for unit in model["units"]:
+        writer.writerow({
+            "unit": unit["name"],
+            "detail": unit["detail_label"],
+            "size": unit["size"],
+            "quality": unit["quality"],
+            "defense": unit["defense"],
+            "coriace": unit["coriace"],
+            "cost": unit["cost"],
+            "weapons": " | ".join(_md_weapon(w) for w in unit["weapons"]),
+            "rules": ", ".join(unit["rules"]),
+            "upgrades": ", ".join(u["name"] for u in unit["upgrades"]),
+            "mount": unit["mount"]["name"] if unit["mount"] else "",
+            "expected_wounds": round(unit["expected_wounds"], 2),
+        })
+    return output.getvalue()
+
+
+# ── PDF (mise en page locale, sans réseau ni dépendance) ──────────────────────
+
+@register_renderer("pdf", "pdf", "application/pdf", "📑 Export PDF")
+def render_pdf(model: RenderModel) -> bytes:
+    return _render_pdf(model)
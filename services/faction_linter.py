@@ -0,0 +1,358 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+
+from repositories.common_rules_repository import CommonRulesRepository
+from services.upgrade_graph import compile_upgrade_graph
+
+
+LintIssue = dict[str, str]
+_Check = Callable[[Any, str, list[LintIssue]], None]
+
+LINT_SCHEMA = 3
+UNIT_TYPES = {"hero", "unit"}
+UNIT_DETAILS = {"named_hero", "hero", "unit", "light_vehicle", "vehicle", "titan"}
+GROUP_TYPES = {"weapon", "conditional_weapon", "variable_weapon_count", "role", "upgrades", "mount"}
+MAX_COUNT_TYPES = {"fixed", "size_based", "count_in_weapons"}
+
+
+def _issue(issues: list[LintIssue], path: str, message: str, severity: str = "error") -> None:
+    issues.append({"path": path, "severity": severity, "message": message})
+
+
+# ── Schéma déclaratif compilé une seule fois en fonctions de contrôle ─────────
+
+def _type_check(expected: type | tuple[type, ...], label: str) -> _Check:
+    def check(value: Any, path: str, issues: list[LintIssue]) -> None:
+        if isinstance(value, bool) or not isinstance(value, expected):
+            _issue(issues, path, f"{label} attendu, {type(value).__name__} trouvé")
+    return check
+
+
+def _range_check(low: int, high: int) -> _Check:
+    def check(value: Any, path: str, issues: list[LintIssue]) -> None:
+        if isinstance(value, bool) or not isinstance(value, int):
+            _issue(issues, path, f"entier attendu, {type(value).__name__} trouvé")
+        elif not low <= value <= high:
+            _issue(issues, path, f"valeur {value} hors de [{low}, {high}]")
+    return check
+
+
+def _enum_check(allowed: set[str], severity: str = "error") -> _Check:
+    def check(value: Any, path: str, issues: list[LintIssue]) -> None:
+        if value not in allowed:
+            _issue(issues, path, f"valeur {value!r} inconnue (attendu : {', '.join(sorted(allowed))})", severity)
+    return check
+
+
+def _range_value_check(value: Any, path: str, issues: list[LintIssue]) -> None:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return
+    if isinstance(value, str) and (value.lower() in ("mêlée", "-") or value.rstrip('"').isdigit()):
+        return
+    _issue(issues, path, f"portée invalide : {value!r}")
+
+
+def _list_of(item_check: _Check) -> _Check:
+    def check(value: Any, path: str, issues: list[LintIssue]) -> None:
+        if not isinstance(value, list):
+            _issue(issues, path, f"liste attendue, {type(value).__name__} trouvé")
+            return
+        for index, item in enumerate(value):
+            item_check(item, f"{path}[{index}]", issues)
+    return check
+
+
+def _dict_of(value_check: _Check) -> _Check:
+    def check(value: Any, path: str, issues: list[LintIssue]) -> None:
+        if not isinstance(value, dict):
+            _issue(issues, path, f"objet attendu, {type(value).__name__} trouvé")
+            return
+        for key, item in value.items():
+            value_check(item, f"{path}.{key}", issues)
+    return check
+
+
+def _one_or_many(item_check: _Check) -> _Check:
+    list_check = _list_of(item_check)
+
+    def check(value: Any, path: str, issues: list[LintIssue]) -> None:
+        if isinstance(value, dict):
+            item_check(value, path, issues)
+        else:
+            list_check(value, path, issues)
+    return check
+
+
+def _object(required: dict[str, _Check], optional: dict[str, _Check] | None = None) -> _Check:
+    optional = optional or {}
+
+    def check(value: Any, path: str, issues: list[LintIssue]) -> None:
+        if not isinstance(value, dict):
+            _issue(issues, path, f"objet attendu, {type(value).__name__} trouvé")
+            return
+        for key, key_check in required.items():
+            if key not in value:
+                _issue(issues, f"{path}.{key}", "champ obligatoire manquant")
+            else:
+                key_check(value[key], f"{path}.{key}", issues)
+        for key, key_check in optional.items():
+            if key in value:
+                key_check(value[key], f"{path}.{key}", issues)
+    return check
+
+
+_STR = _type_check(str, "chaîne")
+_INT = _type_check(int, "entier")
+_STR_LIST = _list_of(_STR)
+
+_WEAPON = _object(
+    {"name": _STR, "attacks": _INT, "armor_piercing": _INT},
+    {"range": _range_value_check, "special_rules": _STR_LIST, "count": _INT, "tags": _STR_LIST},
+)
+_MOUNT = _object(
+    {"name": _STR},
+    {"weapon": _one_or_many(_WEAPON), "special_rules": _STR_LIST, "coriace_bonus": _INT},
+)
+_MAX_COUNT = _object(
+    {"type": _enum_check(MAX_COUNT_TYPES)},
+    {"value": _INT, "weapon_name": _STR},
+)
+_OPTION = _object(
+    {"name": _STR, "cost": _INT},
+    {
+        "weapon": _one_or_many(_WEAPON),
+        "special_rules": _STR_LIST,
+        "replaces": _STR_LIST,
+        "requires": _STR_LIST,
+        "mount": _MOUNT,
+        "max_count": _MAX_COUNT,
+        "min_count": _INT,
+        "coriace_bonus": _INT,
+    },
+)
+_GROUP = _object(
+    {"type": _enum_check(GROUP_TYPES), "options": _list_of(_OPTION)},
+    {"group": _STR, "description": _STR},
+)
+_UNIT = _object(
+    {
+        "name": _STR,
+        "type": _enum_check(UNIT_TYPES),
+        "base_cost": _range_check(0, 100_000),
+        "quality": _range_check(2, 6),
+        "defense": _range_check(2, 6),
+    },
+    {
+        # Catégorie inconnue : l'unité n'apparaît que dans le filtre « Tous »
+        "unit_detail": _enum_check(UNIT_DETAILS, "warning"),
+        "size": _range_check(1, 100),
+        "coriace": _range_check(0, 100),
+        "special_rules": _STR_LIST,
+        "weapon": _one_or_many(_WEAPON),
+        "upgrade_groups": _list_of(_GROUP),
+    },
+)
+# Renommages entre versions, lus par services.list_migration
+_MIGRATION = _object(
+    {"from": _STR, "to": _STR},
+    {"units": _dict_of(_STR), "options": _dict_of(_STR), "weapons": _dict_of(_STR)},
+)
+_FACTION = _object(
+    {"game": _STR, "faction": _STR, "units": _list_of(_UNIT)},
+    {
+        "version": _STR,
+        "faction_special_rules": _type_check(list, "liste"),
+        "spells": _type_check(dict, "objet"),
+        "migrations": _list_of(_MIGRATION),
+    },
+)
+
+
+# ── Contrôles de cohérence (références croisées) ─────────────────────────────
+
+def _weapons_of(value: Any) -> list[dict[str, Any]]:
+    if isinstance(value, dict):
+        return [value]
+    return [w for w in value if isinstance(w, dict)] if isinstance(value, list) else []
+
+
+def _check_unit_references(unit: dict[str, Any], path: str, issues: list[LintIssue]) -> None:
+    groups = [g for g in unit.get("upgrade_groups", []) if isinstance(g, dict)]
+    base_weapons = _weapons_of(unit.get("weapon", []))
+    known_weapons = {w.get("name") for w in base_weapons}
+    known_tags = {t for w in base_weapons for t in w.get("tags", [])}
+    for group in groups:
+        for option in group.get("options", []):
+            if isinstance(option, dict):
+                for w in _weapons_of(option.get("weapon")):
+                    known_weapons.add(w.get("name"))
+                    known_tags.update(w.get("tags", []))
+
+    for g_index, group in enumerate(groups):
+        for o_index, option in enumerate(group.get("options", [])):
+            if not isinstance(option, dict):
+                continue
+            o_path = f"{path}.upgrade_groups[{g_index}].options[{o_index}]"
+            for r_index, name in enumerate(option.get("replaces", [])):
+                if name not in known_weapons:
+                    _issue(issues, f"{o_path}.replaces[{r_index}]", f"arme remplacée inconnue : {name!r}")
+            for r_index, name in enumerate(option.get("requires", [])):
+                if name not in known_weapons and name not in known_tags:
+                    _issue(issues, f"{o_path}.requires[{r_index}]", f"prérequis introuvable : {name!r}")
+            max_count = option.get("max_count")
+            if isinstance(max_count, dict) and max_count.get("type") == "count_in_weapons":
+                if max_count.get("weapon_name") not in known_weapons:
+                    _issue(issues, f"{o_path}.max_count.weapon_name", f"arme comptée inconnue : {max_count.get('weapon_name')!r}")
+            if group.get("type") == "variable_weapon_count" and "weapon" not in option:
+                _issue(issues, f"{o_path}.weapon", "arme manquante pour une option à nombre variable")
+            if group.get("type") == "mount" and "mount" not in option:
+                _issue(issues, f"{o_path}.mount", "profil de monture manquant")
+
+    raw_groups = unit.get("upgrade_groups") if isinstance(unit.get("upgrade_groups"), list) else []
+    for cycle in compile_upgrade_graph(unit).cycles:
+        names = " → ".join(str(raw_groups[i].get("group", i)) for i in cycle)
+        _issue(issues, f"{path}.upgrade_groups[{cycle[0]}]", f"prérequis circulaires entre groupes : {names}")
+
+
+def _check_faction_rules(data: dict[str, Any], common_rules: set[str], issues: list[LintIssue]) -> None:
+    for index, rule in enumerate(data.get("faction_special_rules", []) or []):
+        path = f"$.faction_special_rules[{index}]"
+        if isinstance(rule, dict):
+            name = rule.get("name")
+            if not name:
+                _issue(issues, f"{path}.name", "règle sans nom (ignorée au chargement)")
+            elif not rule.get("description") and name not in common_rules:
+                _issue(issues, f"{path}.description", f"description vide : {name!r} absente de common-rules.json")
+        elif isinstance(rule, str) and rule:
+            if rule not in common_rules:
+                _issue(issues, path, f"description vide : {rule!r} absente de common-rules.json")
+        else:
+            _issue(issues, path, "règle invalide (ignorée au chargement)")
+
+
+def lint_faction(data: Any, common_rules: set[str]) -> list[LintIssue]:
+    issues: list[LintIssue] = []
+    _FACTION(data, "$", issues)
+    if not isinstance(data, dict):
+        return issues
+
+    seen: dict[str, int] = {}
+    for index, unit in enumerate(data.get("units", []) if isinstance(data.get("units"), list) else []):
+        if not isinstance(unit, dict):
+            continue
+        path = f"$.units[{index}]"
+        name = unit.get("name")
+        if name in seen:
+            _issue(issues, f"{path}.name", f"nom d'unité en double (déjà en $.units[{seen[name]}])", "warning")
+        elif isinstance(name, str):
+            seen[name] = index
+        _check_unit_references(unit, path, issues)
+    _check_faction_rules(data, common_rules, issues)
+    return issues
+
+
+def lint_file(file_path: str, common_rules: frozenset[str]) -> list[LintIssue]:
+    try:
+        with open(file_path, encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError) as error:
+        return [{"path": "$", "severity": "error", "message": f"JSON illisible : {error}"}]
+    return lint_faction(data, set(common_rules))
+
+
+class LintCache:
+    """JSON cache of lint results keyed by file content hash."""
+
+    def __init__(self, cache_path: Path) -> None:
+        self.cache_path = Path(cache_path)
+        self._entries: dict[str, list[LintIssue]] = {}
+        if self.cache_path.exists():
+            try:
+                self._entries = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            except ValueError:
+                self._entries = {}
+
+    def get(self, key: str) -> list[LintIssue] | None:
+        return self._entries.get(key)
+
+    def put(self, key: str, issues: list[LintIssue]) -> None:
+        self._entries[key] = issues
+
+    def save(self) -> None:
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._entries, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(self.cache_path)
+
+
+def _file_hash(file_path: Path, salt: str) -> str:
+    digest = hashlib.sha256(salt.encode())
+    digest.update(file_path.read_bytes())
+    return digest.hexdigest()
+
+
+def lint_factions(
+    base_dir: Path,
+    cache: LintCache | None = None,
+    workers: int | None = None,
+) -> dict[str, list[LintIssue]]:
+    """Analyse tous les fichiers de faction, en parallèle, en sautant ceux dont le hash n'a pas changé."""
+    base_dir = Path(base_dir)
+    common_rules = frozenset(CommonRulesRepository(base_dir).load_rules_by_title())
+    # Les résultats dépendent aussi des règles communes et de la version du linter
+    salt = f"{LINT_SCHEMA}:" + hashlib.sha256("\n".join(sorted(common_rules)).encode()).hexdigest()
+
+    files = sorted((base_dir / "repositories" / "data" / "factions").glob("*.json"))
+    results: dict[str, list[LintIssue]] = {}
+    pending: list[tuple[Path, str]] = []
+    for file_path in files:
+        key = _file_hash(file_path, salt)
+        cached = cache.get(key) if cache else None
+        if cached is not None:
+            results[file_path.name] = cached
+        else:
+            pending.append((file_path, key))
+
+    if len(pending) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers or min(len(pending), os.cpu_count() or 1)) as pool:
+            computed = list(pool.map(lint_file, [str(p) for p, _ in pending], [common_rules] * len(pending)))
+    else:
+        computed = [lint_file(str(p), common_rules) for p, _ in pending]
+
+    for (file_path, key), issues in zip(pending, computed):
+        results[file_path.name] = issues
+        if cache:
+            cache.put(key, issues)
+    if cache and pending:
+        cache.save()
+
+    return {name: results[name] for name in sorted(results)}
+
+
+def main(argv: list[str] | None = None) -> int:
+    base_dir = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Vérifie les fichiers JSON de faction.")
+    parser.add_argument("--base-dir", type=Path, default=base_dir)
+    parser.add_argument("--cache", type=Path, default=base_dir / ".cache" / "faction_lint.json")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    cache = None if args.no_cache else LintCache(args.cache)
+    results = lint_factions(args.base_dir, cache, workers=args.workers)
+    errors = 0
+    for file_name, issues in results.items():
+        for issue in issues:
+            errors += issue["severity"] == "error"
+            print(f"{file_name}:{issue['path']}: {issue['severity']}: {issue['message']}")
+    print(f"{len(results)} fichier(s) analysé(s), {errors} erreur(s).")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,66 @@
+import base64
+import io
+from functools import lru_cache
+from pathlib import Path
+
+
+FontFiles = dict[int, Path]  # graisse CSS → fichier TTF/OTF
+
+
+def glyph_set(text: str) -> str:
+    """Caractères distincts d'un texte, triés : clé de cache stable pour un même jeu de glyphes."""
+    return "".join(sorted({c for c in text if c.isprintable()}))
+
+
+def _flavor() -> str:
+    try:
+        import brotli  # noqa: F401  (requis par fontTools pour le WOFF2)
+    except ImportError:
+        return "woff"
+    return "woff2"
+
+
+@lru_cache(maxsize=64)
+def _subset(path: str, mtime_ns: int, glyphs: str, flavor: str) -> bytes | None:
+    try:
+        from fontTools import subset
+        from fontTools.ttLib import TTFont
+    except ImportError:
+        return None
+    options = subset.Options()
+    options.flavor = flavor
+    font = TTFont(path)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=glyphs)
+    subsetter.subset(font)
+    buffer = io.BytesIO()
+    font.save(buffer)
+    return buffer.getvalue()
+
+
+def subset_font(path: Path, glyphs: str) -> bytes | None:
+    """Police réduite aux glyphes demandés (WOFF2 si brotli est installé, WOFF sinon).
+
+    None si fontTools est absent ou le fichier illisible. Mémoïsé par (fichier, version du fichier, glyphes).
+    """
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    return _subset(str(path), mtime_ns, glyphs, _flavor())
+
+
+def font_face_css(fonts: FontFiles, text: str, family: str = "Inter") -> str:
+    """Règles @font-face avec les sous-ensembles inlinés en data URI (chaîne vide si rien n'est disponible)."""
+    glyphs = glyph_set(text)
+    rules = []
+    for weight, path in sorted(fonts.items()):
+        data = subset_font(path, glyphs)
+        if not data:
+            continue
+        flavor = "woff2" if data[:4] == b"wOF2" else "woff"
+        rules.append(
+            f"@font-face{{font-family:'{family}';font-weight:{weight};font-display:block;"
+            f"src:url(data:font/{flavor};base64,{base64.b64encode(data).decode()}) format('{flavor}')}}"
+        )
+    return "".join(rules)
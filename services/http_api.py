@@ -0,0 +1,427 @@
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import traceback
+import urllib.parse
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+from services.army_codec import UnknownReferenceError, expand_unit
+from services.army_fingerprint import fingerprint_text
+from services.army_rules import GAME_CONFIG, GameConfig
+from services.exporters import RENDER_MODEL_VERSION, RENDERERS, build_render_model, render
+from services.list_import import MAX_IMPORT_BYTES, ListImportError, import_army_list
+from services.pricing import price_entry
+
+
+FactionData = dict[str, Any]
+FactionsByGame = dict[str, dict[str, FactionData]]
+
+# À incrémenter quand le format d'une réponse change (invalide les ETag déjà distribués)
+API_VERSION = 1
+_JSON = "application/json; charset=utf-8"
+
+
+class ApiError(Exception):
+    """Raised by a route to answer with an HTTP error status and a JSON message."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(frozen=True)
+class ApiResponse:
+    status: int
+    body: bytes
+    content_type: str = _JSON
+    etag: str | None = None
+
+
+def _json_response(payload: Any, status: int = 200, etag: str | None = None) -> ApiResponse:
+    return ApiResponse(status, json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), _JSON, etag)
+
+
+class ResponseCache:
+    """Thread-safe LRU of rendered responses, keyed by the response ETag and bounded in entries and bytes."""
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 16 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: OrderedDict[str, ApiResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> ApiResponse | None:
+        with self._lock:
+            response = self._items.get(key)
+            if response is not None:
+                self._items.move_to_end(key)
+            return response
+
+    def put(self, key: str, response: ApiResponse) -> None:
+        if len(response.body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous.body)
+            self._items[key] = response
+            self.size += len(response.body)
+            while len(self._items) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted.body)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class CatalogApi:
+    """HTTP-agnostic API over the faction catalog and the build/validate/export services.
+
+    Every response carries an ETag derived from the API and render model versions, the route, the
+    request body and the version of the faction data it depends on: a faction update invalidates only
+    its own responses. Exports are rendered on each request (they are stamped with their generation
+    time and can weigh several megabytes); the other responses are kept in a bounded cache.
+    """
+
+    def __init__(
+        self,
+        factions: FactionsByGame,
+        games: list[str],
+        game_config: dict[str, GameConfig] | None = None,
+        app_url: str = "",
+        cache_entries: int = 512,
+        cache_bytes: int = 16 * 1024 * 1024,
+    ) -> None:
+        self.factions = factions
+        self.games = games
+        self.game_config = GAME_CONFIG if game_config is None else game_config
+        self.app_url = app_url
+        self.cache = ResponseCache(cache_entries, cache_bytes)
+        self._catalog_version = fingerprint_text(json.dumps(
+            sorted((g, f, d.get("version", "")) for g, by_name in factions.items() for f, d in by_name.items())
+        ))
+
+    @classmethod
+    def from_repository(cls, repository: Any, **kwargs: Any) -> "CatalogApi":
+        # Catalogue lu une fois par processus (avant fork : partagé en copie sur écriture entre workers)
+        factions, games = repository.load_catalog()
+        return cls(factions, games, **kwargs)
+
+    # ── Dispatch ──
+
+    def handle(self, method: str, path: str, body: bytes = b"", if_none_match: str | None = None) -> ApiResponse:
+        try:
+            parts = [urllib.parse.unquote(p) for p in urllib.parse.urlsplit(path).path.split("/") if p]
+            route, version, args = self._route(method, parts)
+            etag = '"' + fingerprint_text(json.dumps([API_VERSION, RENDER_MODEL_VERSION, version, method, parts], ensure_ascii=False) + "\n" + body.decode("utf-8", "replace")) + '"'
+            if method == "GET" and if_none_match and etag in {tag.strip() for tag in if_none_match.split(",")}:
+                return ApiResponse(304, b"", etag=etag)
+            cached = self.cache.get(etag)
+            if cached is not None:
+                return cached
+            response = route(*args, body=body) if method == "POST" else route(*args)
+            response = ApiResponse(response.status, response.body, response.content_type, etag)
+            if route != self.export:
+                self.cache.put(etag, response)
+            return response
+        except ApiError as exc:
+            return _json_response({"error": str(exc)}, exc.status)
+        except Exception:
+            # Erreur imprévue (donnée de requête d'une forme non vérifiée, bug) : trace côté serveur, JSON côté client
+            traceback.print_exc()
+            return _json_response({"error": "Erreur interne du serveur."}, 500)
+
+    def _route(self, method: str, parts: list[str]) -> tuple[Any, str, tuple[Any, ...]]:
+        """Retourne (fonction, version des données concernées, arguments)."""
+        if parts == ["games"] and method == "GET":
+            return self.list_games, self._catalog_version, ()
+        if len(parts) >= 3 and parts[0] == "games" and parts[2] == "factions":
+            game = parts[1]
+            if game not in self.factions:
+                raise ApiError(404, f"Jeu inconnu : {game}")
+            if len(parts) == 3 and method == "GET":
+                return self.list_factions, self._catalog_version, (game,)
+            if len(parts) >= 4:
+                faction = self._faction(game, parts[3])
+                version = f"{game}/{parts[3]}/{faction.get('version', '')}"
+                rest = parts[4:]
+                if method == "GET":
+                    if not rest:
+                        return self.get_faction, version, (faction,)
+                    if rest == ["units"]:
+                        return self.list_units, version, (faction,)
+                    if len(rest) == 2 and rest[0] == "units":
+                        return self.get_unit, version, (faction, rest[1])
+                if method == "POST":
+                    if rest == ["price"]:
+                        return self.price, version, (faction,)
+                    if rest == ["validate"]:
+                        return self.validate, version, (game, faction)
+                    if len(rest) == 2 and rest[0] == "export":
+                        return self.export, version, (game, faction, rest[1])
+        if method not in ("GET", "POST"):
+            raise ApiError(405, f"Méthode non prise en charge : {method}")
+        raise ApiError(404, "Ressource introuvable : /" + "/".join(parts))
+
+    def _faction(self, game: str, name: str) -> FactionData:
+        faction = self.factions.get(game, {}).get(name)
+        if faction is None:
+            raise ApiError(404, f"Faction inconnue : {game} / {name}")
+        return faction
+
+    @staticmethod
+    def _unit(faction: FactionData, name: str) -> FactionData:
+        unit = next((u for u in faction.get("units", []) if u.get("name") == name), None)
+        if unit is None:
+            raise ApiError(404, f"Unité inconnue : {name}")
+        return unit
+
+    @staticmethod
+    def _body(body: bytes) -> dict[str, Any]:
+        if len(body) > MAX_IMPORT_BYTES:
+            raise ApiError(413, f"Requête trop volumineuse (max {MAX_IMPORT_BYTES // 1024} Ko).")
+        try:
+            data = json.loads(body.decode("utf-8-sig") or "{}")
+        except (UnicodeDecodeError, ValueError) as exc:
+            raise ApiError(400, f"JSON invalide : {exc}") from exc
+        if not isinstance(data, dict):
+            raise ApiError(400, "Le corps de la requête doit être un objet JSON.")
+        return data
+
+    @staticmethod
+    def _check_weapons(weapons: Any, label: str, name_key: str = "name") -> None:
+        if isinstance(weapons, dict):
+            weapons = [weapons]
+        if not isinstance(weapons, list) or not all(isinstance(w, dict) and isinstance(w.get(name_key), str) for w in weapons):
+            raise ApiError(400, f"« {label} » : liste d'armes attendue.")
+        if not all(type(w.get("_count", 1)) is int for w in weapons):
+            raise ApiError(400, f"« {label} » : « _count » doit être un entier.")
+
+    @classmethod
+    def _check_compact(cls, compact: dict[str, Any]) -> None:
+        """Forme d'une unité compacte (voir army_codec), vérifiée avant la ré-hydratation."""
+        if not isinstance(compact.get("n"), str):
+            raise ApiError(400, "« compact.n » : nom d'unité attendu.")
+        if type(compact.get("c", 0)) is not int or type(compact.get("s", 1)) is not int:
+            raise ApiError(400, "« compact.c » et « compact.s » doivent être des entiers.")
+        cls._check_weapons(compact.get("w", []), "compact.w", "n")
+        options = compact.get("o", {})
+        if not isinstance(options, dict) or not all(
+            isinstance(names, list) and all(isinstance(n, str) for n in names) for names in options.values()
+        ):
+            raise ApiError(400, "« compact.o » : objet { groupe: [noms d'options] } attendu.")
+        if compact.get("m") is not None and not isinstance(compact["m"], str):
+            raise ApiError(400, "« compact.m » : nom de monture attendu.")
+        rules = compact.get("r", [])
+        if not isinstance(rules, list) or not all(isinstance(r, str) for r in rules):
+            raise ApiError(400, "« compact.r » : liste de règles attendue.")
+
+    @classmethod
+    def _check_entry(cls, entry: Any, label: str = "entry") -> None:
+        """Forme d'une unité d'army_list : nom, armes, options par groupe, monture."""
+        if not isinstance(entry, dict) or not isinstance(entry.get("name"), str):
+            raise ApiError(400, f"« {label} » : unité avec un nom attendue.")
+        cls._check_weapons(entry.get("weapon", []), f"{label}.weapon")
+        options = entry.get("options") or {}
+        if not isinstance(options, dict) or not all(
+            isinstance(opts, dict) or isinstance(opts, list) and all(isinstance(o, dict) for o in opts) for opts in options.values()
+        ):
+            raise ApiError(400, f"« {label}.options » : objet {{ groupe: [options] }} attendu.")
+        if entry.get("mount") is not None and not isinstance(entry["mount"], dict):
+            raise ApiError(400, f"« {label}.mount » : objet attendu.")
+        for key in ("cost", "size"):
+            if type(entry.get(key, 0)) is not int:
+                raise ApiError(400, f"« {label}.{key} » doit être un entier.")
+
+    # ── Catalogue ──
+
+    def list_games(self) -> ApiResponse:
+        return _json_response({"games": self.games})
+
+    def list_factions(self, game: str) -> ApiResponse:
+        return _json_response({"game": game, "factions": [
+            {"name": name, "version": data.get("version", ""), "units": len(data.get("units", []))}
+            for name, data in sorted(self.factions[game].items())
+        ]})
+
+    def get_faction(self, faction: FactionData) -> ApiResponse:
+        return _json_response({
+            "faction": faction.get("faction", ""),
+            "game": faction.get("game", ""),
+            "version": faction.get("version", ""),
+            "faction_special_rules": faction.get("faction_special_rules", []),
+            "spells": faction.get("spells", {}),
+            "units": [u.get("name", "") for u in faction.get("units", [])],
+        })
+
+    def list_units(self, faction: FactionData) -> ApiResponse:
+        return _json_response({"version": faction.get("version", ""), "units": faction.get("units", [])})
+
+    def get_unit(self, faction: FactionData, name: str) -> ApiResponse:
+        return _json_response(self._unit(faction, name))
+
+    # ── Listes ──
+
+    def price(self, faction: FactionData, body: bytes) -> ApiResponse:
+        """Coût d'une configuration : ``{"entry": <unité d'army_list>}`` ou ``{"compact": <unité compacte>}``."""
+        data = self._body(body)
+        if isinstance(data.get("compact"), dict):
+            self._check_compact(data["compact"])
+            unit = self._unit(faction, data["compact"]["n"])
+            try:
+                entry = expand_unit(data["compact"], unit)
+            except UnknownReferenceError as exc:
+                raise ApiError(422, str(exc)) from exc
+        elif isinstance(data.get("entry"), dict):
+            entry = data["entry"]
+            self._check_entry(entry)
+            unit = self._unit(faction, entry["name"])
+        else:
+            raise ApiError(400, "Champ « entry » ou « compact » attendu.")
+        return _json_response({"name": unit.get("name"), "cost": price_entry(entry, unit), "version": faction.get("version", "")})
+
+    def validate(self, game: str, faction: FactionData, body: bytes) -> ApiResponse:
+        """Même pipeline que l'import de l'app : migration, ré-hydratation, dérive des coûts, composition."""
+        data = self._body(body)
+        points = data.get("points", 0) if isinstance(data.get("points"), int) else 0
+        try:
+            result = import_army_list(body, faction, self.game_config.get(game, {}), points)
+        except ListImportError as exc:
+            raise ApiError(400, str(exc)) from exc
+        return _json_response({
+            "valid": not any(level == "error" for level, _ in result["issues"]),
+            "army_cost": result["army_cost"],
+            "points": points,
+            "issues": [{"level": level, "message": message} for level, message in result["issues"]],
+        })
+
+    def export(self, game: str, faction: FactionData, fmt: str, body: bytes) -> ApiResponse:
+        if fmt not in RENDERERS:
+            raise ApiError(404, f"Format d'export inconnu : {fmt}")
+        data = self._body(body)
+        army_list = data.get("army_list")
+        if not isinstance(army_list, list):
+            raise ApiError(400, "Champ « army_list » attendu.")
+        for index, entry in enumerate(army_list):
+            self._check_entry(entry, f"army_list[{index}]")
+        model = build_render_model(
+            army_list, str(data.get("list_name", "Liste")), data.get("points", 0) if isinstance(data.get("points"), int) else 0,
+            game, faction.get("faction", ""), faction.get("version", ""),
+            faction.get("faction_special_rules", []), faction.get("spells", {}), self.app_url, datetime.now(),
+        )
+        output = render(fmt, model)
+        mime = RENDERERS[fmt]["mime"]
+        if isinstance(output, str):
+            return ApiResponse(200, output.encode("utf-8"), f"{mime}; charset=utf-8")
+        return ApiResponse(200, output, mime)
+
+
+# ── Serveur HTTP (bibliothèque standard) ─────────────────────────────────────
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    server_version = "OPRArmyBuilderAPI/" + str(API_VERSION)
+    api: CatalogApi  # fixé par make_server
+
+    def _dispatch(self, method: str, send_body: bool = True) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_IMPORT_BYTES:
+            response = _json_response({"error": "Requête trop volumineuse."}, 413)
+        else:
+            body = self.rfile.read(length) if length else b""
+            response = self.api.handle(method, self.path, body, self.headers.get("If-None-Match"))
+        self.send_response(response.status)
+        if response.etag:
+            self.send_header("ETag", response.etag)
+            self.send_header("Cache-Control", "no-cache")  # revalidation systématique, réponse 304 si inchangée
+        if response.status != 304:
+            self.send_header("Content-Type", response.content_type)
+            self.send_header("Content-Length", str(len(response.body)))
+        self.end_headers()
+        if send_body and response.status != 304:
+            self.wfile.write(response.body)
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_HEAD(self) -> None:
+        self._dispatch("GET", send_body=False)
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not getattr(self.server, "quiet", False):
+            super().log_message(format, *args)
+
+
+def make_server(api: CatalogApi, host: str = "127.0.0.1", port: int = 8765, quiet: bool = False) -> ThreadingHTTPServer:
+    handler = type("BoundApiRequestHandler", (ApiRequestHandler,), {"api": api})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.quiet = quiet  # type: ignore[attr-defined]
+    return server
+
+
+def serve(server: ThreadingHTTPServer, workers: int = 1) -> None:
+    """Sert les requêtes ; avec ``workers`` > 1, des processus forkés se partagent la socket d'écoute.
+
+    Le processus parent arrête ses workers en sortant.
+    """
+    children: list[int] = []
+    if workers > 1 and hasattr(os, "fork"):
+        for _ in range(workers - 1):
+            pid = os.fork()
+            if pid == 0:
+                children = []
+                break
+            children.append(pid)
+    try:
+        server.serve_forever()
+    finally:
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="API HTTP/JSON en lecture seule : catalogue, coûts, validation et export de listes.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--base-dir", type=Path, default=Path("."))
+    parser.add_argument("--workers", type=int, default=1, help="Processus servant la même socket (Linux/macOS)")
+    parser.add_argument("--app-url", default="", help="URL de l'app pour les liens de partage des exports")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    from repositories.faction_repository import JsonFactionRepository
+
+    base_dir = args.base_dir.resolve()
+    shared_catalog = os.environ.get("OPR_SHARED_CATALOG")
+    repository = JsonFactionRepository(
+        base_dir,
+        artifact_path=base_dir / "repositories" / "data" / "catalog.bin",
+        shared_catalog_path=Path(shared_catalog) if shared_catalog else None,
+    )
+    api = CatalogApi.from_repository(repository, app_url=args.app_url)
+    server = make_server(api, args.host, args.port, args.quiet)
+    print(f"API sur http://{args.host}:{server.server_address[1]}/games ({len(api.games)} jeux, {args.workers} worker(s))", flush=True)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        serve(server, args.workers)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
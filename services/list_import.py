@@ -0,0 +1,151 @@
+import json
+from typing import Any, BinaryIO
+
+from services.army_codec import UnknownReferenceError, compact_unit, expand_unit
+from services.army_rules import validate_army_rules
+from services.list_migration import ListMigrator
+
+
+UnitEntry = dict[str, Any]
+FactionData = dict[str, Any]
+ImportIssue = tuple[str, str]  # (niveau : "error" | "warning" | "info", message)
+
+MAX_IMPORT_BYTES = 2 * 1024 * 1024
+MAX_IMPORT_UNITS = 300
+_READ_CHUNK = 64 * 1024
+
+
+class ListImportError(ValueError):
+    """Raised when an uploaded list cannot be read at all (too large, not JSON, wrong shape)."""
+
+
+def read_limited(stream: BinaryIO, limit: int = MAX_IMPORT_BYTES) -> bytes:
+    """Lit le flux par blocs et abandonne dès que la limite est dépassée (sans tout charger)."""
+    chunks = []
+    size = 0
+    while chunk := stream.read(_READ_CHUNK):
+        size += len(chunk)
+        if size > limit:
+            raise ListImportError(f"Fichier trop volumineux (max {limit // 1024} Ko).")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def parse_list_file(raw: bytes) -> dict[str, Any]:
+    if len(raw) > MAX_IMPORT_BYTES:
+        raise ListImportError(f"Fichier trop volumineux (max {MAX_IMPORT_BYTES // 1024} Ko).")
+    try:
+        data = json.loads(raw.decode("utf-8-sig"))
+    except (UnicodeDecodeError, ValueError) as exc:
+        raise ListImportError(f"JSON invalide : {exc}") from exc
+    if not isinstance(data, dict) or not isinstance(data.get("army_list"), list):
+        raise ListImportError("Fichier invalide.")
+    if len(data["army_list"]) > MAX_IMPORT_UNITS:
+        raise ListImportError(f"Trop d'unités dans la liste (max {MAX_IMPORT_UNITS}).")
+    return data
+
+
+def _units_by_name(faction: FactionData) -> dict[str, FactionData]:
+    return {u.get("name"): u for u in faction.get("units", []) if isinstance(u, dict)}
+
+
+def _drift_issues(entry: UnitEntry, unit: FactionData) -> list[ImportIssue]:
+    """Écarts entre l'unité importée et la fiche courante : coûts d'options/monture et profil."""
+    issues: list[ImportIssue] = []
+    name = entry.get("name", "")
+    current_costs = {
+        (group.get("group"), option.get("name")): option.get("cost", 0)
+        for group in unit.get("upgrade_groups", [])
+        for option in group.get("options", [])
+    }
+    options = entry.get("options") if isinstance(entry.get("options"), dict) else {}
+    for group_name, chosen in options.items():
+        for option in chosen if isinstance(chosen, list) else [chosen]:
+            if not isinstance(option, dict):
+                continue
+            current = current_costs.get((group_name, option.get("name")))
+            if current is not None and "cost" in option and option["cost"] != current:
+                issues.append(("warning", f"{name} : « {option.get('name')} » coûte désormais {current} pts (au lieu de {option['cost']})."))
+    mount = entry.get("mount")
+    if isinstance(mount, dict) and "cost" in mount:
+        current = next((c for (g, o), c in current_costs.items() if o == mount.get("name")), None)
+        if current is not None and current != mount["cost"]:
+            issues.append(("warning", f"{name} : la monture « {mount.get('name')} » coûte désormais {current} pts (au lieu de {mount['cost']})."))
+    for stat, label in (("quality", "Qualité"), ("defense", "Défense")):
+        if entry.get(stat) is not None and unit.get(stat) is not None and entry[stat] != unit[stat]:
+            issues.append(("warning", f"{name} : {label} modifiée ({entry[stat]}+ → {unit[stat]}+)."))
+    return issues
+
+
+def rehydrate_army_list(army_list: list[Any], faction: FactionData) -> tuple[list[UnitEntry], list[ImportIssue]]:
+    """Reconstruit chaque unité depuis les données de faction courantes, en conservant coût, taille et sélections.
+
+    Les unités introuvables (ou référençant des armes/options disparues) sont gardées telles quelles et signalées.
+    """
+    units_by_name = _units_by_name(faction)
+    rehydrated: list[UnitEntry] = []
+    issues: list[ImportIssue] = []
+    for entry in army_list:
+        if not isinstance(entry, dict) or not entry.get("name"):
+            issues.append(("error", "Entrée ignorée : unité sans nom."))
+            continue
+        try:
+            entry = {**entry, "cost": int(entry.get("cost", 0))}
+        except (TypeError, ValueError):
+            issues.append(("error", f"{entry['name']} : coût invalide, unité ignorée."))
+            continue
+        unit = units_by_name.get(entry["name"])
+        if unit is None:
+            issues.append(("error", f"Unité inconnue dans {faction.get('faction', 'la faction')} : {entry['name']}"))
+            rehydrated.append(entry)
+            continue
+        issues.extend(_drift_issues(entry, unit))
+        try:
+            rehydrated.append(expand_unit(compact_unit(entry, unit), unit))
+        except UnknownReferenceError as exc:
+            issues.append(("warning", f"{exc} (profil importé conservé)"))
+            rehydrated.append(entry)
+    return rehydrated, issues
+
+
+def import_army_list(
+    raw: bytes,
+    faction: FactionData,
+    game_config: dict[str, Any],
+    points: int,
+    migrator: ListMigrator | None = None,
+) -> dict[str, Any]:
+    """Pipeline complet d'import : lecture, ré-hydratation, contrôles de dérive et règles de composition.
+
+    Sans effet de bord : conçu pour tourner dans un thread d'arrière-plan. ``migrator`` : migrateur
+    de la faction déjà construit (partagé par l'appelant), créé à la demande sinon.
+    """
+    data = parse_list_file(raw)
+    issues: list[ImportIssue] = []
+    if data.get("faction") and faction.get("faction") and data["faction"] != faction["faction"]:
+        issues.append(("warning", f"Liste créée pour {data['faction']}, importée dans {faction['faction']}."))
+    imported_version = data.get("faction_version")
+    if not imported_version:
+        issues.append(("info", "Version de faction absente du fichier : contrôles de dérive limités."))
+    army_list = data["army_list"]
+    if imported_version and faction.get("version") and imported_version != faction["version"]:
+        # Liste d'une version antérieure : renommages appliqués et coûts recalculés
+        issues.append(("warning", f"Liste créée avec la version {imported_version}, migrée vers {faction['version']}."))
+        migration = (migrator or ListMigrator(faction)).migrate_army_list([u for u in army_list if isinstance(u, dict)], imported_version)
+        army_list = migration["army_list"]
+        issues.extend(migration["notes"])
+
+    army_list, unit_issues = rehydrate_army_list(army_list, faction)
+    issues.extend(unit_issues)
+    army_cost = sum(u.get("cost", 0) for u in army_list)
+    if "army_cost" in data and data["army_cost"] != army_cost:
+        issues.append(("warning", f"Coût total recalculé : {army_cost} pts (fichier : {data['army_cost']} pts)."))
+    if points and army_cost > points:
+        issues.append(("error", f"Dépassement : {army_cost} / {points} pts"))
+    issues.extend(("error", message) for message in validate_army_rules(army_list, points, game_config))
+    return {
+        "list_name": data.get("list_name"),
+        "army_list": army_list,
+        "army_cost": army_cost,
+        "issues": issues,
+    }
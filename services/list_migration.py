@@ -0,0 +1,291 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from services.army_codec import UnknownReferenceError, compact_unit, expand_unit
+from services.pricing import price_entry, untraceable_options
+
+
+UnitEntry = dict[str, Any]
+CompactUnit = dict[str, Any]
+FactionData = dict[str, Any]
+MigrationNote = tuple[str, str]  # (niveau : "error" | "warning" | "info", message)
+
+
+@dataclass(frozen=True)
+class RenameMap:
+    """Old name → current name for units, options (mounts included) and weapons."""
+
+    units: dict[str, str] = field(default_factory=dict)
+    options: dict[str, str] = field(default_factory=dict)
+    weapons: dict[str, str] = field(default_factory=dict)
+
+    def then(self, step: "RenameMap") -> "RenameMap":
+        """Compose deux étapes : A→B suivi de B→C donne A→C."""
+        def compose(first: dict[str, str], second: dict[str, str]) -> dict[str, str]:
+            composed = {old: second.get(new, new) for old, new in first.items()}
+            for old, new in second.items():
+                composed.setdefault(old, new)
+            return composed
+
+        return RenameMap(
+            compose(self.units, step.units),
+            compose(self.options, step.options),
+            compose(self.weapons, step.weapons),
+        )
+
+
+def _step_renames(step: dict[str, Any]) -> RenameMap:
+    return RenameMap(
+        dict(step.get("units", {})),
+        dict(step.get("options", {})),
+        dict(step.get("weapons", {})),
+    )
+
+
+class ListMigrator:
+    """Migrates army lists saved against an older version of one faction's data.
+
+    Renames come from the faction file's optional ``migrations`` list
+    (``{"from": "FR-3.5.1", "to": "FR-3.5.2", "units": {...}, "options": {...}, "weapons": {...}}``);
+    costs are recomputed from the current data, except that a lower cost is only applied when every
+    option of the unit can be traced in the entry (see ``pricing.untraceable_options``).
+    """
+
+    def __init__(self, faction: FactionData) -> None:
+        self.faction = faction
+        self.version = faction.get("version", "")
+        self._units_by_name = {u.get("name"): u for u in faction.get("units", []) if isinstance(u, dict)}
+        self._steps = {s["from"]: s for s in faction.get("migrations", []) if isinstance(s, dict) and s.get("from")}
+        self._renames: dict[tuple[str, str], RenameMap] = {}
+        self._unit_mappings: dict[tuple[str, str], dict[str, FactionData | None]] = {}
+        self._untraceable: dict[str, list[str]] = {}
+
+    def renames(self, from_version: str) -> RenameMap:
+        key = (from_version, self.version)
+        if key not in self._renames:
+            renames = RenameMap()
+            version, seen = from_version, set()
+            while version != self.version and version in self._steps and version not in seen:
+                seen.add(version)
+                step = self._steps[version]
+                renames = renames.then(_step_renames(step))
+                version = step.get("to", "")
+            self._renames[key] = renames
+        return self._renames[key]
+
+    def resolve_unit(self, from_version: str, name: str) -> FactionData | None:
+        """Fiche courante correspondant à un nom d'unité d'une version antérieure (mémoïsé par couple de versions)."""
+        mapping = self._unit_mappings.setdefault((from_version, self.version), {})
+        if name not in mapping:
+            mapping[name] = self._units_by_name.get(self.renames(from_version).units.get(name, name))
+        return mapping[name]
+
+    def _untraceable_options(self, unit: FactionData) -> list[str]:
+        name = unit.get("name", "")
+        if name not in self._untraceable:
+            self._untraceable[name] = untraceable_options(unit)
+        return self._untraceable[name]
+
+    def _rename_compact(self, compact: CompactUnit, renames: RenameMap, unit_name: str) -> CompactUnit:
+        weapons = renames.weapons
+        renamed = {**compact, "n": unit_name}
+        renamed["w"] = [
+            {
+                **ref,
+                "n": weapons.get(ref.get("n"), ref.get("n")),
+                **({"_replaces": [weapons.get(r, r) for r in ref["_replaces"]]} if isinstance(ref.get("_replaces"), list) else {}),
+            }
+            for ref in compact.get("w", [])
+        ]
+        if "o" in compact:
+            renamed["o"] = {group: [renames.options.get(n, n) for n in names] for group, names in compact["o"].items()}
+        if compact.get("m"):
+            renamed["m"] = renames.options.get(compact["m"], compact["m"])
+        return renamed
+
+    def migrate_compact(self, compact: CompactUnit, from_version: str) -> tuple[CompactUnit, UnitEntry | None, list[MigrationNote]]:
+        """Migre une unité compacte. Retourne (unité compacte migrée, entrée ré-hydratée ou None, notes)."""
+        old_name = compact.get("n", "")
+        unit = self.resolve_unit(from_version, old_name)
+        if unit is None:
+            return compact, None, [("error", f"Unité supprimée ou inconnue : {old_name}")]
+
+        notes: list[MigrationNote] = []
+        if unit.get("name") != old_name:
+            notes.append(("info", f"{old_name} renommée en {unit.get('name')}."))
+        migrated = self._rename_compact(compact, self.renames(from_version), unit.get("name", old_name))
+        try:
+            entry = expand_unit(migrated, unit)
+        except UnknownReferenceError as exc:
+            return compact, None, [("error", str(exc))]
+
+        cost, stored = price_entry(entry, unit), compact.get("c")
+        untraceable = self._untraceable_options(unit) if isinstance(stored, int) and cost < stored else []
+        if untraceable:
+            # Choix invisibles dans l'entrée : le recalcul est un minorant, le coût enregistré est conservé
+            notes.append(("warning", f"{entry['name']} : coût recalculé {cost} pts inférieur au coût enregistré ({stored} pts), "
+                                     f"non appliqué — options non traçables : {', '.join(untraceable)}."))
+            cost = stored
+        elif cost != compact.get("c", cost):
+            notes.append(("warning", f"{entry['name']} : coût recalculé {compact.get('c')} → {cost} pts."))
+        entry["cost"] = migrated["c"] = cost
+        return migrated, entry, notes
+
+    def migrate_compact_list(self, compact_units: list[CompactUnit], from_version: str) -> dict[str, Any]:
+        """Migre une liste stockée sous forme compacte (base SQLite)."""
+        units: list[CompactUnit] = []
+        army_list: list[UnitEntry] = []
+        notes: list[MigrationNote] = []
+        for compact in compact_units:
+            migrated, entry, unit_notes = self.migrate_compact(compact, from_version)
+            units.append(migrated)
+            notes.extend(unit_notes)
+            if entry is not None:
+                army_list.append(entry)
+        return {
+            "units": units,
+            "army_list": army_list,
+            "army_cost": sum(u.get("c", 0) for u in units),
+            "faction_version": self.version,
+            "notes": notes,
+        }
+
+    def migrate_army_list(self, army_list: list[UnitEntry], from_version: str) -> dict[str, Any]:
+        """Migre une army_list complète (import JSON) ; les unités non migrables sont conservées telles quelles."""
+        migrated_list: list[UnitEntry] = []
+        notes: list[MigrationNote] = []
+        for entry in army_list:
+            unit = self.resolve_unit(from_version, entry.get("name", ""))
+            _, migrated, unit_notes = self.migrate_compact(compact_unit(entry, unit), from_version)
+            migrated_list.append(migrated if migrated is not None else entry)
+            notes.extend(unit_notes)
+        return {
+            "army_list": migrated_list,
+            "army_cost": sum(u.get("cost", 0) for u in migrated_list),
+            "faction_version": self.version,
+            "notes": notes,
+        }
+
+
+# ── Migration en masse de la base de listes ─────────────────────────────────
+
+_worker_migrators: dict[tuple[str, str], ListMigrator | None] = {}
+_worker_base_dir: Path | None = None
+_worker_catalog: dict[str, dict[str, FactionData]] | None = None
+
+
+def _init_worker(base_dir: str) -> None:
+    global _worker_base_dir, _worker_catalog
+    _worker_base_dir = Path(base_dir)
+    _worker_catalog = None
+    _worker_migrators.clear()
+
+
+def _worker_faction(game: str, faction: str) -> FactionData | None:
+    # Catalogue chargé une fois par processus (artefact précompilé s'il est à jour), puis simples lookups
+    global _worker_catalog
+    if _worker_base_dir is None:
+        return None
+    if _worker_catalog is None:
+        from repositories.faction_repository import JsonFactionRepository
+
+        repository = JsonFactionRepository(_worker_base_dir, artifact_path=_worker_base_dir / "repositories" / "data" / "catalog.bin")
+        _worker_catalog, _ = repository.load_catalog()
+    return _worker_catalog.get(game, {}).get(faction)
+
+
+def _worker_migrator(game: str, faction: str) -> ListMigrator | None:
+    # Un migrateur par faction et par processus : les correspondances mémoïsées servent à tout le lot
+    key = (game, faction)
+    if key not in _worker_migrators:
+        data = _worker_faction(game, faction)
+        _worker_migrators[key] = ListMigrator(data) if data else None
+    return _worker_migrators[key]
+
+
+def migrate_records(records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Migre un lot d'enregistrements (processus worker). Seuls les enregistrements modifiés sont renvoyés."""
+    results = []
+    for record in records:
+        migrator = _worker_migrator(record["game"], record["faction"])
+        if migrator is None or record.get("faction_version") == migrator.version:
+            continue
+        result = migrator.migrate_compact_list(record["units"], record.get("faction_version", ""))
+        results.append({
+            "id": record["id"],
+            "units": result["units"],
+            "army_cost": result["army_cost"],
+            "faction_version": result["faction_version"],
+            "notes": result["notes"],
+        })
+    return results
+
+
+def _batches(records: Iterable[dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    batch: list[dict[str, Any]] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def migrate_stored_lists(
+    db_path: Path,
+    base_dir: Path,
+    workers: int | None = None,
+    batch_size: int = 200,
+    dry_run: bool = False,
+) -> dict[str, int]:
+    """Migre toutes les listes de la base vers les versions de faction courantes, par lots en parallèle."""
+    from repositories.army_list_repository import SqliteArmyListRepository
+
+    repository = SqliteArmyListRepository(db_path)
+    stats = {"scanned": 0, "migrated": 0, "errors": 0}
+    workers = workers or os.cpu_count() or 1
+
+    def scanned(records: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+        for record in records:
+            stats["scanned"] += 1
+            yield record
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(base_dir),)) as executor:
+            batches = _batches(scanned(repository.iter_lists()), batch_size)
+            for results in executor.map(migrate_records, batches):
+                # Une liste avec une unité non migrable reste intacte (et sera retentée après correction des données)
+                clean = [r for r in results if not any(level == "error" for level, _ in r["notes"])]
+                stats["migrated"] += len(clean)
+                stats["errors"] += len(results) - len(clean)
+                if clean and not dry_run:
+                    repository.apply_migrations(clean)
+    finally:
+        repository.close()
+    return stats
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Migre les listes sauvegardées vers les versions de faction courantes.")
+    parser.add_argument("--db", type=Path, default=Path("saves") / "army_lists.sqlite3")
+    parser.add_argument("--base-dir", type=Path, default=Path("."))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--dry-run", action="store_true", help="N'écrit rien, affiche seulement le bilan")
+    args = parser.parse_args(argv)
+
+    if not args.db.exists():
+        print(f"Base introuvable : {args.db}")
+        return 1
+    stats = migrate_stored_lists(args.db, args.base_dir, args.workers, args.batch_size, args.dry_run)
+    print(f"{stats['scanned']} listes examinées, {stats['migrated']} migrées, {stats['errors']} avec erreurs.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
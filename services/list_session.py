@@ -0,0 +1,23 @@
+from typing import Any, MutableMapping
+
+
+# Clés de session d'une liste en cours d'édition (hors paramètres jeu / faction / format)
+_ARMY_KEYS = {"army_list": list, "army_cost": int, "unit_selections": dict}
+
+
+def detach_saved_list(state: MutableMapping[str, Any]) -> None:
+    """La liste affichée n'est plus celle ouverte depuis la base : la prochaine sauvegarde crée un nouvel enregistrement."""
+    state.pop("saved_list_id", None)
+
+
+def start_new_list(state: MutableMapping[str, Any]) -> None:
+    """Vide l'armée en cours et la détache de la liste sauvegardée qu'elle remplaçait."""
+    for key, empty in _ARMY_KEYS.items():
+        state[key] = empty()
+    state.pop("_compare_base", None)
+    detach_saved_list(state)
+
+
+def forget_saved_lists_page(state: MutableMapping[str, Any]) -> None:
+    """Pagination de « Mes listes » propre à un joueur : repart de la première page quand il change."""
+    state.pop("saved_lists_cursors", None)
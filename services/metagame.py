@@ -0,0 +1,391 @@
+import argparse
+import json
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from services.list_import import ListImportError, parse_list_file
+
+
+UnitEntry = dict[str, Any]
+MetaRow = dict[str, Any]
+# Unité réduite à ce que l'analyse lit : (nom, unit_detail, coût, options / montures / armes améliorées)
+UnitSummary = tuple[str, str, int, tuple[str, ...]]
+# Source intégrée : (version, jeu, faction, unités résumées) — de quoi retirer sa contribution
+SourceRecord = tuple[str, str, str, list[UnitSummary]]
+
+STATE_SCHEMA = 2  # 2 : contribution de chaque source conservée (mise à jour et suppression)
+_COUNTERS = ("lists", "factions", "unit_lists", "unit_copies", "option_picks", "category_share")
+
+
+@dataclass
+class MetagameStats:
+    """Additive aggregates over a corpus of army lists.
+
+    Every counter is a sum over lists, so partial results computed by workers merge by addition and
+    new lists are folded in without recomputing the corpus. ``sources`` maps each source id
+    (``file:<absolute path>``, ``db:<id>``) to its version and list summary: a source whose version
+    changed, or which disappeared, has its previous contribution subtracted instead of being counted twice.
+    """
+
+    lists: Counter = field(default_factory=Counter)           # (jeu,) → listes
+    factions: Counter = field(default_factory=Counter)        # (jeu, faction) → listes
+    unit_lists: Counter = field(default_factory=Counter)      # (jeu, faction, unité) → listes où elle figure
+    unit_copies: Counter = field(default_factory=Counter)     # (jeu, faction, unité) → exemplaires
+    option_picks: Counter = field(default_factory=Counter)    # (jeu, faction, unité, option) → exemplaires équipés
+    category_share: Counter = field(default_factory=Counter)  # (jeu, unit_detail) → somme des parts de points
+    sources: dict[str, SourceRecord] = field(default_factory=dict)
+
+    @property
+    def seen(self) -> set[str]:
+        return set(self.sources)
+
+    def version(self, source: str) -> str | None:
+        record = self.sources.get(source)
+        return record[0] if record is not None else None
+
+    def add_list(self, source: str, game: str, faction: str, units: list[UnitSummary], version: str = "") -> None:
+        self.remove(source)
+        self.sources[source] = (version, game, faction, [tuple(u) for u in units])  # type: ignore[misc]
+        self._count(game, faction, units, 1)
+
+    def remove(self, source: str) -> bool:
+        """Retire la contribution d'une source (liste modifiée ou supprimée) ; False si elle n'a jamais été intégrée."""
+        record = self.sources.pop(source, None)
+        if record is None:
+            return False
+        _, game, faction, units = record
+        self._count(game, faction, units, -1)
+        for name in _COUNTERS:
+            counter = getattr(self, name)
+            for key in [key for key, value in counter.items() if abs(value) < 1e-9]:
+                del counter[key]
+        return True
+
+    def _count(self, game: str, faction: str, units: list[UnitSummary], sign: int) -> None:
+        self.lists[(game,)] += sign
+        self.factions[(game, faction)] += sign
+        total = sum(cost for _, _, cost, _ in units)
+        points_by_detail: Counter = Counter()
+        for name, detail, cost, options in units:
+            self.unit_copies[(game, faction, name)] += sign
+            points_by_detail[detail] += cost
+            for option in options:
+                self.option_picks[(game, faction, name, option)] += sign
+        for name in {name for name, _, _, _ in units}:
+            self.unit_lists[(game, faction, name)] += sign
+        for detail, points in points_by_detail.items():
+            self.category_share[(game, detail)] += sign * (points / total if total else 0.0)
+
+    def merge(self, other: "MetagameStats") -> None:
+        # Lots des workers : sources disjointes, les anciennes versions ont été retirées avant le calcul
+        for name in _COUNTERS:
+            getattr(self, name).update(getattr(other, name))
+        self.sources.update(other.sources)
+
+    def to_json(self) -> dict[str, Any]:
+        state: dict[str, Any] = {
+            "schema": STATE_SCHEMA,
+            "sources": {
+                source: [version, game, faction, [[name, detail, cost, list(options)] for name, detail, cost, options in units]]
+                for source, (version, game, faction, units) in sorted(self.sources.items())
+            },
+        }
+        for name in _COUNTERS:
+            state[name] = [[*key, value] for key, value in sorted(getattr(self, name).items())]
+        return state
+
+    @classmethod
+    def from_json(cls, state: dict[str, Any]) -> "MetagameStats":
+        stats = cls()
+        for source, (version, game, faction, units) in state.get("sources", {}).items():
+            stats.sources[source] = (version, game, faction, [(n, d, c, tuple(o)) for n, d, c, o in units])
+        for name in _COUNTERS:
+            getattr(stats, name).update({tuple(row[:-1]): row[-1] for row in state.get(name, [])})
+        return stats
+
+    # ── Résultats ──
+
+    def games(self) -> list[str]:
+        return sorted(game for (game,) in self.lists)
+
+    def faction_distribution(self, game: str) -> list[MetaRow]:
+        lists = self.lists[(game,)] or 1
+        rows = [{"faction": f, "listes": n, "part": n / lists} for (g, f), n in self.factions.items() if g == game]
+        return sorted(rows, key=lambda row: (-row["listes"], row["faction"]))
+
+    def category_shares(self, game: str) -> list[MetaRow]:
+        """Part moyenne des points d'une liste consacrée à chaque unit_detail."""
+        lists = self.lists[(game,)] or 1
+        rows = [{"catégorie": d, "part_moyenne": s / lists} for (g, d), s in self.category_share.items() if g == game]
+        return sorted(rows, key=lambda row: (-row["part_moyenne"], row["catégorie"]))
+
+    def pick_rates(self, game: str, faction: str | None = None) -> list[MetaRow]:
+        """Taux de sélection : part des listes de la faction qui alignent l'unité."""
+        rows = []
+        for (g, f, unit), n in self.unit_lists.items():
+            if g == game and faction in (None, f):
+                rows.append({"faction": f, "unité": unit, "listes": n, "taux": n / (self.factions[(g, f)] or 1),
+                             "exemplaires": self.unit_copies[(g, f, unit)]})
+        return sorted(rows, key=lambda row: (-row["taux"], -row["listes"], row["unité"]))
+
+    def popular_options(self, game: str, faction: str | None = None) -> list[MetaRow]:
+        """Options les plus prises : part des exemplaires de l'unité qui en sont équipés."""
+        rows = []
+        for (g, f, unit, option), n in self.option_picks.items():
+            if g == game and faction in (None, f):
+                rows.append({"faction": f, "unité": unit, "option": option, "exemplaires": n,
+                             "taux": n / (self.unit_copies[(g, f, unit)] or 1)})
+        return sorted(rows, key=lambda row: (-row["exemplaires"], -row["taux"], row["unité"], row["option"]))
+
+
+def load_stats(path: Path) -> MetagameStats:
+    """État persistant ; absent, illisible ou d'un autre schéma : on repart de zéro."""
+    try:
+        state = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return MetagameStats()
+    return MetagameStats.from_json(state) if state.get("schema") == STATE_SCHEMA else MetagameStats()
+
+
+def save_stats(stats: MetagameStats, path: Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(stats.to_json(), ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+# ── Résumé des listes (processus workers) ───────────────────────────────────
+
+_worker_details: dict[tuple[str, str], dict[str, str]] = {}
+_worker_base_dir: Path | None = None
+_worker_catalog: dict[str, dict[str, dict[str, Any]]] | None = None
+
+
+def _init_worker(base_dir: str | None) -> None:
+    global _worker_base_dir, _worker_catalog
+    _worker_base_dir = Path(base_dir) if base_dir else None
+    _worker_catalog = None
+    _worker_details.clear()
+
+
+def _unit_details(game: str, faction: str) -> dict[str, str]:
+    # unit_detail par nom d'unité, par faction et par processus (listes compactes de la base) ;
+    # le catalogue est chargé une seule fois (artefact précompilé s'il est à jour)
+    global _worker_catalog
+    key = (game, faction)
+    if key not in _worker_details:
+        data = None
+        if _worker_base_dir is not None:
+            if _worker_catalog is None:
+                from repositories.faction_repository import JsonFactionRepository
+
+                repository = JsonFactionRepository(_worker_base_dir, artifact_path=_worker_base_dir / "repositories" / "data" / "catalog.bin")
+                _worker_catalog, _ = repository.load_catalog()
+            data = _worker_catalog.get(game, {}).get(faction)
+        _worker_details[key] = {
+            u.get("name"): u.get("unit_detail", u.get("type", "unit")) for u in (data or {}).get("units", []) if isinstance(u, dict)
+        }
+    return _worker_details[key]
+
+
+def _dicts(values: Any) -> list[dict[str, Any]]:
+    values = [values] if isinstance(values, dict) else values if isinstance(values, list) else []
+    return [v for v in values if isinstance(v, dict)]
+
+
+def _names(values: Any) -> list[str]:
+    return [v.get("name", "") for v in _dicts(values)]
+
+
+def _upgraded_weapons(weapons: Any) -> list[str]:
+    # Armes ajoutées par une amélioration (conditional_weapon, variable_weapon_count)
+    return [w.get("name", "") for w in _dicts(weapons) if w.get("_upgraded")]
+
+
+def summarize_entry(entry: UnitEntry, details: dict[str, str]) -> UnitSummary:
+    """Résumé d'une unité d'export JSON (army_list complète)."""
+    options = [name for opts in (entry.get("options") or {}).values() for name in _names(opts)]
+    options += _names(entry.get("mount") or [])
+    options += _upgraded_weapons(entry.get("weapon"))
+    name = entry.get("name", "")
+    detail = entry.get("unit_detail") or details.get(name) or entry.get("type", "unit")
+    return name, detail, entry.get("cost", 0), tuple(options)
+
+
+def summarize_compact(compact: dict[str, Any], details: dict[str, str]) -> UnitSummary:
+    """Résumé d'une unité compacte (base SQLite, voir army_codec)."""
+    options = [name for names in (compact.get("o") or {}).values() for name in names]
+    options += [compact["m"]] if compact.get("m") else []
+    options += [w["n"] for w in compact.get("w", []) if isinstance(w, dict) and w.get("_upgraded")]
+    name = compact.get("n", "")
+    return name, details.get(name, "unit"), compact.get("c", 0), tuple(options)
+
+
+def summarize_files(items: list[tuple[str, str, str]]) -> MetagameStats:
+    """Agrège un lot de fichiers (id source, version, chemin) ; chaque fichier est lu et libéré aussitôt."""
+    stats = MetagameStats()
+    for source, version, path in items:
+        try:
+            data = parse_list_file(Path(path).read_bytes())
+        except (OSError, ListImportError):
+            continue  # fichier illisible : ignoré (et retenté au prochain passage)
+        game, faction = str(data.get("game", "")), str(data.get("faction", ""))
+        entries = [u for u in data["army_list"] if isinstance(u, dict)]
+        # Les exports récents portent unit_detail : le catalogue n'est chargé que pour les anciens fichiers
+        details = _unit_details(game, faction) if any(not u.get("unit_detail") for u in entries) else {}
+        units = [summarize_entry(u, details) for u in entries]
+        stats.add_list(source, game, faction, units, version)
+    return stats
+
+
+def summarize_records(records: list[dict[str, Any]]) -> MetagameStats:
+    """Agrège un lot d'enregistrements de la base (unités compactes)."""
+    stats = MetagameStats()
+    for record in records:
+        details = _unit_details(record["game"], record["faction"])
+        units = [summarize_compact(u, details) for u in record["units"] if isinstance(u, dict)]
+        stats.add_list(f"db:{record['id']}", record["game"], record["faction"], units, record["version"])
+    return stats
+
+
+# ── Pipeline incrémental ────────────────────────────────────────────────────
+
+def _batches(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    batch: list[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def fold(
+    stats: MetagameStats,
+    func: Callable[[list[Any]], MetagameStats],
+    batches: Iterable[list[Any]],
+    base_dir: Path | None = None,
+    workers: int = 1,
+) -> int:
+    """Intègre les lots à ``stats`` au fil de l'eau ; retourne le nombre de listes intégrées (nouvelles ou modifiées).
+
+    Au plus deux lots par worker sont en vol : la mémoire reste bornée quelle que soit la taille du corpus.
+    """
+    folded = 0
+    if workers <= 1:
+        _init_worker(str(base_dir) if base_dir else None)
+        for batch in batches:
+            partial = func(batch)
+            stats.merge(partial)
+            folded += len(partial.sources)
+        return folded
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(base_dir) if base_dir else None,)) as executor:
+        pending: set[Any] = set()
+        for batch in batches:
+            pending.add(executor.submit(func, batch))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    partial = future.result()
+                    stats.merge(partial)
+                    folded += len(partial.sources)
+        for future in pending:
+            partial = future.result()
+            stats.merge(partial)
+            folded += len(partial.sources)
+    return folded
+
+
+def _changed(stats: MetagameStats, items: Iterable[tuple[Any, ...]]) -> Iterator[tuple[Any, ...]]:
+    # Sources nouvelles ou dont la version a changé ; l'ancienne contribution est retirée avant le nouveau calcul
+    for item in items:
+        source, version = item[0], item[1]
+        if stats.version(source) != version:
+            stats.remove(source)
+            yield item
+
+
+def _forget_missing(stats: MetagameStats, prefix: str, present: set[str]) -> None:
+    # Fichiers effacés, listes supprimées de la base : leur contribution est soustraite
+    for source in [s for s in stats.sources if s.startswith(prefix) and s not in present]:
+        stats.remove(source)
+
+
+def update_from_directory(stats: MetagameStats, directory: Path, base_dir: Path | None = None, workers: int = 1, batch_size: int = 64) -> int:
+    """Intègre les exports JSON du dossier (récursif) nouveaux ou modifiés, et retire ceux qui ont disparu.
+
+    Une source est identifiée par son chemin absolu (deux archives ne se confondent pas), sa version
+    par sa taille et sa date de modification (un stat, aucune lecture pour un fichier déjà vu).
+    """
+    directory = Path(directory).resolve()
+    items = []
+    for path in sorted(directory.rglob("*.json")):
+        stat = path.stat()
+        items.append((f"file:{path.as_posix()}", f"{stat.st_size}:{stat.st_mtime_ns}", str(path)))
+    _forget_missing(stats, f"file:{directory.as_posix()}/", {source for source, _, _ in items})
+    return fold(stats, summarize_files, _batches(_changed(stats, items), batch_size), base_dir, workers)
+
+
+def update_from_database(stats: MetagameStats, db_path: Path, base_dir: Path | None = None, workers: int = 1, batch_size: int = 200) -> int:
+    """Intègre les listes de la base SQLite nouvelles ou modifiées, et retire les listes supprimées.
+
+    Version d'une liste : updated_at (sauvegarde) et faction_version (migration, qui conserve updated_at).
+    """
+    from repositories.army_list_repository import SqliteArmyListRepository
+
+    repository = SqliteArmyListRepository(db_path)
+    present: set[str] = set()
+
+    def records() -> Iterator[tuple[str, str, dict[str, Any]]]:
+        for r in repository.iter_lists():
+            source, version = f"db:{r['id']}", f"{r['updated_at']}:{r['faction_version']}"
+            present.add(source)
+            yield source, version, {"id": r["id"], "version": version, "game": r["game"], "faction": r["faction"], "units": r["units"]}
+
+    try:
+        changed = (record for _, _, record in _changed(stats, records()))
+        folded = fold(stats, summarize_records, _batches(changed, batch_size), base_dir, workers)
+    finally:
+        repository.close()
+    _forget_missing(stats, "db:", present)
+    return folded
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Statistiques de métagame sur un corpus de listes (incrémental).")
+    parser.add_argument("directories", nargs="*", type=Path, help="Dossiers d'exports JSON")
+    parser.add_argument("--db", type=Path, default=None, help="Base SQLite des listes sauvegardées")
+    parser.add_argument("--state", type=Path, default=Path("saves") / "metagame.json")
+    parser.add_argument("--base-dir", type=Path, default=Path("."))
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--rebuild", action="store_true", help="Ignore l'état existant et recalcule tout")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    stats = MetagameStats() if args.rebuild else load_stats(args.state)
+    added = 0
+    for directory in args.directories:
+        added += update_from_directory(stats, directory, args.base_dir, args.workers)
+    if args.db is not None and args.db.exists():
+        added += update_from_database(stats, args.db, args.base_dir, args.workers)
+    save_stats(stats, args.state)
+
+    print(f"{added} liste(s) nouvelle(s) ou modifiée(s) intégrée(s), {len(stats.sources)} au total.")
+    for game in stats.games():
+        print(f"\n== {game} ({stats.lists[(game,)]} listes)")
+        for row in stats.faction_distribution(game)[:args.top]:
+            print(f"  {row['faction']:<40} {row['listes']:>5}  {row['part']:>6.1%}")
+        for row in stats.category_shares(game):
+            print(f"  [{row['catégorie']}] {row['part_moyenne']:.1%} des points en moyenne")
+        for row in stats.pick_rates(game)[:args.top]:
+            print(f"  {row['unité']:<40} {row['taux']:>6.1%} des listes {row['faction']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,434 @@
+import unicodedata
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from services.qr_code import dark_runs, qr_matrix
+
+
+RenderModel = dict[str, Any]
+Color = tuple[float, float, float]
+Op = tuple[Any, ...]
+
+# A4 en points ; mêmes marges que l'impression du HTML
+PAGE_WIDTH, PAGE_HEIGHT = 595.0, 842.0
+MARGIN = 28.0
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+_FOOTER_SPACE = 16.0
+
+TEXT: Color = (0.129, 0.145, 0.161)
+MUTED: Color = (0.424, 0.459, 0.490)
+ACCENT: Color = (0.204, 0.596, 0.859)
+RED: Color = (0.906, 0.298, 0.235)
+BORDER: Color = (0.871, 0.886, 0.902)
+HEADER_BG: Color = (0.973, 0.976, 0.980)
+MOUNT_BG: Color = (0.953, 0.898, 0.961)
+BLACK: Color = (0.0, 0.0, 0.0)
+
+
+# ── Polices standard PDF (Helvetica / Helvetica-Bold, aucune police embarquée) ──
+
+# Chasses AFM des caractères 32 à 126, en millièmes de corps
+_HELVETICA = [int(w) for w in (
+    "278 278 355 556 556 889 667 191 333 333 389 584 278 333 278 278 556 556 556 556 556 556 556 556 556 556 "
+    "278 278 584 584 584 556 1015 667 667 722 722 667 611 778 722 278 500 667 556 833 722 778 667 778 722 667 "
+    "611 722 667 944 667 667 611 278 278 278 469 556 333 556 556 500 556 556 278 556 556 222 222 500 222 833 "
+    "556 556 556 556 333 500 278 556 500 722 500 500 500 334 260 334 584"
+).split()]
+_HELVETICA_BOLD = [int(w) for w in (
+    "278 333 474 556 556 889 722 238 333 333 389 584 278 333 278 278 556 556 556 556 556 556 556 556 556 556 "
+    "333 333 584 584 584 611 975 722 722 722 722 667 611 778 722 278 556 722 611 833 722 778 667 778 722 667 "
+    "611 722 667 944 667 667 611 333 278 333 584 556 333 556 611 556 611 556 333 611 611 278 278 556 278 889 "
+    "611 611 611 611 389 556 333 611 556 778 556 556 500 389 280 389 584"
+).split()]
+_EXTRA_WIDTHS = {"—": 1000, "–": 556, "’": 222, "‘": 222, "«": 556, "»": 556, "×": 584, "•": 350, "·": 278, "…": 1000, "°": 400}
+
+
+def pdf_text(text: Any) -> str:
+    """Texte réduit à ce que WinAnsiEncoding sait afficher (émojis et symboles hors cp1252 retirés)."""
+    text = unicodedata.normalize("NFC", str(text if text is not None else ""))
+    text = text.encode("cp1252", errors="ignore").decode("cp1252")
+    return "".join(" " if c.isspace() else c for c in text).strip()
+
+
+def _char_width(char: str, bold: bool) -> int:
+    code = ord(char)
+    if 32 <= code <= 126:
+        return (_HELVETICA_BOLD if bold else _HELVETICA)[code - 32]
+    if char in _EXTRA_WIDTHS:
+        return _EXTRA_WIDTHS[char]
+    base = unicodedata.normalize("NFD", char)[0]  # é → e, Ç → C : même chasse que la lettre de base
+    return _char_width(base, bold) if base != char and 32 <= ord(base) <= 126 else 556
+
+
+def text_width(text: str, size: float, bold: bool = False) -> float:
+    return sum(_char_width(c, bold) for c in text) * size / 1000
+
+
+def wrap_text(text: Any, width: float, size: float, bold: bool = False) -> list[str]:
+    """Découpe au mot près pour tenir dans ``width`` points ; un mot trop long est coupé au caractère."""
+    lines: list[str] = []
+    current = ""
+    for word in pdf_text(text).split():
+        candidate = f"{current} {word}" if current else word
+        if text_width(candidate, size, bold) <= width:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        while text_width(word, size, bold) > width and len(word) > 1:
+            cut = len(word) - 1
+            while cut > 1 and text_width(word[:cut], size, bold) > width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        current = word
+    if current:
+        lines.append(current)
+    return lines
+
+
+# ── Canevas : opérations de dessin → fichier PDF ─────────────────────────────
+
+def _escape(text: str) -> bytes:
+    raw = text.encode("cp1252", errors="ignore")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _num(value: float) -> str:
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def _rgb(color: Color) -> str:
+    return " ".join(_num(c) for c in color)
+
+
+class PdfCanvas:
+    """Minimal PDF 1.4 writer: text in the standard Helvetica fonts, rectangles and lines.
+
+    Coordinates are measured from the top-left corner of the page, in points.
+    """
+
+    def __init__(self) -> None:
+        self.pages: list[list[str]] = []
+        self.page = -1  # page sur laquelle on dessine
+
+    def new_page(self) -> None:
+        self.pages.append([])
+        self.page = len(self.pages) - 1
+
+    def text(self, x: float, y: float, text: str, size: float, bold: bool = False, color: Color = TEXT, align: str = "left") -> None:
+        text = pdf_text(text)
+        if align != "left":
+            offset = text_width(text, size, bold)
+            x -= offset / 2 if align == "center" else offset
+        self.pages[self.page].append(
+            f"BT /{'F2' if bold else 'F1'} {_num(size)} Tf {_rgb(color)} rg {_num(x)} {_num(PAGE_HEIGHT - y)} Td ("
+            + _escape(text).decode("latin-1") + ") Tj ET"
+        )
+
+    def rect(self, x: float, y: float, width: float, height: float, fill: Color | None = None, stroke: Color | None = None, line_width: float = 0.5) -> None:
+        box = f"{_num(x)} {_num(PAGE_HEIGHT - y - height)} {_num(width)} {_num(height)} re"
+        if fill and stroke:
+            self.pages[self.page].append(f"{_rgb(fill)} rg {_rgb(stroke)} RG {_num(line_width)} w {box} B")
+        elif fill:
+            self.pages[self.page].append(f"{_rgb(fill)} rg {box} f")
+        elif stroke:
+            self.pages[self.page].append(f"{_rgb(stroke)} RG {_num(line_width)} w {box} S")
+
+    def line(self, x1: float, y1: float, x2: float, y2: float, color: Color = BORDER, line_width: float = 0.5) -> None:
+        self.pages[self.page].append(
+            f"{_rgb(color)} RG {_num(line_width)} w {_num(x1)} {_num(PAGE_HEIGHT - y1)} m {_num(x2)} {_num(PAGE_HEIGHT - y2)} l S"
+        )
+
+    def draw(self, ops: list[Op], x: float, y: float) -> None:
+        """Rejoue des opérations exprimées relativement au point (x, y)."""
+        for kind, *args in ops:
+            if kind == "text":
+                dx, dy, text, size, bold, color, align = args
+                self.text(x + dx, y + dy, text, size, bold, color, align)
+            elif kind == "rect":
+                dx, dy, width, height, fill, stroke = args
+                self.rect(x + dx, y + dy, width, height, fill, stroke)
+            elif kind == "line":
+                dx1, dy1, dx2, dy2, color = args
+                self.line(x + dx1, y + dy1, x + dx2, y + dy2, color)
+
+    def to_bytes(self, title: str = "", creation_date: str = "") -> bytes:
+        """Sérialise le document. Sortie déterministe : mêmes opérations → mêmes octets (cache par empreinte)."""
+        page_count = len(self.pages)
+        first_page = 6  # 1 catalogue, 2 arbre des pages, 3-4 polices, 5 infos
+        objects: list[bytes] = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            ("<< /Type /Pages /Kids [" + " ".join(f"{first_page + 2 * i} 0 R" for i in range(page_count))
+             + f"] /Count {page_count} >>").encode(),
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+            b"<< /Producer (OPR ArmyBuilder FRA) /Title (" + _escape(pdf_text(title))
+            + b")" + (f" /CreationDate (D:{creation_date})".encode() if creation_date else b"") + b" >>",
+        ]
+        for i, ops in enumerate(self.pages):
+            stream = zlib.compress("\n".join(ops).encode("latin-1"), 6)
+            objects.append(
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_num(PAGE_WIDTH)} {_num(PAGE_HEIGHT)}] "
+                f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {first_page + 2 * i + 1} 0 R >>".encode()
+            )
+            objects.append(f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode() + stream + b"\nendstream")
+
+        out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(out))
+            out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+        xref = len(out)
+        out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+        out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+        out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R /Info 5 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+        return bytes(out)
+
+
+# ── Mise en page : blocs de lignes répartis en colonnes ──────────────────────
+
+@dataclass
+class Row:
+    """One unbreakable line of a block; ops are relative to the row's top-left corner."""
+
+    height: float
+    ops: list[Op] = field(default_factory=list)
+
+
+def text_rows(text: Any, width: float, size: float, bold: bool = False, color: Color = TEXT, indent: float = 0.0, leading: float = 1.25) -> list[Row]:
+    return [
+        Row(size * leading, [("text", indent, size, line, size, bold, color, "left")])
+        for line in wrap_text(text, width - indent, size, bold)
+    ]
+
+
+def spacer(height: float) -> Row:
+    return Row(height)
+
+
+class PdfLayout:
+    """Flows blocks (lists of rows) into columns and pages, keeping each block together when it fits."""
+
+    def __init__(self) -> None:
+        self.canvas = PdfCanvas()
+        self.canvas.new_page()
+        self.y = MARGIN
+        self.bottom = PAGE_HEIGHT - MARGIN - _FOOTER_SPACE
+
+    def new_page(self) -> None:
+        self.canvas.new_page()
+        self.y = MARGIN
+
+    def place(self, row: Row) -> None:
+        """Ligne pleine largeur (titres, résumé)."""
+        if self.y + row.height > self.bottom and self.y > MARGIN:
+            self.new_page()
+        self.canvas.draw(row.ops, MARGIN, self.y)
+        self.y += row.height
+
+    @staticmethod
+    def column_width(columns: int, gap: float) -> float:
+        return (CONTENT_WIDTH - gap * (columns - 1)) / columns
+
+    def flow(self, blocks: list[list[Row]], columns: int, gap: float = 8.0, spacing: float = 6.0, frame: bool = False) -> None:
+        width = self.column_width(columns, gap)
+        column, top, y = 0, self.y, self.y
+        page_end = self.y
+
+        def next_column() -> None:
+            nonlocal column, top, y
+            column += 1
+            if column == columns:
+                self.new_page()
+                column, top = 0, self.y
+            y = top
+
+        for rows in blocks:
+            height = sum(row.height for row in rows)
+            # Bloc entier dans la colonne suivante s'il ne tient pas ; coupé seulement s'il dépasse une colonne vide
+            if y + height > self.bottom and y > top and height <= self.bottom - MARGIN:
+                next_column()
+            x = MARGIN + column * (width + gap)
+            segment = y
+            for row in rows:
+                if y + row.height > self.bottom and y > top:
+                    if frame and y > segment:
+                        self.canvas.rect(x, segment, width, y - segment, stroke=BORDER)
+                    next_column()
+                    x, segment = MARGIN + column * (width + gap), y
+                self.canvas.draw(row.ops, x, y)
+                y += row.height
+            if frame and y > segment:
+                self.canvas.rect(x, segment, width, y - segment, stroke=BORDER)
+            page_end = y if column == 0 else max(page_end, y)
+            y += spacing
+        self.y = page_end + spacing
+
+
+# ── Fiche d'armée ────────────────────────────────────────────────────────────
+
+_PAD = 5.0
+_WEAPON_COLUMNS = (("Arme", 0.33), ("Por", 0.09), ("Att", 0.08), ("PA", 0.07), ("Spé", 0.43))
+
+
+def _weapon_table(weapons: list[dict[str, Any]], width: float) -> list[Row]:
+    size, leading = 6.8, 1.25
+    widths = [width * share for _, share in _WEAPON_COLUMNS]
+    offsets = [sum(widths[:i]) for i in range(len(widths))]
+    header = Row(size * 1.5, [("rect", 0, 0, width, size * 1.5, HEADER_BG, None)] + [
+        ("text", offsets[i] + 2, size * 1.1, label, size - 0.5, True, MUTED, "left") for i, (label, _) in enumerate(_WEAPON_COLUMNS)
+    ])
+    rows = [header]
+    for weapon in weapons:
+        cells = [
+            wrap_text(weapon["label"], widths[0] - 4, size, True),
+            [pdf_text(weapon["range"])],
+            [pdf_text(weapon["attacks"])],
+            [pdf_text(weapon["armor_piercing"])],
+            wrap_text(", ".join(weapon["special_rules"]) or "-", widths[4] - 4, size),
+        ]
+        lines = max(len(c) for c in cells) or 1
+        height = lines * size * leading + 2
+        ops: list[Op] = [("line", 0, height, width, height, BORDER)]
+        for i, cell in enumerate(cells):
+            for n, text in enumerate(cell):
+                ops.append(("text", offsets[i] + 2, size + 1 + n * size * leading, text, size, i == 0, TEXT, "left"))
+        rows.append(Row(height, ops))
+    return rows
+
+
+
+
+def _shift(rows: list[Row], dx: float) -> list[Row]:
+    def moved(op: Op) -> Op:
+        if op[0] == "line":
+            return ("line", op[1] + dx, op[2], op[3] + dx, *op[4:])
+        return (op[0], op[1] + dx, *op[2:])
+    return [Row(row.height, [moved(op) for op in row.ops]) for row in rows]
+
+
+def _shaded(rows: list[Row], width: float, color: Color) -> list[Row]:
+    return [Row(row.height, [("rect", 0, 0, width, row.height, color, None)] + row.ops) for row in rows]
+
+
+def _section(title: str, items: list[str], width: float) -> list[Row]:
+    rows = [Row(9.0, [("text", 0, 7, title.upper(), 6, True, MUTED, "left")])]
+    return rows + (text_rows(", ".join(items), width, 7.2) if items else [])
+
+
+def unit_block(unit: dict[str, Any], width: float) -> list[Row]:
+    """Carte d'unité : en-tête (nom, coût, profil), règles, améliorations, armes, monture."""
+    inner = width - 2 * _PAD
+    cost = f"{unit['cost']} pts"
+    name_lines = wrap_text(unit["name"], inner - text_width(cost, 9.5, True) - 6, 10, True)
+    stats = [f"QUAL {pdf_text(unit['quality'])}+", f"DÉF {pdf_text(unit['defense'])}+"]
+    if unit["coriace"] > 0:
+        stats.append(f"CORIACE {unit['coriace']}")
+    stats += [f"TAILLE {unit['size']}", f"BLESS. {unit['expected_wounds']:.1f}"]
+
+    y = _PAD + 12 * len(name_lines)
+    height = y + (9 if unit["detail_label"] else 0) + 12
+    header: list[Op] = [("rect", 0, 0, width, height, HEADER_BG, None), ("line", 0, height, width, height, BORDER)]
+    header += [("text", _PAD, _PAD + 9 + 12 * i, line, 10, True, TEXT, "left") for i, line in enumerate(name_lines)]
+    header.append(("text", width - _PAD, _PAD + 9, cost, 9.5, True, RED, "right"))
+    if unit["detail_label"]:
+        header.append(("text", _PAD, y + 6, unit["detail_label"], 6.5, False, MUTED, "left"))
+        y += 9
+    header.append(("text", _PAD, y + 8, "  ·  ".join(stats), 7.2, True, TEXT, "left"))
+
+    body = [spacer(3)] + _section("Règles spéciales", unit["rules"] or ["Aucune"], inner)
+    if unit["upgrades"]:
+        upgrades = [u["name"] + (f" ({', '.join(u['special_rules'])})" if u["special_rules"] else "") for u in unit["upgrades"]]
+        body += [spacer(2)] + _section("Améliorations", upgrades, inner)
+    body += [spacer(3)] + _section("Armes", [], inner) + _weapon_table(unit["weapons"], inner)
+    mount = unit["mount"]
+    if mount:
+        mount_rows = [spacer(2)] + text_rows(f"{mount['name']} (+{mount['cost']} pts)", inner - 4, 7.5, True, ACCENT, indent=2)
+        if mount["special_rules"]:
+            mount_rows += text_rows(", ".join(mount["special_rules"]), inner - 4, 7.2, indent=2)
+        body += [spacer(3)] + _shaded(mount_rows + _weapon_table(mount["weapons"], inner) + [spacer(2)], inner, MOUNT_BG)
+    return [Row(height, header)] + _shift(body + [spacer(_PAD)], _PAD)
+
+
+def legend_block(name: str, description: str, width: float) -> list[Row]:
+    rows = text_rows(name, width, 7, True, ACCENT) + text_rows(description, width, 6.5, color=MUTED)
+    rows[-1].ops.append(("line", 0, rows[-1].height + 2, width, rows[-1].height + 2, BORDER))
+    return rows + [spacer(3)]
+
+
+def qr_block(url: str, width: float, size: float = 80.0, modules: list[list[bool]] | None = None) -> list[Row]:
+    """QR code vectoriel (un rectangle par suite de modules noirs) : pas d'image, pas de réseau.
+
+    ``modules`` : matrice déjà calculée (ex. en parallèle pour un recueil de listes).
+    """
+    modules = modules or qr_matrix(url)
+    if not modules:
+        return []
+    step = size / len(modules)
+    left = (width - size) / 2
+    ops: list[Op] = [("rect", left + col * step, 4 + row * step, length * step, step, BLACK, None) for row, col, length in dark_runs(modules)]
+    title = Row(14.0, [("text", width / 2, 9, "SCANNER POUR PARTAGER", 6.5, True, MUTED, "center")])
+    return [title, Row(size + 8, ops)]
+
+
+def army_section(layout: PdfLayout, model: RenderModel, qr_modules: list[list[bool]] | None = None) -> None:
+    """Titre, résumé, cartes d'unités sur deux colonnes et QR de partage, à partir de la position courante."""
+    title = f"{model['list_name']} — {model['army_cost']}/{model['points']} pts"
+    layout.place(Row(22.0, [
+        ("text", CONTENT_WIDTH / 2, 15, title, 15, True, TEXT, "center"),
+        ("line", 0, 20, CONTENT_WIDTH, 20, ACCENT),
+    ]))
+    summary = f"Unités : {len(model['units'])}     Blessures moy. (Déf {model['target_defense']}+) : {model['expected_wounds']:.1f}"
+    layout.place(Row(24.0, [
+        ("rect", 0, 4, CONTENT_WIDTH, 16, HEADER_BG, None),
+        ("text", 6, 15, summary, 8, False, TEXT, "left"),
+        ("text", CONTENT_WIDTH - 6, 15.5, f"{model['army_cost']}/{model['points']} pts", 10, True, RED, "right"),
+    ]))
+    layout.y += 4
+
+    width = layout.column_width(2, 8.0)
+    layout.flow([unit_block(unit, width) for unit in model["units"]], columns=2, frame=True)
+    if model["share_url"]:
+        layout.flow([qr_block(model["share_url"], CONTENT_WIDTH, modules=qr_modules)], columns=1)
+
+
+def legend_section(layout: PdfLayout, rules: list[dict[str, Any]], spells: list[dict[str, Any]], title: str = "Règles spéciales & Sorts") -> None:
+    """Règles et sorts sur trois colonnes, toujours à partir d'une nouvelle page."""
+    if not rules and not spells:
+        return
+    layout.new_page()
+    layout.place(Row(22.0, [
+        ("text", CONTENT_WIDTH / 2, 13, title, 13, True, ACCENT, "center"),
+        ("line", 0, 18, CONTENT_WIDTH, 18, ACCENT),
+    ]))
+    width = layout.column_width(3, 10.0)
+    blocks = [legend_block(r["name"], r["description"], width) for r in rules]
+    if spells:
+        if rules:
+            blocks.append([Row(14.0, [("text", 0, 10, "Sorts", 9, True, ACCENT, "left"), ("line", 0, 13, width, 13, ACCENT)])])
+        blocks += [legend_block(s["name"], s["description"], width) for s in spells]
+    layout.flow(blocks, columns=3, gap=10.0, spacing=0.0)
+
+
+def add_footers(canvas: PdfCanvas, generated_at: datetime | None) -> None:
+    # Ajoutés une fois le nombre de pages connu
+    stamp = f" — {generated_at.strftime('%d/%m/%Y %H:%M')}" if generated_at else ""
+    for number in range(len(canvas.pages)):
+        canvas.page = number
+        canvas.text(PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN + 4,
+                    f"Généré par OPR ArmyBuilder FRA{stamp} — page {number + 1}/{len(canvas.pages)}",
+                    6.5, color=MUTED, align="center")
+
+
+def render_pdf(model: RenderModel) -> bytes:
+    """Fiche d'armée PDF : unités sur deux colonnes, puis règles et sorts sur une page à part."""
+    layout = PdfLayout()
+    army_section(layout, model)
+    legend_section(layout, model["faction_rules"], model["spells"])
+    add_footers(layout.canvas, model["generated_at"])
+    title = f"{model['list_name']} — {model['army_cost']}/{model['points']} pts"
+    created = model["generated_at"].strftime("%Y%m%d%H%M%S") if model["generated_at"] else ""
+    return layout.canvas.to_bytes(title, created)
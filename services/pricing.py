@@ -0,0 +1,114 @@
+from typing import Any
+
+
+UnitEntry = dict[str, Any]
+UnitData = dict[str, Any]
+
+
+def _as_list(value: Any) -> list[dict[str, Any]]:
+    if isinstance(value, dict):
+        return [value] if value else []
+    return [v for v in value if isinstance(v, dict)] if isinstance(value, list) else []
+
+
+def _weapon_names(option: dict[str, Any]) -> set[str]:
+    return {w.get("name") for w in _as_list(option.get("weapon"))}
+
+
+def entry_multiplier(entry: UnitEntry, unit: UnitData) -> int:
+    """2 pour une unité combinée (taille doublée), 1 sinon — comme le configurateur."""
+    size = unit.get("size", 1)
+    if unit.get("type") != "hero" and size > 1 and entry.get("size") == size * 2:
+        return 2
+    return 1
+
+
+def price_entry(entry: UnitEntry, unit: UnitData) -> int:
+    """Recalcule le coût d'une entrée d'army_list à partir des coûts courants de la fiche d'unité.
+
+    Même formule que le configurateur : (base + arme de remplacement) × multiplicateur
+    + améliorations + monture. Les choix sont retrouvés dans l'entrée (armes marquées
+    _upgraded/_count, options par groupe, monture) ; une amélioration conditionnelle
+    sans arme ni trace dans l'entrée ne peut pas être comptée.
+    """
+    weapons = _as_list(entry.get("weapon"))
+    weapon_names = {w.get("name") for w in weapons}
+    base_names = {w.get("name") for w in _as_list(unit.get("weapon"))}
+    options = entry.get("options") if isinstance(entry.get("options"), dict) else {}
+    chosen = {(group, o.get("name")) for group, opts in options.items() for o in _as_list(opts)}
+    mount = entry.get("mount") if isinstance(entry.get("mount"), dict) else None
+    consumed: set[int] = set()  # chaque arme améliorée n'est facturée qu'une fois
+
+    weapon_cost = upgrades_cost = mount_cost = 0
+    for group in unit.get("upgrade_groups", []):
+        gtype = group.get("type", "")
+        group_options = _as_list(group.get("options"))
+        if gtype == "weapon":
+            for option in group_options:
+                names = _weapon_names(option)
+                if names and names <= weapon_names and not names <= base_names:
+                    weapon_cost += option.get("cost", 0)
+                    break
+        elif gtype in ("conditional_weapon", "variable_weapon_count"):
+            for option in group_options:
+                names = _weapon_names(option)
+                matched = [
+                    i for i, w in enumerate(weapons)
+                    if i not in consumed and w.get("_upgraded") and w.get("name") in names
+                    and ("_count" in w) == (gtype == "variable_weapon_count")
+                ]
+                if not matched:
+                    continue
+                consumed.update(matched)
+                if gtype == "conditional_weapon":
+                    upgrades_cost += option.get("cost", 0)
+                else:
+                    # une option à plusieurs armes ajoute chaque arme avec le même _count
+                    upgrades_cost += weapons[matched[0]].get("_count", 1) * option.get("cost", 0)
+        elif gtype in ("upgrades", "role"):
+            group_name = group.get("group", "Options" if gtype == "upgrades" else "Rôle")
+            for option in group_options:
+                if (group_name, option.get("name")) in chosen:
+                    upgrades_cost += option.get("cost", 0)
+        elif gtype == "mount" and mount:
+            for option in group_options:
+                if option.get("name") == mount.get("name"):
+                    mount_cost = option.get("cost", 0)
+                    break
+
+    return (unit.get("base_cost", 0) + weapon_cost) * entry_multiplier(entry, unit) + upgrades_cost + mount_cost
+
+
+def untraceable_options(unit: UnitData) -> list[str]:
+    """Options dont le choix peut ne laisser aucune trace dans une entrée d'army_list.
+
+    ``price_entry`` ne peut pas les facturer : son résultat est alors un minorant du coût réel.
+    - option d'arme ou conditionnelle sans arme (règle spéciale seule) ;
+    - arme de remplacement portant le nom d'une arme de base ;
+    - arme retirée ensuite par un groupe ultérieur (remplacement, nouvelle arme de remplacement).
+    """
+    base_names = {w.get("name") for w in _as_list(unit.get("weapon"))}
+    groups = _as_list(unit.get("upgrade_groups"))
+    untraceable: list[str] = []
+    for index, group in enumerate(groups):
+        gtype = group.get("type", "")
+        if gtype not in ("weapon", "conditional_weapon", "variable_weapon_count"):
+            continue
+        later = groups[index + 1:]
+        replaced_later = {
+            name for g in later for o in _as_list(g.get("options"))
+            for name in (o.get("replaces") or []) if isinstance(name, str)
+        }
+        weapon_replaced_later = any(
+            g.get("type") == "weapon" and any(_weapon_names(o) for o in _as_list(g.get("options"))) for g in later
+        )
+        for option in _as_list(group.get("options")):
+            names = _weapon_names(option)
+            if (
+                not names
+                or (gtype == "weapon" and names <= base_names)
+                or names & replaced_later
+                or weapon_replaced_later
+            ):
+                untraceable.append(option.get("name", ""))
+    return untraceable
@@ -0,0 +1,51 @@
+from typing import Iterator
+
+
+QrMatrix = list[list[bool]]
+
+
+def qr_matrix(data: str) -> QrMatrix | None:
+    """Modules du QR code (sans marge), ou None si qrcode est absent ou si les données sont trop longues.
+
+    N'utilise que le cœur pur Python de qrcode : ni Pillow, ni réseau.
+    """
+    try:
+        import qrcode
+        from qrcode.exceptions import DataOverflowError
+    except ImportError:
+        return None
+    qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_M, border=0)
+    qr.add_data(data)
+    try:
+        qr.make(fit=True)
+    except (DataOverflowError, ValueError):
+        return None
+    return qr.get_matrix()
+
+
+def dark_runs(matrix: QrMatrix) -> Iterator[tuple[int, int, int]]:
+    """Suites horizontales de modules noirs : (ligne, colonne de départ, longueur)."""
+    for row, line in enumerate(matrix):
+        col = 0
+        while col < len(line):
+            if not line[col]:
+                col += 1
+                continue
+            start = col
+            while col < len(line) and line[col]:
+                col += 1
+            yield row, start, col - start
+
+
+def qr_svg(data: str, size: int = 96, border: int = 2) -> str | None:
+    """QR code en SVG inline (un seul chemin), à insérer tel quel dans une page HTML."""
+    matrix = qr_matrix(data)
+    if not matrix:
+        return None
+    extent = len(matrix) + 2 * border
+    path = "".join(f"M{col + border} {row + border}h{length}v1h-{length}z" for row, col, length in dark_runs(matrix))
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {extent} {extent}" width="{size}" height="{size}" '
+        f'shape-rendering="crispEdges" role="img" aria-label="QR code">'
+        f'<rect width="{extent}" height="{extent}" fill="#fff"/><path d="{path}" fill="#000"/></svg>'
+    )
@@ -0,0 +1,227 @@
+import bisect
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from repositories.rule_parser import parse_rule, tokens
+
+
+FactionsByGame = dict[str, dict[str, dict[str, Any]]]
+Holder = tuple[str, str, str, str]  # (jeu, faction, unité, via : "unité" | "arme" | "option")
+
+INDEX_FORMAT = 2  # 2 : clés issues de repositories.rule_parser
+RULE_KINDS = {"generic": "Règle générique", "common": "Règle commune", "faction": "Règle de faction", "spell": "Sort"}
+_NAME_WEIGHT = 3
+_EXACT_BONUS = 10
+
+
+# ── Normalisation ──
+
+def rule_aliases(name: str) -> list[str]:
+    """Clés d'une règle : nom anglais et français, sans paramètre ni coût.
+
+    « Tough (X) [Coriace (X)] » → ["tough", "coriace"] ; « Coriace (3) » → ["coriace"].
+    """
+    return list(parse_rule(name).aliases)
+
+
+# ── Index ──
+
+@dataclass(frozen=True)
+class RuleHit:
+    """A rule, spell or faction rule matching a search, with the factions and units that have it."""
+
+    kind: str
+    name: str
+    description: str
+    factions: tuple[tuple[str, str], ...]
+    holders: tuple[Holder, ...]
+    score: int
+
+    @property
+    def kind_label(self) -> str:
+        return RULE_KINDS.get(self.kind, self.kind)
+
+
+def _unit_holders(factions: FactionsByGame) -> dict[str, list[Holder]]:
+    holders: dict[str, list[Holder]] = {}
+
+    def add(rule: Any, holder: Holder) -> None:
+        if not isinstance(rule, str):
+            return
+        for key in rule_aliases(rule):
+            entries = holders.setdefault(key, [])
+            if holder not in entries:
+                entries.append(holder)
+
+    for game, by_name in sorted(factions.items()):
+        for faction, data in sorted(by_name.items()):
+            for unit in data.get("units", []):
+                if not isinstance(unit, dict):
+                    continue
+                name = unit.get("name", "")
+                for rule in unit.get("special_rules", []):
+                    add(rule, (game, faction, name, "unité"))
+                weapons = unit.get("weapon", [])
+                for weapon in [weapons] if isinstance(weapons, dict) else weapons:
+                    for rule in weapon.get("special_rules", []) if isinstance(weapon, dict) else []:
+                        add(rule, (game, faction, name, "arme"))
+                for group in unit.get("upgrade_groups", []):
+                    for option in group.get("options", []) if isinstance(group, dict) else []:
+                        rules = option.get("special_rules", []) if isinstance(option, dict) else []
+                        for rule in rules if isinstance(rules, list) else []:
+                            add(rule, (game, faction, name, "option"))
+    return holders
+
+
+class RulesIndex:
+    """Accent-insensitive full-text index over generic, common and faction rules and spells.
+
+    Each rule is indexed under its English and French names (``EN [FR]``); a faction rule shared by
+    several factions is a single document listing them. ``holders`` maps a rule key to the units
+    that carry it (base rules, weapon rules, upgrade options), so "who has rule X" is a dict lookup.
+    """
+
+    def __init__(self, docs: list[dict[str, Any]], holders: dict[str, list[Holder]], version: str = "") -> None:
+        self.docs = docs
+        self.holders = holders
+        self.version = version
+        self._name_postings: dict[str, set[int]] = {}
+        self._text_postings: dict[str, set[int]] = {}
+        self._by_alias: dict[str, list[int]] = {}
+        for doc_id, doc in enumerate(docs):
+            for token in tokens(doc["name"]):
+                self._name_postings.setdefault(token, set()).add(doc_id)
+            for token in tokens(doc["description"]):
+                self._text_postings.setdefault(token, set()).add(doc_id)
+            for key in doc["aliases"]:
+                self._by_alias.setdefault(key, []).append(doc_id)
+        self._vocabulary = sorted(self._name_postings.keys() | self._text_postings.keys())
+
+    @classmethod
+    def build(
+        cls,
+        factions: FactionsByGame,
+        common_rules: Iterable[dict[str, str]] = (),
+        generic_rules: Iterable[dict[str, str]] = (),
+        version: str = "",
+    ) -> "RulesIndex":
+        docs: list[dict[str, Any]] = []
+        seen: dict[tuple[str, str, str], dict[str, Any]] = {}
+
+        def add(kind: str, name: str, description: str, owner: tuple[str, str] | None = None) -> None:
+            key = (kind, name, description)
+            doc = seen.get(key)
+            if doc is None:
+                doc = seen[key] = {"kind": kind, "name": name, "description": description,
+                                   "aliases": rule_aliases(name), "factions": []}
+                docs.append(doc)
+            if owner is not None and list(owner) not in doc["factions"]:
+                doc["factions"].append(list(owner))
+
+        for rule in generic_rules:
+            add("generic", rule["name"], rule.get("description", ""))
+        for rule in common_rules:
+            add("common", rule["title"], rule.get("description", ""))
+        for game, by_name in sorted(factions.items()):
+            for faction, data in sorted(by_name.items()):
+                for rule in data.get("faction_special_rules", []):
+                    if isinstance(rule, dict) and rule.get("name"):
+                        add("faction", rule["name"], rule.get("description", ""), (game, faction))
+                for spell, details in data.get("spells", {}).items():
+                    description = details.get("description", "") if isinstance(details, dict) else str(details)
+                    add("spell", spell, description, (game, faction))
+        return cls(docs, _unit_holders(factions), version)
+
+    # ── Requêtes ──
+
+    def _matching(self, token: str, postings: dict[str, set[int]]) -> set[int]:
+        # Préfixe : « coria » trouve « coriace » (recherche à la frappe) ; plage du vocabulaire trié via bisect
+        matched: set[int] = set()
+        start = bisect.bisect_left(self._vocabulary, token)
+        for word in self._vocabulary[start:]:
+            if not word.startswith(token):
+                break
+            matched |= postings.get(word, set())
+        return matched
+
+    def search(self, query: str, limit: int = 20, kinds: Iterable[str] | None = None) -> list[RuleHit]:
+        """Règles dont le nom ou la description contient tous les mots de la requête (préfixes acceptés)."""
+        words = tokens(query)
+        if not words:
+            return []
+        scores: dict[int, int] | None = None
+        for word in words:
+            in_name = self._matching(word, self._name_postings)
+            in_text = self._matching(word, self._text_postings)
+            word_scores = {doc_id: 1 for doc_id in in_text}
+            word_scores.update((doc_id, _NAME_WEIGHT) for doc_id in in_name)
+            scores = word_scores if scores is None else {d: s + word_scores[d] for d, s in scores.items() if d in word_scores}
+        allowed = set(kinds) if kinds is not None else None
+        exact = " ".join(words)
+        for doc_id in self._by_alias.get(exact, []):
+            if doc_id in scores:  # type: ignore[operator]
+                scores[doc_id] += _EXACT_BONUS  # type: ignore[index]
+        ranked = sorted(
+            (doc_id for doc_id in scores or {} if allowed is None or self.docs[doc_id]["kind"] in allowed),
+            key=lambda doc_id: (-scores[doc_id], self.docs[doc_id]["name"]),  # type: ignore[index]
+        )
+        return [self._hit(doc_id, scores[doc_id]) for doc_id in ranked[:limit]]  # type: ignore[index]
+
+    def _hit(self, doc_id: int, score: int) -> RuleHit:
+        doc = self.docs[doc_id]
+        return RuleHit(
+            doc["kind"], doc["name"], doc["description"],
+            tuple(tuple(owner) for owner in doc["factions"]),  # type: ignore[misc]
+            tuple(self.holders_of(doc["name"])), score,
+        )
+
+    def holders_of(self, rule: str) -> list[Holder]:
+        """Unités qui ont la règle, sous son nom anglais ou français, quel que soit le paramètre (« Coriace (3) »)."""
+        holders: list[Holder] = []
+        for key in rule_aliases(rule):
+            for holder in self.holders.get(key, []):
+                if holder not in holders:
+                    holders.append(holder)
+        return holders
+
+    # ── Persistance ──
+
+    def to_json(self) -> dict[str, Any]:
+        return {"format": INDEX_FORMAT, "version": self.version, "docs": self.docs,
+                "holders": {key: [list(h) for h in holders] for key, holders in self.holders.items()}}
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> "RulesIndex":
+        holders = {key: [tuple(h) for h in entries] for key, entries in data["holders"].items()}
+        return cls(data["docs"], holders, data.get("version", ""))  # type: ignore[arg-type]
+
+
+def load_rules_index(repository: Any, cache_path: Path | None = None) -> RulesIndex:
+    """Index relu depuis le disque s'il correspond à la version courante des données, sinon reconstruit et écrit.
+
+    ``repository`` : un ``JsonFactionRepository``. La version est l'empreinte des fichiers sources
+    (factions, règles communes, règles génériques) ; le cache par défaut est ``.cache/rules_index.json``.
+    """
+    from repositories.catalog_artifact import source_fingerprint
+
+    cache_path = Path(cache_path or repository.base_dir / ".cache" / "rules_index.json")
+    version = source_fingerprint(repository.data_dir)
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+        if data.get("format") == INDEX_FORMAT and data.get("version") == version:
+            return RulesIndex.from_json(data)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    factions, _ = repository.load_catalog()
+    index = RulesIndex.build(factions, repository.common_rules_repository.load_rules(), repository.load_generic_rules(), version)
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(index.to_json(), ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        tmp_path.replace(cache_path)
+    except OSError:
+        pass  # index reconstruit à chaque démarrage si le cache n'est pas inscriptible
+    return index
@@ -0,0 +1,77 @@
+import sys
+from types import ModuleType
+from typing import Any, Iterable, Mapping
+
+
+DRAFT_RETENTION = 8  # brouillons d'unités conservés par session (les plus récemment utilisés)
+
+_ATOMS = (str, bytes, bytearray, int, float, complex, bool, type(None))
+
+
+# ── Rétention des brouillons ──
+
+def retain_drafts(selections: dict[str, Any], current: str, keep: int = DRAFT_RETENTION) -> list[str]:
+    """Marque ``current`` comme le plus récent et évince les brouillons les plus anciens au-delà de ``keep``.
+
+    Le dictionnaire sert de LRU : l'ordre d'insertion est l'ordre d'utilisation. Retourne les clés évincées.
+    """
+    if current in selections:
+        selections[current] = selections.pop(current)
+    evicted = []
+    while len(selections) > max(keep, 1):
+        oldest = next(iter(selections))
+        del selections[oldest]
+        evicted.append(oldest)
+    return evicted
+
+
+# ── Mesure de l'empreinte mémoire ──
+
+def _children(obj: Any) -> Iterable[Any]:
+    if isinstance(obj, _ATOMS):
+        return ()
+    if isinstance(obj, dict):
+        return [*obj.keys(), *obj.values()]
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return obj
+    if isinstance(obj, (type, ModuleType)) or callable(obj):
+        return ()
+    attributes = getattr(obj, "__dict__", None)
+    return attributes.values() if isinstance(attributes, dict) else ()
+
+
+def _walk(obj: Any, seen: set[int], shared_ids: set[int] | frozenset[int] = frozenset()) -> tuple[int, int]:
+    """(octets propres, octets partagés) des objets atteignables depuis ``obj`` et absents de ``seen``."""
+    own = shared = 0
+    pending = [obj]
+    while pending:
+        item = pending.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size = sys.getsizeof(item, 0)
+        if id(item) in shared_ids:
+            shared += size
+        else:
+            own += size
+        pending.extend(_children(item))
+    return own, shared
+
+
+def session_footprint(state: Mapping[str, Any], shared: Iterable[Any] = ()) -> list[dict[str, Any]]:
+    """Octets par clé de session, du plus gros au plus petit.
+
+    ``shared`` : racines des données communes à toutes les sessions (catalogue en cache) ; ce qu'une clé
+    en référence est compté à part (``partagé``), pas dans ``propre``. Un objet atteignable depuis
+    plusieurs clés n'est compté qu'une fois, pour la première clé rencontrée.
+    """
+    shared_ids: set[int] = set()
+    for root in shared:
+        _walk(root, shared_ids)
+    seen: set[int] = set()
+    rows = []
+    for key in state:
+        own, shared_bytes = _walk(state[key], seen, shared_ids)
+        rows.append({"clé": key, "propre": own, "partagé": shared_bytes})
+    rows.sort(key=lambda row: (-row["propre"], row["clé"]))
+    return rows
@@ -0,0 +1,276 @@
+import argparse
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, TextIO, TypeVar
+
+from services.exporters import (
+    HTML_STYLE, RenderModel, build_render_model, esc, html_army_section, html_legend, html_qr_block, html_svg_qr, minify_css,
+)
+from services.font_subset import font_face_css
+from services.list_import import ImportIssue, ListImportError, import_army_list, parse_list_file
+from services.pdf_export import (
+    ACCENT, CONTENT_WIDTH, MARGIN, MUTED, TEXT, PdfLayout, add_footers, army_section, legend_section, pdf_text, text_width,
+)
+from services.qr_code import qr_matrix, qr_svg
+
+
+DEFAULT_APP_URL = "https://armybuilder-fra.streamlit.app/"
+_QR_CHUNK = 8
+_T = TypeVar("_T")
+
+
+@dataclass
+class PackEntry:
+    """One list of the pack, already rendered to the shared render model."""
+
+    source: str
+    model: RenderModel
+    issues: list[ImportIssue] = field(default_factory=list)
+
+    @property
+    def legend_key(self) -> tuple[str, str, str]:
+        return self.model["game"], self.model["faction"], self.model["faction_version"]
+
+
+def load_pack_entries(
+    paths: Iterable[Path],
+    repository: Any,
+    app_url: str = DEFAULT_APP_URL,
+    generated_at: datetime | None = None,
+) -> tuple[list[PackEntry], list[tuple[str, str]]]:
+    """Lit les exports JSON, les migre/ré-hydrate comme à l'import et construit un modèle de rendu par liste.
+
+    Retourne (entrées, fichiers rejetés avec le motif).
+    """
+    generated_at = generated_at or datetime.now()
+    entries: list[PackEntry] = []
+    rejected: list[tuple[str, str]] = []
+    for path in paths:
+        try:
+            raw = path.read_bytes()
+            data = parse_list_file(raw)
+        except (OSError, ListImportError) as exc:
+            rejected.append((path.name, str(exc)))
+            continue
+        game, faction_name = data.get("game", ""), data.get("faction", "")
+        points = data.get("points", 0) if isinstance(data.get("points"), int) else 0
+        faction = repository.get_faction(game, faction_name) if game and faction_name else None
+        if faction:
+            imported = import_army_list(raw, faction, {}, points)
+            army_list, issues = imported["army_list"], imported["issues"]
+        else:
+            army_list = [u for u in data["army_list"] if isinstance(u, dict)]
+            issues = [("error", f"Faction introuvable : {game} / {faction_name} (liste reprise telle quelle)")]
+        faction = faction or {}
+        model = build_render_model(
+            army_list, data.get("list_name") or path.stem, points, game, faction_name, faction.get("version", ""),
+            faction.get("faction_special_rules", []), faction.get("spells", {}), app_url, generated_at,
+        )
+        entries.append(PackEntry(path.name, model, issues))
+    return entries, rejected
+
+
+def parallel_map(func: Callable[[str], _T], items: list[str], workers: int | None = None) -> list[_T]:
+    """map en processus séparés (génération de QR : pur Python, liée au CPU) ; en série pour un petit lot."""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(items) <= _QR_CHUNK:
+        return [func(item) for item in items]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, items, chunksize=_QR_CHUNK))
+
+
+def _legends(entries: list[PackEntry]) -> dict[tuple[str, str, str], RenderModel]:
+    # Une seule légende par faction (et version) : modèle de la première liste concernée
+    legends: dict[tuple[str, str, str], RenderModel] = {}
+    for entry in entries:
+        model = entry.model
+        if model["faction_rules"] or model["spells"]:
+            legends.setdefault(entry.legend_key, model)
+    return legends
+
+
+# ── HTML ─────────────────────────────────────────────────────────────────────
+
+_PACK_STYLE = """
+.pack-title{text-align:center;font-size:22px;font-weight:700;margin:24px 0 4px;}
+.pack-meta{text-align:center;color:var(--muted);margin-bottom:16px;}
+.toc{list-style:none;padding:0;margin:0 0 16px;}
+.toc li{display:flex;justify-content:space-between;gap:8px;padding:3px 0;border-bottom:1px dotted var(--brd);}
+.toc a{color:inherit;text-decoration:none;} .toc .toc-faction{color:var(--muted);}
+.toc-section{font-weight:700;color:var(--accent);margin:12px 0 4px;}
+.pack-list{break-before:page;page-break-before:always;}
+.pack-legend-ref{font-size:10px;color:var(--muted);text-align:center;margin-top:8px;}
+"""
+
+
+def write_pack_html(
+    entries: list[PackEntry],
+    out: TextIO,
+    title: str = "Recueil de listes",
+    qr_svgs: list[str | None] | None = None,
+    fonts: dict[int, Path] | None = None,
+) -> None:
+    """Écrit le recueil (sommaire, une liste par page, légendes par faction) sans appel réseau à l'ouverture.
+
+    Le corps est accumulé en fragments puis écrit d'un bloc : coût linéaire quel que soit le nombre de listes.
+    """
+    legends = _legends(entries)
+    legend_ids = {key: f"regles-{i}" for i, key in enumerate(legends, start=1)}
+    generated_at = entries[0].model["generated_at"] if entries else datetime.now()
+
+    parts = [
+        f'<div class="pack-title">{esc(title)}</div>',
+        f'<div class="pack-meta">{len(entries)} listes — {generated_at.strftime("%d/%m/%Y %H:%M")}</div>',
+        '<div class="toc-section">Listes</div><ul class="toc">',
+    ]
+    for i, entry in enumerate(entries, start=1):
+        model = entry.model
+        parts.append(
+            f'<li><a href="#liste-{i}">{i}. {esc(model["list_name"])} <span class="toc-faction">({esc(entry.source)})</span></a>'
+            f'<span class="toc-faction">{esc(model["faction"])} — {model["army_cost"]}/{model["points"]} pts</span></li>'
+        )
+    parts.append("</ul>")
+    if legends:
+        parts.append('<div class="toc-section">Règles de faction</div><ul class="toc">')
+        parts += [f'<li><a href="#{legend_ids[key]}">{esc(key[1])}</a><span class="toc-faction">{esc(key[0])} {esc(key[2])}</span></li>' for key in legends]
+        parts.append("</ul>")
+
+    for i, entry in enumerate(entries, start=1):
+        parts.append(f'<section class="pack-list" id="liste-{i}">')
+        parts.append(html_army_section(entry.model))
+        if entry.legend_key in legend_ids:
+            parts.append(f'<div class="pack-legend-ref">Règles spéciales &amp; sorts : <a href="#{legend_ids[entry.legend_key]}">{esc(entry.model["faction"])}</a></div>')
+        if qr_svgs and qr_svgs[i - 1]:
+            parts.append(html_qr_block(html_svg_qr(qr_svgs[i - 1])))
+        parts.append("</section>")
+    for key, model in legends.items():
+        parts.append(f'<section id="{legend_ids[key]}">')
+        parts.append(html_legend(model, title=f"📜 {esc(key[1])} — Règles spéciales &amp; Sorts"))
+        parts.append("</section>")
+
+    font_css = font_face_css(fonts, "".join(parts)) if fonts else ""
+    out.write(
+        '<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">\n'
+        f"<title>{esc(title)}</title>\n"
+        f"<style>{font_css}{minify_css(HTML_STYLE)}{minify_css(_PACK_STYLE)}</style></head><body><div class=\"army\">\n"
+    )
+    out.writelines(parts)
+    out.write("</div></body></html>")
+
+
+# ── PDF ──────────────────────────────────────────────────────────────────────
+
+_TOC_ROW = 13.0
+_TOC_HEADER = 56.0
+
+
+def render_pack_pdf(entries: list[PackEntry], title: str = "Recueil de listes", qr_matrices: list[Any] | None = None) -> bytes:
+    """Recueil PDF : sommaire paginé, chaque liste sur une nouvelle page, puis une légende par faction."""
+    legends = _legends(entries)
+    layout = PdfLayout()
+    canvas = layout.canvas
+    rows_per_page = [int((layout.bottom - MARGIN - _TOC_HEADER) // _TOC_ROW), int((layout.bottom - MARGIN) // _TOC_ROW)]
+    toc_rows = len(entries) + (len(legends) + 1 if legends else 0)
+    toc_pages = 1 + max(0, math.ceil((toc_rows - rows_per_page[0]) / rows_per_page[1]))
+    for _ in range(toc_pages - 1):
+        layout.new_page()  # pages du sommaire réservées, remplies une fois les numéros de page connus
+
+    toc: list[tuple[str, str, int | None]] = []
+    for i, entry in enumerate(entries, start=1):
+        layout.new_page()
+        model = entry.model
+        toc.append((f"{i}. {model['list_name']} ({entry.source})", f"{model['faction']} — {model['army_cost']}/{model['points']} pts", len(canvas.pages)))
+        army_section(layout, model, qr_matrices[i - 1] if qr_matrices else None)
+    if legends:
+        toc.append(("Règles de faction", "", None))
+    for (game, faction, version), model in legends.items():
+        # legend_section ouvre une nouvelle page : c'est la première de la légende
+        toc.append((faction, f"{game} {version}".strip(), len(canvas.pages) + 1))
+        legend_section(layout, model["faction_rules"], model["spells"], title=f"{faction} — Règles spéciales & Sorts")
+
+    generated_at = entries[0].model["generated_at"] if entries else datetime.now()
+    canvas.page, y = 0, MARGIN
+    canvas.text(MARGIN + CONTENT_WIDTH / 2, y + 20, title, 18, True, align="center")
+    canvas.text(MARGIN + CONTENT_WIDTH / 2, y + 36, f"{len(entries)} listes — {generated_at.strftime('%d/%m/%Y %H:%M')}", 8, color=MUTED, align="center")
+    canvas.line(MARGIN, y + 44, MARGIN + CONTENT_WIDTH, y + 44, ACCENT)
+    y += _TOC_HEADER
+    for label, detail, page in toc:
+        if y + _TOC_ROW > layout.bottom:
+            canvas.page, y = canvas.page + 1, MARGIN
+        if page is None:
+            canvas.text(MARGIN, y + 10, label, 9, True, ACCENT)
+        else:
+            number = str(page)
+            label = _fit(label, CONTENT_WIDTH * 0.55, 8.5)
+            canvas.text(MARGIN, y + 10, label, 8.5)
+            canvas.text(MARGIN + CONTENT_WIDTH - 30, y + 10, detail, 7.5, color=MUTED, align="right")
+            canvas.text(MARGIN + CONTENT_WIDTH, y + 10, number, 8.5, True, TEXT, align="right")
+        y += _TOC_ROW
+
+    add_footers(canvas, generated_at)
+    return canvas.to_bytes(title, generated_at.strftime("%Y%m%d%H%M%S"))
+
+
+def _fit(text: str, width: float, size: float) -> str:
+    text = pdf_text(text)
+    if text_width(text, size) <= width:
+        return text
+    while text and text_width(text + "…", size) > width:
+        text = text[:-1]
+    return text + "…"
+
+
+# ── Point d'entrée ───────────────────────────────────────────────────────────
+
+def build_tournament_pack(
+    paths: list[Path],
+    output: Path,
+    base_dir: Path = Path("."),
+    title: str = "Recueil de listes",
+    app_url: str = DEFAULT_APP_URL,
+    workers: int | None = None,
+    fonts: dict[int, Path] | None = None,
+) -> dict[str, Any]:
+    """Produit le recueil (PDF si ``output`` finit par .pdf, HTML sinon). QR codes générés en parallèle."""
+    from repositories.faction_repository import JsonFactionRepository
+
+    entries, rejected = load_pack_entries(paths, JsonFactionRepository(base_dir), app_url)
+    urls = [entry.model["share_url"] for entry in entries]
+    if output.suffix.lower() == ".pdf":
+        output.write_bytes(render_pack_pdf(entries, title, parallel_map(qr_matrix, urls, workers)))
+    else:
+        with output.open("w", encoding="utf-8") as out:
+            write_pack_html(entries, out, title, parallel_map(qr_svg, urls, workers), fonts)
+    return {
+        "lists": len(entries),
+        "rejected": rejected,
+        "issues": [(entry.source, level, message) for entry in entries for level, message in entry.issues if level != "info"],
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Assemble des exports JSON de listes en un recueil de tournoi (HTML ou PDF).")
+    parser.add_argument("lists", nargs="+", type=Path, help="Fichiers JSON exportés par l'app")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Fichier de sortie (.html ou .pdf)")
+    parser.add_argument("--title", default="Recueil de listes")
+    parser.add_argument("--base-dir", type=Path, default=Path("."))
+    parser.add_argument("--app-url", default=DEFAULT_APP_URL, help="URL de l'app pour les QR codes (vide : pas de QR)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    stats = build_tournament_pack(args.lists, args.output, args.base_dir, args.title, args.app_url, args.workers)
+    for source, reason in stats["rejected"]:
+        print(f"Ignoré : {source} — {reason}", file=sys.stderr)
+    for source, level, message in stats["issues"]:
+        print(f"{source} [{level}] {message}", file=sys.stderr)
+    print(f"{stats['lists']} listes → {args.output}")
+    return 0 if stats["lists"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
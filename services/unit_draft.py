@@ -0,0 +1,324 @@
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple
+
+from services.pricing import UnitData
+from services.upgrade_graph import UpgradeGraph, compile_upgrade_graph, provided_names, requirements
+
+
+Weapon = dict[str, Any]
+Overlay = tuple[tuple[str, Any], ...]
+Choice = Any  # index d'option | None, frozenset d'index (upgrades) ou tuple de quantités (variable_weapon_count)
+
+WEAPON_INDEPENDENT = ("upgrades", "mount")  # groupes qui ne lisent ni ne modifient les armes
+
+
+def _as_list(value: Any) -> list[dict[str, Any]]:
+    if isinstance(value, dict):
+        return [value] if value else []
+    return [v for v in value if isinstance(v, dict)] if isinstance(value, list) else []
+
+
+def _is_index(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class WeaponSlot(NamedTuple):
+    """Arme du brouillon : profil du catalogue (partagé, jamais modifié) et champs qui le surchargent.
+
+    Remplacer des exemplaires ne crée qu'un nouveau couple (profil, surcharge) : le profil n'est
+    recopié qu'à la matérialisation, quand l'unité quitte le brouillon.
+    """
+
+    profile: Weapon
+    overlay: Overlay = ()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        for name, value in self.overlay:
+            if name == key:
+                return value
+        return self.profile.get(key, default)
+
+    def has(self, key: str) -> bool:
+        return key in self.profile or any(name == key for name, _ in self.overlay)
+
+    @property
+    def count(self) -> int:
+        # _count pour les armes ajoutées par variable_weapon_count, count pour les armes de base
+        return self.get("_count", self.get("count", 1))
+
+    def with_count(self, count: int) -> "WeaponSlot":
+        key = "_count" if self.has("_count") else "count"
+        return WeaponSlot(self.profile, tuple((n, v) for n, v in self.overlay if n != key) + ((key, count),))
+
+    def materialize(self) -> Weapon:
+        return {**self.profile, **dict(self.overlay)} if self.overlay else self.profile
+
+
+Weapons = tuple[WeaponSlot, ...]
+
+_UPGRADED: Overlay = (("_upgraded", True),)
+_UPGRADED_UNIQUE: Overlay = (("_upgraded", True), ("_unique", True))
+
+
+def _slots(weapons: Any, overlay: Overlay = ()) -> Weapons:
+    return tuple(WeaponSlot(w, overlay) for w in _as_list(weapons))
+
+
+@dataclass
+class DraftStage:
+    """Résultat d'un groupe d'améliorations : armes en entrée/sortie et coûts ajoutés par ce groupe."""
+
+    weapons_in: Weapons
+    weapons_out: Weapons
+    weapon_cost: int = 0
+    upgrades_cost: int = 0
+    mount: dict[str, Any] | None = None
+    options: list[dict[str, Any]] = field(default_factory=list)
+    available: frozenset[int] = frozenset()
+    counts: tuple[int, ...] = ()
+    max_counts: tuple[int, ...] = ()
+
+
+class UnitDraft:
+    """Incremental pricing of the unit being configured.
+
+    Each upgrade group is a stage fed with the weapons left by the previous one. Changing a
+    choice only recomputes that group, the groups whose ``requires`` depend on it, and the
+    later groups whose incoming weapon list actually changed; other stages are reused as is.
+    Weapon profiles are shared with the catalog and never mutated (see ``WeaponSlot``); ``weapons``
+    materializes them, and callers copy that list when the unit leaves the draft.
+    """
+
+    def __init__(self, unit: UnitData, graph: UpgradeGraph | None = None) -> None:
+        self.unit = unit
+        self.groups: list[dict[str, Any]] = unit.get("upgrade_groups", [])
+        self.graph = graph if graph is not None else compile_upgrade_graph(unit)
+        self.combined = False
+        self._base_profiles = _as_list(unit.get("weapon"))
+        self.base_weapons: Weapons = _slots(self._base_profiles)
+        self._materialized: tuple[Weapons, list[Weapon]] | None = None
+        self._choices: list[Choice] = [self._default(group) for group in self.groups]
+        self._stages: list[DraftStage | None] = [None] * len(self.groups)
+        self._available: list[frozenset[int]] = [frozenset()] * len(self.groups)
+        self._provides: list[set[str] | None] = [None] * len(self.groups)
+        self._dirty: set[int] = set(range(len(self.groups)))
+        self.recomputed = 0  # nombre de groupes recalculés (diagnostic)
+
+    # ── Sélections ──
+
+    @staticmethod
+    def _default(group: dict[str, Any]) -> Choice:
+        gtype = group.get("type", "")
+        if gtype == "upgrades":
+            return frozenset()
+        if gtype == "variable_weapon_count":
+            return tuple(option.get("min_count", 0) for option in _as_list(group.get("options")))
+        return None
+
+    def choice(self, index: int) -> Choice:
+        return self._choices[index]
+
+    def choose(self, index: int, choice: Choice) -> None:
+        if self._choices[index] == choice:
+            return
+        self._choices[index] = choice
+        self._dirty.add(index)
+        self._dirty.update(self.graph.requires_downstream(index))
+
+    def set_count(self, index: int, option_index: int, count: int) -> None:
+        counts = list(self._choices[index])
+        counts[option_index] = count
+        self.choose(index, tuple(counts))
+
+    def selections(self) -> dict[str, Any]:
+        """Choix différents des valeurs par défaut, sous forme compacte (JSON) pour la session et l'autosave :
+        ``{"group_<i>": index d'option | [quantités] | [index cochés]}``."""
+        compact: dict[str, Any] = {}
+        for index, (group, choice) in enumerate(zip(self.groups, self._choices)):
+            if choice == self._default(group):
+                continue
+            compact[f"group_{index}"] = sorted(choice) if isinstance(choice, frozenset) else list(choice) if isinstance(choice, tuple) else choice
+        return compact
+
+    def load(self, selections: dict[str, Any]) -> None:
+        """Rejoue des sélections compactes ; les valeurs d'un autre format (anciens libellés) sont ignorées."""
+        for index, group in enumerate(self.groups):
+            value = selections.get(f"group_{index}")
+            gtype = group.get("type", "")
+            if gtype == "upgrades" and isinstance(value, list):
+                self.choose(index, frozenset(v for v in value if _is_index(v)))
+            elif gtype == "variable_weapon_count" and isinstance(value, list):
+                counts = list(self._default(group))
+                for option_index, count in enumerate(value[:len(counts)]):
+                    if _is_index(count):
+                        counts[option_index] = count
+                self.choose(index, tuple(counts))
+            elif gtype not in ("upgrades", "variable_weapon_count") and _is_index(value):
+                self.choose(index, value)
+
+    # ── Calcul ──
+
+    def _refresh(self) -> None:
+        if not self._dirty:
+            return
+        self._refresh_availability()
+        start = min(self._dirty)
+        weapons = self._stages[start - 1].weapons_out if start else self.base_weapons
+        for index in range(start, len(self.groups)):
+            stage = self._stages[index]
+            if stage is not None and index not in self._dirty and stage.weapons_in is not weapons \
+                    and self.groups[index].get("type") in WEAPON_INDEPENDENT:
+                stage.weapons_in = stage.weapons_out = weapons  # options / monture : les armes traversent sans recalcul
+            elif stage is None or index in self._dirty or stage.weapons_in is not weapons:
+                stage = self._stages[index] = self._compute(index, weapons)
+                self.recomputed += 1
+            weapons = stage.weapons_out
+        self._dirty.clear()
+
+    def _refresh_availability(self) -> None:
+        """Options disponibles des groupes à réévaluer, dans l'ordre topologique du graphe.
+
+        Un groupe ne fournit ses noms aux ``requires`` en aval que si son choix est lui-même disponible ;
+        dans un cycle (fichier de faction incohérent), le choix enregistré est pris tel quel.
+        """
+        for index in self.graph.order:
+            if index not in self._dirty:
+                continue
+            active: set[str] = set()
+            for provider in self.graph.providers[index]:
+                provided = self._provides[provider]
+                active |= provided if provided is not None else provided_names(self.groups[provider], self._choices[provider], self._base_profiles)
+            options = _as_list(self.groups[index].get("options"))
+            available = frozenset(i for i, o in enumerate(options) if all(req in active for req in requirements(o)))
+            choice = self._choices[index]
+            self._available[index] = available
+            self._provides[index] = provided_names(self.groups[index], choice if choice in available else None, self._base_profiles)
+
+    def _compute(self, index: int, weapons: Weapons) -> DraftStage:
+        group, choice = self.groups[index], self._choices[index]
+        gtype = group.get("type", "")
+        options = _as_list(group.get("options"))
+        available = self._available[index]
+        stage = DraftStage(weapons, weapons, available=available)
+        picked = options[choice] if isinstance(choice, int) and 0 <= choice < len(options) and choice in available else None
+
+        if gtype == "weapon" and picked is not None:
+            stage.weapon_cost = picked.get("cost", 0)
+            # option sans arme (règle spéciale seule) : les armes actuelles restent en place
+            stage.weapons_out = _slots(picked.get("weapon")) or weapons
+        elif gtype == "conditional_weapon" and picked is not None:
+            stage.upgrades_cost = picked.get("cost", 0)
+            # avec "requires" : amélioration d'une seule figurine (_unique) ; sans : toute l'unité
+            stage.weapons_out = weapons + _slots(picked.get("weapon"), _UPGRADED_UNIQUE if requirements(picked) else _UPGRADED)
+        elif gtype == "variable_weapon_count":
+            counts, max_counts = [], []
+            for oi, option in enumerate(options):
+                if oi not in available:
+                    counts.append(0); max_counts.append(0)
+                    continue
+                mc = self._max_count(option, weapons)
+                wanted = choice[oi] if oi < len(choice) else option.get("min_count", 0)
+                count = max(min(wanted, mc), option.get("min_count", 0))
+                counts.append(count); max_counts.append(mc)
+                stage.upgrades_cost += count * option.get("cost", 0)
+                if count > 0:
+                    weapons = self._replace(weapons, option, count)
+            stage.counts, stage.max_counts, stage.weapons_out = tuple(counts), tuple(max_counts), weapons
+        elif gtype == "role" and picked is not None:
+            stage.upgrades_cost = picked.get("cost", 0)
+            stage.options = [picked]
+            stage.weapons_out = weapons + _slots(picked.get("weapon"))
+        elif gtype == "upgrades":
+            stage.options = [o for i, o in enumerate(options) if i in choice]
+            stage.upgrades_cost = sum(o.get("cost", 0) for o in stage.options)
+        elif gtype == "mount" and picked is not None:
+            stage.mount = picked
+        return stage
+
+    def _max_count(self, option: dict[str, Any], weapons: Weapons) -> int:
+        size = self.unit.get("size", 1)
+        config = option.get("max_count", {})
+        kind = config.get("type", "size_based") if isinstance(config, dict) else "size_based"
+        if kind == "fixed":
+            mc = config.get("value", 1)
+        elif kind == "size_based":
+            mc = min(config.get("value", size), size)
+        elif kind == "count_in_weapons":
+            name = config.get("weapon_name", "")
+            mc = sum(w.count for w in weapons if w.get("name") == name)
+        else:
+            mc = size
+        return max(mc, 0)
+
+    @staticmethod
+    def _replace(weapons: Weapons, option: dict[str, Any], count: int) -> Weapons:
+        """Retire ``count`` exemplaires des armes remplacées (delta sur le compteur, profils partagés)
+        puis ajoute l'arme de l'option avec ``_count``."""
+        replaces = option.get("replaces", [])
+        kept: list[WeaponSlot] = []
+        remaining = count if replaces else 0
+        for w in weapons:
+            if remaining > 0 and w.get("name") in replaces:
+                if w.count > remaining:
+                    w = w.with_count(w.count - remaining)
+                    remaining = 0
+                else:
+                    remaining -= w.count
+                    continue
+            kept.append(w)
+        return tuple(kept) + _slots(option.get("weapon"), (("_count", count), ("_replaces", replaces), ("_upgraded", True)))
+
+    # ── Résultats ──
+
+    def stage(self, index: int) -> DraftStage:
+        self._refresh()
+        return self._stages[index]  # type: ignore[return-value]
+
+    def is_available(self, index: int, option_index: int) -> bool:
+        return option_index in self.stage(index).available
+
+    def max_count(self, index: int, option_index: int) -> int:
+        return self.stage(index).max_counts[option_index]
+
+    def _stage_list(self) -> list[DraftStage]:
+        self._refresh()
+        return self._stages  # type: ignore[return-value]
+
+    @property
+    def weapon_slots(self) -> Weapons:
+        stages = self._stage_list()
+        return stages[-1].weapons_out if stages else self.base_weapons
+
+    @property
+    def weapons(self) -> list[Weapon]:
+        """Armes finales en dictionnaires (mémoïsées tant que la liste de slots ne change pas)."""
+        slots = self.weapon_slots
+        if self._materialized is None or self._materialized[0] is not slots:
+            self._materialized = (slots, [w.materialize() for w in slots])
+        return self._materialized[1]
+
+    @property
+    def multiplier(self) -> int:
+        return 2 if self.combined and self.unit.get("type") != "hero" and self.unit.get("size", 1) > 1 else 1
+
+    @property
+    def mount(self) -> dict[str, Any] | None:
+        return next((s.mount for s in self._stage_list() if s.mount is not None), None)
+
+    @property
+    def selected_options(self) -> dict[str, list[dict[str, Any]]]:
+        selected: dict[str, list[dict[str, Any]]] = {}
+        for group, stage in zip(self.groups, self._stage_list()):
+            if stage.options:
+                default = "Rôle" if group.get("type") == "role" else "Options"
+                selected.setdefault(group.get("group", default), []).extend(stage.options)
+        return selected
+
+    @property
+    def cost(self) -> int:
+        """Même formule que price_entry : (base + arme de remplacement) × multiplicateur + améliorations + monture."""
+        stages = self._stage_list()
+        weapon_cost = sum(s.weapon_cost for s in stages)
+        upgrades_cost = sum(s.upgrades_cost for s in stages)
+        mount = self.mount
+        return (self.unit.get("base_cost", 0) + weapon_cost) * self.multiplier + upgrades_cost + (mount or {}).get("cost", 0)
@@ -0,0 +1,180 @@
+from dataclasses import dataclass
+from typing import Any
+
+from services.pricing import UnitData
+
+
+Group = dict[str, Any]
+
+SINGLE_CHOICE = ("weapon", "conditional_weapon", "role", "mount")
+
+
+def _as_list(value: Any) -> list[dict[str, Any]]:
+    if isinstance(value, dict):
+        return [value] if value else []
+    return [v for v in value if isinstance(v, dict)] if isinstance(value, list) else []
+
+
+def weapon_names(weapons: list[dict[str, Any]] | tuple[dict[str, Any], ...]) -> set[str]:
+    """Noms et tags d'armes : ce que ``requires`` peut désigner."""
+    names = set()
+    for w in weapons:
+        names.add(w.get("name", ""))
+        names.update(w.get("tags", []))
+    return names
+
+
+def requirements(option: dict[str, Any]) -> list[str]:
+    return option.get("requires") or []
+
+
+def provided_names(group: Group, choice: Any, base_weapons: list[dict[str, Any]] | tuple[dict[str, Any], ...]) -> set[str]:
+    """Noms qu'un choix de groupe rend disponibles pour les ``requires`` des autres groupes.
+
+    Un groupe d'armes sans sélection fournit les armes de base ; les groupes à choix multiples
+    (options, quantités variables) ne fournissent rien.
+    """
+    gtype = group.get("type", "")
+    if gtype not in SINGLE_CHOICE:
+        return set()
+    options = _as_list(group.get("options"))
+    if not isinstance(choice, int) or not 0 <= choice < len(options):
+        return weapon_names(base_weapons) if gtype == "weapon" else set()
+    option = options[choice]
+    return weapon_names(_as_list(option.get("weapon"))) | {option.get("name", "")}
+
+
+def _counted_names(group: Group) -> set[str]:
+    """Armes dont dépend un groupe à quantité variable : armes comptées (count_in_weapons) et remplacées."""
+    names: set[str] = set()
+    if group.get("type") != "variable_weapon_count":
+        return names
+    for option in _as_list(group.get("options")):
+        names.update(option.get("replaces", []))
+        max_count = option.get("max_count")
+        if isinstance(max_count, dict) and max_count.get("type") == "count_in_weapons":
+            names.add(max_count.get("weapon_name", ""))
+    return names
+
+
+def _changed_names(group: Group) -> set[str] | None:
+    """Armes qu'un groupe peut ajouter ou retirer ; None si le groupe peut remplacer toute la liste."""
+    gtype = group.get("type", "")
+    if gtype == "weapon":
+        return None
+    if gtype not in ("conditional_weapon", "variable_weapon_count", "role"):
+        return set()
+    names: set[str] = set()
+    for option in _as_list(group.get("options")):
+        names |= weapon_names(_as_list(option.get("weapon")))
+        names.update(option.get("replaces", []))
+    return names
+
+
+@dataclass(frozen=True)
+class UpgradeGraph:
+    """Dependency graph between the upgrade groups of one unit, compiled once per unit.
+
+    ``requires[g]`` lists the groups whose option availability depends on the choice made in g;
+    ``weapons[g]`` the later groups that count or replace weapons g can add or remove. ``order`` is
+    a topological order of the ``requires`` edges; groups caught in a requirement cycle are listed
+    in ``cycles`` and appended to ``order`` in index order.
+    """
+
+    providers: tuple[frozenset[int], ...]
+    requires: tuple[frozenset[int], ...]
+    weapons: tuple[frozenset[int], ...]
+    order: tuple[int, ...]
+    cycles: tuple[tuple[int, ...], ...]
+
+    def _closure(self, index: int, with_weapons: bool) -> frozenset[int]:
+        seen: set[int] = set()
+        pending = [index]
+        while pending:
+            node = pending.pop()
+            for other in self.requires[node] | (self.weapons[node] if with_weapons else frozenset()):
+                if other not in seen and other != index:
+                    seen.add(other)
+                    pending.append(other)
+        return frozenset(seen)
+
+    def downstream(self, index: int) -> frozenset[int]:
+        """Groupes à réévaluer quand la sélection de ``index`` change (fermeture transitive, ``index`` exclu)."""
+        return self._closure(index, with_weapons=True)
+
+    def requires_downstream(self, index: int) -> frozenset[int]:
+        """Groupes dont la disponibilité des options dépend, directement ou non, de ``index``."""
+        return self._closure(index, with_weapons=False)
+
+
+def _strongly_connected(edges: list[set[int]]) -> list[list[int]]:
+    """Composantes fortement connexes (Tarjan) ; les groupes d'une unité sont peu nombreux, la récursion suffit."""
+    index_of: dict[int, int] = {}
+    low: dict[int, int] = {}
+    stack: list[int] = []
+    on_stack: set[int] = set()
+    components: list[list[int]] = []
+
+    def visit(node: int) -> None:
+        index_of[node] = low[node] = len(index_of)
+        stack.append(node)
+        on_stack.add(node)
+        for other in edges[node]:
+            if other not in index_of:
+                visit(other)
+                low[node] = min(low[node], low[other])
+            elif other in on_stack:
+                low[node] = min(low[node], index_of[other])
+        if low[node] == index_of[node]:
+            component = []
+            while True:
+                member = stack.pop()
+                on_stack.discard(member)
+                component.append(member)
+                if member == node:
+                    break
+            components.append(sorted(component))
+
+    for node in range(len(edges)):
+        if node not in index_of:
+            visit(node)
+    return components
+
+
+def compile_upgrade_graph(unit: UnitData) -> UpgradeGraph:
+    groups = [g if isinstance(g, dict) else {} for g in unit.get("upgrade_groups", [])]
+    base_weapons = _as_list(unit.get("weapon"))
+    needed = [{req for option in _as_list(g.get("options")) for req in requirements(option)} for g in groups]
+    possible = []
+    for group in groups:
+        names = provided_names(group, None, base_weapons)
+        for choice in range(len(_as_list(group.get("options")))):
+            names |= provided_names(group, choice, base_weapons)
+        possible.append(names)
+
+    requires = [{h for h, names in enumerate(needed) if h != g and names & possible[g]} for g in range(len(groups))]
+    providers = [frozenset(g for g in range(len(groups)) if h in requires[g]) for h in range(len(groups))]
+    counted = [_counted_names(g) for g in groups]
+    weapons = []
+    for g, group in enumerate(groups):
+        changed = _changed_names(group)
+        weapons.append(frozenset(
+            h for h in range(g + 1, len(groups)) if counted[h] and (changed is None or changed & counted[h])
+        ))
+
+    # Ordre topologique (Kahn) ; les membres d'un cycle sont ajoutés à la fin, dans l'ordre des groupes
+    incoming = [len(p) for p in providers]
+    ready = [g for g in range(len(groups)) if not incoming[g]]
+    order: list[int] = []
+    while ready:
+        g = ready.pop(0)
+        order.append(g)
+        for h in sorted(requires[g]):
+            incoming[h] -= 1
+            if not incoming[h]:
+                ready.append(h)
+    cycles = tuple(tuple(c) for c in _strongly_connected(requires) if len(c) > 1)
+    order += [g for g in range(len(groups)) if g not in order]
+    return UpgradeGraph(
+        tuple(providers), tuple(frozenset(r) for r in requires), tuple(weapons), tuple(order), cycles,
+    )
@@ -0,0 +1,83 @@
+import unittest
+
+from services.army_codec import UnknownReferenceError, compact_army_list, expand_army_list
+
+
+class ArmyCodecTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.lance = {"name": "Lance", "range": "Mêlée", "attacks": 1, "armor_piercing": 0, "special_rules": []}
+        self.arc = {"name": "Arc", "range": 18, "attacks": 1, "armor_piercing": 0, "special_rules": []}
+        self.banner = {"name": "Bannière", "cost": 10, "special_rules": ["Sans peur"]}
+        self.horse = {"name": "Cheval", "cost": 20, "mount": {"name": "Cheval", "coriace_bonus": 2, "special_rules": ["Rapide"]}}
+        self.unit = {
+            "name": "Chevalier",
+            "type": "hero",
+            "unit_detail": "hero",
+            "size": 1,
+            "base_cost": 60,
+            "quality": 4,
+            "defense": 4,
+            "coriace": 3,
+            "special_rules": ["Héros"],
+            "weapon": [self.lance],
+            "upgrade_groups": [
+                {"group": "Armes", "type": "variable_weapon_count", "options": [{"name": "Arc", "cost": 5, "weapon": self.arc}]},
+                {"group": "Améliorations", "type": "upgrades", "options": [self.banner]},
+                {"group": "Montures", "type": "mount", "options": [self.horse]},
+            ],
+        }
+        self.faction = {"faction": "Faction Alpha", "units": [self.unit]}
+        self.entry = {
+            "name": "Chevalier",
+            "type": "hero",
+            "unit_detail": "hero",
+            "cost": 95,
+            "size": 1,
+            "quality": 4,
+            "defense": 4,
+            "weapon": [dict(self.lance), {**self.arc, "_count": 1, "_replaces": [], "_upgraded": True}],
+            "options": {"Améliorations": [self.banner]},
+            "mount": self.horse,
+            "special_rules": ["Héros", "Rapide"],
+            "coriace": 5,
+        }
+
+    def test_compact_army_list_keeps_only_references(self) -> None:
+        compact = compact_army_list([self.entry], self.faction)
+
+        self.assertEqual(
+            compact,
+            [{
+                "n": "Chevalier",
+                "c": 95,
+                "s": 1,
+                "w": [{"n": "Lance"}, {"n": "Arc", "_count": 1, "_replaces": [], "_upgraded": True}],
+                "o": {"Améliorations": ["Bannière"]},
+                "m": "Cheval",
+                "r": ["Rapide"],
+            }],
+        )
+
+    def test_expand_army_list_restores_entries(self) -> None:
+        expanded = expand_army_list(compact_army_list([self.entry], self.faction), self.faction)
+
+        self.assertEqual(expanded, [self.entry])
+
+    def test_expand_army_list_restores_merged_rule_parameters(self) -> None:
+        self.unit["special_rules"] = ["Héros", "Effrayant (1)"]
+        self.entry["special_rules"] = ["Héros", "Effrayant (2)", "Rapide"]
+
+        expanded = expand_army_list(compact_army_list([self.entry], self.faction), self.faction)
+
+        self.assertEqual(expanded[0]["special_rules"], ["Héros", "Effrayant (2)", "Rapide"])
+
+    def test_expand_army_list_raises_on_unknown_reference(self) -> None:
+        compact = compact_army_list([self.entry], self.faction)
+        compact[0]["m"] = "Dragon"
+
+        with self.assertRaises(UnknownReferenceError):
+            expand_army_list(compact, self.faction)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from services.army_diff import diff_army_lists, unit_category
+
+
+def _unit(name: str, cost: int, **extra) -> dict:
+    return {"name": name, "type": "unit", "unit_detail": "unit", "cost": cost, "size": 10,
+            "weapon": [{"name": "Lance", "count": 10}], "options": {}, "mount": None, **extra}
+
+
+HERO = _unit("Champion", 80, type="hero", unit_detail="hero", size=1)
+TANK = _unit("Char", 200, unit_detail="vehicle", size=1)
+
+
+class ArmyDiffTests(unittest.TestCase):
+    def test_identical_lists_in_another_order_have_no_difference(self) -> None:
+        before = [HERO, _unit("Guerriers", 100), TANK]
+        diff = diff_army_lists(before, list(reversed(before)))
+
+        self.assertTrue(diff.is_empty)
+        self.assertEqual(diff.unchanged, 3)
+        self.assertEqual(diff.summary(), ["Aucune différence."])
+
+    def test_duplicates_are_matched_as_a_multiset(self) -> None:
+        warriors = _unit("Guerriers", 100)
+        diff = diff_army_lists([warriors, warriors], [warriors, dict(warriors), warriors])
+
+        self.assertEqual(len(diff.added), 1)
+        self.assertEqual(diff.unchanged, 2)
+        self.assertEqual(diff.cost_deltas, {"hero": 0, "unit": 100, "vehicle": 0})
+
+    def test_same_name_with_new_options_is_reported_as_changed(self) -> None:
+        before = _unit("Guerriers", 100)
+        after = _unit("Guerriers", 125, weapon=[{"name": "Lance", "count": 8}, {"name": "Fléau", "_count": 2}],
+                      options={"Options": [{"name": "Bannière", "cost": 5}]})
+
+        diff = diff_army_lists([before, HERO], [after])
+
+        (change,) = diff.changed
+        self.assertEqual(change.options_added, ("Options : Bannière",))
+        self.assertEqual(change.weapons_added, ("Fléau ×2",))
+        self.assertEqual(change.weapons_removed, ("Lance ×2",))
+        self.assertEqual(diff.removed, (HERO,))
+        self.assertEqual(diff.cost_deltas, {"hero": -80, "unit": 25, "vehicle": 0})
+        self.assertIn("Modifiée : Guerriers : +Options : Bannière, armes : +Fléau ×2, −Lance ×2, 100 → 125 pts", diff.summary())
+
+    def test_cost_only_change_is_a_change(self) -> None:
+        diff = diff_army_lists([TANK], [{**TANK, "cost": 210}])
+
+        self.assertEqual(diff.changed[0].describe(), "Char : 200 → 210 pts")
+        self.assertEqual(diff.cost_delta, 10)
+
+    def test_categories(self) -> None:
+        self.assertEqual([unit_category(u) for u in (HERO, _unit("Guerriers", 1), TANK)], ["hero", "unit", "vehicle"])
+
+
+if __name__ == "__main__":
+    unittest.main()
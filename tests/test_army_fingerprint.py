@@ -0,0 +1,136 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from repositories.content_store import ContentAddressedStore
+from services.army_fingerprint import army_fingerprint, canonical_army_json, normalize_army_list, unit_fingerprint
+
+
+class ArmyFingerprintTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.unit = {
+            "name": "Guerriers",
+            "cost": 120,
+            "special_rules": ["Furieux", "Bouclier"],
+            "options": {"Équipement": [{"name": "Bannière", "cost": 5}, {"name": "Musicien", "cost": 5}]},
+            "weapon": [
+                {"name": "Lance", "attacks": 1, "_count": 3},
+                {"name": "Épée", "attacks": 1},
+            ],
+        }
+
+    def test_fingerprint_ignores_rule_and_option_order_and_transient_keys(self) -> None:
+        reordered = {
+            **self.unit,
+            "special_rules": ["Bouclier", "Furieux"],
+            "options": {"Équipement": [{"cost": 5, "name": "Musicien"}, {"name": "Bannière", "cost": 5}]},
+            "weapon": [
+                {"name": "Lance", "attacks": 1, "_count": 3, "_display_count": 3},
+                {"name": "Épée", "attacks": 1, "_mount_weapon": True},
+            ],
+        }
+
+        self.assertEqual(army_fingerprint([self.unit]), army_fingerprint([reordered]))
+        self.assertNotIn("_display_count", canonical_army_json([reordered]))
+
+    def test_fingerprint_depends_on_weapon_state_order_and_context(self) -> None:
+        other = {**self.unit, "weapon": [{"name": "Lance", "attacks": 1, "_count": 2}, self.unit["weapon"][1]]}
+        swapped = {**self.unit, "weapon": list(reversed(self.unit["weapon"]))}
+
+        base = army_fingerprint([self.unit])
+        self.assertNotEqual(base, army_fingerprint([other]))
+        self.assertNotEqual(base, army_fingerprint([swapped]))
+        self.assertNotEqual(base, army_fingerprint([self.unit], {"points": 1000}))
+        self.assertEqual(len(base), 32)
+
+    def test_normalize_does_not_mutate_input(self) -> None:
+        normalize_army_list([self.unit])
+
+        self.assertEqual(self.unit["special_rules"], ["Furieux", "Bouclier"])
+
+    def test_unit_fingerprint_can_ignore_cost(self) -> None:
+        repriced = {**self.unit, "cost": 130}
+        self.assertNotEqual(unit_fingerprint(self.unit), unit_fingerprint(repriced))
+        self.assertEqual(unit_fingerprint(self.unit, frozenset({"cost"})), unit_fingerprint(repriced, frozenset({"cost"})))
+
+
+class ContentAddressedStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name) / "artifacts"
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_identical_content_is_stored_once(self) -> None:
+        store = ContentAddressedStore(self.root)
+        key = army_fingerprint([{"name": "Guerriers"}])
+
+        self.assertTrue(store.put("list", key, b"payload"))
+        self.assertFalse(store.put("list", key, b"payload"))
+        self.assertEqual(store.count("list"), 1)
+        self.assertEqual(ContentAddressedStore(self.root).get("list", key), b"payload")
+
+    def test_memory_cache_is_bounded_in_bytes(self) -> None:
+        store = ContentAddressedStore(self.root, memory_bytes=10)
+        keys = [army_fingerprint([{"name": str(i)}]) for i in range(3)]
+
+        store.put("pdf", keys[0], b"123456")
+        store.put("pdf", keys[1], b"123456")
+        store.put("pdf", keys[2], b"x" * 11)
+
+        self.assertEqual(list(store._memory), [("pdf", keys[1])])
+        self.assertEqual(store.memory_size, 6)
+        self.assertEqual(store.get("pdf", keys[2]), b"x" * 11)  # trop gros pour la mémoire : relu depuis le disque
+        self.assertEqual(store.memory_size, 6)
+
+    def test_get_or_create_calls_factory_only_on_miss(self) -> None:
+        store = ContentAddressedStore(self.root, memory_items=1)
+        key = army_fingerprint([])
+        calls = []
+
+        def render() -> bytes:
+            calls.append(1)
+            return b"<html>"
+
+        store.get_or_create("html", key, render)
+        store.get_or_create("html", key, render)
+        ContentAddressedStore(self.root).get_or_create("html", key, render)
+
+        self.assertEqual(len(calls), 1)
+
+    def test_prune_drops_expired_then_least_recently_used(self) -> None:
+        store = ContentAddressedStore(self.root)
+        keys = [army_fingerprint([{"name": str(i)}]) for i in range(4)]
+        for age, key in zip((100, 40, 30, 20), keys):
+            store.put("html", key, b"12345")
+            path = store._path("html", key)
+            os.utime(path, (time.time() - age, time.time() - age))
+        ContentAddressedStore(self.root).get("html", keys[1])  # lu depuis le disque : mtime rafraîchi
+
+        self.assertEqual(store.prune(max_bytes=10, max_age=60), 2)
+        self.assertEqual([store._path("html", k).exists() for k in keys], [False, True, False, True])
+
+    def test_store_prunes_itself_after_writes(self) -> None:
+        store = ContentAddressedStore(self.root, max_bytes=4, prune_every=1)
+        store.put("html", army_fingerprint([]), b"12345")
+        for thread in threading.enumerate():
+            if thread.name == "artifact-prune":
+                thread.join(5)
+
+        self.assertEqual(store.count("html"), 0)
+
+    def test_rejects_unsafe_kind_and_key(self) -> None:
+        store = ContentAddressedStore(self.root)
+
+        with self.assertRaises(ValueError):
+            store.get("../html", "0" * 32)
+        with self.assertRaises(ValueError):
+            store.put("html", "../../etc", b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from repositories.army_list_repository import SqliteArmyListRepository
+
+
+class SqliteArmyListRepositoryTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = SqliteArmyListRepository(Path(self.temp_dir.name) / "saves" / "lists.sqlite3", pool_size=2)
+        self.units = [{"n": "Unit Alpha", "c": 100, "s": 10, "w": [{"n": "Lance"}]}]
+
+    def tearDown(self) -> None:
+        self.repository.close()
+        self.temp_dir.cleanup()
+
+    def _save(self, player: str = "alice", name: str = "Liste", **kwargs) -> int:
+        return self.repository.save_list(player, "Game One", "Faction Alpha", name, self.units, points=1000, army_cost=100, **kwargs)
+
+    def test_save_and_get_list_round_trips_compact_units(self) -> None:
+        list_id = self._save(faction_version="FR-1")
+
+        record = self.repository.get_list(list_id)
+
+        self.assertEqual(record["units"], self.units)
+        self.assertEqual(record["faction_version"], "FR-1")
+        self.assertEqual((record["player"], record["points"], record["army_cost"]), ("alice", 1000, 100))
+
+    def test_save_list_updates_existing_list_of_same_player(self) -> None:
+        list_id = self._save()
+
+        same_id = self._save(name="Renommée", list_id=list_id)
+        other_id = self._save(player="bob", name="Volée", list_id=list_id)
+
+        self.assertEqual(same_id, list_id)
+        self.assertNotEqual(other_id, list_id)
+        self.assertEqual(self.repository.get_list(list_id)["list_name"], "Renommée")
+
+    def test_save_list_never_moves_a_list_to_another_game_or_faction(self) -> None:
+        list_id = self._save()
+
+        other_id = self.repository.save_list("alice", "Game One", "Faction Beta", "Autre", self.units, list_id=list_id)
+
+        self.assertNotEqual(other_id, list_id)
+        self.assertEqual(self.repository.get_list(list_id)["faction"], "Faction Alpha")
+
+    def test_list_lists_paginates_most_recent_first(self) -> None:
+        ids = [self._save(name=f"Liste {i}") for i in range(5)]
+        self._save(player="bob")
+
+        first_page, cursor = self.repository.list_lists("alice", limit=2)
+        second_page, cursor2 = self.repository.list_lists("alice", limit=2, cursor=cursor)
+        last_page, cursor3 = self.repository.list_lists("alice", limit=2, cursor=cursor2)
+
+        listed = [r["id"] for r in first_page + second_page + last_page]
+        self.assertEqual(listed, list(reversed(ids)))
+        self.assertIsNone(cursor3)
+        self.assertNotIn("units", first_page[0])
+        self.assertEqual(self.repository.count_lists("alice"), 5)
+
+    def test_list_lists_filters_by_game_and_faction(self) -> None:
+        self._save()
+        self.repository.save_list("alice", "Game Two", "Faction Beta", "Autre", self.units)
+
+        rows, _ = self.repository.list_lists("alice", game="Game Two", faction="Faction Beta")
+
+        self.assertEqual([r["list_name"] for r in rows], ["Autre"])
+
+    def test_delete_list_only_removes_lists_of_player(self) -> None:
+        list_id = self._save()
+
+        self.assertFalse(self.repository.delete_list("bob", list_id))
+        self.assertTrue(self.repository.delete_list("alice", list_id))
+        self.assertIsNone(self.repository.get_list(list_id))
+
+    def test_pool_is_usable_from_several_threads(self) -> None:
+        threads = [threading.Thread(target=self._save, kwargs={"name": f"T{i}"}) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.repository.count_lists("alice"), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from services.autosave import ArmyJournal, prune_sessions
+
+
+class ArmyJournalTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.journal_dir = Path(self.temp_dir.name)
+        self.token = "session-token-1"
+        self.unit_a = {"name": "Unit Alpha", "cost": 100}
+        self.unit_b = {"name": "Unit Beta", "cost": 50}
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _journal(self, **kwargs) -> ArmyJournal:
+        journal = ArmyJournal(self.journal_dir, self.token, **kwargs)
+        journal.restore()
+        return journal
+
+    def test_restore_replays_deltas(self) -> None:
+        journal = self._journal()
+        journal.record("meta", values={"game": "Game One", "faction": "Faction Alpha"})
+        journal.record("add", unit=self.unit_a)
+        journal.record("add", unit=self.unit_b)
+        journal.record("duplicate", index=0)
+        journal.record("delete", index=2)
+        journal.record_selections({"draft_1": {"group_0": "Arc"}})
+        journal.flush()
+
+        state = ArmyJournal(self.journal_dir, self.token).restore()
+
+        self.assertEqual(state["meta"], {"game": "Game One", "faction": "Faction Alpha"})
+        self.assertEqual([u["name"] for u in state["army_list"]], ["Unit Alpha", "Unit Alpha"])
+        self.assertEqual(state["army_cost"], 200)
+        self.assertEqual(state["unit_selections"], {"draft_1": {"group_0": "Arc"}})
+
+    def test_flush_appends_only_new_deltas(self) -> None:
+        journal = self._journal()
+        journal.record("add", unit=self.unit_a)
+        journal.flush()
+        journal.flush()
+        journal.record_selections({"draft_1": {"group_0": "Arc", "combined": False}})
+        journal.record_selections({"draft_1": {"group_0": "Arc", "combined": True}})
+        journal.flush()
+
+        lines = journal.journal_path.read_text(encoding="utf-8").splitlines()
+
+        self.assertEqual(len(lines), 3)
+        self.assertIn('"values":{"combined":true}', lines[2])
+
+    def test_compaction_writes_snapshot_and_truncates_journal(self) -> None:
+        journal = self._journal(compact_every=3)
+        for _ in range(3):
+            journal.record("add", unit=self.unit_b)
+        journal.flush()
+        journal.record("delete", index=0)
+        journal.flush()
+
+        self.assertTrue(journal.snapshot_path.exists())
+        self.assertEqual(len(journal.journal_path.read_text(encoding="utf-8").splitlines()), 1)
+        state = ArmyJournal(self.journal_dir, self.token).restore()
+        self.assertEqual((len(state["army_list"]), state["army_cost"]), (2, 100))
+
+    def test_restore_skips_deltas_already_in_snapshot_and_truncated_lines(self) -> None:
+        journal = self._journal()
+        journal.record("add", unit=self.unit_a)
+        journal.flush()
+        journal_content = journal.journal_path.read_text(encoding="utf-8")
+        journal.compact()
+        # Compaction interrompue avant la troncature + écriture tronquée
+        journal.journal_path.write_text(journal_content + '{"seq":2,"op":"add"', encoding="utf-8")
+
+        state = ArmyJournal(self.journal_dir, self.token).restore()
+
+        self.assertEqual(len(state["army_list"]), 1)
+
+    def test_replace_resets_list_and_selections(self) -> None:
+        journal = self._journal()
+        journal.record("add", unit=self.unit_a)
+        journal.record_selections({"draft_1": {"group_0": "Arc"}})
+        journal.record("replace", army_list=[self.unit_b], army_cost=50)
+        journal.flush()
+
+        state = ArmyJournal(self.journal_dir, self.token).restore()
+
+        self.assertEqual(state["army_list"], [self.unit_b])
+        self.assertEqual(state["unit_selections"], {})
+
+    def test_record_selections_drops_evicted_drafts_and_removed_keys(self) -> None:
+        journal = self._journal()
+        journal.record_selections({"draft_1": {"group_0": 1}, "draft_2": {"group_0": 2, "group_3": [0]}})
+        journal.record_selections({"draft_2": {"group_3": [0]}})
+        journal.flush()
+
+        state = ArmyJournal(self.journal_dir, self.token).restore()
+
+        self.assertEqual(state["unit_selections"], {"draft_2": {"group_3": [0]}})
+
+    def test_restore_returns_none_for_unknown_session(self) -> None:
+        self.assertIsNone(ArmyJournal(self.journal_dir, self.token).restore())
+
+    def test_prune_sessions_removes_only_abandoned_sessions(self) -> None:
+        old = self._journal(compact_every=1)
+        old.record("add", unit=self.unit_a)
+        old.flush()
+        recent = ArmyJournal(self.journal_dir, "session-token-2")
+        recent.record("add", unit=self.unit_b)
+        recent.flush()
+        (self.journal_dir / "notes.txt").write_text("", encoding="utf-8")
+        for path in (old.snapshot_path, old.journal_path):
+            os.utime(path, (1_000, 1_000))
+
+        removed = prune_sessions(self.journal_dir, max_age=3600, now=recent.journal_path.stat().st_mtime + 60)
+
+        self.assertEqual(removed, 1)
+        self.assertEqual(sorted(p.name for p in self.journal_dir.iterdir()), ["notes.txt", "session-token-2.journal.jsonl"])
+        self.assertEqual(prune_sessions(self.journal_dir / "absent"), 0)
+
+    def test_rejects_unsafe_tokens(self) -> None:
+        with self.assertRaises(ValueError):
+            ArmyJournal(self.journal_dir, "../../etc/passwd")
+
+
+if __name__ == "__main__":
+    unittest.main()
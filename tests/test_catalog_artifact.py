@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from repositories.catalog_artifact import read_catalog_artifact
+from repositories.faction_repository import JsonFactionRepository
+
+
+class CatalogArtifactTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = Path(self.temp_dir.name)
+        self.data_dir = self.base_dir / "repositories" / "data"
+
+        common_rules_dir = self.data_dir / "common-rules"
+        self.factions_dir = self.data_dir / "factions"
+        common_rules_dir.mkdir(parents=True)
+        self.factions_dir.mkdir(parents=True)
+        (common_rules_dir / "common-rules.json").write_text(
+            json.dumps([{"title": "Rule A", "description": "Description A"}]),
+            encoding="utf-8",
+        )
+        (self.data_dir / "generic_rules.json").write_text(
+            json.dumps({"version": "FR-1.0", "rules": [{"name": "Rule G [Règle G]", "description": "G"}]}),
+            encoding="utf-8",
+        )
+        self.faction_path = self.factions_dir / "a_faction.json"
+        self._write_faction("Faction Alpha")
+        self.artifact_path = self.data_dir / "catalog.bin"
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _write_faction(self, name: str) -> None:
+        faction = {"game": "Game One", "faction": name, "faction_special_rules": ["Rule A"]}
+        self.faction_path.write_text(json.dumps(faction), encoding="utf-8")
+
+    def test_build_artifact_round_trips_catalog_and_rules(self) -> None:
+        repository = JsonFactionRepository(self.base_dir, artifact_path=self.artifact_path)
+
+        repository.build_artifact()
+        payload = read_catalog_artifact(self.artifact_path, self.data_dir)
+
+        self.assertEqual((payload["factions"], payload["games"]), repository._load_catalog_from_json()[:2])
+        self.assertEqual(payload["common_rules"], [{"title": "Rule A", "description": "Description A"}])
+        self.assertEqual(payload["generic_rules"]["version"], "FR-1.0")
+
+    def test_load_catalog_uses_fresh_artifact(self) -> None:
+        repository = JsonFactionRepository(self.base_dir, artifact_path=self.artifact_path)
+        repository.build_artifact()
+        repository._load_catalog_from_json = lambda: self.fail("JSON relu malgré un artefact à jour")
+
+        factions_by_game, games = repository.load_catalog()
+
+        self.assertEqual(games, ["Game One"])
+        self.assertEqual(
+            factions_by_game["Game One"]["Faction Alpha"]["faction_special_rules"],
+            [{"name": "Rule A", "description": "Description A"}],
+        )
+
+    def test_load_catalog_falls_back_to_json_when_artifact_is_stale(self) -> None:
+        repository = JsonFactionRepository(self.base_dir, artifact_path=self.artifact_path)
+        repository.build_artifact()
+
+        self._write_faction("Faction Renamed")
+        stat = self.faction_path.stat()
+        os.utime(self.faction_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        factions_by_game, _ = repository.load_catalog()
+
+        self.assertIsNone(read_catalog_artifact(self.artifact_path, self.data_dir))
+        self.assertEqual(list(factions_by_game["Game One"]), ["Faction Renamed"])
+
+    def test_read_catalog_artifact_rejects_corrupted_body(self) -> None:
+        repository = JsonFactionRepository(self.base_dir, artifact_path=self.artifact_path)
+        repository.build_artifact()
+
+        raw = bytearray(self.artifact_path.read_bytes())
+        raw[-2] ^= 0xFF
+        self.artifact_path.write_bytes(bytes(raw))
+
+        self.assertIsNone(read_catalog_artifact(self.artifact_path, self.data_dir))
+
+    def test_read_catalog_artifact_returns_none_when_missing(self) -> None:
+        self.assertIsNone(read_catalog_artifact(self.artifact_path, self.data_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+
+from services.combat import (
+    AttackProfile,
+    attack_profiles,
+    expected_army_output,
+    expected_profile,
+    expected_unit_output,
+    simulate_profile,
+    success_probability,
+)
+
+try:
+    import numpy  # noqa: F401
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+class CombatTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.unit = {
+            "name": "Guerriers",
+            "type": "unit",
+            "size": 10,
+            "quality": 4,
+            "defense": 4,
+            "cost": 100,
+            "weapon": [
+                {"name": "Lance", "range": "Mêlée", "attacks": 1, "armor_piercing": 0, "special_rules": []},
+                {
+                    "name": "Arbalète",
+                    "range": 24,
+                    "attacks": 1,
+                    "armor_piercing": 1,
+                    "special_rules": [],
+                    "_count": 2,
+                    "_replaces": ["Lance"],
+                    "_upgraded": True,
+                },
+            ],
+        }
+
+    def test_success_probability_keeps_natural_one_and_six(self) -> None:
+        self.assertAlmostEqual(success_probability(1), 5 / 6)
+        self.assertAlmostEqual(success_probability(4), 3 / 6)
+        self.assertAlmostEqual(success_probability(9), 1 / 6)
+
+    def test_attack_profiles_subtracts_replaced_carriers(self) -> None:
+        profiles = {p.name: p for p in attack_profiles(self.unit)}
+
+        self.assertEqual(profiles["Lance"].dice, 8)
+        self.assertEqual(profiles["Arbalète"].dice, 2)
+        self.assertTrue(profiles["Lance"].melee)
+        self.assertFalse(profiles["Arbalète"].melee)
+
+    def test_attack_profiles_reads_weapon_rules(self) -> None:
+        unit = {
+            "type": "hero",
+            "quality": 3,
+            "weapon": [{"name": "Canon", "range": 24, "attacks": 2, "special_rules": ["Explosion (3)", "Mortel (3)", "Fiable"]}],
+        }
+
+        profile = attack_profiles(unit)[0]
+
+        self.assertEqual((profile.dice, profile.blast, profile.deadly, profile.reliable), (2, 3, 3, True))
+
+    def test_expected_profile_closed_form(self) -> None:
+        profile = AttackProfile(name="Lance", dice=6, quality=4, armor_piercing=1)
+
+        result = expected_profile(profile, {"defense": 4, "coriace": 1, "size": 10})
+
+        self.assertAlmostEqual(result["hits"], 3.0)
+        self.assertAlmostEqual(result["wounds"], 3.0 * 4 / 6)
+
+    def test_expected_profile_caps_blast_and_deadly_by_target(self) -> None:
+        profile = AttackProfile(name="Canon", dice=6, quality=4, blast=3, deadly=3)
+
+        result = expected_profile(profile, {"defense": 7, "coriace": 2, "size": 2})
+
+        self.assertAlmostEqual(result["hits"], 6.0)
+        self.assertAlmostEqual(result["wounds"], 6.0 * 5 / 6 * 2)
+
+    def test_expected_unit_output_splits_shooting_and_melee(self) -> None:
+        result = expected_unit_output(self.unit)
+
+        self.assertAlmostEqual(result["hits"], 5.0)
+        self.assertAlmostEqual(result["melee_wounds"], 4.0 * 3 / 6)
+        self.assertAlmostEqual(result["shooting_wounds"], 1.0 * 4 / 6)
+
+    def test_expected_army_output_reports_wounds_per_100_points(self) -> None:
+        result = expected_army_output([self.unit, self.unit])
+
+        self.assertAlmostEqual(result["cost"], 200)
+        self.assertAlmostEqual(result["wounds_per_100_pts"], result["wounds"] / 2)
+
+    @unittest.skipUnless(HAS_NUMPY, "numpy non installé")
+    def test_simulation_matches_closed_form(self) -> None:
+        profile = AttackProfile(name="Canon", dice=4, quality=4, armor_piercing=1, blast=3, rending=True, bane=True)
+        target = {"defense": 3, "coriace": 1, "size": 10}
+
+        expected = expected_profile(profile, target)
+        simulated = simulate_profile(profile, target, rolls=200_000, batch_size=50_000, seed=1)
+
+        self.assertAlmostEqual(simulated["hits"], expected["hits"], delta=0.05)
+        self.assertAlmostEqual(simulated["wounds"], expected["wounds"], delta=0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
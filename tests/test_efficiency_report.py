@@ -0,0 +1,128 @@
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from services.efficiency_report import (
+    REPORT_COLUMNS,
+    EfficiencyReportCache,
+    generate_report,
+    iter_configurations,
+    score_configuration,
+    sort_rows,
+    write_csv,
+)
+
+
+class EfficiencyReportTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = Path(self.temp_dir.name)
+        self.factions_dir = self.base_dir / "factions"
+        self.factions_dir.mkdir()
+
+        self.unit = {
+            "name": "Guerriers",
+            "type": "unit",
+            "size": 5,
+            "base_cost": 50,
+            "quality": 4,
+            "defense": 5,
+            "weapon": [{"name": "Lance", "range": "Mêlée", "attacks": 1, "armor_piercing": 0}],
+            "upgrade_groups": [
+                {
+                    "type": "variable_weapon_count",
+                    "options": [
+                        {
+                            "name": "Arbalète",
+                            "cost": 5,
+                            "replaces": ["Lance"],
+                            "max_count": {"type": "size_based", "value": 2},
+                            "weapon": {"name": "Arbalète", "range": 24, "attacks": 1, "armor_piercing": 1},
+                        }
+                    ],
+                },
+                {
+                    "type": "upgrades",
+                    "options": [{"name": "Bannière", "cost": 10, "special_rules": ["Sans peur"]}],
+                },
+            ],
+        }
+        self.faction = {"game": "Game One", "faction": "Faction Alpha", "version": "FR-1", "units": [self.unit]}
+        self.faction_path = self.factions_dir / "alpha.json"
+        self.faction_path.write_text(json.dumps(self.faction, ensure_ascii=False), encoding="utf-8")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_iter_configurations_enumerates_every_combination(self) -> None:
+        configurations = dict(iter_configurations(self.unit))
+
+        # 2 bornes de curseur x 2 cases à cocher x 2 (unité combinée)
+        self.assertEqual(len(configurations), 8)
+        self.assertEqual(configurations["Base"]["cost"], 50)
+        self.assertEqual(configurations["2x Arbalète + Bannière"]["cost"], 70)
+        self.assertEqual(configurations["Unité combinée"]["size"], 10)
+        self.assertEqual(configurations["Unité combinée"]["cost"], 100)
+
+    def test_iter_configurations_applies_weapon_replacement(self) -> None:
+        configurations = dict(iter_configurations(self.unit))
+
+        weapons = configurations["2x Arbalète"]["weapon"]
+
+        # Même logique que le configurateur : l'entrée remplacée est consommée
+        self.assertEqual([w["name"] for w in weapons], ["Arbalète"])
+        self.assertEqual(weapons[0]["_count"], 2)
+        self.assertEqual(weapons[0]["_replaces"], ["Lance"])
+
+    def test_iter_configurations_is_bounded_and_keeps_the_best(self) -> None:
+        self.unit["upgrade_groups"].append({
+            "type": "upgrades",
+            "options": [
+                {"name": f"Option {i}", "cost": 5 + i, "special_rules": ["Furieux"] if i % 3 == 0 else []}
+                for i in range(10)
+            ],
+        })
+
+        bounded = dict(iter_configurations(self.unit, limit=16))
+        exhaustive = dict(iter_configurations(self.unit, limit=None))
+
+        self.assertLessEqual(len(bounded), 16 * 2)
+        self.assertEqual(len(exhaustive), 2 * 2 * 2 ** 11)
+        for column in ("wounds_per_100_pts", "durability_per_100_pts"):
+            self.assertEqual(
+                max(score_configuration(entry)[column] for entry in bounded.values()),
+                max(score_configuration(entry)[column] for entry in exhaustive.values()),
+            )
+
+    def test_generate_report_uses_cache_keyed_by_version(self) -> None:
+        cache = EfficiencyReportCache(self.base_dir / "cache")
+        first = generate_report(self.factions_dir, cache, workers=1)
+
+        self.faction["units"] = []
+        self.faction_path.write_text(json.dumps(self.faction), encoding="utf-8")
+        cached = generate_report(self.factions_dir, cache, workers=1)
+
+        self.faction["version"] = "FR-2"
+        self.faction_path.write_text(json.dumps(self.faction), encoding="utf-8")
+        refreshed = generate_report(self.factions_dir, cache, workers=1)
+
+        self.assertEqual(len(first), 8)
+        self.assertEqual(cached, first)
+        self.assertEqual(refreshed, [])
+
+    def test_sort_rows_and_write_csv(self) -> None:
+        rows = sort_rows(generate_report(self.factions_dir, workers=1), "cost", descending=False)
+        output = io.StringIO()
+
+        write_csv(rows, output)
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0].split(","), REPORT_COLUMNS)
+        self.assertEqual(len(lines), 9)
+        self.assertEqual(rows[0]["cost"], 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
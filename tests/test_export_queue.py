@@ -0,0 +1,137 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from services.export_queue import ExportQueue
+
+
+class _Store:
+    def __init__(self) -> None:
+        self.items: dict[tuple[str, str], bytes] = {}
+
+    def get(self, kind: str, key: str) -> bytes | None:
+        return self.items.get((kind, key))
+
+    def put(self, kind: str, key: str, data: bytes) -> bool:
+        self.items[(kind, key)] = data
+        return True
+
+
+class ExportQueueTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.store = _Store()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(self.executor.shutdown)
+        self.calls: list[str] = []
+
+    def _render(self, key: str) -> bytes:
+        self.calls.append(key)
+        return key.encode()
+
+    def test_ready_artifact_is_served_from_store(self) -> None:
+        self.store.put("html", "aa", b"<html>")
+        queue = ExportQueue(self.store, self.executor, debounce=0)
+
+        self.assertEqual(queue.request(("s1", "html"), "html", "aa", self._render, "aa"), b"<html>")
+        self.assertEqual(self.calls, [])
+
+    def test_finished_job_goes_to_store_and_is_shared(self) -> None:
+        queue = ExportQueue(self.store, self.executor, debounce=0.05)
+        first = queue.request(("s1", "html"), "html", "aa", self._render, "aa")
+        second = queue.request(("s2", "html"), "html", "aa", self._render, "aa")
+
+        self.assertIs(first, second)
+        self.assertEqual(first.result(timeout=5), b"aa")
+        self.assertEqual(self.calls, ["aa"])
+        self.assertEqual(queue.request(("s1", "html"), "html", "aa", self._render, "aa"), b"aa")
+        self.assertEqual(queue.pending(), 0)
+
+    def test_superseded_job_is_cancelled_before_it_starts(self) -> None:
+        queue = ExportQueue(self.store, self.executor, debounce=0.2)
+        stale = queue.request(("s1", "html"), "html", "aa", self._render, "aa")
+        latest = queue.request(("s1", "html"), "html", "bb", self._render, "bb")
+
+        self.assertTrue(stale.cancelled())
+        self.assertEqual(latest.result(timeout=5), b"bb")
+        self.assertEqual(self.calls, ["bb"])
+        self.assertIsNone(queue.job("html", "aa"))
+
+    def test_job_still_awaited_elsewhere_is_kept(self) -> None:
+        queue = ExportQueue(self.store, self.executor, debounce=0.05)
+        shared = queue.request(("s1", "html"), "html", "aa", self._render, "aa")
+        queue.request(("s2", "html"), "html", "aa", self._render, "aa")
+        queue.request(("s1", "html"), "html", "bb", self._render, "bb")
+
+        self.assertEqual(shared.result(timeout=5), b"aa")
+
+    def test_running_job_completes_into_store(self) -> None:
+        started, release = threading.Event(), threading.Event()
+
+        def slow(key: str) -> bytes:
+            started.set()
+            release.wait(5)
+            return key.encode()
+
+        queue = ExportQueue(self.store, self.executor, debounce=0)
+        running = queue.request(("s1", "pdf"), "pdf", "aa", slow, "aa")
+        started.wait(5)
+        queue.release(("s1", "pdf"))
+        release.set()
+
+        self.assertEqual(running.result(timeout=5), b"aa")
+        self.assertEqual(self.store.get("pdf", "aa"), b"aa")
+
+    def test_failure_is_remembered_for_the_fingerprint(self) -> None:
+        def broken(key: str) -> bytes:
+            self.calls.append(key)
+            raise ValueError("rendu impossible")
+
+        queue = ExportQueue(self.store, self.executor, debounce=0)
+        failed = queue.request(("s1", "html"), "html", "aa", broken, "aa")
+        self.assertIsInstance(failed.exception(timeout=5), ValueError)
+
+        self.assertIs(queue.request(("s1", "html"), "html", "aa", broken, "aa"), failed)
+        self.assertEqual(self.calls, ["aa"])
+
+    def test_failure_is_resubmitted_after_its_ttl(self) -> None:
+        def broken(key: str) -> bytes:
+            self.calls.append(key)
+            raise ValueError("rendu impossible")
+
+        queue = ExportQueue(self.store, self.executor, debounce=0, failure_ttl=0)
+        failed = queue.request(("s1", "html"), "html", "aa", broken, "aa")
+        self.assertIsInstance(failed.exception(timeout=5), ValueError)
+
+        again = queue.request(("s1", "html"), "html", "aa", self._render, "aa")
+        self.assertIsNot(again, failed)
+        self.assertEqual(again.result(timeout=5), b"aa")
+        self.assertEqual(self.calls, ["aa", "aa"])
+
+    def test_retry_forgets_the_failure(self) -> None:
+        def broken(key: str) -> bytes:
+            raise ValueError("rendu impossible")
+
+        queue = ExportQueue(self.store, self.executor, debounce=0)
+        failed = queue.request(("s1", "html"), "html", "aa", broken, "aa")
+        self.assertIsInstance(failed.exception(timeout=5), ValueError)
+
+        self.assertTrue(queue.retry("html", "aa"))
+        self.assertIsNone(queue.job("html", "aa"))
+        self.assertFalse(queue.retry("html", "aa"))
+        self.assertEqual(queue.request(("s1", "html"), "html", "aa", self._render, "aa").result(timeout=5), b"aa")
+
+    def test_released_failures_do_not_accumulate(self) -> None:
+        def broken(key: str) -> bytes:
+            raise ValueError("rendu impossible")
+
+        queue = ExportQueue(self.store, self.executor, debounce=0)
+        for key in ("aa", "bb", "cc"):
+            queue.request(("s1", "html"), "html", key, broken, key).exception(timeout=5)
+        queue.release(("s1", "html"))
+
+        self.assertEqual(queue._jobs, {})
+        self.assertEqual(queue._slots, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from services import exporters
+from services.exporters import RENDERERS, build_render_model, register_renderer, render
+
+
+class ExportersTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.army_list = [
+            {
+                "name": "Guerriers",
+                "type": "unit",
+                "unit_detail": "unit",
+                "cost": 120,
+                "size": 10,
+                "quality": 4,
+                "defense": 5,
+                "coriace": 0,
+                "weapon": [
+                    {"name": "Lance", "range": "Mêlée", "attacks": 1, "armor_piercing": 0, "special_rules": [], "count": 10},
+                    {"name": "Arc", "range": 18, "attacks": 1, "armor_piercing": 0, "special_rules": [],
+                     "_count": 3, "_replaces": [], "_upgraded": True},
+                ],
+                "options": {"Améliorations": [{"name": "Bannière", "cost": 5, "special_rules": ["Sans peur"]}]},
+                "mount": None,
+                "special_rules": ["Bouclier"],
+            },
+            {
+                "name": "Capitaine <Rouge>",
+                "type": "hero",
+                "unit_detail": "hero",
+                "cost": 80,
+                "size": 1,
+                "quality": 3,
+                "defense": 4,
+                "coriace": 3,
+                "weapon": [{"name": "Épée", "range": "Mêlée", "attacks": 3, "armor_piercing": 1, "special_rules": ["Fléau"]}],
+                "options": {},
+                "mount": {"name": "Cheval", "cost": 20, "mount": {"special_rules": ["Rapide", "Sabots"], "weapon": [
+                    {"name": "Sabots", "range": "Mêlée", "attacks": 2, "armor_piercing": 0, "special_rules": []}]}},
+                "special_rules": ["Héros"],
+            },
+        ]
+        self.model = build_render_model(
+            self.army_list, "Ma liste", 1000, "Age of Fantasy", "Faction Alpha", "FR-1",
+            faction_rules=[{"name": "Zèle", "description": "Relance"}, "ignorée"],
+            faction_spells={"Éclair (1)": {"description": "Touche"}},
+            app_url="https://example.org/",
+            generated_at=datetime(2024, 1, 2, 3, 4),
+        )
+
+    def test_model_sorts_units_and_groups_weapons(self) -> None:
+        units = self.model["units"]
+
+        self.assertEqual([u["name"] for u in units], ["Capitaine <Rouge>", "Guerriers"])
+        self.assertEqual([(w["label"], w["count"]) for w in units[1]["weapons"]], [("Lance", 1), ("3x Arc", 3)])
+        self.assertEqual(units[1]["rules"], ["Bouclier", "Sans peur"])
+        self.assertEqual(units[0]["rules"], ["Héros", "Rapide"])
+        self.assertEqual(units[0]["mount"]["special_rules"], ["Rapide"])
+        self.assertEqual(self.model["army_cost"], 200)
+        self.assertEqual(self.model["faction_rules"], [{"name": "Zèle", "description": "Relance"}])
+        self.assertTrue(self.model["share_url"].startswith("https://example.org/?list="))
+
+    def test_every_registered_format_renders_from_the_same_model(self) -> None:
+        with mock.patch.object(exporters, "_unit_model", wraps=exporters._unit_model) as unit_model:
+            model = build_render_model(self.army_list, "Ma liste", 1000)
+            outputs = {name: render(name, model) for name in RENDERERS}
+
+        self.assertEqual(unit_model.call_count, 2)
+        self.assertEqual(set(outputs), {"html", "html_offline", "json", "markdown", "cards", "csv", "pdf"})
+        self.assertTrue(all(outputs.values()))
+
+    def test_html_escapes_names_and_embeds_qr(self) -> None:
+        html = render("html", self.model, qr_png=b"PNG")
+
+        self.assertIn("Capitaine &lt;Rouge&gt;", html)
+        self.assertIn("data:image/png;base64,UE5H", html)
+        self.assertIn("Généré par OPR ArmyBuilder FRA — 02/01/2024 03:04", html)
+
+    def test_json_export_is_reimportable(self) -> None:
+        data = json.loads(render("json", self.model))
+
+        self.assertEqual(data["army_list"], self.army_list)
+        self.assertEqual((data["faction_version"], data["army_cost"], data["exported_at"]), ("FR-1", 200, "2024-01-02 03:04"))
+
+    def test_markdown_and_csv(self) -> None:
+        markdown = render("markdown", self.model)
+        rows = list(csv.DictReader(io.StringIO(render("csv", self.model))))
+
+        self.assertIn("## Guerriers [10] Q4+ D5+ — 120 pts", markdown)
+        self.assertIn("3x Arc (18\", A1, PA(0))", markdown)
+        self.assertEqual([r["unit"] for r in rows], ["Capitaine <Rouge>", "Guerriers"])
+        self.assertEqual(rows[0]["mount"], "Cheval")
+
+    def test_undated_model_renders_stable_artifacts(self) -> None:
+        undated = build_render_model(self.army_list, "Ma liste", 1000, "Age of Fantasy", "Faction Alpha", "FR-1")
+
+        self.assertIsNone(undated["generated_at"])
+        html = render("html", undated)
+        self.assertIn("Généré par OPR ArmyBuilder FRA</div>", html)
+        self.assertEqual(html, render("html", {**undated, "army_list": list(self.army_list)}))
+        self.assertNotIn(b"/CreationDate", render("pdf", undated))
+        self.assertIn("02/01/2024 03:04", render("html", self.model))
+
+    def test_register_renderer_adds_a_format(self) -> None:
+        @register_renderer("test_names", "txt", "text/plain", "Noms")
+        def render_names(model):
+            return ",".join(u["name"] for u in model["units"])
+        self.addCleanup(RENDERERS.pop, "test_names")
+
+        self.assertEqual(render("test_names", self.model), "Capitaine <Rouge>,Guerriers")
+        with self.assertRaises(KeyError):
+            render("pdf-inexistant", self.model)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from services.faction_linter import LintCache, lint_faction, lint_factions
+
+
+class FactionLinterTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = Path(self.temp_dir.name)
+
+        self.common_rules_dir = self.base_dir / "repositories" / "data" / "common-rules"
+        self.factions_dir = self.base_dir / "repositories" / "data" / "factions"
+        self.common_rules_dir.mkdir(parents=True)
+        self.factions_dir.mkdir(parents=True)
+        (self.common_rules_dir / "common-rules.json").write_text(
+            json.dumps([{"title": "Rule A", "description": "Description A"}]),
+            encoding="utf-8",
+        )
+
+        self.faction = {
+            "game": "Game One",
+            "faction": "Faction Alpha",
+            "version": "FR-1",
+            "faction_special_rules": ["Rule A", "Rule Missing", {"name": "Rule C", "description": "C"}],
+            "units": [
+                {
+                    "name": "Unit Alpha",
+                    "type": "unit",
+                    "base_cost": 100,
+                    "quality": 4,
+                    "defense": 4,
+                    "weapon": [{"name": "Lance", "range": "Mêlée", "attacks": 1, "armor_piercing": 0}],
+                    "upgrade_groups": [
+                        {
+                            "type": "variable_weapon_count",
+                            "options": [
+                                {
+                                    "name": "Arc",
+                                    "cost": 5,
+                                    "replaces": ["Épée"],
+                                    "requires": ["Lance"],
+                                    "weapon": {"name": "Arc", "range": 18, "attacks": 1, "armor_piercing": 0},
+                                }
+                            ],
+                        }
+                    ],
+                }
+            ],
+        }
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _write_faction(self, payload: dict) -> None:
+        (self.factions_dir / "alpha.json").write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+    def test_lint_faction_reports_dangling_references_with_json_paths(self) -> None:
+        issues = lint_faction(self.faction, {"Rule A"})
+
+        paths = {issue["path"]: issue["message"] for issue in issues}
+        self.assertIn("$.units[0].upgrade_groups[0].options[0].replaces[0]", paths)
+        self.assertIn("$.faction_special_rules[1]", paths)
+        self.assertEqual(len(issues), 2)
+
+    def test_lint_faction_reports_schema_errors(self) -> None:
+        self.faction["units"][0]["quality"] = 9
+        del self.faction["units"][0]["weapon"][0]["attacks"]
+        self.faction["units"][0]["upgrade_groups"][0]["type"] = "unknown"
+
+        paths = {issue["path"] for issue in lint_faction(self.faction, {"Rule A", "Rule Missing"})}
+
+        self.assertIn("$.units[0].quality", paths)
+        self.assertIn("$.units[0].weapon[0].attacks", paths)
+        self.assertIn("$.units[0].upgrade_groups[0].type", paths)
+
+    def test_lint_faction_reports_requirement_cycles(self) -> None:
+        self.faction["units"][0]["upgrade_groups"] = [
+            {"group": "Gauche", "type": "conditional_weapon", "options": [
+                {"name": "Hache", "cost": 5, "requires": ["Masse"], "weapon": {"name": "Hache", "range": "Mêlée", "attacks": 1, "armor_piercing": 0}},
+            ]},
+            {"group": "Droite", "type": "conditional_weapon", "options": [
+                {"name": "Masse", "cost": 5, "requires": ["Hache"], "weapon": {"name": "Masse", "range": "Mêlée", "attacks": 1, "armor_piercing": 0}},
+            ]},
+        ]
+
+        issues = {issue["path"]: issue["message"] for issue in lint_faction(self.faction, {"Rule A", "Rule Missing"})}
+
+        self.assertIn("Gauche → Droite", issues["$.units[0].upgrade_groups[0]"])
+
+    def test_lint_factions_skips_unchanged_files_via_hash_cache(self) -> None:
+        self._write_faction(self.faction)
+        cache = LintCache(self.base_dir / "lint.json")
+
+        first = lint_factions(self.base_dir, cache, workers=1)
+        self.assertTrue((self.base_dir / "lint.json").exists())
+
+        reloaded = LintCache(self.base_dir / "lint.json")
+        reloaded.put = lambda key, issues: self.fail("fichier inchangé recalculé")
+        second = lint_factions(self.base_dir, reloaded, workers=1)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(first["alpha.json"]), 2)
+
+    def test_lint_factions_reports_unreadable_json(self) -> None:
+        (self.factions_dir / "broken.json").write_text("{", encoding="utf-8")
+
+        results = lint_factions(self.base_dir, workers=1)
+
+        self.assertEqual(results["broken.json"][0]["path"], "$")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -106,6 +106,20 @@ class JsonFactionRepositoryTests(unittest.TestCase):
             ],
         )
 
+    def test_special_rule_description_falls_back_to_the_rule_key(self) -> None:
+        (self.common_rules_dir / "common-rules.json").write_text(
+            json.dumps([{"title": "Fear (X) [Effrayant (X)]", "description": "Description Peur"}]),
+            encoding="utf-8",
+        )
+        repository = JsonFactionRepository(self.base_dir)
+
+        hydrated = repository._normalize_faction({"faction_special_rules": ["Effrayant (2)", "Fear", "Inconnue"]})
+
+        self.assertEqual(
+            [rule["description"] for rule in hydrated["faction_special_rules"]],
+            ["Description Peur", "Description Peur", ""],
+        )
+
     def test_normalize_faction_applies_default_values(self) -> None:
         repository = JsonFactionRepository(self.base_dir)
 
@@ -115,6 +129,23 @@ class JsonFactionRepositoryTests(unittest.TestCase):
         self.assertEqual(faction["spells"], {})
         self.assertEqual(faction["units"], [])
 
+    def test_broken_faction_file_is_reported_without_hiding_the_others(self) -> None:
+        (self.factions_dir / "c_broken.json").write_text("{ pas du json", encoding="utf-8")
+        (self.factions_dir / "d_list.json").write_text("[]", encoding="utf-8")
+        repository = JsonFactionRepository(self.base_dir)
+
+        factions_by_game, games = repository.load_catalog()
+
+        self.assertEqual(games, ["Game One", "Game Two"])
+        self.assertEqual([name for name, _ in repository.broken_files], ["c_broken.json", "d_list.json"])
+
+        artifact_path = self.base_dir / "catalog.bin"
+        JsonFactionRepository(self.base_dir).build_artifact(artifact_path)
+        from_artifact = JsonFactionRepository(self.base_dir, artifact_path=artifact_path)
+        from_artifact._load_catalog_from_json = lambda: self.fail("JSON relu malgré un artefact à jour")
+        from_artifact.load_catalog()
+        self.assertEqual(from_artifact.broken_files, repository.broken_files)
+
     def test_load_catalog_raises_when_factions_directory_is_missing(self) -> None:
         repository = JsonFactionRepository(self.base_dir)
         for file_path in self.factions_dir.glob("*.json"):
@@ -0,0 +1,153 @@
+import io
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from contextlib import redirect_stderr
+from unittest.mock import patch
+
+from services.http_api import ApiResponse, CatalogApi, ResponseCache, make_server
+
+
+def _faction(version: str = "FR-1") -> dict:
+    return {
+        "faction": "Alpha",
+        "game": "Age of Fantasy",
+        "version": version,
+        "faction_special_rules": [{"name": "Zèle", "description": "Relance les 1."}],
+        "spells": {},
+        "units": [{
+            "name": "Guerriers",
+            "type": "unit",
+            "base_cost": 100,
+            "size": 10,
+            "quality": 4,
+            "defense": 5,
+            "weapon": [{"name": "Lance", "range": "Mêlée", "attacks": 1, "armor_piercing": 0, "special_rules": []}],
+            "special_rules": [],
+            "upgrade_groups": [],
+        }],
+    }
+
+
+def _api(version: str = "FR-1") -> CatalogApi:
+    return CatalogApi({"Age of Fantasy": {"Alpha": _faction(version)}}, ["Age of Fantasy"])
+
+
+def _json(response) -> dict:
+    return json.loads(response.body)
+
+
+class CatalogApiTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.api = _api()
+        self.entry = {"name": "Guerriers", "type": "unit", "base_cost": 100, "cost": 100, "size": 10,
+                      "quality": 4, "defense": 5, "weapon": _faction()["units"][0]["weapon"], "options": {}}
+
+    def test_catalog_routes(self) -> None:
+        self.assertEqual(_json(self.api.handle("GET", "/games"))["games"], ["Age of Fantasy"])
+        factions = _json(self.api.handle("GET", "/games/Age%20of%20Fantasy/factions"))["factions"]
+        self.assertEqual(factions, [{"name": "Alpha", "version": "FR-1", "units": 1}])
+        unit = _json(self.api.handle("GET", "/games/Age%20of%20Fantasy/factions/Alpha/units/Guerriers"))
+        self.assertEqual(unit["quality"], 4)
+
+    def test_conditional_get_and_cache(self) -> None:
+        first = self.api.handle("GET", "/games/Age%20of%20Fantasy/factions/Alpha")
+        self.assertEqual(first.status, 200)
+        self.assertIsNotNone(first.etag)
+        self.assertIs(self.api.handle("GET", "/games/Age%20of%20Fantasy/factions/Alpha"), first)
+
+        revalidated = self.api.handle("GET", "/games/Age%20of%20Fantasy/factions/Alpha", if_none_match=first.etag)
+        self.assertEqual((revalidated.status, revalidated.body), (304, b""))
+
+    def test_data_version_changes_etag(self) -> None:
+        path = "/games/Age%20of%20Fantasy/factions/Alpha"
+        self.assertNotEqual(self.api.handle("GET", path).etag, _api("FR-2").handle("GET", path).etag)
+
+    def test_price_and_validate(self) -> None:
+        base = "/games/Age%20of%20Fantasy/factions/Alpha"
+        priced = _json(self.api.handle("POST", base + "/price", json.dumps({"entry": self.entry}).encode()))
+        self.assertEqual(priced["cost"], 100)
+
+        saved = {"game": "Age of Fantasy", "faction": "Alpha", "faction_version": "FR-1", "points": 1000,
+                 "list_name": "Test", "army_list": [self.entry]}
+        result = _json(self.api.handle("POST", base + "/validate", json.dumps(saved).encode()))
+        self.assertTrue(result["valid"])
+        self.assertEqual(result["army_cost"], 100)
+
+    def test_exports_use_renderer_mime_types(self) -> None:
+        base = "/games/Age%20of%20Fantasy/factions/Alpha/export/"
+        body = json.dumps({"list_name": "Test", "points": 1000, "army_list": [self.entry]}).encode()
+        html = self.api.handle("POST", base + "html", body)
+        self.assertTrue(html.content_type.startswith("text/html"))
+        self.assertIn("Guerriers".encode(), html.body)
+        pdf = self.api.handle("POST", base + "pdf", body)
+        self.assertEqual(pdf.content_type, "application/pdf")
+        self.assertTrue(pdf.body.startswith(b"%PDF"))
+
+    def test_errors_are_json(self) -> None:
+        self.assertEqual(self.api.handle("GET", "/games/Inconnu/factions").status, 404)
+        self.assertEqual(self.api.handle("GET", "/nulle/part").status, 404)
+        self.assertEqual(self.api.handle("DELETE", "/games").status, 405)
+        bad = self.api.handle("POST", "/games/Age%20of%20Fantasy/factions/Alpha/price", b"{oops")
+        self.assertEqual(bad.status, 400)
+        self.assertIn("error", _json(bad))
+        self.assertEqual(self.api.handle("POST", "/games/Age%20of%20Fantasy/factions/Alpha/export/docx", b"{}").status, 404)
+
+    def test_malformed_payloads_are_rejected_before_pricing(self) -> None:
+        path = "/games/Age%20of%20Fantasy/factions/Alpha/price"
+        for payload in ({"compact": {"n": "Guerriers", "o": "bad"}},
+                        {"compact": {"n": "Guerriers", "w": [{"n": "Lance", "_count": "2"}]}},
+                        {"entry": {**self.entry, "options": {"Options": "Bannière"}}},
+                        {"entry": {**self.entry, "mount": "Cheval"}}):
+            response = self.api.handle("POST", path, json.dumps(payload).encode())
+            self.assertEqual(response.status, 400, payload)
+            self.assertIn("error", _json(response))
+
+    def test_unexpected_errors_answer_json_500(self) -> None:
+        with patch("services.http_api.price_entry", side_effect=AttributeError("boom")), redirect_stderr(io.StringIO()):
+            response = self.api.handle("POST", "/games/Age%20of%20Fantasy/factions/Alpha/price", json.dumps({"entry": self.entry}).encode())
+
+        self.assertEqual(response.status, 500)
+        self.assertEqual(_json(response), {"error": "Erreur interne du serveur."})
+        self.assertEqual(len(self.api.cache), 0)
+
+    def test_render_model_version_changes_etag(self) -> None:
+        path = "/games/Age%20of%20Fantasy/factions/Alpha"
+        etag = self.api.handle("GET", path).etag
+        with patch("services.http_api.RENDER_MODEL_VERSION", -1):
+            self.assertNotEqual(_api().handle("GET", path).etag, etag)
+
+    def test_cache_is_bounded_in_bytes_and_skips_exports(self) -> None:
+        cache = ResponseCache(max_entries=10, max_bytes=10)
+        for key in "abc":
+            cache.put(key, ApiResponse(200, b"1234"))
+        cache.put("big", ApiResponse(200, b"x" * 11))
+        self.assertEqual((len(cache), cache.size, cache.get("a"), cache.get("big")), (2, 8, None, None))
+
+        body = json.dumps({"list_name": "Test", "points": 1000, "army_list": [self.entry]}).encode()
+        self.api.handle("POST", "/games/Age%20of%20Fantasy/factions/Alpha/export/html", body)
+        self.assertEqual(len(self.api.cache), 0)
+
+
+class HttpServerTests(unittest.TestCase):
+    def test_round_trip_with_etag(self) -> None:
+        server = make_server(_api(), port=0, quiet=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}/games"
+
+        with urllib.request.urlopen(url) as response:
+            etag = response.headers["ETag"]
+            self.assertEqual(json.load(response)["games"], ["Age of Fantasy"])
+        request = urllib.request.Request(url, headers={"If-None-Match": etag})
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            urllib.request.urlopen(request)
+        self.assertEqual(ctx.exception.code, 304)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import io
+import json
+import unittest
+
+from services.army_rules import validate_army_rules
+from services.list_import import ListImportError, import_army_list, parse_list_file, read_limited
+
+
+GAME_CONFIG = {"hero_limit": 375, "unit_copy_rule": 750, "unit_max_cost_ratio": 0.35}
+
+
+class ArmyRulesTests(unittest.TestCase):
+    def test_returns_every_failed_rule(self) -> None:
+        army_list = [{"name": "Héros", "type": "hero", "cost": 400}] * 3
+
+        messages = validate_army_rules(army_list, 1000, GAME_CONFIG)
+
+        self.assertEqual(len(messages), 3)
+        self.assertTrue(messages[0].startswith("Limite de héros"))
+
+    def test_valid_list_has_no_message(self) -> None:
+        self.assertEqual(validate_army_rules([{"name": "Guerriers", "type": "unit", "cost": 100}], 1000, GAME_CONFIG), [])
+        self.assertEqual(validate_army_rules([{"name": "X", "cost": 5000}], 1000, {}), [])
+
+
+class ListImportTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.lance = {"name": "Lance", "range": "Mêlée", "attacks": 2, "armor_piercing": 1, "special_rules": []}
+        self.banner = {"name": "Bannière", "cost": 10, "special_rules": ["Sans peur"]}
+        self.faction = {
+            "faction": "Faction Alpha",
+            "version": "FR-2",
+            "units": [{
+                "name": "Guerriers",
+                "type": "unit",
+                "size": 10,
+                "base_cost": 100,
+                "quality": 4,
+                "defense": 5,
+                "special_rules": ["Bouclier"],
+                "weapon": [self.lance],
+                "upgrade_groups": [{"group": "Améliorations", "type": "upgrades", "options": [self.banner]}],
+            }],
+        }
+        self.entry = {
+            "name": "Guerriers",
+            "type": "unit",
+            "cost": 105,
+            "size": 10,
+            "quality": 4,
+            "defense": 4,
+            "weapon": [{**self.lance, "attacks": 1}],
+            "options": {"Améliorations": [{**self.banner, "cost": 5}]},
+            "special_rules": ["Bouclier", "Sans peur"],
+        }
+
+    def _file(self, **fields) -> bytes:
+        return json.dumps({"faction": "Faction Alpha", "army_list": [self.entry], **fields}).encode("utf-8")
+
+    def test_rehydrates_units_from_current_data_and_reports_drift(self) -> None:
+        result = import_army_list(self._file(faction_version="FR-2", army_cost=105), self.faction, GAME_CONFIG, 1000)
+
+        unit = result["army_list"][0]
+        self.assertEqual(unit["weapon"][0]["attacks"], 2)
+        self.assertEqual(unit["defense"], 5)
+        self.assertEqual(unit["cost"], 105)
+        self.assertEqual(unit["options"]["Améliorations"][0]["cost"], 10)
+        messages = [message for _, message in result["issues"]]
+        self.assertTrue(any("Bannière" in m and "10 pts" in m for m in messages))
+        self.assertTrue(any(m.startswith("Guerriers : Défense") for m in messages))
+
+    def test_older_version_is_migrated_and_repriced(self) -> None:
+        result = import_army_list(self._file(faction_version="FR-1", army_cost=105), self.faction, GAME_CONFIG, 1000)
+
+        self.assertEqual(result["army_list"][0]["cost"], 110)
+        self.assertEqual(result["army_cost"], 110)
+        messages = [message for _, message in result["issues"]]
+        self.assertTrue(any("FR-1" in m and "FR-2" in m for m in messages))
+        self.assertIn("Guerriers : coût recalculé 105 → 110 pts.", messages)
+
+    def test_unknown_units_are_kept_and_reported(self) -> None:
+        self.entry["name"] = "Fantôme"
+
+        result = import_army_list(self._file(faction_version="FR-2"), self.faction, GAME_CONFIG, 1000)
+
+        self.assertEqual(result["army_list"][0]["name"], "Fantôme")
+        self.assertIn(("error", "Unité inconnue dans Faction Alpha : Fantôme"), result["issues"])
+
+    def test_composition_rules_and_points_are_checked(self) -> None:
+        result = import_army_list(self._file(faction_version="FR-2"), self.faction, GAME_CONFIG, 100)
+
+        errors = [message for level, message in result["issues"] if level == "error"]
+        self.assertIn("Dépassement : 105 / 100 pts", errors)
+        self.assertTrue(any("dépasse" in m for m in errors))
+
+    def test_rejects_oversized_or_malformed_files(self) -> None:
+        with self.assertRaises(ListImportError):
+            read_limited(io.BytesIO(b"x" * 100), limit=10)
+        with self.assertRaises(ListImportError):
+            parse_list_file(b"{not json")
+        with self.assertRaises(ListImportError):
+            parse_list_file(b'{"army_list": {}}')
+        self.assertEqual(read_limited(io.BytesIO(b"{}"), limit=10), b"{}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from repositories.army_list_repository import SqliteArmyListRepository
+from repositories.faction_repository import JsonFactionRepository
+from services import list_migration
+from services.list_migration import ListMigrator, migrate_stored_lists
+from services.pricing import price_entry, untraceable_options
+
+
+class ListMigrationTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.lance = {"name": "Lance", "range": "Mêlée", "attacks": 1, "armor_piercing": 0, "special_rules": []}
+        self.arc = {"name": "Arc long", "range": 24, "attacks": 1, "armor_piercing": 0, "special_rules": []}
+        self.unit = {
+            "name": "Gardes",
+            "type": "unit",
+            "size": 5,
+            "base_cost": 60,
+            "quality": 4,
+            "defense": 4,
+            "weapon": [self.lance],
+            "upgrade_groups": [
+                {"group": "Armes", "type": "variable_weapon_count", "options": [
+                    {"name": "Arc long", "cost": 3, "weapon": self.arc, "replaces": ["Lance"]},
+                ]},
+                {"group": "Améliorations", "type": "upgrades", "options": [{"name": "Étendard", "cost": 15}]},
+            ],
+        }
+        self.faction = {
+            "game": "Game One",
+            "faction": "Faction Alpha",
+            "version": "FR-3",
+            "units": [self.unit],
+            "migrations": [
+                {"from": "FR-1", "to": "FR-2", "units": {"Gardiens": "Gardes du corps"}, "options": {"Bannière": "Étendard"}},
+                {"from": "FR-2", "to": "FR-3", "units": {"Gardes du corps": "Gardes"}, "weapons": {"Arc": "Arc long"}},
+            ],
+        }
+        self.compact = {
+            "n": "Gardiens",
+            "c": 80,
+            "s": 10,
+            "w": [{"n": "Lance"}, {"n": "Arc", "_count": 2, "_replaces": ["Lance"], "_upgraded": True}],
+            "o": {"Améliorations": ["Bannière"]},
+        }
+
+    def test_renames_are_chained_across_versions(self) -> None:
+        renames = ListMigrator(self.faction).renames("FR-1")
+
+        self.assertEqual(renames.units["Gardiens"], "Gardes")
+        self.assertEqual(renames.options, {"Bannière": "Étendard"})
+        self.assertEqual(renames.weapons, {"Arc": "Arc long"})
+
+    def test_unit_mapping_is_memoized_per_version_pair(self) -> None:
+        migrator = ListMigrator(self.faction)
+
+        first = migrator.resolve_unit("FR-1", "Gardiens")
+        migrator._units_by_name = {}
+
+        self.assertIs(migrator.resolve_unit("FR-1", "Gardiens"), first)
+        self.assertIsNone(migrator.resolve_unit("FR-2", "Gardiens"))
+
+    def test_migrate_compact_list_renames_and_reprices(self) -> None:
+        result = ListMigrator(self.faction).migrate_compact_list([self.compact], "FR-1")
+
+        unit = result["units"][0]
+        self.assertEqual(unit["n"], "Gardes")
+        self.assertEqual(unit["w"][1]["n"], "Arc long")
+        self.assertEqual(unit["o"], {"Améliorations": ["Étendard"]})
+        # (60 × 2 combinée) + 2 × 3 + 15
+        self.assertEqual(unit["c"], 141)
+        self.assertEqual(result["army_list"][0]["weapon"][1]["range"], 24)
+        self.assertEqual(result["faction_version"], "FR-3")
+        self.assertIn(("warning", "Gardes : coût recalculé 80 → 141 pts."), result["notes"])
+
+    def test_unknown_unit_is_reported_and_left_untouched(self) -> None:
+        result = ListMigrator(self.faction).migrate_compact_list([{**self.compact, "n": "Fantômes"}], "FR-3")
+
+        self.assertEqual(result["units"][0]["n"], "Fantômes")
+        self.assertEqual(result["army_list"], [])
+        self.assertEqual(result["notes"], [("error", "Unité supprimée ou inconnue : Fantômes")])
+
+    def test_price_entry_matches_configurator_formula(self) -> None:
+        entry = {
+            "size": 5,
+            "weapon": [self.lance, {**self.arc, "_count": 1, "_replaces": ["Lance"], "_upgraded": True}],
+            "options": {"Améliorations": [{"name": "Étendard", "cost": 15}]},
+        }
+
+        self.assertEqual(price_entry(entry, self.unit), 60 + 3 + 15)
+
+    def test_lower_cost_is_kept_when_an_option_leaves_no_trace(self) -> None:
+        self.unit["upgrade_groups"].append({"group": "Vétérans", "type": "conditional_weapon", "options": [
+            {"name": "Entraînement", "cost": 10, "special_rules": ["Relance"]},
+        ]})
+        compact = {"n": "Gardes", "c": 70, "s": 5, "w": [{"n": "Lance"}]}
+
+        result = ListMigrator(self.faction).migrate_compact_list([compact], "FR-3")
+
+        self.assertEqual((result["units"][0]["c"], result["army_cost"], result["army_list"][0]["cost"]), (70, 70, 70))
+        self.assertIn("options non traçables : Entraînement", result["notes"][0][1])
+        # une hausse reste appliquée : le recalcul est un minorant du coût réel
+        self.assertEqual(ListMigrator(self.faction).migrate_compact_list([{**compact, "c": 50}], "FR-3")["army_cost"], 60)
+
+    def test_untraceable_options(self) -> None:
+        sword = {"name": "Épée", "range": "Mêlée", "attacks": 2}
+        unit = {"weapon": [self.lance], "upgrade_groups": [
+            {"type": "weapon", "options": [{"name": "Lance lourde", "weapon": {**self.lance}}, {"name": "Épée", "weapon": sword}]},
+            {"type": "variable_weapon_count", "options": [{"name": "Arc", "weapon": self.arc, "replaces": ["Épée"]}]},
+            {"type": "upgrades", "options": [{"name": "Étendard", "cost": 15}]},
+        ]}
+
+        self.assertEqual(untraceable_options(unit), ["Lance lourde", "Épée"])
+        self.assertEqual(untraceable_options(self.unit), [])
+
+
+class BulkMigrationTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = Path(self.temp_dir.name)
+        factions_dir = self.base_dir / "repositories" / "data" / "factions"
+        common_dir = self.base_dir / "repositories" / "data" / "common-rules"
+        factions_dir.mkdir(parents=True)
+        common_dir.mkdir(parents=True)
+        (common_dir / "common-rules.json").write_text("[]", encoding="utf-8")
+        faction = {
+            "game": "Game One",
+            "faction": "Faction Alpha",
+            "version": "FR-2",
+            "units": [{"name": "Gardes", "type": "unit", "size": 5, "base_cost": 70, "quality": 4, "defense": 4}],
+            "migrations": [{"from": "FR-1", "to": "FR-2", "units": {"Gardiens": "Gardes"}}],
+        }
+        (factions_dir / "alpha.json").write_text(json.dumps(faction), encoding="utf-8")
+        self.db_path = self.base_dir / "saves" / "lists.sqlite3"
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_migrates_outdated_lists_without_touching_updated_at(self) -> None:
+        repository = SqliteArmyListRepository(self.db_path)
+        old_id = repository.save_list("Ana", "Game One", "Faction Alpha", "Ancienne", [{"n": "Gardiens", "c": 60, "s": 5, "w": []}],
+                                      army_cost=60, faction_version="FR-1")
+        broken_id = repository.save_list("Ana", "Game One", "Faction Alpha", "Cassée", [{"n": "Fantômes", "c": 60, "s": 5, "w": []}],
+                                         army_cost=60, faction_version="FR-1")
+        current_id = repository.save_list("Ana", "Game One", "Faction Alpha", "À jour", [{"n": "Gardes", "c": 70, "s": 5, "w": []}],
+                                          army_cost=70, faction_version="FR-2")
+        before = repository.get_list(old_id)["updated_at"]
+        repository.close()
+
+        stats = migrate_stored_lists(self.db_path, self.base_dir, workers=1, batch_size=2)
+
+        repository = SqliteArmyListRepository(self.db_path)
+        self.addCleanup(repository.close)
+        migrated = repository.get_list(old_id)
+        self.assertEqual(stats, {"scanned": 3, "migrated": 1, "errors": 1})
+        self.assertEqual(migrated["units"][0]["n"], "Gardes")
+        self.assertEqual((migrated["army_cost"], migrated["faction_version"]), (70, "FR-2"))
+        self.assertEqual(migrated["updated_at"], before)
+        self.assertEqual(repository.get_list(broken_id)["faction_version"], "FR-1")
+        self.assertEqual(repository.get_list(current_id)["army_cost"], 70)
+
+    def test_worker_loads_the_catalog_once(self) -> None:
+        worker_state = patch.multiple(list_migration, _worker_base_dir=None, _worker_catalog=None, _worker_migrators={})
+        worker_state.start()
+        self.addCleanup(worker_state.stop)
+        list_migration._init_worker(str(self.base_dir))
+
+        with patch.object(JsonFactionRepository, "load_catalog", autospec=True, side_effect=JsonFactionRepository.load_catalog) as load:
+            self.assertEqual(list_migration._worker_migrator("Game One", "Faction Alpha").version, "FR-2")
+            self.assertIsNone(list_migration._worker_migrator("Game One", "Faction Beta"))
+            self.assertIsNone(list_migration._worker_migrator("Game Two", "Faction Alpha"))
+
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(load.call_args.args[0].artifact_path, self.base_dir / "repositories" / "data" / "catalog.bin")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from repositories.army_list_repository import SqliteArmyListRepository
+from services.list_session import detach_saved_list, forget_saved_lists_page, start_new_list
+
+
+class ListSessionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = SqliteArmyListRepository(Path(self.temp_dir.name) / "lists.sqlite3", pool_size=1)
+        self.units = [{"n": "Guerriers", "c": 100, "s": 10, "w": []}]
+
+    def tearDown(self) -> None:
+        self.repository.close()
+        self.temp_dir.cleanup()
+
+    def _save(self, state: dict, name: str) -> None:
+        # Même appel que le bouton « Sauvegarder la liste »
+        state["saved_list_id"] = self.repository.save_list(
+            "alice", "Game One", "Faction Alpha", name, state["army_list"], points=1000,
+            army_cost=state["army_cost"], list_id=state.get("saved_list_id"),
+        )
+
+    def test_new_list_after_opening_a_saved_one_does_not_overwrite_it(self) -> None:
+        list_a = self.repository.save_list("alice", "Game One", "Faction Alpha", "Liste A", self.units, 1000, 100)
+        state = {"army_list": self.units, "army_cost": 100, "unit_selections": {"draft_1": {}}, "saved_list_id": list_a}
+
+        start_new_list(state)
+        self._save(state, "Liste B")
+
+        self.assertEqual((state["army_list"], state["army_cost"], state["unit_selections"]), ([], 0, {}))
+        self.assertNotEqual(state["saved_list_id"], list_a)
+        record = self.repository.get_list(list_a)
+        self.assertEqual((record["list_name"], record["units"], record["army_cost"]), ("Liste A", self.units, 100))
+
+    def test_detach_keeps_the_army_but_saves_a_copy(self) -> None:
+        list_a = self.repository.save_list("alice", "Game One", "Faction Alpha", "Liste A", self.units, 1000, 100)
+        state = {"army_list": self.units, "army_cost": 100, "saved_list_id": list_a}
+
+        detach_saved_list(state)
+        self._save(state, "Liste A bis")
+
+        self.assertEqual(self.repository.get_list(list_a)["list_name"], "Liste A")
+        self.assertEqual(self.repository.get_list(state["saved_list_id"])["units"], self.units)
+
+    def test_player_change_resets_pagination(self) -> None:
+        state = {"saved_lists_cursors": [None, "cursor"]}
+
+        forget_saved_lists_page(state)
+
+        self.assertNotIn("saved_lists_cursors", state)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from repositories.army_list_repository import SqliteArmyListRepository
+from repositories.faction_repository import JsonFactionRepository
+from services.metagame import MetagameStats, load_stats, save_stats, update_from_database, update_from_directory
+
+
+def _export(faction: str, units: list[dict]) -> str:
+    return json.dumps({"game": "Game One", "faction": faction, "points": 500, "army_list": units})
+
+
+HERO = {"name": "Champion", "type": "hero", "unit_detail": "hero", "cost": 100, "options": {}, "mount": {"name": "Cheval"}}
+GUARDS = {"name": "Gardes", "type": "unit", "unit_detail": "unit", "cost": 300,
+          "options": {"Options": [{"name": "Bannière"}]}, "weapon": [{"name": "Fléau", "_count": 2, "_upgraded": True}]}
+
+
+class MetagameTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = Path(self.temp_dir.name)
+        self.lists_dir = self.base_dir / "listes"
+        self.lists_dir.mkdir()
+        (self.lists_dir / "a.json").write_text(_export("Alpha", [HERO, GUARDS]), encoding="utf-8")
+        (self.lists_dir / "b.json").write_text(_export("Alpha", [{**GUARDS, "options": {}, "weapon": []}]), encoding="utf-8")
+        (self.lists_dir / "c.json").write_text(_export("Beta", [HERO]), encoding="utf-8")
+        (self.lists_dir / "cassé.json").write_text("{", encoding="utf-8")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_aggregates_pick_rates_shares_and_options(self) -> None:
+        stats = MetagameStats()
+        self.assertEqual(update_from_directory(stats, self.lists_dir), 3)
+
+        self.assertEqual([(r["faction"], r["listes"]) for r in stats.faction_distribution("Game One")], [("Alpha", 2), ("Beta", 1)])
+        rates = {r["unité"]: r["taux"] for r in stats.pick_rates("Game One", "Alpha")}
+        self.assertEqual(rates, {"Gardes": 1.0, "Champion": 0.5})
+        shares = {r["catégorie"]: r["part_moyenne"] for r in stats.category_shares("Game One")}
+        self.assertAlmostEqual(shares["hero"], (0.25 + 0 + 1) / 3)
+        self.assertAlmostEqual(shares["unit"], (0.75 + 1) / 3)
+        options = {(r["unité"], r["option"]): r["taux"] for r in stats.popular_options("Game One", "Alpha")}
+        self.assertEqual(options, {("Gardes", "Bannière"): 0.5, ("Gardes", "Fléau"): 0.5, ("Champion", "Cheval"): 1.0})
+
+    def test_new_lists_are_folded_without_recounting(self) -> None:
+        state_path = self.base_dir / "metagame.json"
+        stats = MetagameStats()
+        update_from_directory(stats, self.lists_dir)
+        save_stats(stats, state_path)
+
+        (self.lists_dir / "d.json").write_text(_export("Beta", [GUARDS]), encoding="utf-8")
+        stats = load_stats(state_path)
+        self.assertEqual(update_from_directory(stats, self.lists_dir), 1)
+
+        rebuilt = MetagameStats()
+        update_from_directory(rebuilt, self.lists_dir, workers=2, batch_size=1)
+        self.assertEqual(stats.to_json()["unit_lists"], rebuilt.to_json()["unit_lists"])
+        self.assertEqual(stats.seen, rebuilt.seen)
+        for name in ("hero", "unit"):
+            self.assertAlmostEqual(stats.category_share[("Game One", name)], rebuilt.category_share[("Game One", name)])
+
+    def test_database_lists_use_catalog_unit_details(self) -> None:
+        factions_dir = self.base_dir / "repositories" / "data" / "factions"
+        factions_dir.mkdir(parents=True)
+        faction = {"game": "Game One", "faction": "Alpha", "version": "1",
+                   "units": [{"name": "Char", "type": "unit", "unit_detail": "vehicle", "base_cost": 150}]}
+        (factions_dir / "alpha.json").write_text(json.dumps(faction), encoding="utf-8")
+        db_path = self.base_dir / "saves" / "lists.sqlite3"
+        repository = SqliteArmyListRepository(db_path)
+        repository.save_list("Ana", "Game One", "Alpha", "Blindée", [{"n": "Char", "c": 150, "s": 1, "w": [], "m": "Rails"}], army_cost=150)
+        repository.close()
+
+        stats = MetagameStats()
+        self.assertEqual(update_from_database(stats, db_path, self.base_dir), 1)
+        self.assertEqual(update_from_database(stats, db_path, self.base_dir), 0)
+
+        self.assertEqual(stats.category_shares("Game One"), [{"catégorie": "vehicle", "part_moyenne": 1.0}])
+        self.assertEqual(stats.popular_options("Game One")[0]["option"], "Rails")
+
+        repository = SqliteArmyListRepository(db_path)
+        repository.save_list("Ana", "Game One", "Beta", "Inconnue", [{"n": "Char", "c": 150, "s": 1, "w": []}], army_cost=150)
+        repository.save_list("Bo", "Game One", "Alpha", "Seconde", [{"n": "Char", "c": 150, "s": 1, "w": []}], army_cost=150)
+        repository.close()
+        with patch.object(JsonFactionRepository, "load_catalog", autospec=True, side_effect=JsonFactionRepository.load_catalog) as load:
+            self.assertEqual(update_from_database(stats, db_path, self.base_dir), 2)
+        self.assertEqual(load.call_count, 1)  # catalogue chargé une fois pour toutes les factions du lot
+
+    def test_edited_and_deleted_files_replace_their_contribution(self) -> None:
+        other_dir = self.base_dir / "autre_club"
+        other_dir.mkdir()
+        (other_dir / "a.json").write_text(_export("Beta", [GUARDS]), encoding="utf-8")
+        stats = MetagameStats()
+        update_from_directory(stats, self.lists_dir)
+        self.assertEqual(update_from_directory(stats, other_dir), 1)  # même nom relatif, autre archive
+
+        edited = self.lists_dir / "c.json"
+        edited.write_text(_export("Beta", [GUARDS, GUARDS]), encoding="utf-8")
+        os.utime(edited, ns=(edited.stat().st_atime_ns, edited.stat().st_mtime_ns + 1_000_000))
+        (self.lists_dir / "b.json").unlink()
+        self.assertEqual(update_from_directory(stats, self.lists_dir), 1)
+
+        rebuilt = MetagameStats()
+        update_from_directory(rebuilt, self.lists_dir)
+        update_from_directory(rebuilt, other_dir)
+        self.assertEqual(stats.to_json(), rebuilt.to_json())
+        self.assertEqual([(r["faction"], r["listes"]) for r in stats.faction_distribution("Game One")], [("Beta", 2), ("Alpha", 1)])
+
+    def test_updated_and_deleted_database_lists_are_refolded(self) -> None:
+        db_path = self.base_dir / "saves" / "lists.sqlite3"
+        repository = SqliteArmyListRepository(db_path)
+        self.addCleanup(repository.close)
+        kept = repository.save_list("Ana", "Game One", "Alpha", "A", [{"n": "Gardes", "c": 300, "s": 10, "w": []}], army_cost=300)
+        deleted = repository.save_list("Ana", "Game One", "Beta", "B", [{"n": "Char", "c": 150, "s": 1, "w": []}], army_cost=150)
+        stats = MetagameStats()
+        update_from_database(stats, db_path)
+
+        repository.save_list("Ana", "Game One", "Alpha", "A", [{"n": "Gardes", "c": 300, "s": 10, "w": [], "m": "Rails"}],
+                             army_cost=300, list_id=kept)
+        repository.delete_list("Ana", deleted)
+        self.assertEqual(update_from_database(stats, db_path), 1)
+
+        self.assertEqual(stats.seen, {f"db:{kept}"})
+        self.assertEqual(stats.faction_distribution("Game One"), [{"faction": "Alpha", "listes": 1, "part": 1.0}])
+        self.assertEqual([(r["option"], r["exemplaires"]) for r in stats.popular_options("Game One")], [("Rails", 1)])
+        self.assertEqual(stats.category_shares("Game One"), [{"catégorie": "unit", "part_moyenne": 1.0}])
+
+    def test_state_round_trip_keeps_source_contributions(self) -> None:
+        state_path = self.base_dir / "metagame.json"
+        stats = MetagameStats()
+        update_from_directory(stats, self.lists_dir)
+        save_stats(stats, state_path)
+
+        stats = load_stats(state_path)
+        (self.lists_dir / "a.json").unlink()
+        update_from_directory(stats, self.lists_dir)
+
+        self.assertEqual([(r["faction"], r["listes"]) for r in stats.faction_distribution("Game One")], [("Alpha", 1), ("Beta", 1)])
+        self.assertNotIn(("Game One", "Alpha", "Champion"), stats.unit_lists)
+
+    def test_unknown_state_schema_starts_over(self) -> None:
+        state_path = self.base_dir / "metagame.json"
+        state_path.write_text(json.dumps({"schema": 0, "seen": ["file:a.json"]}), encoding="utf-8")
+        self.assertEqual(load_stats(state_path).seen, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
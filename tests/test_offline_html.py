@@ -0,0 +1,100 @@
+import importlib.util
+import re
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from services.exporters import build_render_model, minify_css, render
+from services.font_subset import font_face_css, glyph_set, subset_font
+from services.qr_code import dark_runs, qr_matrix, qr_svg
+
+HAS_QRCODE = importlib.util.find_spec("qrcode") is not None
+HAS_FONTTOOLS = importlib.util.find_spec("fontTools") is not None
+SYSTEM_FONT = Path("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+
+
+class OfflineHtmlTests(unittest.TestCase):
+    def setUp(self) -> None:
+        army_list = [{
+            "name": "Guerriers",
+            "type": "unit",
+            "cost": 120,
+            "size": 10,
+            "quality": 4,
+            "defense": 5,
+            "weapon": [{"name": "Lance", "range": "Mêlée", "attacks": 1, "armor_piercing": 0, "special_rules": []}],
+            "special_rules": ["Bouclier"],
+        }]
+        self.model = build_render_model(
+            army_list, "Ma liste", 1000, faction_rules=[{"name": "Zèle", "description": "Relance"}],
+            app_url="https://example.org/", generated_at=datetime(2024, 1, 2, 3, 4),
+        )
+
+    def test_offline_html_makes_no_network_requests(self) -> None:
+        html = render("html_offline", self.model)
+        urls = set(re.findall(r"(?:src|href)=[\"']?(https?://[^\"' >]+)", html))
+
+        self.assertNotIn("fonts.googleapis.com", html)
+        self.assertNotIn("api.qrserver.com", html)
+        self.assertEqual(urls, set())
+        self.assertIn("Guerriers", html)
+
+    @unittest.skipUnless(HAS_QRCODE, "qrcode non installé")
+    def test_offline_html_embeds_local_svg_qr(self) -> None:
+        html = render("html_offline", self.model)
+
+        self.assertIn('<svg xmlns="http://www.w3.org/2000/svg"', html)
+        self.assertNotIn("<img", html)
+
+    def test_online_html_is_unchanged(self) -> None:
+        html = render("html", self.model)
+
+        self.assertIn("fonts.googleapis.com", html)
+        self.assertIn("/* ── Titre & résumé ── */", html)
+
+    def test_minify_css(self) -> None:
+        css = "/* titre */\n.a , .b > .c {\n  color : red;\n  margin: 0 0 4px;\n}\n@media print{ .a{ padding:6px; } }"
+
+        self.assertEqual(minify_css(css), ".a,.b>.c{color:red;margin:0 0 4px}@media print{.a{padding:6px}}")
+
+
+class QrCodeTests(unittest.TestCase):
+    def test_dark_runs_merge_adjacent_modules(self) -> None:
+        matrix = [[True, True, False, True], [False, False, False, False]]
+
+        self.assertEqual(list(dark_runs(matrix)), [(0, 0, 2), (0, 3, 1)])
+
+    @unittest.skipUnless(HAS_QRCODE, "qrcode non installé")
+    def test_qr_svg_and_overflow(self) -> None:
+        svg = qr_svg("https://example.org/?list=abc", size=64)
+
+        self.assertTrue(svg.startswith("<svg") and 'width="64"' in svg)
+        self.assertIsNotNone(qr_matrix("abc"))
+        self.assertIsNone(qr_matrix("x" * 10000))
+
+
+class FontSubsetTests(unittest.TestCase):
+    def test_glyph_set_is_sorted_and_unique(self) -> None:
+        self.assertEqual(glyph_set("bébé\n ab"), " abé")
+
+    def test_missing_font_files_are_skipped(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            missing = Path(tmp) / "Inter-Regular.ttf"
+
+            self.assertIsNone(subset_font(missing, "abc"))
+            self.assertEqual(font_face_css({400: missing}, "abc"), "")
+
+    @unittest.skipUnless(HAS_FONTTOOLS and SYSTEM_FONT.exists(), "fontTools ou police système absents")
+    def test_subset_is_smaller_and_cached_by_glyph_set(self) -> None:
+        first = subset_font(SYSTEM_FONT, glyph_set("Guerriers 120 pts"))
+        again = subset_font(SYSTEM_FONT, glyph_set("Guerriers 120 pts"))
+        css = font_face_css({400: SYSTEM_FONT}, "Guerriers")
+
+        self.assertIs(first, again)
+        self.assertLess(len(first), SYSTEM_FONT.stat().st_size / 10)
+        self.assertTrue(css.startswith("@font-face{font-family:'Inter';font-weight:400;"))
+
+
+if __name__ == "__main__":
+    unittest.main()
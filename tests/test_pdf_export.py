@@ -0,0 +1,102 @@
+import re
+import unittest
+import zlib
+from datetime import datetime
+
+from services.exporters import build_render_model, render
+from services.pdf_export import PdfCanvas, pdf_text, text_width, wrap_text
+
+
+def _page_streams(pdf: bytes) -> list[bytes]:
+    return [zlib.decompress(m) for m in re.findall(rb"stream\n(.*?)\nendstream", pdf, re.S)]
+
+
+class PdfTextTests(unittest.TestCase):
+    def test_widths_use_helvetica_metrics(self) -> None:
+        self.assertAlmostEqual(text_width("Il", 10), (278 + 222) / 100)
+        self.assertAlmostEqual(text_width("Il", 10, bold=True), (278 + 278) / 100)
+        self.assertAlmostEqual(text_width("é", 10), text_width("e", 10))
+
+    def test_wrap_keeps_lines_within_width(self) -> None:
+        text = "Lorsque cette unité est activée, vous pouvez placer toutes les figurines n'importe où."
+        lines = wrap_text(text, 80, 7)
+
+        self.assertGreater(len(lines), 1)
+        self.assertTrue(all(text_width(line, 7) <= 80 for line in lines))
+        self.assertEqual(" ".join(lines), text)
+        self.assertEqual(wrap_text("x" * 60, 20, 10)[0], "x" * 4)
+
+    def test_characters_outside_winansi_are_dropped(self) -> None:
+        self.assertEqual(pdf_text("🐴 Cheval  (+20 pts)"), "Cheval  (+20 pts)")
+        self.assertEqual(pdf_text("Règles — Sorts"), "Règles — Sorts")
+
+
+class PdfCanvasTests(unittest.TestCase):
+    def test_document_structure_and_xref_offsets(self) -> None:
+        canvas = PdfCanvas()
+        canvas.new_page()
+        canvas.text(10, 20, "Épée (Fléau)", 8)
+        canvas.new_page()
+        canvas.rect(10, 10, 50, 20, fill=(1, 0, 0))
+        pdf = canvas.to_bytes("Titre", "20240102030400")
+
+        self.assertTrue(pdf.startswith(b"%PDF-1.4"))
+        self.assertTrue(pdf.endswith(b"%%EOF\n"))
+        xref = int(re.search(rb"startxref\n(\d+)", pdf).group(1))
+        self.assertTrue(pdf[xref:].startswith(b"xref"))
+        offsets = [int(o) for o in re.findall(rb"(\d{10}) 00000 n", pdf)]
+        for number, offset in enumerate(offsets, start=1):
+            self.assertTrue(pdf[offset:].startswith(f"{number} 0 obj".encode()))
+        self.assertIn(b"/Count 2", pdf)
+        self.assertIn("(Épée \\(Fléau\\)) Tj".encode("cp1252"), _page_streams(pdf)[0])
+
+
+class PdfRenderTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.unit = {
+            "name": "Guerriers",
+            "type": "unit",
+            "cost": 120,
+            "size": 10,
+            "quality": 4,
+            "defense": 5,
+            "weapon": [{"name": "Lance", "range": "Mêlée", "attacks": 1, "armor_piercing": 0, "special_rules": ["Perforant"]}],
+            "special_rules": ["Bouclier"],
+        }
+        self.rules = [{"name": f"Règle {i}", "description": "Description " * 20} for i in range(40)]
+
+    def _model(self, units: int, **kwargs) -> dict:
+        return build_render_model([dict(self.unit) for _ in range(units)], "Ma liste", 2000,
+                                  generated_at=datetime(2024, 1, 2, 3, 4), **kwargs)
+
+    def test_render_is_deterministic_and_offline(self) -> None:
+        model = self._model(3)
+        pdf = render("pdf", model)
+
+        self.assertEqual(pdf, render("pdf", model))
+        self.assertNotIn(b"http", pdf)
+        self.assertEqual(pdf.count(b"/Type /Page "), 1)
+        content = b"".join(_page_streams(pdf))
+        self.assertIn(b"(Guerriers) Tj", content)
+        self.assertIn(b"page 1/1", content)
+
+    def test_legend_starts_on_its_own_page(self) -> None:
+        pdf = render("pdf", self._model(1, faction_rules=self.rules, faction_spells={"Éclair (1)": "Touche"}))
+        pages = _page_streams(pdf)
+
+        self.assertGreaterEqual(len(pages), 2)
+        self.assertNotIn(b"Guerriers", b"".join(pages[1:]))
+        self.assertIn(b"(R\xe8gles sp\xe9ciales & Sorts) Tj", pages[1])
+        self.assertIn(b"(Sorts) Tj", b"".join(pages[1:]))
+
+    def test_large_lists_flow_onto_further_pages(self) -> None:
+        pdf = render("pdf", self._model(60))
+        pages = _page_streams(pdf)
+
+        self.assertGreater(len(pages), 2)
+        self.assertEqual(sum(page.count(b"(Guerriers) Tj") for page in pages), 60)
+        self.assertIn(f"page {len(pages)}/{len(pages)}".encode(), pages[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
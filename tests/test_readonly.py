@@ -0,0 +1,44 @@
+import copy
+import json
+import pickle
+import unittest
+
+from repositories.readonly import ReadOnlyDict, ReadOnlyList, freeze
+
+
+class FreezeTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.unit = freeze({"name": "Chevalier", "special_rules": ["Héros"],
+                            "upgrade_groups": [{"options": [{"name": "Cheval", "cost": 20}]}]})
+
+    def test_nested_structures_refuse_changes(self) -> None:
+        option = self.unit["upgrade_groups"][0]["options"][0]
+
+        self.assertIsInstance(option, ReadOnlyDict)
+        self.assertIsInstance(self.unit["special_rules"], ReadOnlyList)
+        with self.assertRaises(TypeError):
+            self.unit["upgrade_groups"] = []
+        with self.assertRaises(TypeError):
+            option["cost"] = 0
+        with self.assertRaises(TypeError):
+            self.unit["special_rules"].append("Rapide")
+        with self.assertRaises(TypeError):
+            self.unit.setdefault("coriace", 3)
+
+    def test_copies_are_plain_and_mutable(self) -> None:
+        for duplicate in (copy.deepcopy(self.unit), pickle.loads(pickle.dumps(self.unit))):
+            self.assertIs(type(duplicate), dict)
+            self.assertIs(type(duplicate["upgrade_groups"][0]["options"][0]), dict)
+            duplicate["upgrade_groups"][0]["options"][0]["cost"] = 0
+        rules = self.unit["special_rules"].copy()
+        rules.append("Rapide")
+
+        self.assertEqual(self.unit["upgrade_groups"][0]["options"][0]["cost"], 20)
+        self.assertEqual(self.unit["special_rules"], ["Héros"])
+
+    def test_reads_like_json(self) -> None:
+        self.assertEqual(self.unit, json.loads(json.dumps(self.unit)))
+
+
+if __name__ == "__main__":
+    unittest.main()
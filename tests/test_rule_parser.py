@@ -0,0 +1,59 @@
+import unittest
+
+from repositories.rule_parser import combine_rules, fold_text, is_natural_weapon, parse_rule, rule_key
+
+
+class ParseRuleTests(unittest.TestCase):
+    def test_bilingual_rule_with_parameter(self) -> None:
+        rule = parse_rule("Crossing Barrage (X) [Bombardement croisé (X)]")
+
+        self.assertEqual(rule.name, "Crossing Barrage [Bombardement croisé]")
+        self.assertEqual(rule.param, "X")
+        self.assertIsNone(rule.value)
+        self.assertEqual(rule.aliases, ("crossing barrage", "bombardement croise"))
+        self.assertEqual(rule.key, "bombardement croise")
+
+    def test_french_rule_with_numeric_and_bonus_parameters(self) -> None:
+        self.assertEqual((parse_rule("Peur (2)").key, parse_rule("Peur (2)").value), ("peur", 2))
+        bonus = parse_rule("Coriace (+6)")
+        self.assertEqual((bonus.name, bonus.value, bonus.is_bonus), ("Coriace", 6, True))
+        self.assertEqual(rule_key("Éclaireur"), rule_key("eclaireur"))
+        self.assertEqual(fold_text("Éclaireur"), "eclaireur")
+
+    def test_parsing_is_memoized(self) -> None:
+        self.assertIs(parse_rule("Effrayant (1)"), parse_rule("Effrayant (1)"))
+
+    def test_named_matches_either_language_and_any_parameter(self) -> None:
+        self.assertTrue(parse_rule("Coriace (+3)").named("Coriace"))
+        self.assertTrue(parse_rule("Tough (X) [Coriace (X)]").named("Tough", "Régénération"))
+        self.assertFalse(parse_rule("Coriace du roc").named("Coriace"))
+
+    def test_natural_weapons(self) -> None:
+        self.assertTrue(is_natural_weapon("Griffes lourdes"))
+        self.assertTrue(is_natural_weapon("Sabots"))
+        self.assertFalse(is_natural_weapon("Griffon"))
+
+
+class CombineRulesTests(unittest.TestCase):
+    def test_bonuses_add_up_and_levels_keep_the_highest(self) -> None:
+        rules = ["Héros", "Coriace (3)", "Héros", "Coriace (+3)", "Effrayant (1)", "Effrayant (2)",
+                 "Impact (+1)", "Impact (+1)", "Lanceur de sorts (X)", "Lanceur de sorts (2)"]
+
+        self.assertEqual(combine_rules(rules),
+                         ["Héros", "Coriace (6)", "Effrayant (2)", "Impact (+2)", "Lanceur de sorts (2)"])
+
+    def test_thresholds_and_text_parameters_are_kept_verbatim(self) -> None:
+        rules = ["Armure (2+)", "Armure (3+)", "Armure (2+)", "Haine (Nains)", "Haine (Elfes)", "Haine (nains)"]
+
+        self.assertEqual(combine_rules(rules), ["Armure (2+)", "Armure (3+)", "Haine (Nains)", "Haine (Elfes)"])
+
+    def test_bilingual_rules_keep_the_parameter_on_both_names(self) -> None:
+        self.assertEqual(combine_rules(["Tough (3) [Coriace (3)]", "Coriace (+3)"]), ["Tough (6) [Coriace (6)]"])
+        self.assertEqual(combine_rules(["Impact (+1) [Impact (+1)]", "Impact (+2)"]), ["Impact (+3) [Impact (+3)]"])
+
+    def test_single_occurrences_are_left_untouched(self) -> None:
+        self.assertEqual(combine_rules(["Coriace (+6)", "Éclaireur", "Eclaireur", ""]), ["Coriace (+6)", "Éclaireur"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from repositories.faction_repository import JsonFactionRepository
+from repositories.rule_parser import fold_text
+from services.rules_index import RulesIndex, load_rules_index, rule_aliases
+
+
+GENERIC = [
+    {"name": "Tough (X) [Coriace (X)]", "description": "Doit subir X blessures avant d'être éliminé."},
+    {"name": "Scout [Éclaireur]", "description": "Se déploie après les autres unités."},
+]
+COMMON = [{"title": "Regeneration Aura [Aura Régénération]", "description": "Les unités à portée gagnent Régénération."}]
+FURY = {"name": "Fury [Furie]", "description": "Touche deux fois en charge."}
+
+
+def _faction(units: list[dict]) -> dict:
+    return {
+        "faction_special_rules": [FURY],
+        "spells": {"Lightning Bolt (3) [Éclair (3)]": {"cost": 3, "description": "Inflige 3 touches."}},
+        "units": units,
+    }
+
+
+FACTIONS = {
+    "Age of Fantasy": {
+        "Orques": _faction([
+            {"name": "Boss", "special_rules": ["Coriace (3)", "Héros"],
+             "weapon": [{"name": "Hache", "special_rules": ["Perforant (1)"]}]},
+            {"name": "Éclaireurs", "special_rules": ["Eclaireur"], "weapon": {"name": "Arc", "special_rules": []},
+             "upgrade_groups": [{"options": [{"name": "Peaux", "special_rules": ["Tough (1)"]}]}]},
+        ]),
+        "Gobelins": _faction([{"name": "Chef", "special_rules": ["Furie"]}]),
+    },
+}
+
+
+class RulesIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = RulesIndex.build(FACTIONS, COMMON, GENERIC)
+
+    def test_aliases_drop_parameters_and_accents(self) -> None:
+        self.assertEqual(rule_aliases("Tough (X) [Coriace (X)]"), ["tough", "coriace"])
+        self.assertEqual(rule_aliases("Coriace (3)"), ["coriace"])
+        self.assertEqual(rule_aliases("Lightning Bolt (3) [Éclair (3)]"), ["lightning bolt", "eclair"])
+        self.assertEqual(fold_text("Éclaireur"), "eclaireur")
+
+    def test_search_matches_both_languages_and_prefixes(self) -> None:
+        self.assertEqual(self.index.search("tough")[0].name, "Tough (X) [Coriace (X)]")
+        self.assertEqual(self.index.search("CORIA")[0].name, "Tough (X) [Coriace (X)]")
+        self.assertEqual(self.index.search("eclaireur")[0].name, "Scout [Éclaireur]")
+
+    def test_search_requires_every_word(self) -> None:
+        hits = self.index.search("aura regen")
+
+        self.assertEqual([hit.name for hit in hits], ["Regeneration Aura [Aura Régénération]"])
+        self.assertEqual(self.index.search("aura furie"), [])
+        self.assertEqual(self.index.search("  "), [])
+
+    def test_exact_name_ranks_above_description_mentions(self) -> None:
+        hits = self.index.search("régénération")
+
+        self.assertEqual(hits[0].kind, "common")
+        self.assertEqual(self.index.search("blessures")[0].kind_label, "Règle générique")
+
+    def test_shared_faction_rule_is_one_document_listing_factions(self) -> None:
+        (hit,) = self.index.search("furie", kinds=["faction"])
+
+        self.assertEqual(hit.factions, (("Age of Fantasy", "Gobelins"), ("Age of Fantasy", "Orques")))
+        self.assertEqual(hit.holders, (("Age of Fantasy", "Gobelins", "Chef", "unité"),))
+
+    def test_holders_cover_unit_weapon_and_option_rules(self) -> None:
+        self.assertEqual(
+            self.index.holders_of("Tough (X) [Coriace (X)]"),
+            [("Age of Fantasy", "Orques", "Éclaireurs", "option"), ("Age of Fantasy", "Orques", "Boss", "unité")],
+        )
+        self.assertEqual(self.index.holders_of("Perforant"), [("Age of Fantasy", "Orques", "Boss", "arme")])
+        self.assertEqual(self.index.search("eclair", kinds=["spell"])[0].holders, ())
+
+    def test_json_roundtrip_preserves_results(self) -> None:
+        restored = RulesIndex.from_json(json.loads(json.dumps(self.index.to_json())))
+
+        self.assertEqual(restored.search("coriace"), self.index.search("coriace"))
+
+
+class LoadRulesIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = Path(self.temp_dir.name)
+        data_dir = self.base_dir / "repositories" / "data"
+        (data_dir / "common-rules").mkdir(parents=True)
+        (data_dir / "factions").mkdir()
+        (data_dir / "common-rules" / "common-rules.json").write_text(json.dumps(COMMON), encoding="utf-8")
+        (data_dir / "generic_rules.json").write_text(json.dumps({"rules": GENERIC}), encoding="utf-8")
+        self.faction_path = data_dir / "factions" / "orques.json"
+        self.faction_path.write_text(json.dumps({"game": "Age of Fantasy", "faction": "Orques", **FACTIONS["Age of Fantasy"]["Orques"]}), encoding="utf-8")
+        self.repository = JsonFactionRepository(self.base_dir)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_index_is_cached_until_sources_change(self) -> None:
+        index = load_rules_index(self.repository)
+        cache_path = self.base_dir / ".cache" / "rules_index.json"
+
+        self.assertTrue(cache_path.exists())
+        self.assertEqual(self.repository.load_generic_rules()[0]["name"], "Tough (X) [Coriace (X)]")
+        self.assertEqual(load_rules_index(self.repository).version, index.version)
+
+        data = json.loads(self.faction_path.read_text(encoding="utf-8"))
+        data["faction_special_rules"].append({"name": "Waaagh [Waaagh]", "description": "Cri de guerre."})
+        self.faction_path.write_text(json.dumps(data), encoding="utf-8")
+
+        reloaded = load_rules_index(self.repository)
+        self.assertNotEqual(reloaded.version, index.version)
+        self.assertEqual(reloaded.search("waaagh")[0].factions, (("Age of Fantasy", "Orques"),))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from services.session_footprint import retain_drafts, session_footprint
+
+
+class RetainDraftsTests(unittest.TestCase):
+    def test_evicts_least_recently_used_drafts(self) -> None:
+        selections = {"draft_1": {}, "draft_2": {"group_0": 1}, "draft_3": {}}
+
+        retain_drafts(selections, "draft_1", keep=3)
+        selections["draft_4"] = {}
+        evicted = retain_drafts(selections, "draft_4", keep=3)
+
+        self.assertEqual(evicted, ["draft_2"])
+        self.assertEqual(list(selections), ["draft_3", "draft_1", "draft_4"])
+
+    def test_keeps_at_least_the_current_draft(self) -> None:
+        selections = {"draft_1": {}, "draft_2": {}}
+        retain_drafts(selections, "draft_1", keep=0)
+        self.assertEqual(list(selections), ["draft_1"])
+
+
+class SessionFootprintTests(unittest.TestCase):
+    def test_catalog_references_are_counted_as_shared(self) -> None:
+        catalog = {"units": [{"name": "Guerriers", "rules": ["Coriace (3)"] * 50}]}
+        state = {"units": list(catalog["units"]), "army_list": [{"name": "x" * 500}]}
+
+        rows = {row["clé"]: row for row in session_footprint(state, shared=(catalog,))}
+
+        self.assertGreater(rows["units"]["partagé"], rows["units"]["propre"])
+        self.assertEqual(rows["army_list"]["partagé"], 0)
+        self.assertGreater(rows["army_list"]["propre"], 500)
+
+    def test_objects_reachable_from_two_keys_are_counted_once(self) -> None:
+        payload = ["y" * 1000]
+        rows = session_footprint({"a": payload, "b": {"alias": payload}})
+
+        self.assertEqual([row["clé"] for row in rows], ["a", "b"])
+        self.assertLess(rows[1]["propre"], 1000)
+
+    def test_walks_instance_attributes(self) -> None:
+        class Holder:
+            def __init__(self) -> None:
+                self.data = "z" * 2000
+
+        self.assertGreater(session_footprint({"holder": Holder()})[0]["propre"], 2000)
+
+
+if __name__ == "__main__":
+    unittest.main()
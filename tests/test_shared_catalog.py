@@ -0,0 +1,145 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from repositories.faction_repository import JsonFactionRepository
+from repositories.shared_catalog import SharedCatalog
+
+
+class SharedCatalogTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = Path(self.temp_dir.name)
+        self.data_dir = self.base_dir / "repositories" / "data"
+
+        common_rules_dir = self.data_dir / "common-rules"
+        self.factions_dir = self.data_dir / "factions"
+        common_rules_dir.mkdir(parents=True)
+        self.factions_dir.mkdir(parents=True)
+        (common_rules_dir / "common-rules.json").write_text(
+            json.dumps([{"title": "Rule A", "description": "Description A"}]),
+            encoding="utf-8",
+        )
+        self.faction = {
+            "game": "Game One",
+            "faction": "Faction Alpha",
+            "version": "FR-1",
+            "faction_special_rules": ["Rule A"],
+            "units": [{"name": "Unit Alpha", "base_cost": 10}, {"name": "Unité Bêta", "base_cost": 20}],
+        }
+        self.faction_path = self.factions_dir / "a_faction.json"
+        self.faction_path.write_text(json.dumps(self.faction, ensure_ascii=False), encoding="utf-8")
+        self.shared_path = self.data_dir / "catalog.mmap"
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_shared_catalog_decodes_factions_and_units_lazily(self) -> None:
+        JsonFactionRepository(self.base_dir).build_shared_catalog(self.shared_path)
+        catalog = SharedCatalog(self.shared_path)
+        self.addCleanup(catalog.close)
+
+        faction = catalog.get_faction("Game One", "Faction Alpha")
+
+        self.assertEqual(catalog.list_games(), ["Game One"])
+        self.assertEqual(faction["version"], "FR-1")
+        self.assertEqual(len(faction["units"]), 2)
+        self.assertEqual(faction["units"][1], {"name": "Unité Bêta", "base_cost": 20})
+        self.assertEqual([u["name"] for u in faction["units"]], ["Unit Alpha", "Unité Bêta"])
+        self.assertEqual(catalog.get_unit("Game One", "Faction Alpha", 0)["name"], "Unit Alpha")
+        self.assertIsNone(catalog.get_unit("Game One", "Faction Alpha", 5))
+
+    def test_repository_serves_same_data_from_shared_catalog(self) -> None:
+        json_repository = JsonFactionRepository(self.base_dir)
+        json_repository.build_shared_catalog(self.shared_path)
+        shared_repository = JsonFactionRepository(self.base_dir, shared_catalog_path=self.shared_path)
+        shared_repository._load_catalog_from_json = lambda: self.fail("JSON relu malgré un catalogue partagé à jour")
+
+        expected = json_repository.get_faction("Game One", "Faction Alpha")
+        faction = shared_repository.get_faction("Game One", "Faction Alpha")
+
+        self.assertEqual({**faction, "units": list(faction["units"])}, expected)
+        self.assertEqual(shared_repository.get_unit("Game One", "Faction Alpha", 1)["base_cost"], 20)
+
+    def test_repository_ignores_stale_shared_catalog(self) -> None:
+        JsonFactionRepository(self.base_dir).build_shared_catalog(self.shared_path)
+
+        self.faction["units"] = []
+        self.faction_path.write_text(json.dumps(self.faction), encoding="utf-8")
+        stat = self.faction_path.stat()
+        os.utime(self.faction_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        repository = JsonFactionRepository(self.base_dir, shared_catalog_path=self.shared_path)
+
+        self.assertEqual(repository.get_faction("Game One", "Faction Alpha")["units"], [])
+
+    def test_decoded_units_are_read_only_and_not_retained(self) -> None:
+        JsonFactionRepository(self.base_dir).build_shared_catalog(self.shared_path)
+        catalog = SharedCatalog(self.shared_path)
+        self.addCleanup(catalog.close)
+        units = catalog.get_faction("Game One", "Faction Alpha")["units"]
+
+        self.assertEqual(units[1], units[-1])
+        self.assertIsNot(units[1], units[-1])
+        self.assertEqual(units[0], next(iter(units)))
+        self.assertFalse(hasattr(units, "_decoded"))
+        with self.assertRaises(TypeError):
+            units[0]["upgrade_groups"] = []
+        with self.assertRaises(IndexError):
+            units[2]
+        self.assertEqual(pickle.loads(pickle.dumps(units)), [dict(u) for u in units])
+
+    def test_replaced_catalog_is_closed_once_its_units_are_released(self) -> None:
+        JsonFactionRepository(self.base_dir).build_shared_catalog(self.shared_path)
+        repository = JsonFactionRepository(self.base_dir, shared_catalog_path=self.shared_path)
+        units = repository.load_catalog()[0]["Game One"]["Faction Alpha"]["units"]
+        old_catalog = repository._shared_catalog
+
+        JsonFactionRepository(self.base_dir).build_shared_catalog(self.shared_path)
+        stat = self.shared_path.stat()
+        os.utime(self.shared_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        repository.get_unit("Game One", "Faction Alpha", 0)
+
+        self.assertIsNot(repository._shared_catalog, old_catalog)
+        self.assertEqual(units[1]["name"], "Unité Bêta")  # encore lue par une session : pas encore fermée
+        self.assertFalse(old_catalog._mmap.closed)
+        del units
+        self.assertTrue(old_catalog._mmap.closed)
+
+    def test_sources_are_fingerprinted_once_per_shared_file(self) -> None:
+        JsonFactionRepository(self.base_dir).build_shared_catalog(self.shared_path)
+        repository = JsonFactionRepository(self.base_dir, shared_catalog_path=self.shared_path)
+        repository.get_unit("Game One", "Faction Alpha", 0)
+
+        with patch("repositories.faction_repository.source_fingerprint", side_effect=AssertionError("stat des sources")):
+            self.assertEqual(repository.get_unit("Game One", "Faction Alpha", 1)["base_cost"], 20)
+            self.assertEqual(len(repository.load_catalog()[0]["Game One"]["Faction Alpha"]["units"]), 2)
+
+        self.faction["units"] = []
+        self.faction_path.write_text(json.dumps(self.faction), encoding="utf-8")
+        JsonFactionRepository(self.base_dir).build_shared_catalog(self.shared_path)
+        stat = self.shared_path.stat()
+        os.utime(self.shared_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        self.assertIsNone(repository.get_unit("Game One", "Faction Alpha", 0))
+
+    def test_broken_files_are_recorded_in_the_shared_catalog(self) -> None:
+        (self.factions_dir / "b_broken.json").write_text("{", encoding="utf-8")
+        JsonFactionRepository(self.base_dir).build_shared_catalog(self.shared_path)
+        repository = JsonFactionRepository(self.base_dir, shared_catalog_path=self.shared_path)
+
+        self.assertEqual(list(repository.load_catalog()[0]["Game One"]), ["Faction Alpha"])
+        self.assertEqual([name for name, _ in repository.broken_files], ["b_broken.json"])
+
+    def test_shared_catalog_rejects_foreign_file(self) -> None:
+        self.shared_path.write_bytes(b"not a catalog")
+
+        with self.assertRaises(ValueError):
+            SharedCatalog(self.shared_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from services.tournament_pack import load_pack_entries, parallel_map, render_pack_pdf, write_pack_html
+
+
+class _Repository:
+    def __init__(self, factions: dict[tuple[str, str], dict]) -> None:
+        self.factions = factions
+
+    def get_faction(self, game: str, faction: str) -> dict | None:
+        return self.factions.get((game, faction))
+
+
+def _faction(name: str, rule: str) -> dict:
+    return {
+        "faction": name,
+        "version": "FR-1",
+        "faction_special_rules": [{"name": rule, "description": f"{rule} : description"}],
+        "spells": {},
+        "units": [{
+            "name": "Guerriers",
+            "type": "unit",
+            "base_cost": 100,
+            "size": 10,
+            "quality": 4,
+            "defense": 5,
+            "weapon": [{"name": "Lance", "range": "Mêlée", "attacks": 1, "armor_piercing": 0, "special_rules": []}],
+            "special_rules": [],
+            "upgrade_groups": [],
+        }],
+    }
+
+
+class TournamentPackTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.repository = _Repository({
+            ("AoF", "Alpha"): _faction("Alpha", "Zèle"),
+            ("AoF", "Beta"): _faction("Beta", "Rage"),
+        })
+        self.paths = []
+        for i, faction in enumerate(["Alpha", "Beta", "Alpha", "Inconnue"]):
+            unit = {**_faction(faction, "")["units"][0], "cost": 100}
+            self.paths.append(self._write(f"joueur_{i}.json", {
+                "game": "AoF", "faction": faction, "faction_version": "FR-1", "points": 1000,
+                "list_name": f"Liste <{i}>", "army_list": [unit], "army_cost": 100,
+            }))
+        self.paths.append(self._write("casse.json", "pas du json"))
+
+    def _write(self, name: str, data) -> Path:
+        path = Path(self.tmp.name) / name
+        path.write_text(data if isinstance(data, str) else json.dumps(data), encoding="utf-8")
+        return path
+
+    def _entries(self):
+        return load_pack_entries(self.paths, self.repository, app_url="")
+
+    def test_load_rejects_unreadable_files_and_flags_unknown_factions(self) -> None:
+        entries, rejected = self._entries()
+
+        self.assertEqual([e.source for e in entries], ["joueur_0.json", "joueur_1.json", "joueur_2.json", "joueur_3.json"])
+        self.assertEqual([name for name, _ in rejected], ["casse.json"])
+        self.assertEqual(entries[3].issues[0][0], "error")
+        self.assertEqual(entries[0].model["faction_version"], "FR-1")
+
+    def test_html_pack_has_toc_and_one_legend_per_faction(self) -> None:
+        entries, _ = self._entries()
+        out = io.StringIO()
+        write_pack_html(entries, out, "Tournoi <test>")
+        html = out.getvalue()
+
+        self.assertIn("<title>Tournoi &lt;test&gt;</title>", html)
+        self.assertEqual(html.count('class="pack-list"'), 4)
+        self.assertIn('href="#liste-4"', html)
+        self.assertIn("Liste &lt;0&gt;", html)
+        self.assertEqual(html.count("Zèle : description"), 1)
+        self.assertEqual(html.count("Rage : description"), 1)
+        self.assertEqual(html.count('<section id="regles-'), 2)
+        self.assertNotIn("googleapis", html)
+
+    def test_pdf_pack_numbers_lists_and_legends(self) -> None:
+        entries, _ = self._entries()
+        pdf = render_pack_pdf(entries, "Tournoi")
+
+        # sommaire + 4 listes + 2 légendes
+        self.assertEqual(pdf.count(b"/Type /Page "), 7)
+        self.assertTrue(pdf.startswith(b"%PDF-1.4"))
+
+    def test_parallel_map_runs_small_batches_in_process(self) -> None:
+        self.assertEqual(parallel_map(str.upper, ["a", "b"], workers=4), ["A", "B"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+
+from services.pricing import price_entry
+from services.unit_draft import UnitDraft
+
+
+def _weapon(name: str, **extra) -> dict:
+    return {"name": name, "range": "Mêlée", "attacks": 1, "armor_piercing": 0, "special_rules": [], **extra}
+
+
+UNIT = {
+    "name": "Guerriers",
+    "type": "unit",
+    "size": 5,
+    "base_cost": 100,
+    "weapon": [_weapon("Lance", count=5)],
+    "upgrade_groups": [
+        {"group": "Armes", "type": "weapon", "options": [
+            {"name": "Épée", "cost": 10, "weapon": _weapon("Épée", count=5)},
+        ]},
+        {"group": "Spéciale", "type": "conditional_weapon", "options": [
+            {"name": "Lance sacrée", "cost": 15, "requires": ["Lance"], "weapon": _weapon("Lance sacrée")},
+        ]},
+        {"group": "Lourdes", "type": "variable_weapon_count", "options": [
+            {"name": "Fléau", "cost": 5, "replaces": ["Lance"], "weapon": _weapon("Fléau"),
+             "max_count": {"type": "count_in_weapons", "weapon_name": "Lance"}},
+        ]},
+        {"group": "Options", "type": "upgrades", "options": [
+            {"name": "Bannière", "cost": 20}, {"name": "Musicien", "cost": 10},
+        ]},
+        {"group": "Monture", "type": "mount", "options": [{"name": "Cheval", "cost": 30, "mount": {}}]},
+    ],
+}
+
+
+class UnitDraftTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.draft = UnitDraft(UNIT)
+
+    def _entry(self) -> dict:
+        return {"name": UNIT["name"], "size": UNIT["size"] * self.draft.multiplier, "weapon": list(self.draft.weapons),
+                "options": self.draft.selected_options, "mount": self.draft.mount}
+
+    def test_costs_match_price_entry(self) -> None:
+        self.assertEqual(self.draft.cost, 100)
+        self.draft.choose(1, 0)
+        self.draft.set_count(2, 0, 2)
+        self.draft.choose(3, frozenset({0}))
+        self.draft.choose(4, 0)
+        self.draft.combined = True
+
+        self.assertEqual(self.draft.cost, 100 * 2 + 15 + 2 * 5 + 20 + 30)
+        self.assertEqual(self.draft.cost, price_entry(self._entry(), UNIT))
+        self.assertEqual(self.draft.selected_options, {"Options": [UNIT["upgrade_groups"][3]["options"][0]]})
+
+    def test_requires_follow_weapon_choice(self) -> None:
+        self.assertEqual(self.draft.graph.requires[0], {1})
+        self.draft.choose(1, 0)
+        self.assertTrue(self.draft.is_available(1, 0))
+
+        self.draft.choose(0, 0)  # la Lance est remplacée : l'option conditionnelle n'est plus proposée
+        self.assertFalse(self.draft.is_available(1, 0))
+        self.assertEqual(self.draft.cost, 110)
+
+    def test_unavailable_choice_does_not_unlock_later_options(self) -> None:
+        unit = {**UNIT, "upgrade_groups": [
+            UNIT["upgrade_groups"][0],
+            {"type": "conditional_weapon", "options": [{"name": "Hache", "cost": 5, "requires": ["Épée"], "weapon": _weapon("Hache")}]},
+            {"type": "conditional_weapon", "options": [{"name": "Fouet", "cost": 5, "requires": ["Hache"], "weapon": _weapon("Fouet")}]},
+        ]}
+        draft = UnitDraft(unit)
+        draft.choose(0, 0)
+        draft.choose(1, 0)
+        draft.choose(2, 0)
+        self.assertEqual(draft.cost, 120)
+
+        draft.choose(0, None)  # plus d'Épée : la Hache tombe, et le Fouet avec elle
+        self.assertFalse(draft.is_available(2, 0))
+        self.assertEqual(draft.cost, 100)
+
+    def test_count_in_weapons_tracks_remaining_copies(self) -> None:
+        self.assertEqual(self.draft.max_count(2, 0), 5)
+        self.draft.set_count(2, 0, 7)
+
+        self.assertEqual(self.draft.stage(2).counts, (5,))
+        names = {w["name"]: w.get("_count", w.get("count")) for w in self.draft.weapons}
+        self.assertEqual(names, {"Fléau": 5})
+
+        self.draft.set_count(2, 0, 2)
+        names = {w["name"]: w.get("_count", w.get("count")) for w in self.draft.weapons}
+        self.assertEqual(names, {"Lance": 3, "Fléau": 2})
+
+    def test_only_affected_stages_are_recomputed(self) -> None:
+        self.draft.cost
+        self.assertEqual(self.draft.recomputed, 5)
+
+        self.draft.choose(3, frozenset({1}))  # options : n'affecte ni les armes ni les requires
+        self.draft.cost
+        self.assertEqual(self.draft.recomputed, 6)
+
+        self.draft.choose(0, 0)  # arme remplacée : groupes suivants dont les armes d'entrée changent
+        self.draft.cost
+        self.assertEqual(self.draft.recomputed, 9)  # groupes 0, 1 (requires) et 2 (armes en entrée)
+
+    def test_catalog_weapons_are_not_mutated(self) -> None:
+        self.draft.set_count(2, 0, 2)
+        self.draft.weapons
+        self.assertEqual(UNIT["weapon"], [_weapon("Lance", count=5)])
+
+    def test_replacements_share_catalog_profiles(self) -> None:
+        self.draft.set_count(2, 0, 2)
+        lance, fleau = self.draft.weapon_slots
+
+        self.assertIs(lance.profile, UNIT["weapon"][0])
+        self.assertEqual(lance.overlay, (("count", 3),))
+        self.assertIs(fleau.profile, UNIT["upgrade_groups"][2]["options"][0]["weapon"])
+        self.assertEqual(self.draft.weapons[0], _weapon("Lance", count=3))
+        self.assertIs(self.draft.weapons, self.draft.weapons)
+
+    def test_selections_round_trip_in_compact_form(self) -> None:
+        self.draft.choose(0, 0)
+        self.draft.set_count(2, 0, 2)
+        self.draft.choose(3, frozenset({1, 0}))
+        selections = self.draft.selections()
+        self.assertEqual(selections, {"group_0": 0, "group_2": [2], "group_3": [0, 1]})
+
+        restored = UnitDraft(UNIT)
+        restored.load({**selections, "group_4": "Cheval (+30 pts)"})  # ancien format (libellé) : ignoré
+        self.assertEqual(restored.selections(), selections)
+        self.assertEqual(restored.cost, self.draft.cost)
+
+
+if __name__ == "__main__":
+    unittest.main()
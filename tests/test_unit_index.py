@@ -0,0 +1,101 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from repositories.faction_repository import JsonFactionRepository
+from repositories.unit_index import UnitIndex
+
+
+def _weapon(name: str, attacks: int, ap: int = 0, range_: object = "Mêlée", rules: list[str] | None = None) -> dict:
+    return {"name": name, "range": range_, "attacks": attacks, "armor_piercing": ap, "special_rules": rules or []}
+
+
+BOSS = {
+    "name": "Boss", "base_cost": 60, "quality": 3, "defense": 3, "coriace": 3,
+    "special_rules": ["Héros", "Effrayant (1)"],
+    "weapon": [_weapon("Hache", 3, 1)],
+    "upgrade_groups": [
+        {"options": [{"name": "Sorcier", "cost": 30, "special_rules": ["Lanceur de sorts (2)"]}]},
+        {"options": [{"name": "Wyverne", "cost": 90, "mount": {
+            "name": "Wyverne", "coriace_bonus": 6, "special_rules": ["Volant"],
+            "weapon": [_weapon("Queue", 2, 2, rules=["Explosion (3)"])]}}]},
+    ],
+}
+ARCHERS = {
+    "name": "Archers", "base_cost": 90, "quality": 4, "defense": 5,
+    "special_rules": ["Éclaireur"],
+    "weapon": {"name": "Arc", "range": '24"', "attacks": 1, "armor_piercing": 0, "special_rules": []},
+    "upgrade_groups": [{"options": [{"name": "Flèches lourdes", "cost": 10,
+                                     "weapon": _weapon("Arc lourd", 1, 2, 24, ["Explosion (1)"])}]}],
+}
+CANNON = {
+    "name": "Canon", "base_cost": 120, "quality": 4, "defense": 2, "coriace": 6,
+    "special_rules": ["Effrayant (2)"],
+    "weapon": [_weapon("Boulet", 1, 2, 36, ["Explosion (3)", "Indirect"]), _weapon("Équipage", 2)],
+}
+FACTIONS = {
+    "Age of Fantasy": {"Orques": {"units": [BOSS, ARCHERS]}, "Nains": {"units": [CANNON]}},
+    "Grimdark Future": {"Orques": {"units": [dict(ARCHERS, name="Tireurs")]}},
+}
+
+
+def _names(matches) -> list[str]:
+    return [match.name for match in matches]
+
+
+class UnitIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = UnitIndex(FACTIONS)
+
+    def test_rule_parameter_is_a_minimum(self) -> None:
+        self.assertEqual(_names(self.index.query(rules=["Effrayant"])), ["Canon", "Boss"])
+        self.assertEqual(_names(self.index.query(rules=["effrayant (2)"])), ["Canon"])
+        self.assertEqual(_names(self.index.query(rules=["eclaireur"], game="Age of Fantasy")), ["Archers"])
+
+    def test_option_rules_are_reported_with_the_option(self) -> None:
+        (boss,) = self.index.query(rules=["Lanceur de sorts (2)"])
+
+        self.assertEqual((boss.faction, boss.index, boss.via), ("Orques", 0, ("Sorcier",)))
+        self.assertEqual(self.index.query(rules=["Lanceur de sorts"], with_options=False), [])
+
+    def test_weapon_criteria_apply_to_a_single_weapon(self) -> None:
+        matches = self.index.query(weapon_rules=["Explosion (3)"], weapon_stats={"armor_piercing": (2, None)})
+
+        self.assertEqual([(m.name, m.via) for m in matches], [("Canon", ()), ("Boss", ("Wyverne",))])
+        # « Équipage » a 2 attaques mais pas Indirect : aucune arme ne satisfait les deux
+        self.assertEqual(self.index.query(weapon_rules=["Indirect"], weapon_stats={"attacks": (2, None)}), [])
+
+    def test_stat_ranges_cover_base_profile_and_mount_bonus(self) -> None:
+        self.assertEqual(_names(self.index.query(stats={"coriace": (6, None)})), ["Canon", "Boss"])
+        self.assertEqual(_names(self.index.query(stats={"coriace": (6, None)}, with_options=False)), ["Canon"])
+        self.assertEqual(_names(self.index.query(stats={"cost": (None, 90)}, weapon_stats={"range": (24, None)})),
+                         ["Archers", "Tireurs"])
+
+    def test_scope_and_vocabulary(self) -> None:
+        self.assertEqual(len(self.index.query()), 4)
+        self.assertEqual(_names(self.index.query(faction="Orques")), ["Boss", "Archers", "Tireurs"])
+        self.assertIn("Volant", self.index.rule_names("Age of Fantasy", "Orques"))
+        self.assertNotIn("Indirect", self.index.weapon_rule_names("Age of Fantasy", "Orques"))
+        self.assertEqual(self.index.weapon_rule_names("Age of Fantasy", "Nains"), ["Explosion", "Indirect"])
+
+
+class RepositoryUnitIndexTests(unittest.TestCase):
+    def test_index_is_rebuilt_when_sources_change(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            base_dir = Path(temp_dir)
+            factions_dir = base_dir / "repositories" / "data" / "factions"
+            factions_dir.mkdir(parents=True)
+            path = factions_dir / "nains.json"
+            path.write_text(json.dumps({"game": "Age of Fantasy", "faction": "Nains", "units": [CANNON]}), encoding="utf-8")
+            repository = JsonFactionRepository(base_dir)
+
+            index = repository.unit_index()
+            self.assertIs(repository.unit_index(), index)
+
+            path.write_text(json.dumps({"game": "Age of Fantasy", "faction": "Nains", "units": [CANNON, BOSS]}), encoding="utf-8")
+            self.assertEqual(_names(repository.unit_index().query(rules=["Héros"])), ["Boss"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from services.upgrade_graph import compile_upgrade_graph
+
+
+def _weapon(name: str) -> dict:
+    return {"name": name, "range": "Mêlée", "attacks": 1, "armor_piercing": 0}
+
+
+def _unit(*groups: dict) -> dict:
+    return {"name": "Guerriers", "size": 5, "weapon": [_weapon("Lance")], "upgrade_groups": list(groups)}
+
+
+class UpgradeGraphTests(unittest.TestCase):
+    def test_requires_edges_and_topological_order(self) -> None:
+        graph = compile_upgrade_graph(_unit(
+            {"type": "conditional_weapon", "options": [{"name": "Lance sacrée", "requires": ["Épée"], "weapon": _weapon("Lance sacrée")}]},
+            {"type": "upgrades", "options": [{"name": "Bannière"}]},
+            {"type": "weapon", "options": [{"name": "Épée", "weapon": _weapon("Épée")}]},
+        ))
+
+        self.assertEqual(graph.requires[2], {0})
+        self.assertEqual(graph.providers[0], {2})
+        self.assertLess(graph.order.index(2), graph.order.index(0))
+        self.assertEqual(graph.cycles, ())
+
+    def test_count_in_weapons_depends_on_earlier_weapon_changes(self) -> None:
+        counted = {"type": "variable_weapon_count", "options": [{
+            "name": "Fléau", "replaces": ["Lance"], "weapon": _weapon("Fléau"),
+            "max_count": {"type": "count_in_weapons", "weapon_name": "Lance"},
+        }]}
+        graph = compile_upgrade_graph(_unit(
+            {"type": "weapon", "options": [{"name": "Épée", "weapon": _weapon("Épée")}]},
+            {"type": "role", "options": [{"name": "Chef", "weapon": _weapon("Arc")}]},
+            counted,
+        ))
+
+        self.assertEqual(graph.weapons[0], {2})
+        self.assertEqual(graph.weapons[1], frozenset())
+        self.assertEqual(graph.downstream(0), {2})
+        self.assertEqual(graph.requires_downstream(0), frozenset())
+
+    def test_cycles_are_detected_and_still_ordered(self) -> None:
+        graph = compile_upgrade_graph(_unit(
+            {"type": "conditional_weapon", "options": [{"name": "Hache", "requires": ["Masse"], "weapon": _weapon("Hache")}]},
+            {"type": "conditional_weapon", "options": [{"name": "Masse", "requires": ["Fouet"], "weapon": _weapon("Masse")}]},
+            {"type": "conditional_weapon", "options": [{"name": "Fouet", "requires": ["Hache"], "weapon": _weapon("Fouet")}]},
+            {"type": "mount", "options": [{"name": "Cheval"}]},
+        ))
+
+        self.assertEqual(graph.cycles, ((0, 1, 2),))
+        self.assertEqual(sorted(graph.order), [0, 1, 2, 3])
+        self.assertEqual(graph.requires_downstream(0), {1, 2})
+
+
+if __name__ == "__main__":
+    unittest.main()